@@ -0,0 +1,42 @@
+"""
+失败签名补算脚本
+
+为启用失败签名之前写入的failed和error结果计算指纹，设置signature_id并累加签名的次数和出现时间。
+可以重复执行，已有签名的结果不会重复计入。
+
+用法:
+    python scripts/backfill_failure_signatures.py --project-id 1
+    python scripts/backfill_failure_signatures.py --project-id 1 --batch-size 500
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加src目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from core.database.session import SessionLocal
+from api.services.failure_signature import BACKFILL_BATCH_SIZE, FailureSignatureService
+
+
+def main() -> int:
+    """运行补算"""
+    parser = argparse.ArgumentParser(description="补算历史失败结果的失败签名")
+    parser.add_argument(
+        "--project-id", type=int, action="append", dest="project_ids", required=True, help="项目ID，可重复"
+    )
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="每批处理的结果数")
+    args = parser.parse_args()
+
+    for project_id in args.project_ids:
+        db = SessionLocal()
+        try:
+            stats = FailureSignatureService.backfill(db, project_id, batch_size=args.batch_size)
+        finally:
+            db.close()
+        print(f"项目 {project_id}: 处理 {stats['results']} 条失败结果，涉及 {stats['signatures']} 个签名")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+验证码服务压测脚本
+
+统计验证码生成和验证的QPS与延迟分位数(p50/p99)
+
+用法:
+    python scripts/captcha_benchmark.py --requests 2000 --concurrency 16
+    python scripts/captcha_benchmark.py --mode async --renderer simple
+    python scripts/captcha_benchmark.py --store memory  # 不依赖Redis，只测渲染开销
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# 添加src目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from core.auth.captcha import RENDERERS, CaptchaManager, CaptchaStore
+
+
+class MemoryCaptchaStore(CaptchaStore):
+    """进程内验证码存储，仅用于压测时排除Redis的影响"""
+
+    def __init__(self):
+        self._data: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def save(self, captcha_id: str, text: str, expire_seconds: int) -> bool:
+        with self._lock:
+            self._data[captcha_id] = text
+        return True
+
+    def pop(self, captcha_id: str) -> Optional[str]:
+        with self._lock:
+            return self._data.pop(captcha_id, None)
+
+    def clear_expired(self, batch_size: int = 500) -> int:
+        return 0
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """计算分位数
+
+    Args:
+        samples: 已排序的样本
+        pct: 分位(0-100)
+
+    Returns:
+        float: 分位数值
+    """
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def report(name: str, latencies: List[float], elapsed: float) -> None:
+    """打印压测结果"""
+    latencies.sort()
+    print(
+        f"{name:<10} 请求数: {len(latencies):>6}  "
+        f"QPS: {len(latencies) / elapsed:>9.1f}  "
+        f"p50: {percentile(latencies, 50) * 1000:>7.2f}ms  "
+        f"p99: {percentile(latencies, 99) * 1000:>7.2f}ms  "
+        f"max: {latencies[-1] * 1000:>7.2f}ms"
+    )
+
+
+def run_sync(manager: CaptchaManager, requests: int, concurrency: int) -> None:
+    """使用线程池压测同步接口"""
+
+    def timed(func: Callable, *args) -> tuple:
+        start = time.perf_counter()
+        result = func(*args)
+        return time.perf_counter() - start, result
+
+    answers = {}
+    original_generate_text = manager._generate_text
+
+    def generate_text() -> str:
+        # 记录生成的文本，用于后续验证
+        text = original_generate_text()
+        answers[threading.get_ident()] = text
+        return text
+
+    manager._generate_text = generate_text
+
+    def generate_one(_) -> tuple:
+        latency, result = timed(manager.generate_captcha_sync)
+        return latency, result["captcha_id"], answers[threading.get_ident()]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        generated = list(executor.map(generate_one, range(requests)))
+        report("generate", [item[0] for item in generated], time.perf_counter() - start)
+
+        start = time.perf_counter()
+        verified = list(executor.map(
+            lambda item: timed(manager.verify_captcha_sync, item[1], item[2]),
+            generated
+        ))
+        report("verify", [item[0] for item in verified], time.perf_counter() - start)
+
+    failures = sum(1 for _, ok in verified if not ok)
+    if failures:
+        print(f"警告: {failures} 个验证码验证失败")
+
+
+async def run_async(manager: CaptchaManager, requests: int, concurrency: int) -> None:
+    """使用协程压测异步接口"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(coro_func: Callable, *args) -> tuple:
+        async with semaphore:
+            start = time.perf_counter()
+            result = await coro_func(*args)
+            return time.perf_counter() - start, result
+
+    start = time.perf_counter()
+    generated = await asyncio.gather(*[timed(manager.generate_captcha) for _ in range(requests)])
+    report("generate", [item[0] for item in generated], time.perf_counter() - start)
+
+    # 异步模式下无法得知验证码文本，这里验证的是失败路径(取出并删除)的开销
+    start = time.perf_counter()
+    verified = await asyncio.gather(*[
+        timed(manager.verify_captcha, result["captcha_id"], "XXXX")
+        for _, result in generated
+    ])
+    report("verify", [item[0] for item in verified], time.perf_counter() - start)
+
+
+def main() -> int:
+    """运行压测"""
+    parser = argparse.ArgumentParser(description="验证码服务压测")
+    parser.add_argument("--requests", type=int, default=1000, help="每个阶段的请求数")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发数")
+    parser.add_argument("--renderer", choices=sorted(RENDERERS), default="distorted", help="渲染器")
+    parser.add_argument("--store", choices=["redis", "memory"], default="redis", help="存储后端")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync", help="压测同步或异步接口")
+    args = parser.parse_args()
+
+    store = MemoryCaptchaStore() if args.store == "memory" else CaptchaStore()
+    manager = CaptchaManager(store=store, renderer=RENDERERS[args.renderer]())
+
+    print(
+        f"模式: {args.mode}, 渲染器: {args.renderer}, 存储: {args.store}, "
+        f"请求数: {args.requests}, 并发数: {args.concurrency}"
+    )
+    if args.mode == "async":
+        asyncio.run(run_async(manager, args.requests, args.concurrency))
+    else:
+        run_sync(manager, args.requests, args.concurrency)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
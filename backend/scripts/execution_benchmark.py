@@ -0,0 +1,59 @@
+"""
+测试执行进程池压测脚本
+
+用固定耗时的任务(time.sleep)模拟测试用例，比较不同工作进程数下执行全部用例的总耗时，
+检查加速比是否随工作进程数近似线性增长。
+
+用法:
+    python scripts/execution_benchmark.py --cases 1000 --duration 0.05
+    python scripts/execution_benchmark.py --workers 1 2 4 8 16
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加src目录到Python路径，并通过PYTHONPATH传给forkserver，使其能预先导入进程池模块
+SRC_DIR = str(Path(__file__).parent.parent / "src")
+sys.path.append(SRC_DIR)
+os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")]))
+
+from core.utils.process_pool import KillablePool
+
+
+def run(cases: int, duration: float, workers: int) -> float:
+    """执行一轮压测
+
+    Returns:
+        float: 总耗时(秒)，包括启动工作进程的时间
+    """
+    pool = KillablePool(time.sleep, workers=workers, timeout=max(duration * 10, 1))
+    started = time.perf_counter()
+    failed = sum(1 for outcome in pool.imap_unordered((i, duration) for i in range(cases)) if not outcome.ok)
+    elapsed = time.perf_counter() - started
+    if failed:
+        print(f"警告: {failed}个任务执行失败")
+    return elapsed
+
+
+def main() -> int:
+    """运行压测"""
+    parser = argparse.ArgumentParser(description="测试执行进程池压测")
+    parser.add_argument("--cases", type=int, default=1000, help="用例数")
+    parser.add_argument("--duration", type=float, default=0.05, help="单个用例耗时(秒)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="工作进程数")
+    args = parser.parse_args()
+
+    print(f"{'工作进程':<10}{'耗时':>10}{'加速比':>10}{'效率':>10}")
+    baseline = None
+    for workers in args.workers:
+        elapsed = run(args.cases, args.duration, workers)
+        baseline = baseline or elapsed * workers
+        speedup = baseline / elapsed
+        print(f"{workers:<10}{elapsed:>9.2f}s{speedup:>10.2f}{speedup / workers:>10.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+测试用例不稳定度重建脚本
+
+按时间顺序回放项目的历史测试结果，重新生成test_case_flakiness。
+用于首次启用不稳定度统计，或调整窗口大小、阈值之后。
+
+用法:
+    python scripts/rebuild_flakiness.py --project-id 1
+    python scripts/rebuild_flakiness.py --project-id 1 --project-id 2
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加src目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from core.database.session import SessionLocal
+from api.services.flakiness import FlakinessService
+
+
+def main() -> int:
+    """运行重建"""
+    parser = argparse.ArgumentParser(description="重建测试用例不稳定度")
+    parser.add_argument(
+        "--project-id", type=int, action="append", dest="project_ids", required=True, help="项目ID，可重复"
+    )
+    args = parser.parse_args()
+
+    for project_id in args.project_ids:
+        db = SessionLocal()
+        try:
+            stats = FlakinessService.rebuild(db, project_id)
+        finally:
+            db.close()
+        print(
+            f"项目 {project_id}: 回放 {stats['results']} 条结果，"
+            f"{stats['cases']} 个用例，隔离 {stats['quarantined']} 个"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+测试运行计数核对脚本
+
+按test_results重新统计test_runs的各项计数，修复因异常中断等原因产生的偏差。
+可由定时任务周期执行。
+
+用法:
+    python scripts/reconcile_run_counters.py
+    python scripts/reconcile_run_counters.py --run-id 12 --run-id 13
+    python scripts/reconcile_run_counters.py --interval 600  # 每10分钟核对一次
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加src目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from core.database.session import SessionLocal
+from api.services.test import TestService, RECONCILE_BATCH_SIZE
+
+
+def reconcile_once(run_ids, batch_size: int) -> int:
+    """执行一次核对
+
+    Returns:
+        int: 修复的测试运行数
+    """
+    db = SessionLocal()
+    try:
+        repaired = TestService.reconcile_run_counters(db, run_ids, batch_size)
+    finally:
+        db.close()
+    for item in repaired:
+        print(f"测试运行 {item['test_run_id']}: {item['stored']} -> {item['actual']}")
+    print(f"核对完成，修复 {len(repaired)} 个测试运行")
+    return len(repaired)
+
+
+def main() -> int:
+    """运行核对"""
+    parser = argparse.ArgumentParser(description="核对并修复测试运行计数")
+    parser.add_argument("--run-id", type=int, action="append", dest="run_ids", help="只核对指定的测试运行，可重复")
+    parser.add_argument("--batch-size", type=int, default=RECONCILE_BATCH_SIZE, help="每批核对的测试运行数")
+    parser.add_argument("--interval", type=int, default=0, help="循环执行的间隔(秒)，0表示只执行一次")
+    args = parser.parse_args()
+
+    while True:
+        reconcile_once(args.run_ids, args.batch_size)
+        if args.interval <= 0:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+测试执行机
+
+从指定测试环境的队列中按优先级领取测试运行并执行，可在多台机器上同时启动，
+同一环境的执行机共同消费一个队列。收到SIGTERM/SIGINT后执行完当前运行再退出。
+
+用法:
+    python scripts/run_executor.py --environment staging
+    python scripts/run_executor.py --environment staging --workers 8
+    python scripts/run_executor.py --environment staging --stats  # 只查看队列积压
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+from pathlib import Path
+
+# 添加src目录到Python路径，并通过PYTHONPATH传给执行引擎的forkserver
+SRC_DIR = str(Path(__file__).parent.parent / "src")
+sys.path.append(SRC_DIR)
+os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")]))
+
+from api.services.execution import TestExecutionEngine
+from api.services.run_queue import RunQueueWorker, queue_stats
+
+
+def main() -> int:
+    """启动执行机"""
+    parser = argparse.ArgumentParser(description="测试执行机")
+    parser.add_argument("--environment", default=None, help="负责的测试环境，默认为default")
+    parser.add_argument("--workers", type=int, default=None, help="执行引擎的工作进程数，默认取测试配置")
+    parser.add_argument("--stats", action="store_true", help="输出队列积压指标后退出")
+    args = parser.parse_args()
+
+    if args.stats:
+        print(json.dumps(queue_stats(args.environment), ensure_ascii=False, indent=2))
+        return 0
+
+    worker = RunQueueWorker(args.environment, engine_factory=lambda: TestExecutionEngine(workers=args.workers))
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: worker.stop())
+    worker.run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+测试用例搜索压测脚本
+
+在独立项目下生成指定规模的测试用例语料(默认100万条)，对比ILIKE全表扫描与
+FULLTEXT全文检索的延迟分位数(p50/p99)，并检查两者返回的首页结果数。
+
+用法:
+    python scripts/search_benchmark.py --cases 1000000
+    python scripts/search_benchmark.py --project-id 42 --skip-generate  # 复用已生成的语料
+    python scripts/search_benchmark.py --cases 100000 --repeat 50 --cleanup
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+# 添加src目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from core.database.session import SessionLocal
+from core.database.fulltext import fulltext_match
+from api.models.project import Project
+from api.models.test_case import TestCase
+from api.config.constants import TestPriority, TestType
+
+# 语料词表，中英文混合
+MODULES = ["用户登录", "订单支付", "购物车", "商品搜索", "权限管理", "报表导出", "消息推送", "文件上传",
+           "login", "checkout", "inventory", "gateway", "scheduler", "webhook", "billing", "profile"]
+ACTIONS = ["正常流程", "参数校验", "边界值", "并发提交", "超时重试", "异常回滚", "权限不足", "数据为空",
+           "happy path", "invalid token", "rate limit", "timeout", "retry", "rollback", "pagination"]
+DETAILS = ["验证返回码", "检查数据库记录", "确认缓存失效", "校验日志输出", "断言页面跳转",
+           "verify response", "check audit log", "assert redirect", "compare snapshot", "validate schema"]
+
+# 压测使用的检索词
+QUERIES = ["登录", "订单支付", "超时", "checkout", "time", "invalid token", "权限 rollback", "webhook 重试"]
+
+INSERT_BATCH_SIZE = 5000
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """计算分位数
+
+    Args:
+        samples: 已排序的样本
+        pct: 分位(0-100)
+
+    Returns:
+        float: 分位数值
+    """
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def generate_corpus(db: Session, cases: int, seed: int) -> int:
+    """在新项目下批量生成测试用例
+
+    Returns:
+        int: 项目ID
+    """
+    rng = random.Random(seed)
+    project = Project(name=f"search-benchmark-{seed}", description="搜索压测语料")
+    db.add(project)
+    db.commit()
+
+    types = list(TestType)
+    priorities = list(TestPriority)
+    start_time = datetime.utcnow() - timedelta(days=365)
+    started = time.perf_counter()
+    for offset in range(0, cases, INSERT_BATCH_SIZE):
+        rows = []
+        for i in range(offset, min(offset + INSERT_BATCH_SIZE, cases)):
+            module, action = rng.choice(MODULES), rng.choice(ACTIONS)
+            rows.append({
+                "project_id": project.id,
+                "name": f"{module}-{action}-{i:07d}",
+                "description": "，".join(rng.sample(DETAILS, 3)) + f"。覆盖{module}模块的{action}场景",
+                "type": rng.choice(types),
+                "priority": rng.choice(priorities),
+                "created_at": start_time + timedelta(seconds=i * 30),
+                "updated_at": start_time + timedelta(seconds=i * 30),
+                "steps": [],
+                "test_data": {},
+            })
+        db.execute(insert(TestCase), rows)
+        db.commit()
+        print(f"\r已生成 {offset + len(rows)}/{cases}", end="", flush=True)
+    print(f"\n语料生成完成，项目ID: {project.id}，耗时 {time.perf_counter() - started:.1f}s")
+    return project.id
+
+
+def ilike_search(db: Session, project_id: int, search: str, limit: int) -> int:
+    """原实现: 对名称和描述做前后通配的ILIKE"""
+    statement = select(TestCase.id).where(
+        TestCase.project_id == project_id,
+        or_(TestCase.name.ilike(f"%{search}%"), TestCase.description.ilike(f"%{search}%"))
+    ).limit(limit)
+    return len(db.execute(statement).all())
+
+
+def fulltext_search(db: Session, project_id: int, search: str, limit: int) -> int:
+    """全文检索: 按相关度排序取首页"""
+    condition, score = fulltext_match(
+        db.get_bind().dialect.name, [TestCase.name, TestCase.description], search, boost_column=TestCase.name
+    )
+    statement = (
+        select(TestCase.id)
+        .where(TestCase.project_id == project_id, condition)
+        .order_by(score.desc(), TestCase.id.desc())
+        .limit(limit)
+    )
+    return len(db.execute(statement).all())
+
+
+def run(db: Session, project_id: int, repeat: int, limit: int) -> None:
+    """逐个检索词压测两种实现"""
+    print(f"{'检索词':<16}{'实现':<10}{'首页条数':>8}{'p50':>12}{'p99':>12}")
+    for search in QUERIES:
+        for name, func in (("ilike", ilike_search), ("fulltext", fulltext_search)):
+            latencies = []
+            rows = 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rows = func(db, project_id, search, limit)
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            print(
+                f"{search:<16}{name:<10}{rows:>8}"
+                f"{percentile(latencies, 50) * 1000:>10.2f}ms"
+                f"{percentile(latencies, 99) * 1000:>10.2f}ms"
+            )
+
+
+def main() -> int:
+    """运行压测"""
+    parser = argparse.ArgumentParser(description="测试用例搜索压测")
+    parser.add_argument("--cases", type=int, default=1_000_000, help="生成的测试用例数")
+    parser.add_argument("--project-id", type=int, help="复用已有语料的项目ID")
+    parser.add_argument("--skip-generate", action="store_true", help="不生成语料，需配合--project-id")
+    parser.add_argument("--repeat", type=int, default=20, help="每个检索词的执行次数")
+    parser.add_argument("--limit", type=int, default=20, help="每次检索取的条数")
+    parser.add_argument("--seed", type=int, default=20240101, help="语料随机种子")
+    parser.add_argument("--cleanup", action="store_true", help="压测结束后删除生成的语料")
+    args = parser.parse_args()
+
+    if args.skip_generate and not args.project_id:
+        parser.error("--skip-generate需要同时指定--project-id")
+
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name != "mysql":
+            print("警告: 当前数据库不是MySQL，全文检索会退化为LIKE")
+        project_id = args.project_id if args.skip_generate else generate_corpus(db, args.cases, args.seed)
+        run(db, project_id, args.repeat, args.limit)
+        if args.cleanup and not args.skip_generate:
+            db.execute(delete(TestCase).where(TestCase.project_id == project_id))
+            db.execute(delete(Project).where(Project.id == project_id))
+            db.commit()
+            print("已删除压测语料")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@
 
 管理所有AI相关的配置项，包括LLM、向量数据库、提示词等
 """
-from core.config.base_settings import BaseAppSettings
+from core.config.base import BaseAppSettings
 from pydantic import Field
 from typing import List, Optional, Dict
 
@@ -4,7 +4,7 @@
 管理应用程序的所有配置项
 """
 from typing import Optional
-from core.config.base_settings import BaseAppSettings
+from core.config.base import BaseAppSettings
 from pydantic import Field
 
 class Settings(BaseAppSettings):
@@ -6,7 +6,7 @@
 from typing import Dict, List
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from core.config.base_settings import BaseAppSettings
+from core.config.base import BaseAppSettings
 
 # 获取项目根目录
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent
@@ -139,6 +139,32 @@ class TestSettings(BaseAppSettings):
     TEST_TIMEOUT: int = Field(default=300, description="测试超时时间(秒)")
     TEST_RETRIES: int = Field(default=2, description="测试重试次数")
     
+    # 变更影响分析配置
+    TEST_IMPACT_ANALYSIS: bool = Field(default=True, description="执行时记录用例覆盖的源码文件")
+    TEST_IMPACT_ROOT: str = Field(default=".", description="覆盖记录的源码根目录，应为git仓库根目录")
+    
+    # 测试结果存储配置
+    TEST_RESULT_BLOB_DIR: str = Field(default="uploads/result_blobs", description="测试结果大字段的压缩存储目录")
+    TEST_RESULT_BLOB_THRESHOLD: int = Field(default=16 * 1024, description="输出、堆栈和测试数据超过该字节数时转存")
+    TEST_RESULT_PREVIEW_CHARS: int = Field(default=2000, description="转存后行内保留的输出和堆栈末尾字符数")
+    
+    # 测试产物存储配置，是否保存及保留天数见TestExecutionConfig.save_artifacts和artifacts_expire_days
+    TEST_ARTIFACT_DIR: str = Field(default="uploads/artifacts", description="测试产物存储目录")
+    TEST_ARTIFACT_MAX_SIZE: int = Field(default=1024 * 1024 * 1024, description="单个测试产物最大字节数")
+    TEST_ARTIFACT_UPLOAD_EXPIRE: int = Field(default=24 * 3600, description="未完成的上传保留时间(秒)")
+    TEST_ARTIFACT_SWEEP_INTERVAL: int = Field(default=3600, description="过期产物清理间隔(秒)")
+    TEST_ARTIFACT_SWEEP_BATCH: int = Field(default=500, description="过期产物清理每批删除的产物数")
+    
+    # 测试运行实时进度配置
+    TEST_PROGRESS_MAX_RATE: float = Field(default=2.0, description="每个观察者每秒最多推送的进度次数")
+    TEST_PROGRESS_HEARTBEAT: int = Field(default=15, description="没有进度时SSE心跳间隔(秒)")
+    TEST_PROGRESS_STATE_TTL: int = Field(default=24 * 3600, description="进度状态在最后一次更新后的保留时间(秒)")
+    
+    # 测试运行摘要配置
+    TEST_RUN_SUMMARY_CACHE_EXPIRE: int = Field(default=7 * 24 * 3600, description="已完成运行的摘要缓存时间(秒)")
+    TEST_RUN_SUMMARY_SLOWEST: int = Field(default=10, description="摘要中列出的最慢用例数")
+    TEST_RUN_SUMMARY_CLUSTERS: int = Field(default=10, description="摘要中列出的失败分组数")
+    
     # 测试数据配置
     TEST_DATA_PATH: str = Field(default="tests/data", description="测试数据目录")
     TEST_TEMP_PATH: str = Field(default="tests/temp", description="测试临时文件目录")
@@ -148,6 +174,7 @@ class TestSettings(BaseAppSettings):
     TEST_REPORT_PATH: str = Field(default="tests/reports", description="测试报告目录")
     TEST_REPORT_FORMAT: str = Field(default="html", description="测试报告格式")
     TEST_REPORT_TITLE: str = Field(default="AutoTest Report", description="测试报告标题")
+    TEST_REPORT_TREND_MAX_POINTS: int = Field(default=90, description="项目统计趋势最多返回的点数")
     
     # UI测试配置
     TEST_BROWSER: str = Field(default="chrome", description="测试浏览器")
@@ -1,7 +1,7 @@
 """
 系统核心配置模块
 """
-from core.config.base_settings import BaseAppSettings
+from core.config.base import BaseAppSettings
 from pydantic import Field
 from typing import List, Optional
 
@@ -5,11 +5,11 @@
 """
 from ....core.cache.cache_manager import CacheManager
 from ....core.cache.memory import MemoryCache, memory_cache
-from ....core.cache.captcha import CaptchaCache
+from ....core.auth.captcha import CaptchaStore
 
 __all__ = [
     'CacheManager',
     'MemoryCache',
     'memory_cache',
-    'CaptchaCache',
+    'CaptchaStore',
 ] 
\ No newline at end of file
@@ -0,0 +1,15 @@
+"""
+数据库模块
+
+重导出核心数据库功能，API模型与核心模型共用同一个声明式基类和会话
+"""
+from core.database import Base, get_db, engine, metadata
+from core.database.session import SessionLocal
+
+__all__ = [
+    'Base',
+    'get_db',
+    'engine',
+    'metadata',
+    'SessionLocal',
+]
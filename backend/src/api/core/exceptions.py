@@ -0,0 +1,26 @@
+"""
+异常模块
+
+重导出API异常类
+"""
+from .base.exceptions import (
+    APIException,
+    ValidationError,
+    NotFoundError,
+    AuthenticationError,
+    PermissionError,
+    BusinessError,
+    DatabaseError,
+    ConfigurationError,
+)
+
+__all__ = [
+    'APIException',
+    'ValidationError',
+    'NotFoundError',
+    'AuthenticationError',
+    'PermissionError',
+    'BusinessError',
+    'DatabaseError',
+    'ConfigurationError',
+]
@@ -0,0 +1,11 @@
+"""
+API数据模型
+
+导入全部模型，关系中按类名引用的模型在配置映射前都已注册
+"""
+from .user import User, Department
+from .project import Project
+from .test_case import TestCase
+from .report import TestRun, TestResult
+
+__all__ = ['User', 'Department', 'Project', 'TestCase', 'TestRun', 'TestResult']
@@ -5,7 +5,7 @@
 """
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 
 from ..core.database import Base
@@ -15,6 +15,13 @@
 class Project(Base):
     """项目模型"""
     __tablename__ = "projects"
+    __table_args__ = (
+        # 全文检索索引，ngram解析器支持中文，仅在MySQL上创建
+        Index("ft_projects_name_description", "name", "description",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+        Index("ft_projects_name", "name",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -25,7 +32,7 @@ class Project(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # 关系
-    creator = relationship("User", back_populates="projects")
+    creator = relationship("User")
     test_cases = relationship("TestCase", back_populates="project")
     test_runs = relationship("TestRun", back_populates="project")
 
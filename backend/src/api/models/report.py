@@ -5,8 +5,10 @@
 """
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Enum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, String, Integer, BigInteger, DateTime, ForeignKey, Text, Enum, JSON, Index, Float, Boolean, UniqueConstraint
+)
+from sqlalchemy.orm import deferred, relationship
 
 from ..core.database import Base
 from ..config.constants import TestStatus
@@ -15,6 +17,10 @@
 class TestRun(Base):
     """测试运行模型"""
     __tablename__ = "test_runs"
+    __table_args__ = (
+        # 项目下的运行列表和按时间范围的项目统计
+        Index("ix_test_runs_project_started", "project_id", "started_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
@@ -32,9 +38,13 @@ class TestRun(Base):
     error_cases = Column(Integer, default=0)
     skipped_cases = Column(Integer, default=0)
     
+    # 运行完成时生成的报告摘要(api.services.run_summary)，为空表示未完成或完成后又写入了结果；
+    # 延迟加载，运行列表不读取
+    summary = deferred(Column(JSON))
+    
     # 关系
     project = relationship("Project", back_populates="test_runs")
-    starter = relationship("User", back_populates="test_runs")
+    starter = relationship("User")
     test_results = relationship("TestResult", back_populates="test_run")
 
     def __repr__(self):
@@ -44,6 +54,16 @@ def __repr__(self):
 class TestResult(Base):
     """测试结果模型"""
     __tablename__ = "test_results"
+    __table_args__ = (
+        # 运行下的结果列表，按(started_at, id)键集分页
+        Index("ix_test_results_run_started", "test_run_id", "started_at", "id"),
+        # 按状态过滤的结果列表和报告详情
+        Index("ix_test_results_run_status", "test_run_id", "status", "started_at", "id"),
+        # 按测试用例查询历史结果
+        Index("ix_test_results_case", "test_case_id", "started_at"),
+        # 按失败签名对运行中的失败分组
+        Index("ix_test_results_run_signature", "test_run_id", "signature_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     test_run_id = Column(Integer, ForeignKey("test_runs.id"))
@@ -61,9 +81,111 @@ class TestResult(Base):
     # 测试数据
     test_data = Column(JSON)  # 实际使用的测试数据
     
+    # 转存到压缩存储的大字段，{字段名: BlobRef}，output和stack_trace列中只保留末尾预览
+    payload_refs = Column(JSON)
+    
+    # 失败签名，只有failed和error的结果才有
+    signature_id = Column(Integer, ForeignKey("failure_signatures.id", ondelete="SET NULL"))
+    
     # 关系
     test_run = relationship("TestRun", back_populates="test_results")
     test_case = relationship("TestCase", back_populates="test_results")
+    signature = relationship("FailureSignature")
+
+    def __repr__(self):
+        return f"<TestResult {self.id}>" 
+
+
+class TestCaseFlakiness(Base):
+    """测试用例不稳定度
+    
+    保存最近结果的滚动窗口统计(core.utils.flakiness.FlakinessWindow)，每写入一个结果增量更新。
+    """
+    __tablename__ = "test_case_flakiness"
+    __table_args__ = (
+        # 项目下按不稳定度排序的列表和隔离列表
+        Index("ix_test_case_flakiness_project_score", "project_id", "quarantined", "score"),
+    )
+
+    test_case_id = Column(Integer, ForeignKey("test_cases.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    bits = Column(BigInteger, nullable=False, default=0)  # 最近的结果，最低位为最新，1表示失败
+    samples = Column(Integer, nullable=False, default=0)  # 窗口内的结果数
+    failures = Column(Integer, nullable=False, default=0)
+    transitions = Column(Integer, nullable=False, default=0)  # 相邻结果通过/失败翻转的次数
+    score = Column(Float, nullable=False, default=0)  # 翻转率
+    quarantined = Column(Boolean, nullable=False, default=False)
+    quarantined_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<TestCaseFlakiness {self.test_case_id} {self.score:.2f}>"
+
+
+class FailureSignature(Base):
+    """失败签名
+    
+    错误信息和堆栈归一化后的指纹(core.utils.failure_fingerprint)相同的失败共用一个签名，
+    写入结果时累加次数和最后出现时间。
+    """
+    __tablename__ = "failure_signatures"
+    __table_args__ = (
+        UniqueConstraint("project_id", "fingerprint", name="uk_failure_signatures_project_fingerprint"),
+        # 项目下按最后出现时间排列的签名列表
+        Index("ix_failure_signatures_project_last_seen", "project_id", "last_seen"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    fingerprint = Column(String(40), nullable=False)  # SHA-1十六进制
+    exception_type = Column(String(200))
+    message = Column(String(500))  # 归一化后的错误信息
+    frames = Column(Text)  # 归一化后参与指纹计算的帧，每行一帧，内层在前
+    count = Column(Integer, nullable=False, default=0)
+    first_seen = Column(DateTime)  # 为空表示插入签名的结果还没有写入
+    last_seen = Column(DateTime)
+    last_test_run_id = Column(Integer, ForeignKey("test_runs.id", ondelete="SET NULL"))
+
+    def __repr__(self):
+        return f"<FailureSignature {self.fingerprint[:12]} x{self.count}>"
+
+
+class ArtifactBlob(Base):
+    """测试产物内容
+    
+    内容相同的产物共用一行和一个文件(core.utils.artifact_store)，ref_count为引用该内容的产物数，降为0时删除。
+    """
+    __tablename__ = "artifact_blobs"
+
+    digest = Column(String(64), primary_key=True)  # SHA-256十六进制
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ArtifactBlob {self.digest[:12]} x{self.ref_count}>"
+
+
+class TestArtifact(Base):
+    """测试产物，同一测试运行中按名称唯一，一次运行的全部产物即该运行的清单"""
+    __tablename__ = "test_artifacts"
+    __table_args__ = (
+        UniqueConstraint("test_run_id", "name", name="uk_test_artifacts_run_name"),
+        # 保留期清理按过期时间扫描
+        Index("ix_test_artifacts_expires", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    test_run_id = Column(Integer, ForeignKey("test_runs.id"), nullable=False)
+    test_result_id = Column(Integer, ForeignKey("test_results.id", ondelete="SET NULL"))
+    name = Column(String(255), nullable=False)  # 运行内的相对路径，如screenshots/login_failed.png
+    kind = Column(String(50), nullable=False, default="other")  # screenshot/log/video/report/other
+    content_type = Column(String(100), nullable=False, default="application/octet-stream")
+    digest = Column(String(64), ForeignKey("artifact_blobs.digest"), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime)  # 为空表示不过期
 
     def __repr__(self):
-        return f"<TestResult {self.id}>" 
\ No newline at end of file
+        return f"<TestArtifact {self.test_run_id}:{self.name}>"
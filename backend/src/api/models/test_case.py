@@ -5,7 +5,7 @@
 """
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Enum, JSON
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Enum, JSON, Index, UniqueConstraint, Boolean, LargeBinary
 from sqlalchemy.orm import relationship
 
 from ..core.database import Base
@@ -15,6 +15,19 @@
 class TestCase(Base):
     """测试用例模型"""
     __tablename__ = "test_cases"
+    __table_args__ = (
+        # 导入按(project_id, name)新增或更新用例，名称在项目内唯一
+        UniqueConstraint("project_id", "name", name="uk_test_cases_project_name"),
+        # 项目下的用例列表，按(created_at, id)键集分页
+        Index("ix_test_cases_project_created", "project_id", "created_at", "id"),
+        # 按类型和优先级过滤的用例列表
+        Index("ix_test_cases_project_type_priority", "project_id", "type", "priority", "created_at", "id"),
+        # 全文检索索引，ngram解析器支持中文，仅在MySQL上创建
+        Index("ft_test_cases_name_description", "name", "description",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+        Index("ft_test_cases_name", "name",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
@@ -35,10 +48,77 @@ class TestCase(Base):
     # 环境要求
     prerequisites = Column(Text)
     
+    # 当前版本号，历史版本保存在test_case_versions中
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
     # 关系
     project = relationship("Project", back_populates="test_cases")
-    creator = relationship("User", back_populates="test_cases")
+    creator = relationship("User")
     test_results = relationship("TestResult", back_populates="test_case")
 
     def __repr__(self):
-        return f"<TestCase {self.name}>" 
\ No newline at end of file
+        return f"<TestCase {self.name}>" 
+
+
+class TestCaseVersion(Base):
+    """测试用例历史版本模型
+    
+    每个版本保存相对上一版本的JSON Patch，每隔固定版本数保存一次完整快照，
+    重建任意版本只需读取最近的快照和其后的补丁。
+    """
+    __tablename__ = "test_case_versions"
+    __table_args__ = (
+        UniqueConstraint("test_case_id", "version", name="uk_test_case_versions_case_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    test_case_id = Column(Integer, ForeignKey("test_cases.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    data = Column(JSON, nullable=False)  # 快照为完整文档，否则为相对上一版本的补丁
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<TestCaseVersion {self.test_case_id}@{self.version}>"
+
+
+# 位图列的最大字节数，MySQL上对应MEDIUMBLOB
+BITMAP_COLUMN_LENGTH = 16 * 1024 * 1024 - 1
+
+
+class ImpactPath(Base):
+    """变更影响索引中的源码文件
+    
+    cases为执行时覆盖了该文件的测试用例ID的压缩位图(core.utils.bitmap.RoaringBitmap)。
+    """
+    __tablename__ = "impact_paths"
+    __table_args__ = (
+        UniqueConstraint("project_id", "path", name="uk_impact_paths_project_path"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    path = Column(String(500), nullable=False)  # 相对源码根目录、以/分隔的路径
+    cases = Column(LargeBinary(BITMAP_COLUMN_LENGTH), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ImpactPath {self.path}>"
+
+
+class TestCaseImpact(Base):
+    """测试用例最近一次记录的覆盖文件
+    
+    paths为impact_paths.id的压缩位图，重新记录时用于找出不再覆盖的文件。
+    """
+    __tablename__ = "test_case_impacts"
+
+    test_case_id = Column(Integer, ForeignKey("test_cases.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    paths = Column(LargeBinary(BITMAP_COLUMN_LENGTH), nullable=False)
+    test_run_id = Column(Integer, ForeignKey("test_runs.id", ondelete="SET NULL"))
+    recorded_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<TestCaseImpact {self.test_case_id}>"
@@ -0,0 +1,494 @@
+"""
+测试产物服务模块
+
+测试产物(截图、日志、录像等)按内容去重保存(core.utils.artifact_store)，数据库记录产物和内容的引用数:
+- 上传分为创建、分块写入和完成三步，上传状态保存在Redis中，已写入的大小以上传文件为准，中断后可以续传
+- 完成时按SHA-256去重，重复的截图不占用额外空间，artifact_blobs.ref_count记录引用数
+- 产物按artifacts_expire_days过期，后台清理线程分批删除过期产物，引用数降为0的内容随之删除
+"""
+import logging
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, AsyncIterable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from core.cache.redis_manager import redis_delete, redis_get_json, redis_set_json
+from core.database.session import SessionLocal
+from core.utils.artifact_store import ArtifactStore
+from core.utils.file_manager import FileManager
+
+from ..models.report import ArtifactBlob, TestArtifact, TestResult, TestRun
+from ..config.test_config import test_execution_config, test_settings
+from ..core.exceptions import BusinessError, NotFoundError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# 产物类型
+ARTIFACT_KINDS = ("screenshot", "log", "video", "report", "other")
+
+
+@lru_cache(maxsize=1)
+def get_artifact_store() -> ArtifactStore:
+    """测试产物使用的存储"""
+    return ArtifactStore(FileManager(test_settings.TEST_ARTIFACT_DIR))
+
+
+def _upload_key(upload_id: str) -> str:
+    return f"artifact_upload:{upload_id}"
+
+
+def _save_upload(upload: Dict[str, Any]) -> None:
+    """保存上传状态，每次写入后延长过期时间"""
+    redis_set_json(_upload_key(upload["upload_id"]), upload, ex=test_settings.TEST_ARTIFACT_UPLOAD_EXPIRE)
+
+
+def _get_upload(upload_id: str) -> Dict[str, Any]:
+    upload = redis_get_json(_upload_key(upload_id)) if upload_id.isalnum() else None
+    if not upload:
+        raise NotFoundError(f"Artifact upload {upload_id} not found")
+    return upload
+
+
+def _upload_status(upload: Dict[str, Any]) -> Dict[str, Any]:
+    return {**upload, "received": get_artifact_store().received(upload["upload_id"])}
+
+
+def artifact_document(artifact: TestArtifact) -> Dict[str, Any]:
+    """产物转换为接口返回的字段"""
+    return {
+        "id": artifact.id,
+        "test_run_id": artifact.test_run_id,
+        "test_result_id": artifact.test_result_id,
+        "name": artifact.name,
+        "kind": artifact.kind,
+        "content_type": artifact.content_type,
+        "digest": artifact.digest,
+        "size": artifact.size,
+        "created_at": artifact.created_at,
+        "expires_at": artifact.expires_at
+    }
+
+
+def _lock_blob(db: Session, digest: str, size: int, now: datetime) -> ArtifactBlob:
+    """锁定内容行，不存在时先以0引用插入"""
+    statement = select(ArtifactBlob).where(ArtifactBlob.digest == digest).with_for_update()
+    blob = db.execute(statement).scalar_one_or_none()
+    if blob is None:
+        try:
+            with db.begin_nested():
+                db.execute(insert(ArtifactBlob).values(digest=digest, size=size, ref_count=0, created_at=now))
+        except IntegrityError:
+            # 其他上传同时插入了相同的内容
+            pass
+        blob = db.execute(statement).scalar_one()
+    return blob
+
+
+def release_blobs(db: Session, counts: Mapping[str, int]) -> Dict[str, Any]:
+    """减少内容的引用数，降为0的内容删除行，不提交、不删除文件
+
+    文件要等事务提交后由remove_released_blobs删除，提交失败回滚时内容行和文件都保留。
+
+    Args:
+        db: 数据库会话
+        counts: 内容哈希到减少的引用数
+
+    Returns:
+        Dict[str, Any]: 删除的内容数、释放的字节数和待删除文件的内容哈希
+    """
+    digests: List[str] = []
+    freed = 0
+    for digest in sorted(counts):
+        blob = db.execute(
+            select(ArtifactBlob).where(ArtifactBlob.digest == digest).with_for_update()
+        ).scalar_one_or_none()
+        if blob is None:
+            continue
+        blob.ref_count -= counts[digest]
+        if blob.ref_count <= 0:
+            db.delete(blob)
+            digests.append(digest)
+            freed += blob.size
+    db.flush()
+    return {"blobs": len(digests), "bytes": freed, "digests": digests}
+
+
+def remove_released_blobs(db: Session, digests: Sequence[str], store: Optional[ArtifactStore] = None) -> int:
+    """release_blobs的事务提交后删除内容文件
+
+    删除前重新锁定内容行：提交后同一内容可能已被重新上传，行存在时保留文件。
+    行不存在时的锁定读阻止其他上传插入该内容，直到文件删除后提交。
+    失败时只记录日志，留下的孤立文件不影响已提交的数据。
+
+    Args:
+        db: 数据库会话
+        digests: release_blobs返回的内容哈希
+        store: 产物存储，默认为get_artifact_store()
+
+    Returns:
+        int: 删除的文件数
+    """
+    if not digests:
+        return 0
+    store = store or get_artifact_store()
+    removed = 0
+    try:
+        for digest in digests:
+            exists = db.execute(
+                select(ArtifactBlob.digest).where(ArtifactBlob.digest == digest).with_for_update()
+            ).scalar_one_or_none()
+            if exists is None and store.remove(digest):
+                removed += 1
+        db.commit()
+    except (SQLAlchemyError, OSError) as e:
+        db.rollback()
+        logger.warning(f"测试产物内容文件删除失败 - 内容:{len(digests)}, 错误:{str(e)}")
+    return removed
+
+
+def sweep_expired_artifacts(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_batches: int = 20
+) -> Dict[str, int]:
+    """分批删除过期的产物和超时未完成的上传，每批提交一次
+
+    Args:
+        db: 数据库会话
+        now: 当前时间
+        batch_size: 每批删除的产物数，默认为TEST_ARTIFACT_SWEEP_BATCH
+        max_batches: 本次最多删除的批数，剩余的留到下次清理
+
+    Returns:
+        Dict[str, int]: 删除的产物数、内容数、释放的字节数和清理的上传数
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or test_settings.TEST_ARTIFACT_SWEEP_BATCH
+    store = get_artifact_store()
+    stats = {"artifacts": 0, "blobs": 0, "bytes": 0, "uploads": 0}
+    for _ in range(max_batches):
+        rows = db.execute(
+            select(TestArtifact.id, TestArtifact.digest)
+            .where(TestArtifact.expires_at <= now)
+            .order_by(TestArtifact.expires_at, TestArtifact.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        db.execute(
+            delete(TestArtifact)
+            .where(TestArtifact.id.in_([artifact_id for artifact_id, _ in rows]))
+            .execution_options(synchronize_session=False)
+        )
+        released = release_blobs(db, Counter(digest for _, digest in rows))
+        db.commit()
+        remove_released_blobs(db, released["digests"], store)
+        stats["artifacts"] += len(rows)
+        stats["blobs"] += released["blobs"]
+        stats["bytes"] += released["bytes"]
+        if len(rows) < batch_size:
+            break
+
+    for upload_id in store.stale_uploads(test_settings.TEST_ARTIFACT_UPLOAD_EXPIRE):
+        if store.discard_upload(upload_id):
+            stats["uploads"] += 1
+    if any(stats.values()):
+        logger.info(
+            f"过期测试产物清理完成 - 产物:{stats['artifacts']}, 内容:{stats['blobs']}, "
+            f"释放:{stats['bytes']}字节, 上传:{stats['uploads']}"
+        )
+    return stats
+
+
+class ArtifactService:
+    """测试产物服务类"""
+
+    @staticmethod
+    async def create_upload(
+        db: Session,
+        test_run_id: int,
+        name: str,
+        kind: str = "other",
+        content_type: Optional[str] = None,
+        size: Optional[int] = None,
+        sha256: Optional[str] = None,
+        test_result_id: Optional[int] = None,
+        created_by: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """创建上传
+
+        Args:
+            db: 数据库会话
+            test_run_id: 测试运行ID
+            name: 产物名称，同一运行中已有同名产物时完成上传后替换
+            kind: 产物类型
+            content_type: 媒体类型
+            size: 总字节数，提供时完成上传前校验
+            sha256: 内容的SHA-256，提供时完成上传前校验
+            test_result_id: 关联的测试结果
+            created_by: 上传人
+
+        Returns:
+            Dict[str, Any]: 上传状态，received为已写入的字节数
+
+        Raises:
+            BusinessError: 未启用产物保存
+            NotFoundError: 测试运行或测试结果不存在
+            ValidationError: 参数不合法
+        """
+        if not test_execution_config.save_artifacts:
+            raise BusinessError("Artifact storage is disabled")
+        if kind not in ARTIFACT_KINDS:
+            raise ValidationError(f"Unsupported artifact kind: {kind}")
+        if size is not None and size > test_settings.TEST_ARTIFACT_MAX_SIZE:
+            raise ValidationError(f"Artifact exceeds {test_settings.TEST_ARTIFACT_MAX_SIZE} bytes")
+        if db.get(TestRun, test_run_id) is None:
+            raise NotFoundError(f"Test run {test_run_id} not found")
+        if test_result_id is not None and db.execute(
+            select(TestResult.id).where(TestResult.id == test_result_id, TestResult.test_run_id == test_run_id)
+        ).scalar_one_or_none() is None:
+            raise NotFoundError(f"Test result {test_result_id} not found in test run {test_run_id}")
+
+        upload = {
+            "upload_id": uuid.uuid4().hex,
+            "test_run_id": test_run_id,
+            "test_result_id": test_result_id,
+            "name": name,
+            "kind": kind,
+            "content_type": content_type or "application/octet-stream",
+            "size": size,
+            "sha256": sha256.lower() if sha256 else None,
+            "created_by": created_by,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        _save_upload(upload)
+        return {**upload, "received": 0}
+
+    @staticmethod
+    async def get_upload(upload_id: str) -> Dict[str, Any]:
+        """获取上传状态，客户端据此确定续传的偏移量"""
+        return _upload_status(_get_upload(upload_id))
+
+    @staticmethod
+    async def upload_chunk(upload_id: str, offset: int, chunks: AsyncIterable[bytes]) -> Dict[str, Any]:
+        """从offset开始写入一块上传内容
+
+        Args:
+            upload_id: 上传ID
+            offset: 起始偏移量，不能超过已写入的字节数，小于时覆盖之后的部分
+            chunks: 内容
+
+        Returns:
+            Dict[str, Any]: 上传状态
+
+        Raises:
+            BusinessError: 偏移量超过已写入的字节数
+            ValidationError: 超出产物大小限制
+        """
+        upload = _get_upload(upload_id)
+        store = get_artifact_store()
+        received = store.received(upload_id)
+        if offset > received:
+            raise BusinessError(f"Upload {upload_id} has received {received} bytes, cannot write at {offset}")
+        max_size = min(upload["size"] or test_settings.TEST_ARTIFACT_MAX_SIZE, test_settings.TEST_ARTIFACT_MAX_SIZE)
+        try:
+            await store.append(upload_id, chunks, offset, max_size)
+        except ValueError as e:
+            raise ValidationError(str(e))
+        _save_upload(upload)
+        return _upload_status(upload)
+
+    @staticmethod
+    async def complete_upload(db: Session, upload_id: str) -> Dict[str, Any]:
+        """完成上传，按内容去重保存并创建产物
+
+        Args:
+            db: 数据库会话
+            upload_id: 上传ID
+
+        Returns:
+            Dict[str, Any]: 产物，deduplicated表示内容已存在，没有写入新文件
+
+        Raises:
+            BusinessError: 上传的字节数与创建时声明的不一致
+            ValidationError: 内容的SHA-256与创建时声明的不一致
+        """
+        upload = _get_upload(upload_id)
+        store = get_artifact_store()
+        received = store.received(upload_id)
+        if upload["size"] is not None and received != upload["size"]:
+            raise BusinessError(f"Upload {upload_id} has received {received} of {upload['size']} bytes")
+        digest = await run_in_threadpool(store.hash_upload, upload_id)
+        if upload["sha256"] and digest != upload["sha256"]:
+            store.discard_upload(upload_id)
+            redis_delete(_upload_key(upload_id))
+            raise ValidationError(f"SHA-256 mismatch: expected {upload['sha256']}, got {digest}")
+
+        artifact, stored = ArtifactService._commit(db, upload, digest, received, store)
+        redis_delete(_upload_key(upload_id))
+        return {**artifact_document(artifact), "deduplicated": not stored}
+
+    @staticmethod
+    async def store_artifact(
+        db: Session,
+        test_run_id: int,
+        name: str,
+        chunks: AsyncIterable[bytes],
+        **options: Any
+    ) -> Dict[str, Any]:
+        """一次请求上传完整的产物，适用于截图等小文件，参数同create_upload"""
+        upload = await ArtifactService.create_upload(db, test_run_id, name, **options)
+        try:
+            await ArtifactService.upload_chunk(upload["upload_id"], 0, chunks)
+            return await ArtifactService.complete_upload(db, upload["upload_id"])
+        except BaseException:
+            get_artifact_store().discard_upload(upload["upload_id"])
+            redis_delete(_upload_key(upload["upload_id"]))
+            raise
+
+    @staticmethod
+    def _commit(
+        db: Session,
+        upload: Dict[str, Any],
+        digest: str,
+        size: int,
+        store: ArtifactStore
+    ) -> Tuple[TestArtifact, bool]:
+        """锁定内容行后保存文件并创建或替换产物，提交事务"""
+        now = datetime.utcnow()
+        expire_days = test_execution_config.artifacts_expire_days
+        expires_at = now + timedelta(days=expire_days) if expire_days > 0 else None
+        try:
+            blob = _lock_blob(db, digest, size, now)
+            stored = store.place(upload["upload_id"], digest)
+            blob.ref_count += 1
+
+            artifact = db.execute(
+                select(TestArtifact).where(
+                    TestArtifact.test_run_id == upload["test_run_id"],
+                    TestArtifact.name == upload["name"]
+                ).with_for_update()
+            ).scalar_one_or_none()
+            replaced = None
+            if artifact is None:
+                artifact = TestArtifact(test_run_id=upload["test_run_id"], name=upload["name"])
+                db.add(artifact)
+            else:
+                replaced = artifact.digest
+            artifact.test_result_id = upload["test_result_id"]
+            artifact.kind = upload["kind"]
+            artifact.content_type = upload["content_type"]
+            artifact.digest = digest
+            artifact.size = size
+            artifact.created_by = upload["created_by"]
+            artifact.created_at = now
+            artifact.expires_at = expires_at
+            released = release_blobs(db, {replaced: 1}) if replaced else {"digests": []}
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        remove_released_blobs(db, released["digests"], store)
+        db.refresh(artifact)
+        return artifact, stored
+
+    @staticmethod
+    async def get_manifest(db: Session, test_run_id: int) -> Dict[str, Any]:
+        """获取测试运行的产物清单
+
+        Returns:
+            Dict[str, Any]: 产物列表、产物总字节数，以及去重后实际占用的字节数
+        """
+        if db.get(TestRun, test_run_id) is None:
+            raise NotFoundError(f"Test run {test_run_id} not found")
+        artifacts = db.execute(
+            select(TestArtifact).where(TestArtifact.test_run_id == test_run_id).order_by(TestArtifact.name)
+        ).scalars().all()
+        unique = {artifact.digest: artifact.size for artifact in artifacts}
+        return {
+            "test_run_id": test_run_id,
+            "count": len(artifacts),
+            "total_size": sum(artifact.size for artifact in artifacts),
+            "stored_size": sum(unique.values()),
+            "artifacts": [artifact_document(artifact) for artifact in artifacts]
+        }
+
+    @staticmethod
+    async def get_artifact(db: Session, artifact_id: int) -> TestArtifact:
+        """获取产物"""
+        artifact = db.get(TestArtifact, artifact_id)
+        if artifact is None:
+            raise NotFoundError(f"Artifact {artifact_id} not found")
+        return artifact
+
+
+class ArtifactSweeper:
+    """过期测试产物的后台清理线程"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        interval: Optional[float] = None
+    ):
+        """初始化清理线程
+
+        Args:
+            session_factory: 数据库会话工厂
+            interval: 清理间隔(秒)，默认为TEST_ARTIFACT_SWEEP_INTERVAL
+        """
+        self._session_factory = session_factory
+        self.interval = interval or test_settings.TEST_ARTIFACT_SWEEP_INTERVAL
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """后台线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动后台清理线程"""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="artifact-sweeper", daemon=True)
+            self._thread.start()
+            logger.info("测试产物清理线程已启动")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """停止后台清理线程，正在进行的一批会先完成"""
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        logger.info("测试产物清理线程已停止")
+
+    def run_once(self) -> Dict[str, int]:
+        """执行一次清理"""
+        session = self._session_factory()
+        try:
+            return sweep_expired_artifacts(session)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"过期测试产物清理失败: {str(e)}")
+            return {}
+        finally:
+            session.close()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.run_once()
+
+
+# 全局产物清理线程
+artifact_sweeper = ArtifactSweeper()
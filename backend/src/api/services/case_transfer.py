@@ -0,0 +1,497 @@
+"""
+测试用例导入导出模块
+
+导入:
+- 上传文件经FileManager流式落盘，接口立即返回任务ID，解析和写入在后台任务中完成
+- CSV、XLSX(只读模式)和JSON(数组或NDJSON)均逐行解析，内存占用与文件大小无关
+- 每chunk_size行校验一次并按(project_id, name)批量新增或更新，每块单独提交
+- 任务进度保存在Redis中，按任务ID查询
+
+导出:
+- 按主键分批读取项目下的用例，逐批生成CSV或NDJSON并流式返回
+- XLSX使用只写模式生成到临时文件后再流式返回
+"""
+import csv
+import io
+import json
+import logging
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from core.cache.redis_manager import redis_get_json, redis_set_json
+from core.config.settings import settings
+from core.database.session import SessionLocal
+from core.utils.file_manager import FileManager
+
+from ..models.test_case import TestCase
+from .test import TestService
+
+logger = logging.getLogger(__name__)
+
+# 支持的文件格式及扩展名
+IMPORT_FORMATS = {
+    "csv": (".csv",),
+    "xlsx": (".xlsx",),
+    "json": (".json", ".jsonl", ".ndjson"),
+}
+
+# 导出格式对应的媒体类型和扩展名
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "json": ("application/x-ndjson", ".jsonl"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+}
+
+# 导入导出的列，steps和test_data在CSV/XLSX中以JSON字符串表示
+CASE_COLUMNS = ["name", "description", "type", "priority", "steps", "test_data", "prerequisites"]
+JSON_COLUMNS = ("steps", "test_data")
+
+# 每批校验和写入的行数
+DEFAULT_IMPORT_CHUNK_SIZE = 500
+
+# 导出时每批读取的用例数
+DEFAULT_EXPORT_BATCH_SIZE = 500
+
+# 任务中保留的错误明细条数
+DEFAULT_MAX_ERRORS = 100
+
+# 导入任务状态的保留时间(秒)
+IMPORT_JOB_EXPIRE = 60 * 60 * 24
+
+# 导入任务状态
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# JSON数组流式解析时每次读取的字符数
+_JSON_READ_SIZE = 64 * 1024
+_JSON_DELIMITERS = frozenset(" \t\r\n,]")
+
+
+@lru_cache(maxsize=1)
+def get_file_manager() -> FileManager:
+    """导入导出使用的文件管理器"""
+    return FileManager(settings.CASE_TRANSFER_DIR)
+
+
+def detect_format(filename: Optional[str], format: Optional[str] = None) -> str:
+    """根据显式指定的格式或扩展名确定文件格式
+
+    Raises:
+        ValueError: 不支持的格式
+    """
+    if format:
+        if format not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported format: {format}")
+        return format
+    suffix = Path(filename or "").suffix.lower()
+    for name, suffixes in IMPORT_FORMATS.items():
+        if suffix in suffixes:
+            return name
+    raise ValueError(f"Cannot detect format from file name: {filename}")
+
+
+def _normalize_cells(row: Dict[str, Any]) -> Dict[str, Any]:
+    """规范化表格中的一行: 去掉未知列，空字符串视为未填写，解析JSON列"""
+    normalized = {}
+    for column in CASE_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+            if column in JSON_COLUMNS:
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    # 保留原值，由校验报告错误
+                    pass
+        if value is not None:
+            normalized[column] = value
+    return normalized
+
+
+def iter_csv_rows(fp: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """逐行读取CSV，首行为列名，兼容带BOM的UTF-8
+
+    Yields:
+        Tuple[int, Dict[str, Any]]: (文件中的行号, 行数据)
+    """
+    text = io.TextIOWrapper(fp, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    for row in reader:
+        yield reader.line_num, _normalize_cells(row)
+
+
+def iter_xlsx_rows(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """以只读模式逐行读取XLSX的第一个工作表，首行为列名
+
+    Raises:
+        ValueError: 未安装openpyxl
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ValueError("XLSX import requires openpyxl") from e
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        for row_no, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield row_no, _normalize_cells(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+
+class _Prefixed(io.TextIOBase):
+    """把已读出的前缀放回文本流之前"""
+
+    def __init__(self, prefix: str, stream: io.TextIOBase):
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size: int = -1) -> str:
+        prefix, self._prefix = self._prefix, ""
+        if size is not None and 0 <= size <= len(prefix):
+            self._prefix = prefix[size:]
+            return prefix[:size]
+        rest = self._stream.read(-1 if size is None or size < 0 else size - len(prefix))
+        return prefix + rest
+
+    def readline(self, size: int = -1) -> str:
+        prefix, self._prefix = self._prefix, ""
+        if prefix.endswith("\n"):
+            return prefix
+        return prefix + self._stream.readline()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+def _iter_json_array(text: io.TextIOBase) -> Iterator[Any]:
+    """增量解析顶层JSON数组，每次只在内存中保留一个元素"""
+    decoder = json.JSONDecoder()
+    buffer = text.read(_JSON_READ_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("JSON file must be an array or NDJSON")
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(","):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            value, end = decoder.raw_decode(buffer)
+        except ValueError:
+            if eof:
+                raise ValueError("Truncated or invalid JSON array")
+            chunk = text.read(_JSON_READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        # 数字可能在缓冲区末尾或小数点、指数处被截断，读到分隔符后再确认
+        if not eof and (end == len(buffer) or (
+            isinstance(value, (int, float)) and buffer[end] not in _JSON_DELIMITERS
+        )):
+            chunk = text.read(_JSON_READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            if chunk:
+                continue
+        yield value
+        buffer = buffer[end:]
+
+
+def iter_json_rows(fp: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """逐条读取JSON数组或NDJSON
+
+    Yields:
+        Tuple[int, Any]: (数组下标或NDJSON行号，从1开始, 元素)，NDJSON中无法解析的行以None返回
+    """
+    text = io.TextIOWrapper(fp, encoding="utf-8-sig")
+    # 跳过开头的空白，根据第一个字符区分数组和NDJSON
+    line_no = 0
+    head = text.read(1)
+    while head and head.isspace():
+        line_no += head == "\n"
+        head = text.read(1)
+    if head == "[":
+        for index, value in enumerate(_iter_json_array(_Prefixed("[", text)), start=1):
+            yield index, value
+        return
+
+    for line in _Prefixed(head, text):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+
+def create_import_job(project_id: int, filename: str, format: str) -> Dict[str, Any]:
+    """创建导入任务并保存初始状态"""
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "project_id": project_id,
+        "filename": filename,
+        "format": format,
+        "status": JOB_PENDING,
+        "processed": 0,
+        "created": 0,
+        "updated": 0,
+        "rejected": 0,
+        "errors": [],
+        "message": None,
+        "created_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+    }
+    save_import_job(job)
+    return job
+
+
+def save_import_job(job: Dict[str, Any]) -> None:
+    """保存导入任务状态"""
+    redis_set_json(f"case_import:{job['job_id']}", job, ex=IMPORT_JOB_EXPIRE)
+
+
+def get_import_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """获取导入任务状态，不存在或已过期时返回None"""
+    return redis_get_json(f"case_import:{job_id}")
+
+
+class CaseImportJob:
+    """测试用例导入任务"""
+
+    def __init__(
+        self,
+        job: Dict[str, Any],
+        stored_name: str,
+        created_by: Optional[int],
+        validate: Callable[[Dict[str, Any]], Dict[str, Any]],
+        session_factory: Callable[[], Session] = SessionLocal,
+        file_manager: Optional[FileManager] = None,
+        chunk_size: int = DEFAULT_IMPORT_CHUNK_SIZE,
+        max_errors: int = DEFAULT_MAX_ERRORS
+    ):
+        """初始化导入任务
+
+        Args:
+            job: create_import_job返回的任务状态
+            stored_name: 上传文件在FileManager中的文件名
+            created_by: 新增用例的创建者
+            validate: 单行的校验函数，返回规范化后的字段，校验失败抛出ValueError
+            session_factory: 数据库会话工厂
+            file_manager: 文件管理器，默认使用get_file_manager()
+            chunk_size: 每批校验和写入的行数
+            max_errors: 保留的错误明细条数
+        """
+        self.job = job
+        self.stored_name = stored_name
+        self.created_by = created_by
+        self.validate = validate
+        self.session_factory = session_factory
+        self.file_manager = file_manager or get_file_manager()
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+
+    def run(self) -> Dict[str, Any]:
+        """执行导入，供后台任务在线程池中调用
+
+        Returns:
+            Dict[str, Any]: 最终的任务状态
+        """
+        path = self.file_manager.resolve_path(self.stored_name)
+        self.job["status"] = JOB_RUNNING
+        save_import_job(self.job)
+
+        db = self.session_factory()
+        try:
+            chunk: List[Tuple[int, Dict[str, Any]]] = []
+            for row_no, row in self._iter_rows(path):
+                chunk.append((row_no, row))
+                if len(chunk) >= self.chunk_size:
+                    self._flush(db, chunk)
+                    chunk = []
+            self._flush(db, chunk)
+            self.job["status"] = JOB_COMPLETED
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"测试用例导入失败 - 任务:{self.job['job_id']}")
+            self.job["status"] = JOB_FAILED
+            self.job["message"] = str(e)
+        finally:
+            db.close()
+            path.unlink(missing_ok=True)
+            self.job["finished_at"] = datetime.utcnow().isoformat()
+            save_import_job(self.job)
+        return self.job
+
+    def _iter_rows(self, path: Path) -> Iterator[Tuple[int, Any]]:
+        """按格式逐行读取上传文件"""
+        format = self.job["format"]
+        if format == "xlsx":
+            yield from iter_xlsx_rows(path)
+            return
+        with open(path, "rb") as fp:
+            if format == "csv":
+                yield from iter_csv_rows(fp)
+            else:
+                yield from iter_json_rows(fp)
+
+    def _flush(self, db: Session, chunk: List[Tuple[int, Any]]) -> None:
+        """校验一批行，写入通过校验的用例并更新进度"""
+        if not chunk:
+            return
+        cases = []
+        for row_no, row in chunk:
+            if not isinstance(row, dict):
+                self._reject(row_no, "Each row must be a JSON object")
+                continue
+            try:
+                cases.append(self.validate(row))
+            except ValueError as e:
+                # pydantic.ValidationError是ValueError的子类
+                self._reject(row_no, str(e))
+        created, updated = TestService.upsert_test_cases(db, self.job["project_id"], self.created_by, cases)
+        self.job["processed"] += len(chunk)
+        self.job["created"] += created
+        self.job["updated"] += updated
+        save_import_job(self.job)
+
+    def _reject(self, row_no: int, error: str) -> None:
+        """记录校验失败的行，超出max_errors后只计数"""
+        self.job["rejected"] += 1
+        if len(self.job["errors"]) < self.max_errors:
+            self.job["errors"].append({"row": row_no, "error": error})
+
+
+def iter_project_cases(
+    project_id: int,
+    session_factory: Callable[[], Session] = SessionLocal,
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """按主键分批读取项目下的测试用例，每批使用短查询，不长时间占用连接
+
+    Yields:
+        Dict[str, Any]: 导出列对应的字段
+    """
+    columns = [getattr(TestCase, column) for column in CASE_COLUMNS]
+    last_id = 0
+    while True:
+        db = session_factory()
+        try:
+            rows = db.execute(
+                select(TestCase.id, *columns)
+                .where(TestCase.project_id == project_id, TestCase.id > last_id)
+                .order_by(TestCase.id)
+                .limit(batch_size)
+            ).all()
+        finally:
+            db.close()
+        for row in rows:
+            values = row._mapping
+            yield {
+                column: getattr(values[column], "value", values[column])
+                for column in CASE_COLUMNS
+            }
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1].id
+
+
+def _cell(column: str, value: Any) -> Any:
+    """表格单元格的值，JSON列序列化为字符串"""
+    if column in JSON_COLUMNS and value is not None:
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def iter_csv_export(cases: Iterable[Dict[str, Any]], batch_size: int = DEFAULT_EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """把测试用例逐批编码为CSV，带BOM以便Excel识别UTF-8"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(CASE_COLUMNS)
+    count = 0
+    for case in cases:
+        writer.writerow([_cell(column, case[column]) for column in CASE_COLUMNS])
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson_export(cases: Iterable[Dict[str, Any]], batch_size: int = DEFAULT_EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """把测试用例逐批编码为NDJSON，每行一个用例"""
+    lines: List[str] = []
+    for case in cases:
+        lines.append(json.dumps(case, ensure_ascii=False, default=str))
+        if len(lines) >= batch_size:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def write_xlsx_export(cases: Iterable[Dict[str, Any]], path: Path) -> None:
+    """以只写模式生成XLSX文件
+
+    Raises:
+        ValueError: 未安装openpyxl
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise ValueError("XLSX export requires openpyxl") from e
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("test_cases")
+    sheet.append(CASE_COLUMNS)
+    for case in cases:
+        sheet.append([_cell(column, case[column]) for column in CASE_COLUMNS])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workbook.save(path)
+
+
+async def iter_upload(file: Any, chunk_size: int = 64 * 1024):
+    """分块读取上传文件"""
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def build_xlsx_export(project_id: int, file_manager: Optional[FileManager] = None) -> str:
+    """在线程池中生成项目用例的XLSX文件
+
+    Returns:
+        str: 生成的文件在FileManager中的文件名，返回给客户端后应删除
+
+    Raises:
+        ValueError: 未安装openpyxl
+    """
+    file_manager = file_manager or get_file_manager()
+    name = f"exports/{uuid.uuid4().hex}.xlsx"
+    await run_in_threadpool(write_xlsx_export, iter_project_cases(project_id), file_manager.resolve_path(name))
+    return name
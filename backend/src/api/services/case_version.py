@@ -0,0 +1,215 @@
+"""
+测试用例版本模块
+
+test_cases中始终保存最新内容，读取最新版本与未启用版本化时相同。
+历史版本保存在test_case_versions中:
+- 版本号为1、11、21...时保存完整快照，其余版本保存相对上一版本的JSON Patch
+- 用例第一次被修改时才补记修改前的内容，从未修改过的用例没有历史记录
+- 重建第v版读取v之前最近的快照和其后的补丁，最多读取SNAPSHOT_INTERVAL行
+"""
+import copy
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from core.utils.json_patch import Patch, apply_patch, make_patch
+
+from ..models.test_case import TestCase, TestCaseVersion
+from ..core.exceptions import NotFoundError
+
+# 纳入版本管理的字段
+VERSIONED_FIELDS = ("name", "description", "type", "priority", "steps", "test_data", "prerequisites")
+
+# 每隔多少个版本保存一次完整快照
+SNAPSHOT_INTERVAL = 10
+
+
+def case_document(source: Any) -> Dict[str, Any]:
+    """提取测试用例中纳入版本管理的字段，枚举转换为取值
+
+    Args:
+        source: TestCase实例或字段映射
+
+    Returns:
+        Dict[str, Any]: 可序列化为JSON的文档
+    """
+    document = {}
+    for field in VERSIONED_FIELDS:
+        value = source.get(field) if isinstance(source, Mapping) else getattr(source, field)
+        document[field] = getattr(value, "value", value)
+    return document
+
+
+def is_snapshot_version(version: int) -> bool:
+    """该版本是否保存完整快照"""
+    return (version - 1) % SNAPSHOT_INTERVAL == 0
+
+
+def record_versions(
+    db: Session,
+    changes: Sequence[Tuple[int, int, Dict[str, Any], Dict[str, Any]]],
+    created_by: Optional[int],
+    now: Optional[datetime] = None
+) -> Dict[int, int]:
+    """为一批修改写入历史版本，不提交
+
+    Args:
+        db: 数据库会话
+        changes: (测试用例ID, 当前版本号, 修改前文档, 修改后文档)列表
+        created_by: 修改人
+        now: 修改时间
+
+    Returns:
+        Dict[int, int]: 内容发生变化的测试用例ID到新版本号的映射
+    """
+    patches = []
+    for test_case_id, version, old_document, new_document in changes:
+        patch = make_patch(old_document, new_document)
+        if patch:
+            patches.append((test_case_id, version, old_document, new_document, patch))
+    if not patches:
+        return {}
+
+    # 一次查出已有历史记录的用例，其余用例先补记修改前的快照
+    with_history = set(db.execute(
+        select(TestCaseVersion.test_case_id)
+        .where(TestCaseVersion.test_case_id.in_([item[0] for item in patches]))
+        .distinct()
+    ).scalars())
+
+    now = now or datetime.utcnow()
+    rows: List[Dict[str, Any]] = []
+    new_versions: Dict[int, int] = {}
+    for test_case_id, version, old_document, new_document, patch in patches:
+        if test_case_id not in with_history:
+            rows.append({
+                "test_case_id": test_case_id,
+                "version": version,
+                "is_snapshot": True,
+                "data": old_document,
+                "created_by": None,
+                "created_at": now
+            })
+        new_version = version + 1
+        snapshot = is_snapshot_version(new_version)
+        rows.append({
+            "test_case_id": test_case_id,
+            "version": new_version,
+            "is_snapshot": snapshot,
+            "data": new_document if snapshot else patch,
+            "created_by": created_by,
+            "created_at": now
+        })
+        new_versions[test_case_id] = new_version
+
+    db.execute(insert(TestCaseVersion), rows)
+    return new_versions
+
+
+class CaseVersionService:
+    """测试用例版本服务"""
+
+    @staticmethod
+    async def get_versions(
+        db: Session,
+        test_case: TestCase,
+        limit: int = 20,
+        before: Optional[int] = None
+    ) -> Tuple[List[TestCaseVersion], Optional[int]]:
+        """获取历史版本列表，按版本号倒序
+
+        Args:
+            db: 数据库会话
+            test_case: 测试用例
+            limit: 返回记录数上限
+            before: 只返回小于该版本号的记录，用于翻页
+
+        Returns:
+            Tuple[List[TestCaseVersion], Optional[int]]: (版本列表, 下一页的before参数)
+        """
+        statement = select(TestCaseVersion).where(TestCaseVersion.test_case_id == test_case.id)
+        if before is not None:
+            statement = statement.where(TestCaseVersion.version < before)
+        versions = db.execute(
+            statement.order_by(TestCaseVersion.version.desc()).limit(limit + 1)
+        ).scalars().all()
+        if len(versions) <= limit:
+            return list(versions), None
+        versions = list(versions[:limit])
+        return versions, versions[-1].version
+
+    @staticmethod
+    async def get_version_document(db: Session, test_case: TestCase, version: int) -> Dict[str, Any]:
+        """重建指定版本的内容
+
+        Args:
+            db: 数据库会话
+            test_case: 测试用例
+            version: 版本号
+
+        Returns:
+            Dict[str, Any]: 该版本的文档
+
+        Raises:
+            NotFoundError: 版本不存在
+        """
+        if version == test_case.version:
+            return case_document(test_case)
+        if not 1 <= version < test_case.version:
+            raise NotFoundError(f"Version {version} of test case {test_case.id} not found")
+
+        snapshot = db.execute(
+            select(TestCaseVersion)
+            .where(
+                TestCaseVersion.test_case_id == test_case.id,
+                TestCaseVersion.version <= version,
+                TestCaseVersion.is_snapshot.is_(True)
+            )
+            .order_by(TestCaseVersion.version.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if snapshot is None:
+            raise NotFoundError(f"Version {version} of test case {test_case.id} not found")
+
+        deltas = db.execute(
+            select(TestCaseVersion.data)
+            .where(
+                TestCaseVersion.test_case_id == test_case.id,
+                TestCaseVersion.version > snapshot.version,
+                TestCaseVersion.version <= version
+            )
+            .order_by(TestCaseVersion.version)
+        ).scalars().all()
+
+        document = copy.deepcopy(snapshot.data)
+        for patch in deltas:
+            document = apply_patch(document, patch, in_place=True)
+        return document
+
+    @staticmethod
+    async def diff_versions(
+        db: Session,
+        test_case: TestCase,
+        from_version: int,
+        to_version: Optional[int] = None
+    ) -> Patch:
+        """计算两个版本之间的差异
+
+        Args:
+            db: 数据库会话
+            test_case: 测试用例
+            from_version: 起始版本
+            to_version: 目标版本，默认为当前版本
+
+        Returns:
+            Patch: 把起始版本变为目标版本的JSON Patch
+
+        Raises:
+            NotFoundError: 版本不存在
+        """
+        to_version = test_case.version if to_version is None else to_version
+        source = await CaseVersionService.get_version_document(db, test_case, from_version)
+        target = await CaseVersionService.get_version_document(db, test_case, to_version)
+        return make_patch(source, target)
@@ -0,0 +1,407 @@
+"""
+测试执行模块
+
+把一次测试运行中的测试用例分发到进程池中执行:
+- 工作进程数由TestSettings.TEST_PARALLEL/TEST_WORKERS决定，不超过TestExecutionConfig.max_workers
+- 单个用例超过TestExecutionConfig.timeout后强制终止其工作进程，记为error
+- 失败或出错的用例按retry_interval指数退避重试，最多retry_times次，只保存最后一次的结果
+- 执行结果攒成批次写入test_results，并原子地累加测试运行计数
+- 按test_results中最近的历史耗时估计每个用例的耗时，LPT分片到各工作进程，空闲的工作进程
+  从掉队的分片窃取用例
+- 启用TEST_IMPACT_ANALYSIS时记录每个用例覆盖的源码文件，更新变更影响索引
+- 因结果不稳定被隔离的用例只执行一次不重试，也可以整体跳过
+用例之间没有共享状态，耗时主要在用例本身，总耗时随工作进程数近似线性下降。
+"""
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from core.database.session import SessionLocal
+from core.utils.case_runner import pytest_args_from_options, run_pytest_case
+from core.utils.process_pool import KillablePool, TaskOutcome
+from core.utils.shard_scheduler import (
+    DurationEstimate,
+    WorkStealingScheduler,
+    default_estimate,
+    estimate_durations,
+    lpt_partition,
+    partition_makespan,
+    round_robin_partition
+)
+
+from ..models.test_case import TestCase
+from ..models.report import TestRun, TestResult
+from ..config.constants import TestStatus
+from ..config.test_config import test_execution_config, test_framework_config, test_settings
+from ..core.exceptions import NotFoundError
+from .test import TestService
+from .impact import record_coverage
+from .flakiness import quarantined_case_ids
+from .run_summary import complete_test_run
+
+logger = logging.getLogger(__name__)
+
+# 每批写入的结果数
+DEFAULT_RESULT_BATCH_SIZE = 200
+
+# 结果最长缓存时间(秒)，超过后即使不满一批也写入
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+# 需要重试的结果状态
+RETRY_STATUSES = frozenset({TestStatus.FAILED, TestStatus.ERROR})
+
+# 记录覆盖的结果状态，执行出错或超时的用例覆盖不完整，保留之前的记录
+COVERAGE_STATUSES = frozenset({TestStatus.PASSED, TestStatus.FAILED})
+
+# 估计耗时时每个用例最多使用的历史结果数
+DURATION_HISTORY_SIZE = 20
+
+# 每次查询历史耗时的用例数
+DURATION_QUERY_CHUNK = 1000
+
+
+def configured_workers() -> int:
+    """根据配置计算工作进程数"""
+    if not test_settings.TEST_PARALLEL:
+        return 1
+    return max(1, min(test_settings.TEST_WORKERS, test_execution_config.max_workers))
+
+
+def configured_coverage_root() -> Optional[str]:
+    """根据配置返回覆盖记录的源码根目录，未启用变更影响分析时为None"""
+    if not test_settings.TEST_IMPACT_ANALYSIS:
+        return None
+    return os.path.abspath(test_settings.TEST_IMPACT_ROOT)
+
+
+def case_payload(
+    test_case: TestCase,
+    pytest_args: Optional[List[str]] = None,
+    coverage_root: Optional[str] = None,
+    quarantined: bool = False
+) -> Dict[str, Any]:
+    """构造传给工作进程的用例数据，只包含可以pickle的基本类型"""
+    payload = {
+        "id": test_case.id,
+        "name": test_case.name,
+        "type": getattr(test_case.type, "value", test_case.type),
+        "steps": test_case.steps,
+        "test_data": test_case.test_data,
+        "prerequisites": test_case.prerequisites,
+        "pytest_args": pytest_args or []
+    }
+    if coverage_root:
+        payload["coverage_root"] = coverage_root
+    if quarantined:
+        payload["quarantined"] = True
+    return payload
+
+
+def case_duration_estimates(
+    db: Session,
+    case_ids: Sequence[int],
+    history_size: int = DURATION_HISTORY_SIZE
+) -> Dict[int, DurationEstimate]:
+    """根据每个用例最近的历史结果估计耗时，跳过的结果不计入
+
+    Args:
+        db: 数据库会话
+        case_ids: 测试用例ID
+        history_size: 每个用例最多使用的历史结果数
+
+    Returns:
+        Dict[int, DurationEstimate]: 有历史结果的用例的耗时估计
+    """
+    estimates: Dict[int, DurationEstimate] = {}
+    for start in range(0, len(case_ids), DURATION_QUERY_CHUNK):
+        recency = func.row_number().over(
+            partition_by=TestResult.test_case_id,
+            order_by=(TestResult.started_at.desc(), TestResult.id.desc())
+        )
+        ranked = select(
+            TestResult.test_case_id,
+            TestResult.duration,
+            TestResult.started_at,
+            TestResult.id,
+            recency.label("recency")
+        ).where(
+            TestResult.test_case_id.in_(case_ids[start:start + DURATION_QUERY_CHUNK]),
+            TestResult.duration.is_not(None),
+            TestResult.status != TestStatus.SKIPPED
+        ).subquery()
+        history = db.execute(
+            select(ranked.c.test_case_id, ranked.c.duration)
+            .where(ranked.c.recency <= history_size)
+            .order_by(ranked.c.started_at, ranked.c.id)
+        )
+        estimates.update(estimate_durations(history))
+    return estimates
+
+
+def _runner_result(outcome: TaskOutcome) -> Dict[str, Any]:
+    return outcome.result if isinstance(outcome.result, dict) else {}
+
+
+def outcome_status(outcome: TaskOutcome) -> TestStatus:
+    """执行结果对应的测试状态，执行器异常、超时或返回了无效状态时为error"""
+    if not outcome.ok:
+        return TestStatus.ERROR
+    try:
+        return TestStatus(_runner_result(outcome).get("status"))
+    except ValueError:
+        return TestStatus.ERROR
+
+
+def should_retry(outcome: TaskOutcome) -> bool:
+    """失败或出错的用例需要重试，已隔离的不稳定用例不重试"""
+    return outcome_status(outcome) in RETRY_STATUSES and not outcome.payload.get("quarantined")
+
+
+def outcome_to_result(outcome: TaskOutcome) -> Dict[str, Any]:
+    """把执行结果转换为TestService._write_results接受的测试结果
+
+    Args:
+        outcome: 用例最后一次执行的结果
+
+    Returns:
+        Dict[str, Any]: 测试结果字段
+    """
+    result = {
+        "test_case_id": outcome.key,
+        "status": outcome_status(outcome),
+        "started_at": outcome.started_at,
+        "completed_at": outcome.completed_at,
+        "test_data": outcome.payload.get("test_data"),
+        "output": None,
+        "error_message": None,
+        "stack_trace": None
+    }
+    runner_result = _runner_result(outcome)
+    if outcome.timed_out:
+        result["error_message"] = outcome.error
+    elif not outcome.ok:
+        result["error_message"] = outcome.error.strip().splitlines()[-1]
+        result["stack_trace"] = outcome.error
+    elif result["status"].value != runner_result.get("status"):
+        result["error_message"] = f"Runner returned invalid status: {runner_result.get('status')!r}"
+    else:
+        result["output"] = runner_result.get("output")
+        result["error_message"] = runner_result.get("error_message")
+        result["stack_trace"] = runner_result.get("stack_trace")
+    if outcome.attempts > 1:
+        note = f"Attempts: {outcome.attempts}"
+        result["output"] = f"{note}\n{result['output']}" if result["output"] else note
+    return result
+
+
+class TestExecutionEngine:
+    """测试执行引擎"""
+
+    def __init__(
+        self,
+        runner: Callable[[Dict[str, Any]], Dict[str, Any]] = run_pytest_case,
+        workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retry_times: Optional[int] = None,
+        retry_interval: Optional[float] = None,
+        batch_size: int = DEFAULT_RESULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        start_method: Optional[str] = None
+    ):
+        """初始化执行引擎，未指定的参数取自测试配置
+
+        Args:
+            runner: 在工作进程中执行单个用例的模块级函数，返回包含status的字典
+            workers: 工作进程数
+            timeout: 单个用例的超时时间(秒)
+            retry_times: 失败后的重试次数
+            retry_interval: 第一次重试前的等待时间(秒)，之后每次翻倍
+            batch_size: 每批写入的结果数
+            flush_interval: 结果最长缓存时间(秒)
+            start_method: 工作进程的启动方式，默认由KillablePool按平台选择
+        """
+        self.runner = runner
+        self.workers = workers or configured_workers()
+        self.timeout = timeout if timeout is not None else test_execution_config.timeout
+        self.retry_times = retry_times if retry_times is not None else test_execution_config.retry_times
+        self.retry_interval = (
+            retry_interval if retry_interval is not None else test_execution_config.retry_interval
+        )
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.start_method = start_method
+
+    def plan(
+        self,
+        cases: Sequence[Dict[str, Any]],
+        estimates: Mapping[int, DurationEstimate]
+    ) -> Tuple[WorkStealingScheduler, Dict[str, Any]]:
+        """按估计耗时把用例LPT分片到各工作进程
+
+        Args:
+            cases: case_payload生成的用例数据
+            estimates: 用例ID到耗时估计的映射，没有估计的用例取已知用例的中位数
+
+        Returns:
+            Tuple[WorkStealingScheduler, Dict[str, Any]]: 调度器，以及LPT和轮询分片的预计总耗时
+        """
+        fallback = default_estimate(estimates)
+        costs = [estimates.get(case["id"], fallback).cost() for case in cases]
+        shards = min(self.workers, len(cases))
+        partition = lpt_partition(costs, shards)
+        schedule = {
+            "estimated_cases": sum(1 for case in cases if case["id"] in estimates),
+            "estimated_makespan": round(partition_makespan(partition, costs), 3),
+            "round_robin_makespan": round(partition_makespan(round_robin_partition(len(cases), shards), costs), 3)
+        }
+        return WorkStealingScheduler(partition, costs), schedule
+
+    def execute(
+        self,
+        cases: Sequence[Dict[str, Any]],
+        sink: Callable[[List[Dict[str, Any]]], None],
+        estimates: Optional[Mapping[int, DurationEstimate]] = None,
+        coverage_sink: Optional[Callable[[Dict[int, List[str]]], None]] = None
+    ) -> Dict[str, Any]:
+        """执行一组用例，结果按批次交给sink
+
+        Args:
+            cases: case_payload生成的用例数据
+            sink: 接收一批测试结果的函数
+            estimates: 用例的耗时估计，提供时按LPT分片并允许工作窃取，否则按用例顺序执行
+            coverage_sink: 与sink同时接收这批结果中用例ID到覆盖文件的映射
+
+        Returns:
+            Dict[str, Any]: 执行摘要
+        """
+        scheduler, schedule = self.plan(cases, estimates) if estimates is not None and cases else (None, None)
+        pool = KillablePool(
+            self.runner,
+            workers=self.workers,
+            timeout=self.timeout or None,
+            retry_times=self.retry_times,
+            retry_interval=self.retry_interval,
+            should_retry=should_retry,
+            start_method=self.start_method
+        )
+        statuses: Counter = Counter()
+        retried = timed_out = 0
+        buffer: List[Dict[str, Any]] = []
+        coverage: Dict[int, List[str]] = {}
+        started = last_flush = time.monotonic()
+
+        def flush() -> None:
+            nonlocal buffer, coverage
+            sink(buffer)
+            if coverage_sink and coverage:
+                coverage_sink(coverage)
+            buffer, coverage = [], {}
+
+        for outcome in pool.imap_unordered([(case["id"], case) for case in cases], scheduler):
+            result = outcome_to_result(outcome)
+            statuses[result["status"].value] += 1
+            retried += outcome.attempts > 1
+            timed_out += outcome.timed_out
+            buffer.append(result)
+            touched = _runner_result(outcome).get("touched_files")
+            if touched is not None and result["status"] in COVERAGE_STATUSES:
+                coverage[outcome.key] = touched
+            if len(buffer) >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval:
+                flush()
+                last_flush = time.monotonic()
+        if buffer:
+            flush()
+        summary = {
+            "cases": len(cases),
+            "workers": min(self.workers, len(cases)),
+            "statuses": dict(statuses),
+            "retried": retried,
+            "timed_out": timed_out,
+            "elapsed": round(time.monotonic() - started, 3)
+        }
+        if scheduler is not None:
+            summary["schedule"] = {**schedule, "stolen": scheduler.stolen}
+        return summary
+
+
+def execute_test_run(
+    test_run_id: int,
+    case_ids: Optional[List[int]] = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+    engine: Optional[TestExecutionEngine] = None,
+    resume: bool = False,
+    skip_quarantined: bool = False
+) -> Dict[str, Any]:
+    """执行测试运行，默认执行项目下的全部测试用例，结束后完成运行并生成摘要
+
+    数据库会话只在读取用例和写入每批结果时短暂持有，执行期间不占用连接。
+
+    Args:
+        test_run_id: 测试运行ID
+        case_ids: 要执行的测试用例ID，为空时执行项目下的全部用例
+        session_factory: 创建数据库会话的工厂
+        engine: 执行引擎，默认按测试配置创建
+        resume: 跳过本次运行中已有结果的用例，用于接着执行中断的运行
+        skip_quarantined: 跳过因结果不稳定被隔离的用例，否则只执行一次不重试
+
+    Returns:
+        Dict[str, Any]: 执行摘要
+
+    Raises:
+        NotFoundError: 测试运行不存在
+    """
+    engine = engine or TestExecutionEngine()
+    pytest_args = pytest_args_from_options(test_framework_config.pytest_options)
+    coverage_root = configured_coverage_root()
+    with session_factory() as db:
+        test_run = db.get(TestRun, test_run_id)
+        if test_run is None:
+            raise NotFoundError(f"Test run {test_run_id} not found")
+        statement = select(TestCase).where(TestCase.project_id == test_run.project_id)
+        if case_ids:
+            statement = statement.where(TestCase.id.in_(case_ids))
+        if resume:
+            statement = statement.where(TestCase.id.not_in(
+                select(TestResult.test_case_id).where(
+                    TestResult.test_run_id == test_run_id,
+                    TestResult.test_case_id.is_not(None)
+                )
+            ))
+        project_id = test_run.project_id
+        quarantined = set(quarantined_case_ids(db, project_id))
+        if skip_quarantined and quarantined:
+            statement = statement.where(TestCase.id.not_in(quarantined))
+        cases = [
+            case_payload(test_case, pytest_args, coverage_root, test_case.id in quarantined)
+            for test_case in db.execute(statement.order_by(TestCase.id)).scalars()
+        ]
+        estimates = case_duration_estimates(db, [case["id"] for case in cases])
+
+    def sink(batch: List[Dict[str, Any]]) -> None:
+        with session_factory() as db:
+            test_run = db.get(TestRun, test_run_id)
+            _, errors = TestService._write_results(db, test_run, list(enumerate(batch)))
+        for error in errors:
+            logger.error(f"测试结果写入失败 - 运行:{test_run_id}, 用例:{error['test_case_id']}, 原因:{error['error']}")
+
+    def coverage_sink(coverage: Dict[int, List[str]]) -> None:
+        # 覆盖记录只影响用例选择，失败时不中断执行
+        try:
+            with session_factory() as db:
+                record_coverage(db, project_id, coverage, test_run_id)
+                db.commit()
+        except Exception:
+            logger.exception(f"用例覆盖记录失败 - 运行:{test_run_id}, 用例数:{len(coverage)}")
+
+    logger.info(f"开始执行测试运行 - 运行:{test_run_id}, 用例数:{len(cases)}, 工作进程:{engine.workers}")
+    summary = engine.execute(cases, sink, estimates, coverage_sink if coverage_root else None)
+    with session_factory() as db:
+        complete_test_run(db, test_run_id)
+    summary["test_run_id"] = test_run_id
+    logger.info(f"测试运行执行完成 - {summary}")
+    return summary
@@ -0,0 +1,359 @@
+"""
+失败签名服务模块
+
+写入测试结果时为failed和error的结果计算失败指纹:
+- 同一项目中指纹相同的失败共用一行failure_signatures，结果通过signature_id指向它
+- 签名在结果写入前查出或插入，结果写入后按签名一次累加次数、更新最后出现时间
+- 报告按signature_id分组，成千上万条失败只返回少数几类及各自的样例，不需要传输重复的堆栈
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import Select, bindparam, case, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.utils.failure_fingerprint import FailureFingerprint, fingerprint
+
+from ..models.test_case import TestCase
+from ..models.report import FailureSignature, TestResult
+from ..config.constants import TestStatus
+
+logger = logging.getLogger(__name__)
+
+# 计算失败签名的结果状态
+FAILURE_STATUSES = (TestStatus.FAILED, TestStatus.ERROR)
+
+# 每次查询的指纹数
+FINGERPRINT_QUERY_CHUNK = 500
+
+# 补算签名时每批读取的结果数
+BACKFILL_BATCH_SIZE = 2000
+
+
+def result_fingerprint(row: Dict[str, Any]) -> Optional[FailureFingerprint]:
+    """测试结果行的失败指纹，没有堆栈时从测试输出中提取，非失败状态返回None"""
+    if TestStatus(row["status"]) not in FAILURE_STATUSES:
+        return None
+    return fingerprint(row.get("error_message"), row.get("stack_trace") or row.get("output"))
+
+
+def _signature_ids(db: Session, project_id: int, digests: Iterable[str]) -> Dict[str, int]:
+    """查出指纹对应的failure_signatures.id，不存在的指纹不返回"""
+    digests = sorted(set(digests))
+    ids: Dict[str, int] = {}
+    for start in range(0, len(digests), FINGERPRINT_QUERY_CHUNK):
+        ids.update(db.execute(
+            select(FailureSignature.fingerprint, FailureSignature.id).where(
+                FailureSignature.project_id == project_id,
+                FailureSignature.fingerprint.in_(digests[start:start + FINGERPRINT_QUERY_CHUNK])
+            )
+        ).tuples().all())
+    return ids
+
+
+def _ensure_signatures(db: Session, project_id: int, prints: Dict[str, FailureFingerprint]) -> Dict[str, int]:
+    """查出指纹对应的签名ID，不存在的签名先以0次插入，出现时间由record_signatures设置"""
+    ids = _signature_ids(db, project_id, prints)
+    missing = sorted(prints.keys() - ids.keys())
+    if missing:
+        rows = [
+            {
+                "project_id": project_id,
+                "fingerprint": digest,
+                "exception_type": prints[digest].exception_type,
+                "message": prints[digest].message,
+                "frames": "\n".join(prints[digest].frames) or None,
+                "count": 0
+            }
+            for digest in missing
+        ]
+        try:
+            with db.begin_nested():
+                db.execute(insert(FailureSignature), rows)
+        except IntegrityError:
+            # 其他写入方同时插入了相同的签名，逐个插入仍不存在的签名
+            present = _signature_ids(db, project_id, missing)
+            for row in rows:
+                if row["fingerprint"] in present:
+                    continue
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(FailureSignature).values(**row))
+                except IntegrityError:
+                    pass
+        ids.update(_signature_ids(db, project_id, missing))
+    return ids
+
+
+def assign_signatures(db: Session, project_id: int, rows: Sequence[Dict[str, Any]]) -> None:
+    """为一批待写入的测试结果行设置signature_id，不提交
+
+    Args:
+        db: 数据库会话
+        project_id: 项目ID
+        rows: test_results的行数据，原地设置signature_id
+    """
+    prints: Dict[int, FailureFingerprint] = {}
+    for position, row in enumerate(rows):
+        result_print = result_fingerprint(row)
+        if result_print is not None:
+            prints[position] = result_print
+    if not prints:
+        return
+    ids = _ensure_signatures(db, project_id, {print_.digest: print_ for print_ in prints.values()})
+    for position, result_print in prints.items():
+        rows[position]["signature_id"] = ids.get(result_print.digest)
+
+
+def record_signatures(
+    db: Session,
+    rows: Iterable[Dict[str, Any]],
+    test_run_id: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> int:
+    """按已写入的测试结果行累加签名的出现次数和出现时间，不提交
+
+    Args:
+        db: 数据库会话
+        rows: 已写入的test_results行数据
+        test_run_id: 结果所属的测试运行
+        now: 出现时间，为空时取各结果的started_at
+
+    Returns:
+        int: 更新的签名数
+    """
+    seen: Dict[int, List[Any]] = {}
+    for row in rows:
+        signature_id = row.get("signature_id")
+        if signature_id is None:
+            continue
+        at = now or row.get("started_at") or datetime.utcnow()
+        entry = seen.setdefault(signature_id, [0, at, at])
+        entry[0] += 1
+        entry[1], entry[2] = min(entry[1], at), max(entry[2], at)
+    if not seen:
+        return 0
+
+    # 按ID顺序更新，多个写入方同时更新时不会死锁
+    statement = (
+        update(FailureSignature)
+        .where(FailureSignature.id == bindparam("signature_id"))
+        .values(
+            count=FailureSignature.count + bindparam("seen"),
+            first_seen=case(
+                (or_(FailureSignature.first_seen.is_(None), FailureSignature.first_seen > bindparam("first")),
+                 bindparam("first")),
+                else_=FailureSignature.first_seen
+            ),
+            last_seen=case(
+                (or_(FailureSignature.last_seen.is_(None), FailureSignature.last_seen < bindparam("last")),
+                 bindparam("last")),
+                else_=FailureSignature.last_seen
+            ),
+            last_test_run_id=case(
+                (or_(FailureSignature.last_seen.is_(None), FailureSignature.last_seen <= bindparam("last")),
+                 bindparam("test_run_id")),
+                else_=FailureSignature.last_test_run_id
+            )
+        )
+    )
+    db.connection().execute(statement, [
+        {
+            "signature_id": signature_id, "seen": seen[signature_id][0], "first": seen[signature_id][1],
+            "last": seen[signature_id][2], "test_run_id": test_run_id
+        }
+        for signature_id in sorted(seen)
+    ])
+    return len(seen)
+
+
+def run_failures_statement(test_run_id: int) -> Select:
+    """运行中的失败结果，只取分组需要的列，不读取输出和堆栈"""
+    return (
+        select(TestResult.id, TestResult.signature_id, TestResult.test_case_id, TestCase.name)
+        .join(TestCase, TestCase.id == TestResult.test_case_id)
+        .where(TestResult.test_run_id == test_run_id, TestResult.status.in_(FAILURE_STATUSES))
+        .order_by(TestResult.id)
+    )
+
+
+def signature_document(signature: FailureSignature) -> Dict[str, Any]:
+    """签名转换为接口返回的字段"""
+    return {
+        "id": signature.id,
+        "fingerprint": signature.fingerprint,
+        "exception_type": signature.exception_type,
+        "message": signature.message,
+        "frames": signature.frames.split("\n") if signature.frames else [],
+        "count": signature.count,
+        "first_seen": signature.first_seen,
+        "last_seen": signature.last_seen,
+        "last_test_run_id": signature.last_test_run_id
+    }
+
+
+def failure_clusters(
+    db: Session,
+    test_run_id: int,
+    limit: int = 50,
+    sample_cases: int = 10
+) -> Dict[str, Any]:
+    """按失败签名对测试运行中的失败分组
+
+    每组只返回签名、次数、涉及的用例和一条样例结果的错误信息与堆栈，
+    失败再多也只传输每类一份堆栈。没有签名的失败(没有错误信息和堆栈)归为一组。
+
+    Args:
+        db: 数据库会话
+        test_run_id: 测试运行ID
+        limit: 最多返回的分组数，按失败次数从多到少
+        sample_cases: 每组最多列出的用例数
+
+    Returns:
+        Dict[str, Any]: 失败总数、分组数和分组列表
+    """
+    clusters: Dict[Optional[int], Dict[str, Any]] = {}
+    failures = 0
+    for result_id, signature_id, test_case_id, name in db.execute(run_failures_statement(test_run_id)):
+        failures += 1
+        cluster = clusters.get(signature_id)
+        if cluster is None:
+            cluster = clusters[signature_id] = {
+                "signature": None,
+                "count": 0,
+                "sample_result_id": result_id,
+                "case_ids": set(),
+                "cases": []
+            }
+        cluster["count"] += 1
+        if test_case_id not in cluster["case_ids"]:
+            cluster["case_ids"].add(test_case_id)
+            if len(cluster["cases"]) < sample_cases:
+                cluster["cases"].append({"id": test_case_id, "name": name})
+
+    ranked = sorted(clusters.items(), key=lambda item: (-item[1]["count"], item[1]["sample_result_id"]))[:limit]
+    signature_ids = [signature_id for signature_id, _ in ranked if signature_id is not None]
+    signatures = {
+        signature.id: signature
+        for signature in db.execute(
+            select(FailureSignature).where(FailureSignature.id.in_(signature_ids))
+        ).scalars()
+    } if signature_ids else {}
+    samples = {
+        result_id: (error_message, stack_trace)
+        for result_id, error_message, stack_trace in db.execute(
+            select(TestResult.id, TestResult.error_message, TestResult.stack_trace)
+            .where(TestResult.id.in_([cluster["sample_result_id"] for _, cluster in ranked]))
+        )
+    } if ranked else {}
+
+    items = []
+    for signature_id, cluster in ranked:
+        signature = signatures.get(signature_id)
+        error_message, stack_trace = samples.get(cluster["sample_result_id"], (None, None))
+        items.append({
+            "signature": signature_document(signature) if signature else None,
+            "count": cluster["count"],
+            "case_count": len(cluster["case_ids"]),
+            "cases": cluster["cases"],
+            "sample_result_id": cluster["sample_result_id"],
+            "sample_error_message": error_message,
+            "sample_stack_trace": stack_trace
+        })
+    return {
+        "test_run_id": test_run_id,
+        "failures": failures,
+        "cluster_count": len(clusters),
+        "clusters": items
+    }
+
+
+class FailureSignatureService:
+    """失败签名服务类"""
+
+    @staticmethod
+    async def get_signatures(
+        db: Session,
+        project_id: int,
+        since: Optional[datetime] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """获取项目的失败签名，按最后出现时间倒序
+
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+            since: 只返回该时间之后出现过的签名
+            limit: 最多返回的签名数
+
+        Returns:
+            List[Dict[str, Any]]: 签名列表
+        """
+        statement = select(FailureSignature).where(
+            FailureSignature.project_id == project_id,
+            FailureSignature.count > 0
+        )
+        if since:
+            statement = statement.where(FailureSignature.last_seen >= since)
+        signatures = db.execute(
+            statement.order_by(FailureSignature.last_seen.desc(), FailureSignature.id.desc()).limit(limit)
+        ).scalars()
+        return [signature_document(signature) for signature in signatures]
+
+    @staticmethod
+    def backfill(db: Session, project_id: int, batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, int]:
+        """为项目中还没有签名的失败结果补算签名，每批提交一次
+
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+            batch_size: 每批读取的结果数
+
+        Returns:
+            Dict[str, int]: 处理的结果数和涉及的签名数
+        """
+        last_id = 0
+        results = 0
+        signatures: Set[int] = set()
+        while True:
+            batch = db.execute(
+                select(
+                    TestResult.id, TestResult.test_run_id, TestResult.status, TestResult.started_at,
+                    TestResult.output, TestResult.error_message, TestResult.stack_trace
+                )
+                .join(TestCase, TestCase.id == TestResult.test_case_id)
+                .where(
+                    TestCase.project_id == project_id,
+                    TestResult.id > last_id,
+                    TestResult.status.in_(FAILURE_STATUSES),
+                    TestResult.signature_id.is_(None)
+                )
+                .order_by(TestResult.id)
+                .limit(batch_size)
+            ).mappings().all()
+            if not batch:
+                break
+            last_id = batch[-1]["id"]
+            rows = [dict(row) for row in batch]
+            assign_signatures(db, project_id, rows)
+            rows = [row for row in rows if row.get("signature_id") is not None]
+            if rows:
+                db.connection().execute(
+                    update(TestResult)
+                    .where(TestResult.id == bindparam("result_id"))
+                    .values(signature_id=bindparam("new_signature_id")),
+                    [{"result_id": row["id"], "new_signature_id": row["signature_id"]} for row in rows]
+                )
+                by_run: Dict[Optional[int], List[Dict[str, Any]]] = defaultdict(list)
+                for row in rows:
+                    by_run[row["test_run_id"]].append(row)
+                for test_run_id, run_rows in sorted(by_run.items(), key=lambda item: item[0] or 0):
+                    record_signatures(db, run_rows, test_run_id)
+                signatures.update(row["signature_id"] for row in rows)
+            db.commit()
+            results += len(batch)
+        logger.info(f"失败签名补算完成 - 项目:{project_id}, 结果:{results}, 签名:{len(signatures)}")
+        return {"results": results, "signatures": len(signatures)}
@@ -0,0 +1,257 @@
+"""
+测试用例不稳定度服务模块
+
+每写入一批测试结果时增量更新test_case_flakiness:
+- 只统计passed和failed/error，skipped等状态不影响不稳定度
+- 每个用例只读写一行，每个结果的更新为O(1)，不需要扫描test_results
+- 翻转率达到阈值的用例进入隔离列表，执行时不再重试(重试会掩盖不稳定)，也可以选择跳过
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.utils.flakiness import FlakinessWindow
+
+from ..models.test_case import TestCase
+from ..models.report import TestCaseFlakiness, TestResult
+from ..config.constants import TestStatus
+from ..core.exceptions import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+# 计入不稳定度的结果状态，值表示是否失败
+OUTCOME_STATUSES = {
+    TestStatus.PASSED: False,
+    TestStatus.FAILED: True,
+    TestStatus.ERROR: True,
+}
+
+# 重建时每次读取的结果数
+REBUILD_BATCH_SIZE = 5000
+
+
+def _window(row: TestCaseFlakiness) -> FlakinessWindow:
+    return FlakinessWindow(bits=row.bits, size=row.samples, failures=row.failures, transitions=row.transitions)
+
+
+def _locked_rows(db: Session, case_ids: Sequence[int]) -> Dict[int, TestCaseFlakiness]:
+    """按用例ID顺序锁定不稳定度行，多个写入方同时更新时不会死锁"""
+    return {
+        row.test_case_id: row
+        for row in db.execute(
+            select(TestCaseFlakiness)
+            .where(TestCaseFlakiness.test_case_id.in_(case_ids))
+            .order_by(TestCaseFlakiness.test_case_id)
+            .with_for_update()
+        ).scalars()
+    }
+
+
+def record_outcomes(
+    db: Session,
+    results: Sequence[Tuple[int, TestStatus]],
+    now: Optional[datetime] = None
+) -> List[int]:
+    """按顺序把一批测试结果计入不稳定度，不提交
+
+    Args:
+        db: 数据库会话
+        results: (测试用例ID, 状态)列表，同一用例的多个结果按先后顺序排列
+        now: 更新时间
+
+    Returns:
+        List[int]: 本批结果导致新进入隔离的测试用例ID
+    """
+    outcomes = [
+        (test_case_id, OUTCOME_STATUSES[TestStatus(status)])
+        for test_case_id, status in results
+        if test_case_id is not None and TestStatus(status) in OUTCOME_STATUSES
+    ]
+    if not outcomes:
+        return []
+    now = now or datetime.utcnow()
+    case_ids = sorted({test_case_id for test_case_id, _ in outcomes})
+
+    rows = _locked_rows(db, case_ids)
+    missing = [test_case_id for test_case_id in case_ids if test_case_id not in rows]
+    if missing:
+        # 项目ID取自测试用例，已删除的用例不会插入
+        statement = insert(TestCaseFlakiness).from_select(
+            ["test_case_id", "project_id", "bits", "samples", "failures", "transitions", "score", "quarantined",
+             "updated_at"],
+            select(
+                TestCase.id, TestCase.project_id, literal(0), literal(0), literal(0), literal(0), literal(0.0),
+                literal(False), literal(now)
+            )
+            .where(TestCase.id.in_(missing))
+        )
+        try:
+            with db.begin_nested():
+                db.execute(statement)
+        except IntegrityError:
+            # 其他写入方同时插入了相同的用例，锁定已存在的行即可
+            pass
+        rows.update(_locked_rows(db, missing))
+
+    windows = {test_case_id: _window(row) for test_case_id, row in rows.items()}
+    for test_case_id, failed in outcomes:
+        if test_case_id in windows:
+            windows[test_case_id].push(failed)
+
+    quarantined = []
+    for test_case_id, window in windows.items():
+        row = rows[test_case_id]
+        row.bits, row.samples = window.bits, window.size
+        row.failures, row.transitions = window.failures, window.transitions
+        row.score = round(window.flip_rate, 4)
+        row.updated_at = now
+        quarantine = window.quarantine(row.quarantined)
+        if quarantine and not row.quarantined:
+            row.quarantined_at = now
+            quarantined.append(test_case_id)
+        elif row.quarantined and not quarantine:
+            logger.info(f"测试用例解除隔离 - 用例:{test_case_id}, 翻转率:{row.score}")
+        row.quarantined = quarantine
+    if quarantined:
+        logger.warning(f"测试用例因结果不稳定被隔离 - 用例:{quarantined}")
+    db.flush()
+    return quarantined
+
+
+def quarantined_case_ids(db: Session, project_id: int) -> List[int]:
+    """项目中已隔离的测试用例ID"""
+    return list(db.execute(
+        select(TestCaseFlakiness.test_case_id).where(
+            TestCaseFlakiness.project_id == project_id,
+            TestCaseFlakiness.quarantined.is_(True)
+        )
+    ).scalars())
+
+
+def flakiness_document(row: TestCaseFlakiness, name: Optional[str] = None) -> Dict[str, Any]:
+    """不稳定度行转换为接口返回的字段，history从旧到新，P表示通过，F表示失败"""
+    window = _window(row)
+    return {
+        "test_case_id": row.test_case_id,
+        "name": name,
+        "score": row.score,
+        "failure_rate": round(window.failure_rate, 4),
+        "samples": row.samples,
+        "failures": row.failures,
+        "transitions": row.transitions,
+        "history": "".join("F" if failed else "P" for failed in window.history()),
+        "quarantined": row.quarantined,
+        "quarantined_at": row.quarantined_at,
+        "updated_at": row.updated_at
+    }
+
+
+class FlakinessService:
+    """测试用例不稳定度服务类"""
+
+    @staticmethod
+    async def get_flaky_cases(
+        db: Session,
+        project_id: int,
+        quarantined_only: bool = False,
+        min_score: float = 0.0,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """获取项目中的不稳定用例，按翻转率从高到低排列
+
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+            quarantined_only: 是否只返回已隔离的用例
+            min_score: 最低翻转率
+            limit: 最多返回的用例数
+
+        Returns:
+            Dict[str, Any]: 已隔离的用例数和用例列表
+        """
+        conditions = [TestCaseFlakiness.project_id == project_id, TestCaseFlakiness.score >= min_score]
+        if quarantined_only:
+            conditions.append(TestCaseFlakiness.quarantined.is_(True))
+        rows = db.execute(
+            select(TestCaseFlakiness, TestCase.name)
+            .join(TestCase, TestCase.id == TestCaseFlakiness.test_case_id)
+            .where(*conditions)
+            .order_by(TestCaseFlakiness.score.desc(), TestCaseFlakiness.test_case_id)
+            .limit(limit)
+        ).all()
+        quarantined = db.execute(
+            select(func.count()).select_from(TestCaseFlakiness).where(
+                TestCaseFlakiness.project_id == project_id,
+                TestCaseFlakiness.quarantined.is_(True)
+            )
+        ).scalar_one()
+        return {
+            "quarantined": quarantined,
+            "items": [flakiness_document(row, name) for row, name in rows]
+        }
+
+    @staticmethod
+    async def get_case_flakiness(db: Session, test_case_id: int) -> Dict[str, Any]:
+        """获取单个测试用例的不稳定度
+
+        Raises:
+            NotFoundError: 测试用例还没有计入任何结果
+        """
+        row = db.get(TestCaseFlakiness, test_case_id)
+        if row is None:
+            raise NotFoundError(f"No flakiness data for test case {test_case_id}")
+        return flakiness_document(row)
+
+    @staticmethod
+    def rebuild(db: Session, project_id: int) -> Dict[str, int]:
+        """按时间顺序回放项目的全部历史结果，重新生成不稳定度
+
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+
+        Returns:
+            Dict[str, int]: 回放的结果数、用例数和隔离的用例数
+        """
+        db.execute(delete(TestCaseFlakiness).where(TestCaseFlakiness.project_id == project_id))
+        windows: Dict[int, FlakinessWindow] = {}
+        replayed = 0
+        history = db.execute(
+            select(TestResult.test_case_id, TestResult.status)
+            .join(TestCase, TestCase.id == TestResult.test_case_id)
+            .where(TestCase.project_id == project_id, TestResult.status.in_(list(OUTCOME_STATUSES)))
+            .order_by(TestResult.started_at, TestResult.id)
+            .execution_options(yield_per=REBUILD_BATCH_SIZE)
+        )
+        for test_case_id, status in history:
+            windows.setdefault(test_case_id, FlakinessWindow()).push(OUTCOME_STATUSES[status])
+            replayed += 1
+
+        now = datetime.utcnow()
+        rows = []
+        for test_case_id, window in windows.items():
+            quarantined = window.quarantine(False)
+            rows.append({
+                "test_case_id": test_case_id,
+                "project_id": project_id,
+                "bits": window.bits,
+                "samples": window.size,
+                "failures": window.failures,
+                "transitions": window.transitions,
+                "score": round(window.flip_rate, 4),
+                "quarantined": quarantined,
+                "quarantined_at": now if quarantined else None,
+                "updated_at": now
+            })
+        for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+            db.execute(insert(TestCaseFlakiness), rows[start:start + REBUILD_BATCH_SIZE])
+        db.commit()
+        return {
+            "results": replayed,
+            "cases": len(rows),
+            "quarantined": sum(1 for row in rows if row["quarantined"])
+        }
@@ -0,0 +1,274 @@
+"""
+变更影响分析模块
+
+执行测试用例时由pytest-cov记录其执行到的源码文件，保存为两份压缩位图索引:
+- impact_paths: 每个文件被哪些测试用例覆盖，用于按变更文件查找受影响的用例
+- test_case_impacts: 每个测试用例覆盖了哪些文件，重新记录时据此从不再覆盖的文件中移除该用例
+给定git diff时，只选择覆盖了变更文件的用例，并加入以下用例作为安全余量:
+- 还没有记录过覆盖的用例
+- critical优先级的用例
+- 不稳定度达到隔离阈值或已被隔离的用例(test_case_flakiness)
+变更了构建和测试配置文件(如conftest.py、requirements.txt)时无法判断影响范围，选择全部用例。
+"""
+import fnmatch
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.utils.bitmap import RoaringBitmap
+from core.utils.flakiness import QUARANTINE_SCORE
+
+from ..models.test_case import ImpactPath, TestCase, TestCaseImpact
+from ..models.report import TestCaseFlakiness
+from ..config.constants import TestPriority
+
+logger = logging.getLogger(__name__)
+
+# 变更后需要执行全部用例的文件
+FULL_RUN_PATTERNS = (
+    "conftest.py", "pytest.ini", "tox.ini", "setup.py", "setup.cfg", "pyproject.toml",
+    "requirements*.txt", ".env*", "alembic.ini"
+)
+
+# 不影响测试结果的文件
+IGNORED_PATTERNS = ("*.md", "*.rst", "docs/*", "LICENSE*", ".gitignore")
+
+# 每次查询的路径数
+PATH_QUERY_CHUNK = 500
+
+# git diff中的文件头
+_DIFF_GIT_HEADER = re.compile(r"^diff --git a/(.+?) b/(.+)$")
+_DIFF_FILE_HEADER = re.compile(r"^(?:---|\+\+\+) (?:[ab]/)?(.+?)\t?$")
+
+
+def parse_diff_paths(diff: str) -> List[str]:
+    """从git diff中提取变更的文件路径，重命名时新旧路径都计入
+
+    Args:
+        diff: git diff的输出，也可以是git diff --name-only的输出
+
+    Returns:
+        List[str]: 去重后的路径，保持出现顺序
+    """
+    paths: Dict[str, None] = {}
+    unified = False
+    in_hunk = False
+    for line in diff.splitlines():
+        header = _DIFF_GIT_HEADER.match(line)
+        if header:
+            unified, in_hunk = True, False
+            paths.update(dict.fromkeys(header.groups()))
+        elif line.startswith("@@"):
+            in_hunk = True
+        elif not in_hunk and line.startswith(("--- ", "+++ ")):
+            # 只解析文件头，变更内容中以---开头的行不是路径
+            unified = True
+            file_header = _DIFF_FILE_HEADER.match(line)
+            if file_header and file_header.group(1) != "/dev/null":
+                paths[file_header.group(1)] = None
+    if not unified:
+        paths = dict.fromkeys(line.strip() for line in diff.splitlines() if line.strip())
+    return list(paths)
+
+
+def _matches(path: str, patterns: Iterable[str]) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _path_ids(db: Session, project_id: int, paths: Iterable[str]) -> Dict[str, int]:
+    """查出路径对应的impact_paths.id，不存在的路径不返回"""
+    ids: Dict[str, int] = {}
+    for chunk in _chunks(sorted(set(paths)), PATH_QUERY_CHUNK):
+        ids.update(db.execute(
+            select(ImpactPath.path, ImpactPath.id)
+            .where(ImpactPath.project_id == project_id, ImpactPath.path.in_(chunk))
+        ).tuples().all())
+    return ids
+
+
+def _ensure_paths(db: Session, project_id: int, paths: Set[str], now: datetime) -> Dict[str, int]:
+    """查出路径对应的impact_paths.id，不存在的路径先插入"""
+    ids = _path_ids(db, project_id, paths)
+    missing = sorted(paths - ids.keys())
+    if missing:
+        try:
+            with db.begin_nested():
+                db.execute(insert(ImpactPath), [
+                    {"project_id": project_id, "path": path, "cases": b"", "updated_at": now}
+                    for path in missing
+                ])
+        except IntegrityError:
+            # 其他执行机同时插入了相同的路径，逐个插入仍不存在的路径
+            present = _path_ids(db, project_id, missing)
+            for path in missing:
+                if path in present:
+                    continue
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(ImpactPath).values(
+                            project_id=project_id, path=path, cases=b"", updated_at=now
+                        ))
+                except IntegrityError:
+                    pass
+        ids.update(_path_ids(db, project_id, missing))
+    return ids
+
+
+def record_coverage(
+    db: Session,
+    project_id: int,
+    coverage: Mapping[int, Sequence[str]],
+    test_run_id: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """记录一批测试用例本次执行覆盖的文件，替换其之前的记录，不提交
+
+    Args:
+        db: 数据库会话
+        project_id: 项目ID
+        coverage: 测试用例ID到覆盖文件路径的映射
+        test_run_id: 本次执行所属的测试运行
+        now: 记录时间
+
+    Returns:
+        Dict[str, int]: 记录的用例数和索引发生变化的文件数
+    """
+    if not coverage:
+        return {"cases": 0, "paths": 0}
+    now = now or datetime.utcnow()
+    path_ids = _ensure_paths(db, project_id, {path for paths in coverage.values() for path in paths}, now)
+
+    previous = {
+        impact.test_case_id: impact
+        for impact in db.execute(
+            select(TestCaseImpact).where(TestCaseImpact.test_case_id.in_(list(coverage)))
+        ).scalars()
+    }
+    added: Dict[int, List[int]] = defaultdict(list)
+    removed: Dict[int, List[int]] = defaultdict(list)
+    for test_case_id, paths in coverage.items():
+        current = RoaringBitmap(path_ids[path] for path in paths)
+        impact = previous.get(test_case_id)
+        if impact is None:
+            db.add(TestCaseImpact(
+                test_case_id=test_case_id,
+                project_id=project_id,
+                paths=current.to_bytes(),
+                test_run_id=test_run_id,
+                recorded_at=now
+            ))
+            old = RoaringBitmap()
+        else:
+            old = RoaringBitmap.from_bytes(impact.paths)
+            impact.paths = current.to_bytes()
+            impact.test_run_id = test_run_id
+            impact.recorded_at = now
+        for path_id in current - old:
+            added[path_id].append(test_case_id)
+        for path_id in old - current:
+            removed[path_id].append(test_case_id)
+
+    changed = sorted(added.keys() | removed.keys())
+    # 按ID顺序加锁，多台执行机同时更新时不会死锁
+    for chunk in _chunks(changed, PATH_QUERY_CHUNK):
+        rows = db.execute(
+            select(ImpactPath).where(ImpactPath.id.in_(chunk)).order_by(ImpactPath.id).with_for_update()
+        ).scalars()
+        for row in rows:
+            cases = RoaringBitmap.from_bytes(row.cases)
+            cases.update(added.get(row.id, ()))
+            for test_case_id in removed.get(row.id, ()):
+                cases.discard(test_case_id)
+            row.cases = cases.to_bytes()
+            row.updated_at = now
+    db.flush()
+    return {"cases": len(coverage), "paths": len(changed)}
+
+
+class ImpactService:
+    """变更影响分析服务类"""
+
+    @staticmethod
+    async def select_cases(
+        db: Session,
+        project_id: int,
+        changed_paths: Sequence[str],
+        include_critical: bool = True,
+        include_flaky: bool = True
+    ) -> Dict[str, Any]:
+        """根据变更的文件选择需要执行的测试用例
+
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+            changed_paths: 相对仓库根目录的变更文件路径
+            include_critical: 是否加入critical优先级的用例
+            include_flaky: 是否加入结果不稳定的用例
+
+        Returns:
+            Dict[str, Any]: 选中的用例ID、全部用例数、各来源的用例数、索引中没有的变更文件，
+                以及是否因配置文件变更而选择了全部用例
+        """
+        all_cases = RoaringBitmap(db.execute(
+            select(TestCase.id).where(TestCase.project_id == project_id)
+        ).scalars())
+        paths = [path for path in dict.fromkeys(changed_paths) if not _matches(path, IGNORED_PATTERNS)]
+        full_run = any(_matches(path, FULL_RUN_PATTERNS) for path in paths)
+
+        affected = RoaringBitmap()
+        indexed: Set[str] = set()
+        if paths and not full_run:
+            for chunk in _chunks(paths, PATH_QUERY_CHUNK):
+                for path, cases in db.execute(
+                    select(ImpactPath.path, ImpactPath.cases)
+                    .where(ImpactPath.project_id == project_id, ImpactPath.path.in_(chunk))
+                ).tuples():
+                    indexed.add(path)
+                    affected |= RoaringBitmap.from_bytes(cases)
+            affected &= all_cases
+
+        # 没有覆盖记录的用例无法判断是否受影响
+        unrecorded = all_cases - RoaringBitmap(db.execute(
+            select(TestCaseImpact.test_case_id).where(TestCaseImpact.project_id == project_id)
+        ).scalars())
+        critical = RoaringBitmap(db.execute(
+            select(TestCase.id).where(
+                TestCase.project_id == project_id,
+                TestCase.priority == TestPriority.CRITICAL
+            )
+        ).scalars()) if include_critical else RoaringBitmap()
+        flaky = RoaringBitmap(db.execute(
+            select(TestCaseFlakiness.test_case_id).where(
+                TestCaseFlakiness.project_id == project_id,
+                or_(TestCaseFlakiness.quarantined.is_(True), TestCaseFlakiness.score >= QUARANTINE_SCORE)
+            )
+        ).scalars()) if include_flaky else RoaringBitmap()
+
+        selected = all_cases.copy() if full_run else affected | unrecorded | critical | flaky
+        return {
+            "project_id": project_id,
+            "full_run": full_run,
+            "total_cases": len(all_cases),
+            "selected_cases": len(selected),
+            "case_ids": list(selected),
+            "reasons": {
+                "affected": len(affected),
+                "unrecorded": len(unrecorded),
+                "critical": len(critical),
+                "flaky": len(flaky)
+            },
+            "changed_paths": paths,
+            "unindexed_paths": [path for path in paths if path not in indexed] if not full_run else []
+        }
@@ -5,7 +5,8 @@
 """
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+
+from core.database.fulltext import fulltext_match
 
 from ..models.project import Project
 from ..models.user import User
@@ -51,17 +52,19 @@ async def get_projects(
         limit: int = 10,
         search: Optional[str] = None
     ) -> List[Project]:
-        """获取项目列表"""
+        """获取项目列表，搜索时按相关度倒序，名称命中的项目排在前面"""
         query = db.query(Project)
         
-        # 搜索
-        if search:
-            query = query.filter(
-                or_(
-                    Project.name.ilike(f"%{search}%"),
-                    Project.description.ilike(f"%{search}%")
-                )
-            )
+        # 全文检索
+        matched = fulltext_match(
+            db.get_bind().dialect.name,
+            [Project.name, Project.description],
+            search,
+            boost_column=Project.name
+        )
+        if matched is not None:
+            condition, score = matched
+            query = query.filter(condition).order_by(score.desc(), Project.id.desc())
         
         # 分页
         return query.offset(skip).limit(limit).all()
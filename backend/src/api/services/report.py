@@ -3,14 +3,241 @@
 
 处理测试报告相关的业务逻辑
 """
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import json
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Dict, Any, Sequence
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import Select, func, select
 
+from core.database.query_plan import register_hot_query
+from core.database.session import SessionLocal
+from core.utils.pagination import apply_keyset, encode_cursor
+from core.utils.time_buckets import INTERVAL_DAYS, choose_bucket_width, downsample
+
+from ..models.test_case import TestCase
 from ..models.report import TestRun, TestResult
-from ..core.exceptions import NotFoundError
+from ..core.exceptions import NotFoundError, ValidationError
 from ..config.constants import TestStatus
+from ..config.test_config import test_settings
+from .failure_signature import failure_clusters, run_failures_statement
+from .run_summary import get_run_summary
+from .test import test_results_statement
+
+
+# 项目统计中汇总的测试运行计数列
+PROJECT_COUNT_COLUMNS = ("total_cases", "passed_cases", "failed_cases", "error_cases", "skipped_cases")
+
+
+def _project_runs_filter(
+    project_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> List[Any]:
+    """项目在时间范围内的测试运行的过滤条件"""
+    conditions = [TestRun.project_id == project_id]
+    if start_date:
+        conditions.append(TestRun.started_at >= start_date)
+    if end_date:
+        conditions.append(TestRun.started_at <= end_date)
+    return conditions
+
+
+def _count_sums() -> List[Any]:
+    return [func.coalesce(func.sum(getattr(TestRun, column)), 0).label(column) for column in PROJECT_COUNT_COLUMNS]
+
+
+def project_totals_statement(
+    project_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Select:
+    """项目在时间范围内的运行数、各计数之和以及最早和最晚的开始时间，只返回一行"""
+    return select(
+        func.count(TestRun.id).label("total_runs"),
+        *_count_sums(),
+        func.min(TestRun.started_at).label("first_started_at"),
+        func.max(TestRun.started_at).label("last_started_at")
+    ).where(*_project_runs_filter(project_id, start_date, end_date))
+
+
+def project_daily_statement(
+    project_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Select:
+    """项目在时间范围内按开始日期分组的运行数和各计数之和，每天一行"""
+    day = func.date(TestRun.started_at)
+    return (
+        select(day.label("day"), func.count(TestRun.id).label("total_runs"), *_count_sums())
+        .where(*_project_runs_filter(project_id, start_date, end_date), TestRun.started_at.is_not(None))
+        .group_by(day)
+        .order_by(day)
+    )
+
+
+def _as_date(value: Any) -> date:
+    """DATE()的结果转换为date，SQLite返回字符串"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _success_rate(passed: int, total: int) -> float:
+    return round(passed / total * 100, 2) if total > 0 else 0
+
+
+# 测试运行详情中结果可选的字段，id总是返回
+DETAIL_FIELDS = (
+    "test_case", "status", "started_at", "completed_at", "duration",
+    "output", "error_message", "stack_trace", "test_data", "payload_refs"
+)
+
+# 流式输出详情时每批读取的结果数
+DETAIL_BATCH_SIZE = 500
+
+
+def parse_detail_fields(fields: Optional[str]) -> Sequence[str]:
+    """解析逗号分隔的详情字段，为空时返回全部字段
+
+    Raises:
+        ValidationError: 包含不支持的字段
+    """
+    if not fields:
+        return DETAIL_FIELDS
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in DETAIL_FIELDS]
+    if unknown:
+        raise ValidationError(f"Unsupported fields: {', '.join(unknown)}")
+    return [field for field in DETAIL_FIELDS if field in selected]
+
+
+def run_details_statement(
+    test_run_id: int,
+    status: Optional[TestStatus] = None,
+    fields: Sequence[str] = DETAIL_FIELDS
+) -> Select:
+    """测试运行详情的投影查询，只读取所选字段，测试用例字段通过连接读取，不含排序和分页
+
+    started_at总是读取，用于键集分页。
+    """
+    columns = [TestResult.id, TestResult.started_at]
+    columns += [getattr(TestResult, field) for field in fields if field not in ("test_case", "started_at")]
+    if "test_case" in fields:
+        columns += [
+            TestResult.test_case_id,
+            TestCase.name.label("test_case_name"),
+            TestCase.type.label("test_case_type"),
+            TestCase.priority.label("test_case_priority")
+        ]
+    statement = select(*columns).where(TestResult.test_run_id == test_run_id)
+    if "test_case" in fields:
+        statement = statement.outerjoin(TestCase, TestCase.id == TestResult.test_case_id)
+    if status:
+        statement = statement.where(TestResult.status == status)
+    return statement
+
+
+def detail_document(row: Any, fields: Sequence[str] = DETAIL_FIELDS) -> Dict[str, Any]:
+    """投影查询的一行转换为详情中的一个结果"""
+    values = row._mapping
+    document: Dict[str, Any] = {"id": values["id"]}
+    for field in fields:
+        if field != "test_case":
+            document[field] = values[field]
+        elif values["test_case_id"] is None:
+            document["test_case"] = None
+        else:
+            document["test_case"] = {
+                "id": values["test_case_id"],
+                "name": values["test_case_name"],
+                "type": values["test_case_type"],
+                "priority": values["test_case_priority"]
+            }
+    return document
+
+
+def iter_run_details(
+    test_run_id: int,
+    status: Optional[TestStatus] = None,
+    fields: Sequence[str] = DETAIL_FIELDS,
+    session_factory: Callable[[], Session] = SessionLocal,
+    batch_size: int = DETAIL_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """按(started_at, id)倒序分批读取测试运行详情，每批使用短查询，不在输出期间占用连接
+
+    Yields:
+        Dict[str, Any]: 详情中的一个结果
+    """
+    statement = run_details_statement(test_run_id, status, fields)
+    cursor = None
+    while True:
+        db = session_factory()
+        try:
+            rows = db.execute(apply_keyset(statement, TestResult.started_at, TestResult.id, batch_size, cursor)).all()
+        finally:
+            db.close()
+        for row in rows[:batch_size]:
+            yield detail_document(row, fields)
+        if len(rows) <= batch_size:
+            return
+        last = rows[batch_size - 1]
+        cursor = encode_cursor(last.started_at, last.id)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_details_json(
+    summary: Dict[str, Any],
+    results: Iterable[Dict[str, Any]],
+    batch_size: int = DETAIL_BATCH_SIZE
+) -> Iterator[bytes]:
+    """把详情逐批编码为{"summary": ..., "results": [...]}形式的JSON，不在内存中拼接整个响应"""
+    yield b'{"summary":' + json.dumps(summary, ensure_ascii=False, default=_json_default).encode("utf-8")
+    yield b',"results":['
+    items: List[str] = []
+    separator = ""
+    for result in results:
+        items.append(json.dumps(result, ensure_ascii=False, default=_json_default))
+        if len(items) >= batch_size:
+            yield (separator + ",".join(items)).encode("utf-8")
+            items, separator = [], ","
+    if items:
+        yield (separator + ",".join(items)).encode("utf-8")
+    yield b"]}"
+
+
+@register_hot_query("reports.project_totals")
+def _project_totals_in_range() -> Select:
+    return project_totals_statement(1, datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+
+@register_hot_query("reports.project_daily")
+def _project_daily_in_range() -> Select:
+    return project_daily_statement(1, datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+
+@register_hot_query("reports.run_results_by_status")
+def _run_results_by_status() -> Select:
+    return test_results_statement(1, TestStatus.FAILED)
+
+
+@register_hot_query("reports.run_details")
+def _run_details_page() -> Select:
+    return apply_keyset(
+        run_details_statement(1), TestResult.started_at, TestResult.id, DETAIL_BATCH_SIZE,
+        encode_cursor(datetime(2024, 1, 1), 1000)
+    )
+
+
+@register_hot_query("reports.run_failures")
+def _run_failures() -> Select:
+    return run_failures_statement(1)
 
 
 class ReportService:
@@ -18,12 +245,20 @@ class ReportService:
 
     @staticmethod
     async def get_test_run_summary(db: Session, test_run_id: int) -> Dict[str, Any]:
-        """获取测试运行摘要"""
+        """获取测试运行摘要
+        
+        已完成的运行返回完成时生成的摘要(通常只需一次缓存读取)，未完成的运行按当前计数返回。
+        """
+        summary = get_run_summary(db, test_run_id)
+        if summary is not None:
+            return summary
+        
         test_run = db.query(TestRun).filter(TestRun.id == test_run_id).first()
         if not test_run:
             raise NotFoundError(f"Test run {test_run_id} not found")
         
         return {
+            "materialized": False,
             "id": test_run.id,
             "name": test_run.name,
             "description": test_run.description,
@@ -53,95 +288,129 @@ async def get_test_run_summary(db: Session, test_run_id: int) -> Dict[str, Any]:
     async def get_test_run_details(
         db: Session,
         test_run_id: int,
-        status: Optional[TestStatus] = None
+        status: Optional[TestStatus] = None,
+        fields: Sequence[str] = DETAIL_FIELDS
     ) -> Dict[str, Any]:
-        """获取测试运行详情"""
-        # 获取测试运行摘要
-        summary = await ReportService.get_test_run_summary(db, test_run_id)
-        
-        # 查询测试结果
-        query = db.query(TestResult).filter(TestResult.test_run_id == test_run_id)
-        if status:
-            query = query.filter(TestResult.status == status)
+        """获取测试运行详情
         
-        results = []
-        for result in query.all():
-            results.append({
-                "id": result.id,
-                "test_case": {
-                    "id": result.test_case.id,
-                    "name": result.test_case.name,
-                    "type": result.test_case.type,
-                    "priority": result.test_case.priority
-                },
-                "status": result.status,
-                "started_at": result.started_at,
-                "completed_at": result.completed_at,
-                "duration": result.duration,
-                "output": result.output,
-                "error_message": result.error_message,
-                "stack_trace": result.stack_trace,
-                "test_data": result.test_data
-            })
+        用一条投影查询连接测试用例的所需列，不逐行加载关联对象。结果较多时应使用
+        iter_run_details和iter_details_json流式输出。
         
+        Args:
+            db: 数据库会话
+            test_run_id: 测试运行ID
+            status: 只返回该状态的结果
+            fields: 结果中返回的字段，见DETAIL_FIELDS
+            
+        Returns:
+            Dict[str, Any]: 摘要和结果列表
+        """
+        summary = await ReportService.get_test_run_summary(db, test_run_id)
+        statement = (
+            run_details_statement(test_run_id, status, fields)
+            .order_by(TestResult.started_at.desc(), TestResult.id.desc())
+            .execution_options(yield_per=DETAIL_BATCH_SIZE)
+        )
         return {
             "summary": summary,
-            "results": results
+            "results": [detail_document(row, fields) for row in db.execute(statement)]
         }
 
+    @staticmethod
+    async def get_failure_clusters(
+        db: Session,
+        test_run_id: int,
+        limit: int = 50,
+        sample_cases: int = 10
+    ) -> Dict[str, Any]:
+        """按失败签名对测试运行中的失败分组
+        
+        每组只返回签名、次数、涉及的用例和一条样例结果的错误信息与堆栈，
+        失败再多也只传输每类一份堆栈。没有签名的失败(没有错误信息和堆栈)归为一组。
+        
+        Args:
+            db: 数据库会话
+            test_run_id: 测试运行ID
+            limit: 最多返回的分组数，按失败次数从多到少
+            sample_cases: 每组最多列出的用例数
+            
+        Returns:
+            Dict[str, Any]: 失败总数、分组数和分组列表
+        """
+        if db.get(TestRun, test_run_id) is None:
+            raise NotFoundError(f"Test run {test_run_id} not found")
+        return failure_clusters(db, test_run_id, limit=limit, sample_cases=sample_cases)
+
     @staticmethod
     async def get_project_statistics(
         db: Session,
         project_id: int,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        interval: Optional[str] = None,
+        max_points: Optional[int] = None
     ) -> Dict[str, Any]:
-        """获取项目统计信息"""
-        # 构建查询
-        query = db.query(TestRun).filter(TestRun.project_id == project_id)
-        
-        if start_date:
-            query = query.filter(TestRun.started_at >= start_date)
-        if end_date:
-            query = query.filter(TestRun.started_at <= end_date)
-        
-        test_runs = query.order_by(desc(TestRun.started_at)).all()
-        
-        # 统计数据
-        total_runs = len(test_runs)
-        total_cases = sum(run.total_cases for run in test_runs)
-        passed_cases = sum(run.passed_cases for run in test_runs)
-        failed_cases = sum(run.failed_cases for run in test_runs)
-        error_cases = sum(run.error_cases for run in test_runs)
-        skipped_cases = sum(run.skipped_cases for run in test_runs)
-        
-        return {
-            "total_runs": total_runs,
-            "total_cases": total_cases,
+        """获取项目统计信息
+
+        合计用一次聚合查询得到，趋势由数据库按天分组后合并为按天或按周的桶，
+        运行再多也只传输每天一行，趋势最多返回max_points个点。
+
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+            start_date: 开始时间
+            end_date: 结束时间
+            interval: 趋势的间隔，day或week，为空时按时间范围自动选择
+            max_points: 趋势最多的点数，默认为TEST_REPORT_TREND_MAX_POINTS，
+                超过时按间隔的整数倍加宽每个点
+
+        Returns:
+            Dict[str, Any]: 合计、各状态统计和趋势，趋势的每个点为一个桶的合计
+
+        Raises:
+            ValidationError: 不支持的间隔或点数
+        """
+        max_points = max_points or test_settings.TEST_REPORT_TREND_MAX_POINTS
+        if interval is not None and interval not in INTERVAL_DAYS:
+            raise ValidationError(f"Unsupported interval: {interval}")
+        if max_points < 1:
+            raise ValidationError("max_points must be at least 1")
+
+        totals = db.execute(project_totals_statement(project_id, start_date, end_date)).one()
+        statistics = {
+            "project_id": project_id,
+            "total_runs": totals.total_runs,
+            "total_cases": totals.total_cases,
             "statistics": {
-                "passed": passed_cases,
-                "failed": failed_cases,
-                "error": error_cases,
-                "skipped": skipped_cases,
-                "success_rate": (
-                    round(passed_cases / total_cases * 100, 2)
-                    if total_cases > 0
-                    else 0
-                )
+                "passed": totals.passed_cases,
+                "failed": totals.failed_cases,
+                "error": totals.error_cases,
+                "skipped": totals.skipped_cases,
+                "success_rate": _success_rate(totals.passed_cases, totals.total_cases)
             },
-            "trend": [
-                {
-                    "id": run.id,
-                    "name": run.name,
-                    "started_at": run.started_at,
-                    "total_cases": run.total_cases,
-                    "passed_cases": run.passed_cases,
-                    "success_rate": (
-                        round(run.passed_cases / run.total_cases * 100, 2)
-                        if run.total_cases > 0
-                        else 0
-                    )
-                }
-                for run in test_runs
-            ]
-        } 
\ No newline at end of file
+            "interval": interval or "day",
+            "bucket_days": INTERVAL_DAYS[interval or "day"],
+            "trend": []
+        }
+        if totals.first_started_at is None:
+            return statistics
+
+        interval, width = choose_bucket_width(
+            _as_date(totals.first_started_at), _as_date(totals.last_started_at), max_points, interval
+        )
+        fields = ("total_runs", *PROJECT_COUNT_COLUMNS)
+        daily = (
+            (_as_date(row.day), {name: getattr(row, name) for name in fields})
+            for row in db.execute(project_daily_statement(project_id, start_date, end_date))
+        )
+        statistics["interval"] = interval
+        statistics["bucket_days"] = width
+        statistics["trend"] = [
+            {
+                "date": start.isoformat(),
+                **{name: counts.get(name, 0) for name in fields},
+                "success_rate": _success_rate(counts.get("passed_cases", 0), counts.get("total_cases", 0))
+            }
+            for start, counts in downsample(daily, width)
+        ]
+        return statistics 
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+测试结果大字段转存模块
+
+写入测试结果时，output、stack_trace和test_data超过阈值的转存到内容寻址的压缩存储(core.utils.blob_store):
+- test_results.payload_refs记录转存字段的引用，output和stack_trace在行内保留末尾一段作为预览，test_data置空
+- 相同内容(如多次重试的相同输出)只保存一份
+- 完整内容通过接口按需读取，支持HTTP Range，不需要把整段内容读入内存
+"""
+import json
+import logging
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.utils.blob_store import BlobRef, BlobStore
+from core.utils.file_manager import FileManager
+
+from ..models.report import TestResult
+from ..config.test_config import test_settings
+from ..core.exceptions import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+# 可以转存的字段，以及读取时的媒体类型
+PAYLOAD_MEDIA_TYPES = {
+    "output": "text/plain; charset=utf-8",
+    "stack_trace": "text/plain; charset=utf-8",
+    "test_data": "application/json",
+}
+
+# 转存后行内保留预览的文本字段，其他字段置空
+TEXT_FIELDS = ("output", "stack_trace")
+
+
+@lru_cache(maxsize=1)
+def get_blob_store() -> BlobStore:
+    """测试结果使用的压缩存储"""
+    return BlobStore(FileManager(test_settings.TEST_RESULT_BLOB_DIR))
+
+
+def encode_payload(field: str, value: Any) -> bytes:
+    """字段内容编码为字节，test_data编码为JSON"""
+    if field in TEXT_FIELDS:
+        return value.encode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def offload_payloads(
+    rows: Sequence[Dict[str, Any]],
+    store: Optional[BlobStore] = None,
+    threshold: Optional[int] = None,
+    preview_chars: Optional[int] = None
+) -> int:
+    """把一批待写入的测试结果行中超过阈值的字段转存，原地设置payload_refs和预览
+
+    转存失败(如磁盘已满)时保留原内容写入行内，不影响结果写入。
+
+    Args:
+        rows: test_results的行数据
+        store: 压缩存储，默认为get_blob_store()
+        threshold: 转存阈值(字节)，默认为TEST_RESULT_BLOB_THRESHOLD
+        preview_chars: 文本字段保留的末尾字符数，默认为TEST_RESULT_PREVIEW_CHARS
+
+    Returns:
+        int: 转存的字段数
+    """
+    threshold = test_settings.TEST_RESULT_BLOB_THRESHOLD if threshold is None else threshold
+    preview_chars = test_settings.TEST_RESULT_PREVIEW_CHARS if preview_chars is None else preview_chars
+    offloaded = 0
+    for row in rows:
+        refs: Dict[str, Dict[str, Any]] = {}
+        for field in PAYLOAD_MEDIA_TYPES:
+            value = row.get(field)
+            if value is None:
+                continue
+            content = encode_payload(field, value)
+            if len(content) <= threshold:
+                continue
+            try:
+                ref = (store or get_blob_store()).put(content)
+            except OSError as e:
+                logger.warning(f"测试结果字段转存失败，保留在行内 - 字段:{field}, 大小:{len(content)}, 错误:{e}")
+                continue
+            refs[field] = ref.to_dict()
+            row[field] = value[-preview_chars:] if field in TEXT_FIELDS and preview_chars else None
+            offloaded += 1
+        row["payload_refs"] = refs or None
+    return offloaded
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """解析单段Range请求头
+
+    Args:
+        header: Range请求头，如bytes=0-1023、bytes=1024-、bytes=-500
+        size: 内容的字节数
+
+    Returns:
+        Optional[Tuple[int, int]]: (起始偏移量, 结束偏移量(不含))，没有Range或格式不支持时返回None，
+            此时应返回完整内容
+
+    Raises:
+        ValueError: 范围无法满足
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, separator, last = header[len("bytes="):].strip().partition("-")
+    if not separator or not (first or last) or not (first or "0").isdigit() or not (last or "0").isdigit():
+        return None
+    if first and last and int(last) < int(first):
+        return None
+    if first:
+        start, end = int(first), min(int(last) + 1, size) if last else size
+    else:
+        # bytes=-n表示最后n个字节
+        start, end = max(size - int(last), 0), size if int(last) else 0
+    if start >= size or end <= start:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, end
+
+
+class ResultPayloadService:
+    """测试结果大字段读取服务类"""
+
+    @staticmethod
+    async def get_payload(db: Session, result_id: int, field: str) -> Dict[str, Any]:
+        """获取测试结果字段的完整内容的位置
+
+        Args:
+            db: 数据库会话
+            result_id: 测试结果ID
+            field: output、stack_trace或test_data
+
+        Returns:
+            Dict[str, Any]: 转存内容的引用ref或行内内容content，以及完整内容的字节数size
+
+        Raises:
+            NotFoundError: 测试结果不存在或该字段为空
+        """
+        row = db.execute(
+            select(TestResult.payload_refs, getattr(TestResult, field)).where(TestResult.id == result_id)
+        ).first()
+        if row is None:
+            raise NotFoundError(f"Test result {result_id} not found")
+        refs, value = row
+        if refs and field in refs:
+            ref = BlobRef.from_dict(refs[field])
+            return {"ref": ref, "content": None, "size": ref.size}
+        if value is None:
+            raise NotFoundError(f"Test result {result_id} has no {field}")
+        content = encode_payload(field, value)
+        return {"ref": None, "content": content, "size": len(content)}
+
+    @staticmethod
+    async def iter_payload(
+        payload: Dict[str, Any],
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """读取get_payload返回的内容的一段
+
+        Args:
+            payload: get_payload的返回值
+            start: 起始偏移量
+            end: 结束偏移量(不含)，默认读到末尾
+        """
+        if payload["ref"] is None:
+            yield payload["content"][start:end]
+            return
+        async for chunk in get_blob_store().iter_content(payload["ref"], start, end):
+            yield chunk
@@ -0,0 +1,197 @@
+"""
+测试结果流式写入模块
+
+执行器以NDJSON格式(每行一个测试结果)持续上传结果:
+- 请求体按块增量解析，只缓存当前未结束的一行和一个微批次
+- 微批次满后在线程池中写入数据库，写完之前不再读取请求体，
+  由TCP流控把压力反馈给执行器
+- 每个微批次单独提交，连接中断时已写入的结果不会丢失
+- 错误明细只保留前max_errors条，内存占用与结果数量无关
+"""
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..models.report import TestRun
+from .test import TestService
+
+logger = logging.getLogger(__name__)
+
+# 默认微批次大小
+DEFAULT_STREAM_BATCH_SIZE = 500
+
+# 单行最大字节数
+DEFAULT_MAX_LINE_BYTES = 1024 * 1024
+
+# 响应中保留的错误明细条数
+DEFAULT_MAX_ERRORS = 100
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = DEFAULT_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """把字节块流拆分为NDJSON行
+
+    超长的行会被丢弃，其余部分读到换行符为止，并以None作为该行内容返回。
+
+    Args:
+        chunks: 请求体字节块
+        max_line_bytes: 单行最大字节数
+
+    Yields:
+        Tuple[int, Optional[bytes]]: (行号，从1开始, 行内容)，空行不返回
+    """
+    buffer = bytearray()
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not oversized:
+                    buffer.extend(chunk[start:])
+                    if len(buffer) > max_line_bytes:
+                        oversized = True
+                        buffer.clear()
+                break
+            line_no += 1
+            if oversized:
+                yield line_no, None
+            else:
+                buffer.extend(chunk[start:end])
+                if len(buffer) > max_line_bytes:
+                    yield line_no, None
+                elif buffer.strip():
+                    yield line_no, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+    if oversized:
+        yield line_no + 1, None
+    elif buffer.strip():
+        yield line_no + 1, bytes(buffer)
+
+
+class ResultStreamIngestor:
+    """测试结果流式写入器"""
+
+    def __init__(
+        self,
+        db: Session,
+        test_run: TestRun,
+        validate: Callable[[Dict[str, Any]], Dict[str, Any]],
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+        max_errors: int = DEFAULT_MAX_ERRORS
+    ):
+        """初始化写入器
+
+        Args:
+            db: 数据库会话
+            test_run: 测试运行
+            validate: 单条结果的校验函数，返回规范化后的字段，校验失败抛出ValueError
+            batch_size: 微批次大小
+            max_line_bytes: 单行最大字节数
+            max_errors: 响应中保留的错误明细条数
+        """
+        self.db = db
+        self.test_run = test_run
+        self.validate = validate
+        self.batch_size = batch_size
+        self.max_line_bytes = max_line_bytes
+        self.max_errors = max_errors
+
+        self._batch: List[Tuple[int, Dict[str, Any]]] = []
+        self.lines = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    async def consume(self, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """读取整个NDJSON流并写入数据库
+
+        Args:
+            chunks: 请求体字节块
+
+        Returns:
+            Dict[str, Any]: 写入摘要
+        """
+        async for line_no, line in iter_ndjson_lines(chunks, self.max_line_bytes):
+            self.lines += 1
+            item = self._parse(line_no, line)
+            if item is None:
+                continue
+            self._batch.append((line_no, item))
+            if len(self._batch) >= self.batch_size:
+                await self._flush()
+        await self._flush()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        """当前的写入摘要"""
+        return {
+            "test_run_id": self.test_run.id,
+            "lines": self.lines,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "errors": self.errors
+        }
+
+    def _parse(self, line_no: int, line: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """解析并校验一行，失败时记录错误并返回None"""
+        if line is None:
+            self._reject(line_no, None, f"Line exceeds {self.max_line_bytes} bytes")
+            return None
+        try:
+            payload = json.loads(line)
+        except ValueError as e:
+            self._reject(line_no, None, f"Invalid JSON: {e}")
+            return None
+        if not isinstance(payload, dict):
+            self._reject(line_no, None, "Each line must be a JSON object")
+            return None
+        try:
+            return self.validate(payload)
+        except ValueError as e:
+            # pydantic.ValidationError是ValueError的子类
+            test_case_id = payload.get("test_case_id")
+            self._reject(line_no, test_case_id if isinstance(test_case_id, int) else None, str(e))
+            return None
+
+    async def _flush(self) -> None:
+        """在线程池中写入当前微批次，写完前不读取新的请求体
+
+        单行的错误由_write_results按行返回；整批写入失败时回滚，本批每行都记为失败，
+        已提交的批次和后续的行照常计入摘要。
+        """
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        try:
+            inserted, errors = await run_in_threadpool(
+                TestService._write_results, self.db, self.test_run, batch
+            )
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"测试结果微批次写入失败 - 运行:{self.test_run.id}, 行数:{len(batch)}, 错误:{str(e)}")
+            for line_no, item in batch:
+                self._reject(line_no, item["test_case_id"], f"Batch write failed: {e}")
+            return
+        self.batches += 1
+        self.accepted += sum(inserted.values())
+        for error in errors:
+            self._reject(error["index"], error["test_case_id"], error["error"])
+
+    def _reject(self, line_no: int, test_case_id: Optional[int], error: str) -> None:
+        """记录失败的行，超出max_errors后只计数"""
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line_no, "test_case_id": test_case_id, "error": error})
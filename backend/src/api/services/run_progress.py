@@ -0,0 +1,200 @@
+"""
+测试运行实时进度模块
+
+测试结果写入后把运行计数发布到Redis(core.cache.progress_channel)，看板通过SSE接收推送:
+- 每条消息携带运行的完整计数(state)和本次写入的增量(delta)，计数只增不减，按最大值合并
+- 观察者连接时从Redis读取最新状态，只有Redis中没有状态时才查询一次数据库并写回
+- 同一进程的观察者共用一个订阅连接，每个观察者的消息合并后每秒最多推送TEST_PROGRESS_MAX_RATE次
+"""
+import json
+import logging
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.cache.progress_channel import ProgressChannel, ProgressHub, ProgressSubscription
+from core.database.session import SessionLocal
+
+from ..models.report import TestRun
+from ..config.constants import TestStatus
+from ..config.test_config import test_settings
+from ..core.exceptions import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+# 进度状态的字段及对应的测试运行计数列
+PROGRESS_COLUMNS = {
+    "total": "total_cases",
+    "passed": "passed_cases",
+    "failed": "failed_cases",
+    "error": "error_cases",
+    "skipped": "skipped_cases",
+}
+
+
+@lru_cache(maxsize=1)
+def get_progress_channel() -> ProgressChannel:
+    """测试运行进度通道"""
+    return ProgressChannel("test_runs", state_ttl=test_settings.TEST_PROGRESS_STATE_TTL)
+
+
+@lru_cache(maxsize=1)
+def get_progress_hub() -> ProgressHub:
+    """本进程的测试运行进度订阅中心"""
+    return ProgressHub(get_progress_channel())
+
+
+def _load_state(db: Session, test_run_id: int) -> Optional[Dict[str, int]]:
+    """按主键读取测试运行的计数和完成状态"""
+    row = db.execute(
+        select(*[getattr(TestRun, column) for column in PROGRESS_COLUMNS.values()], TestRun.completed_at)
+        .where(TestRun.id == test_run_id)
+    ).first()
+    if row is None:
+        return None
+    state = {name: value or 0 for name, value in zip(PROGRESS_COLUMNS, row)}
+    state["completed"] = int(row[-1] is not None)
+    return state
+
+
+def publish_run_progress(
+    db: Session,
+    test_run_id: int,
+    counts: Optional[Mapping[TestStatus, int]] = None
+) -> Optional[Dict[str, Any]]:
+    """读取已提交的运行计数并发布进度，在写入结果或完成运行并提交后调用
+
+    Args:
+        db: 数据库会话
+        test_run_id: 测试运行ID
+        counts: 本次写入的各状态结果数
+
+    Returns:
+        Optional[Dict[str, Any]]: 发布的消息，测试运行不存在或Redis不可用时为None
+    """
+    state = _load_state(db, test_run_id)
+    if state is None:
+        return None
+    delta = {TestStatus(status).value: count for status, count in (counts or {}).items() if count}
+    if delta:
+        delta["total"] = sum(delta.values())
+    return get_progress_channel().publish(test_run_id, state, delta)
+
+
+def discard_run_progress(test_run_ids: Iterable[int]) -> None:
+    """删除测试运行的进度状态，计数被修正后调用"""
+    channel = get_progress_channel()
+    for test_run_id in test_run_ids:
+        channel.discard(test_run_id)
+
+
+def encode_sse(message: Optional[Dict[str, Any]]) -> str:
+    """进度消息编码为SSE事件，None编码为保持连接的注释"""
+    if message is None:
+        return ": keepalive\n\n"
+    data = json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {message['seq']}\nevent: progress\ndata: {data}\n\n"
+
+
+async def iter_run_progress(
+    snapshot: Dict[str, Any],
+    subscription: ProgressSubscription,
+    heartbeat: Optional[float] = None
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """先输出当前状态，再输出合并后的进度，运行完成或客户端断开后取消订阅
+
+    Args:
+        snapshot: 订阅时的状态
+        subscription: RunProgressService.watch返回的订阅
+        heartbeat: 没有进度时每隔多少秒输出一次None，默认为TEST_PROGRESS_HEARTBEAT
+
+    Yields:
+        Optional[Dict[str, Any]]: 进度消息，None表示心跳
+    """
+    heartbeat = heartbeat or test_settings.TEST_PROGRESS_HEARTBEAT
+    try:
+        yield snapshot
+        if snapshot["state"].get("completed"):
+            return
+        last_seq = snapshot["seq"]
+        while True:
+            message = await subscription.next(heartbeat)
+            if message is not None:
+                # 订阅后、读取状态前发布的消息已包含在状态中
+                if message["seq"] <= last_seq:
+                    continue
+                last_seq = message["seq"]
+            yield message
+            if message is not None and message["state"].get("completed"):
+                return
+    finally:
+        subscription.close()
+
+
+class RunProgressService:
+    """测试运行实时进度服务类"""
+
+    @staticmethod
+    async def get_progress(
+        test_run_id: int,
+        session_factory: Callable[[], Session] = SessionLocal
+    ) -> Dict[str, Any]:
+        """获取测试运行的最新进度
+
+        优先读取Redis中的状态，不存在时用一次主键查询初始化。
+
+        Args:
+            test_run_id: 测试运行ID
+            session_factory: 创建数据库会话的工厂，只在初始化时使用
+
+        Returns:
+            Dict[str, Any]: 进度消息，state为各状态计数和completed
+
+        Raises:
+            NotFoundError: 测试运行不存在
+        """
+        channel = get_progress_channel()
+        snapshot = channel.snapshot(test_run_id)
+        if snapshot is not None and "total" in snapshot["state"]:
+            return snapshot
+        with session_factory() as db:
+            state = _load_state(db, test_run_id)
+        if state is None:
+            raise NotFoundError(f"Test run {test_run_id} not found")
+        # 按最大值合并，与并发发布的进度不冲突；Redis不可用时直接返回数据库中的计数
+        return channel.publish(test_run_id, state) or {"key": str(test_run_id), "seq": 0, "state": state, "delta": {}}
+
+    @staticmethod
+    async def watch(
+        test_run_id: int,
+        max_rate: Optional[float] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ) -> Tuple[Dict[str, Any], ProgressSubscription]:
+        """订阅测试运行的进度
+
+        等Redis确认订阅频道后再读取状态，读取之后发布的进度都会送达，
+        最后一条完成消息不会落在订阅和读取之间。Redis不可用时等待超时后照常读取状态。
+
+        Args:
+            test_run_id: 测试运行ID
+            max_rate: 每秒最多推送的次数，不能超过TEST_PROGRESS_MAX_RATE
+            session_factory: 创建数据库会话的工厂
+
+        Returns:
+            Tuple[Dict[str, Any], ProgressSubscription]: (当前状态, 订阅)，订阅交给iter_run_progress输出
+
+        Raises:
+            NotFoundError: 测试运行不存在
+        """
+        rate = min(max_rate or test_settings.TEST_PROGRESS_MAX_RATE, test_settings.TEST_PROGRESS_MAX_RATE)
+        subscription = get_progress_hub().watch(test_run_id, rate)
+        try:
+            if not await subscription.wait_subscribed():
+                logger.warning(f"进度订阅未确认，可能错过后续进度 - 运行:{test_run_id}")
+            snapshot = await RunProgressService.get_progress(test_run_id, session_factory)
+        except BaseException:
+            subscription.close()
+            raise
+        return snapshot, subscription
@@ -0,0 +1,209 @@
+"""
+测试运行队列模块
+
+多台执行机通过Redis Streams领取测试运行:
+- 每个测试环境(TestRun.environment)一个队列，同一环境的执行机组成一个消费者组
+- 按TestPriority分为critical/high/medium/low四个通道，执行机总是先领取高优先级的运行
+- 执行机崩溃后，未确认的运行在可见性超时后由其他执行机接管，并跳过已有结果的用例继续执行
+- 队列的等待数、执行中数和最早等待时间用于判断是否需要增加执行机
+"""
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+from sqlalchemy.orm import Session
+
+from core.cache.stream_queue import StreamJob, StreamJobQueue
+from core.database.session import SessionLocal
+
+from ..models.report import TestRun
+from ..config.constants import TestPriority
+from ..core.exceptions import NotFoundError
+from .execution import TestExecutionEngine, execute_test_run
+
+logger = logging.getLogger(__name__)
+
+# 队列名称前缀
+RUN_QUEUE_NAME = "test_runs"
+
+# 优先级通道，从高到低
+PRIORITY_LANES = [
+    TestPriority.CRITICAL.value,
+    TestPriority.HIGH.value,
+    TestPriority.MEDIUM.value,
+    TestPriority.LOW.value
+]
+
+# 未指定环境的测试运行使用的队列
+DEFAULT_ENVIRONMENT = "default"
+
+# 执行机领取运行后多久未确认即可被接管(秒)
+RUN_VISIBILITY_TIMEOUT = 300
+
+# 执行中的运行重置空闲时间的间隔(秒)，需明显小于可见性超时
+RUN_HEARTBEAT_INTERVAL = 60
+
+# 一个运行最多被领取的次数
+RUN_MAX_DELIVERIES = 3
+
+
+def run_queue(
+    environment: Optional[str],
+    consumer: Optional[str] = None,
+    redis_client: Optional[redis.Redis] = None
+) -> StreamJobQueue:
+    """获取测试环境对应的队列
+
+    Args:
+        environment: 测试环境，为空时使用默认队列
+        consumer: 消费者名称，默认为主机名和进程号
+        redis_client: Redis客户端实例，默认使用共享连接池
+
+    Returns:
+        StreamJobQueue: 队列
+    """
+    environment = environment or DEFAULT_ENVIRONMENT
+    return StreamJobQueue(
+        name=f"{RUN_QUEUE_NAME}:{environment}",
+        lanes=PRIORITY_LANES,
+        group=f"executors:{environment}",
+        consumer=consumer,
+        redis_client=redis_client,
+        visibility_timeout=RUN_VISIBILITY_TIMEOUT,
+        max_deliveries=RUN_MAX_DELIVERIES
+    )
+
+
+def enqueue_test_run(
+    test_run: TestRun,
+    priority: TestPriority = TestPriority.MEDIUM,
+    case_ids: Optional[List[int]] = None,
+    queue: Optional[StreamJobQueue] = None,
+    skip_quarantined: bool = False
+) -> Dict[str, Any]:
+    """把测试运行加入其环境的队列
+
+    Args:
+        test_run: 测试运行
+        priority: 优先级，决定进入的通道
+        case_ids: 要执行的测试用例ID，为空时执行项目下的全部用例
+        queue: 队列，默认按测试运行的环境获取
+        skip_quarantined: 执行时跳过因结果不稳定被隔离的用例
+
+    Returns:
+        Dict[str, Any]: 任务ID、环境和通道
+    """
+    queue = queue or run_queue(test_run.environment)
+    lane = TestPriority(priority).value
+    job_id = queue.enqueue(lane, {
+        "test_run_id": test_run.id,
+        "case_ids": json.dumps(case_ids or []),
+        "skip_quarantined": int(skip_quarantined),
+        "enqueued_at": datetime.utcnow().isoformat()
+    })
+    logger.info(f"测试运行入队 - 运行:{test_run.id}, 队列:{queue.name}, 通道:{lane}, 任务:{job_id}")
+    return {
+        "job_id": job_id,
+        "test_run_id": test_run.id,
+        "environment": test_run.environment or DEFAULT_ENVIRONMENT,
+        "priority": lane
+    }
+
+
+def queue_stats(environment: Optional[str], queue: Optional[StreamJobQueue] = None) -> Dict[str, Any]:
+    """获取测试环境队列的积压指标"""
+    stats = (queue or run_queue(environment)).stats()
+    stats["environment"] = environment or DEFAULT_ENVIRONMENT
+    return stats
+
+
+class RunQueueWorker:
+    """从队列领取并执行测试运行的执行机"""
+
+    def __init__(
+        self,
+        environment: Optional[str],
+        queue: Optional[StreamJobQueue] = None,
+        engine_factory: Callable[[], TestExecutionEngine] = TestExecutionEngine,
+        session_factory: Callable[[], Session] = SessionLocal,
+        heartbeat_interval: float = RUN_HEARTBEAT_INTERVAL
+    ):
+        """初始化执行机
+
+        Args:
+            environment: 负责的测试环境
+            queue: 队列，默认按环境获取
+            engine_factory: 创建执行引擎的工厂
+            session_factory: 创建数据库会话的工厂
+            heartbeat_interval: 执行期间重置空闲时间的间隔(秒)
+        """
+        self.environment = environment or DEFAULT_ENVIRONMENT
+        self.queue = queue or run_queue(environment)
+        self.engine_factory = engine_factory
+        self.session_factory = session_factory
+        self.heartbeat_interval = heartbeat_interval
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """处理完当前运行后停止"""
+        self._stop.set()
+
+    def run_forever(self, block_ms: int = 5000) -> None:
+        """循环领取并执行测试运行，直到调用stop"""
+        logger.info(f"执行机启动 - 队列:{self.queue.name}, 消费者:{self.queue.consumer}")
+        while not self._stop.is_set():
+            try:
+                jobs = self.queue.claim(count=1, block_ms=block_ms)
+            except redis.RedisError as e:
+                logger.error(f"领取测试运行失败: {str(e)}")
+                self._stop.wait(1)
+                continue
+            for job in jobs:
+                self.process(job)
+        logger.info(f"执行机停止 - 队列:{self.queue.name}")
+
+    def process(self, job: StreamJob) -> Optional[Dict[str, Any]]:
+        """执行一个任务，成功后确认
+
+        测试运行不存在时直接移入死信队列；其他异常不确认，由可见性超时后重新投递。
+
+        Args:
+            job: 领取到的任务
+
+        Returns:
+            Optional[Dict[str, Any]]: 执行摘要，失败时为None
+        """
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            summary = execute_test_run(
+                int(job.fields["test_run_id"]),
+                case_ids=json.loads(job.fields.get("case_ids") or "[]") or None,
+                session_factory=self.session_factory,
+                engine=self.engine_factory(),
+                # 重新投递时跳过上次已经写入结果的用例
+                resume=job.deliveries > 1,
+                skip_quarantined=job.fields.get("skip_quarantined") == "1"
+            )
+        except NotFoundError as e:
+            self.queue.dead_letter(job, str(e.detail))
+            return None
+        except Exception:
+            logger.exception(f"测试运行执行失败 - 任务:{job.id}, 第{job.deliveries}次投递")
+            return None
+        finally:
+            done.set()
+            heartbeat.join()
+        self.queue.ack(job)
+        return summary
+
+    def _heartbeat(self, job: StreamJob, done: threading.Event) -> None:
+        while not done.wait(self.heartbeat_interval):
+            try:
+                self.queue.heartbeat(job)
+            except redis.RedisError as e:
+                logger.warning(f"重置任务空闲时间失败 - 任务:{job.id}, 错误:{str(e)}")
@@ -0,0 +1,333 @@
+"""
+测试运行摘要模块
+
+运行完成时一次统计报告需要的数据，保存为test_runs.summary中的一个JSON文档并缓存到Redis:
+- 计数、耗时分位数(按秩逐个读取)、最慢用例、失败分组、按用例类型和优先级的分布都用聚合查询计算，不加载完整的结果行
+- 已完成运行的报告先读缓存，未命中时读取summary列并重新缓存，两者都没有时不加锁重新生成，
+  读取不修正计数、不发布进度
+- 运行完成后又写入结果时清除摘要，下次读取时重新生成；写入方在提交结果后重新读取完成时间，
+  与完成操作并发提交时也不会留下过期的摘要
+"""
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from core.cache.redis_manager import redis_delete, redis_get_json, redis_set_json
+
+from ..models.test_case import TestCase
+from ..models.report import TestRun, TestResult
+from ..config.constants import TestStatus
+from ..config.test_config import test_settings
+from ..core.exceptions import NotFoundError
+from .failure_signature import failure_clusters
+from .run_progress import PROGRESS_COLUMNS, discard_run_progress, publish_run_progress
+
+logger = logging.getLogger(__name__)
+
+# 摘要文档的版本，字段变化时递增，旧版本的摘要在读取时重新生成
+SUMMARY_VERSION = 1
+
+# 耗时分位数
+DURATION_PERCENTILES = (50, 90, 95, 99)
+
+
+def summary_cache_key(test_run_id: int) -> str:
+    """摘要的缓存键"""
+    return f"run_summary:{test_run_id}"
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def percentile_rank(count: int, percent: float) -> int:
+    """count个升序数值中最近秩分位数的秩，从1开始"""
+    return int(max(1, -(-count * percent // 100)))
+
+
+def _duration_statistics(db: Session, run_filter) -> Dict[str, Any]:
+    """在数据库中统计耗时，分位数按秩逐个用ORDER BY ... OFFSET读取一行，不加载全部耗时
+
+    每个分位数一次排序查询，由数据库在单个运行的结果范围内排序，代价是比一次读取全部耗时多几次往返。
+    """
+    has_duration = TestResult.duration.is_not(None)
+    count, total, longest = db.execute(
+        select(func.count(TestResult.duration), func.sum(TestResult.duration), func.max(TestResult.duration))
+        .where(run_filter, has_duration)
+    ).one()
+    statistics: Dict[str, Any] = {
+        "count": count,
+        "total": int(total or 0),
+        # MySQL的SUM返回Decimal，转换后才能保存为JSON
+        "mean": round(float(total) / count, 2) if count else None
+    }
+    for percent in DURATION_PERCENTILES:
+        statistics[f"p{percent}"] = db.execute(
+            select(TestResult.duration)
+            .where(run_filter, has_duration)
+            .order_by(TestResult.duration)
+            .offset(percentile_rank(count, percent) - 1)
+            .limit(1)
+        ).scalar() if count else None
+    statistics["max"] = longest
+    return statistics
+
+
+def status_statistics(counts: Mapping[str, int]) -> Dict[str, Any]:
+    """各状态结果数转换为摘要中的统计字段"""
+    total = sum(counts.values())
+    statistics: Dict[str, Any] = {"total": total}
+    for name in PROGRESS_COLUMNS:
+        if name != "total":
+            statistics[name] = counts.get(name, 0)
+    statistics["success_rate"] = round(statistics["passed"] / total * 100, 2) if total > 0 else 0
+    return statistics
+
+
+def _breakdown(db: Session, test_run_id: int, column) -> Dict[str, Dict[str, Any]]:
+    """按测试用例的某一列和结果状态分组计数"""
+    counts: Dict[str, Counter] = defaultdict(Counter)
+    for value, status, count in db.execute(
+        select(column, TestResult.status, func.count())
+        .join(TestCase, TestCase.id == TestResult.test_case_id)
+        .where(TestResult.test_run_id == test_run_id)
+        .group_by(column, TestResult.status)
+    ):
+        key = getattr(value, "value", value) or "unknown"
+        counts[key][TestStatus(status).value] += count
+    return {key: status_statistics(counter) for key, counter in sorted(counts.items())}
+
+
+def build_run_summary(
+    db: Session,
+    test_run: TestRun,
+    slowest: Optional[int] = None,
+    clusters: Optional[int] = None
+) -> Dict[str, Any]:
+    """统计测试运行的报告摘要
+
+    Args:
+        db: 数据库会话
+        test_run: 测试运行
+        slowest: 列出的最慢用例数，默认为TEST_RUN_SUMMARY_SLOWEST
+        clusters: 列出的失败分组数，默认为TEST_RUN_SUMMARY_CLUSTERS
+
+    Returns:
+        Dict[str, Any]: 摘要文档，时间为ISO格式字符串，可以直接保存为JSON
+    """
+    slowest = test_settings.TEST_RUN_SUMMARY_SLOWEST if slowest is None else slowest
+    clusters = test_settings.TEST_RUN_SUMMARY_CLUSTERS if clusters is None else clusters
+    run_filter = TestResult.test_run_id == test_run.id
+
+    counts = Counter({
+        TestStatus(status).value: count
+        for status, count in db.execute(
+            select(TestResult.status, func.count()).where(run_filter).group_by(TestResult.status)
+        )
+    })
+    slowest_cases = [
+        {
+            "result_id": result_id,
+            "test_case_id": test_case_id,
+            "name": name,
+            "status": TestStatus(status).value,
+            "duration": duration
+        }
+        for result_id, test_case_id, name, status, duration in db.execute(
+            select(TestResult.id, TestResult.test_case_id, TestCase.name, TestResult.status, TestResult.duration)
+            .join(TestCase, TestCase.id == TestResult.test_case_id)
+            .where(run_filter, TestResult.duration.is_not(None))
+            .order_by(TestResult.duration.desc(), TestResult.id)
+            .limit(slowest)
+        )
+    ] if slowest else []
+    failures = failure_clusters(db, test_run.id, limit=clusters, sample_cases=0)
+
+    return {
+        "version": SUMMARY_VERSION,
+        "materialized": True,
+        "generated_at": datetime.utcnow().isoformat(),
+        "id": test_run.id,
+        "name": test_run.name,
+        "description": test_run.description,
+        "environment": test_run.environment,
+        "started_at": _isoformat(test_run.started_at),
+        "completed_at": _isoformat(test_run.completed_at),
+        "duration": (
+            int((test_run.completed_at - test_run.started_at).total_seconds())
+            if test_run.completed_at and test_run.started_at
+            else None
+        ),
+        "statistics": status_statistics(counts),
+        "durations": _duration_statistics(db, run_filter),
+        "slowest": slowest_cases,
+        "failures": {
+            "failures": failures["failures"],
+            "cluster_count": failures["cluster_count"],
+            # 只保留签名摘要，堆栈通过失败分组接口查看
+            "clusters": [
+                {
+                    "signature_id": cluster["signature"]["id"] if cluster["signature"] else None,
+                    "exception_type": cluster["signature"]["exception_type"] if cluster["signature"] else None,
+                    "message": cluster["signature"]["message"] if cluster["signature"] else None,
+                    "count": cluster["count"],
+                    "case_count": cluster["case_count"],
+                    "sample_result_id": cluster["sample_result_id"]
+                }
+                for cluster in failures["clusters"]
+            ]
+        },
+        "by_type": _breakdown(db, test_run.id, TestCase.type),
+        "by_priority": _breakdown(db, test_run.id, TestCase.priority)
+    }
+
+
+def complete_test_run(db: Session, test_run_id: int, completed_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """完成测试运行：记录完成时间、生成并保存摘要、按实际结果数修正计数，提交后缓存摘要并发布进度
+
+    已完成的运行保留原完成时间，只重新生成摘要。
+
+    Args:
+        db: 数据库会话
+        test_run_id: 测试运行ID
+        completed_at: 完成时间，默认为当前时间
+
+    Returns:
+        Dict[str, Any]: 摘要文档
+
+    Raises:
+        NotFoundError: 测试运行不存在
+    """
+    # 锁定运行行，同时完成同一运行时依次执行
+    test_run = db.execute(
+        select(TestRun)
+        .where(TestRun.id == test_run_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+    if test_run is None:
+        raise NotFoundError(f"Test run {test_run_id} not found")
+    if test_run.completed_at is None:
+        test_run.completed_at = completed_at or datetime.utcnow()
+
+    summary = build_run_summary(db, test_run)
+    drifted = {
+        column: summary["statistics"][name]
+        for name, column in PROGRESS_COLUMNS.items()
+        if (getattr(test_run, column) or 0) != summary["statistics"][name]
+    }
+    for column, value in drifted.items():
+        setattr(test_run, column, value)
+    test_run.summary = summary
+    db.commit()
+
+    redis_set_json(summary_cache_key(test_run_id), summary, ex=test_settings.TEST_RUN_SUMMARY_CACHE_EXPIRE)
+    if drifted:
+        logger.warning(f"完成测试运行时修正计数 - 运行:{test_run_id}, 计数:{drifted}")
+        discard_run_progress([test_run_id])
+    publish_run_progress(db, test_run_id)
+    return summary
+
+
+def invalidate_run_summary(db: Session, test_run_id: int) -> None:
+    """清除已完成运行的摘要并提交"""
+    db.execute(
+        update(TestRun)
+        .where(TestRun.id == test_run_id)
+        .values(summary=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    redis_delete(summary_cache_key(test_run_id))
+
+
+def invalidate_completed_summary(db: Session, test_run_id: int) -> bool:
+    """结果提交后调用，运行已完成时清除摘要
+
+    完成时间在结果提交后重新读取，写入前读取的完成时间可能早于并发提交的完成操作。
+
+    Returns:
+        bool: 运行是否已完成
+    """
+    completed_at = db.scalar(select(TestRun.completed_at).where(TestRun.id == test_run_id))
+    if completed_at is None:
+        return False
+    invalidate_run_summary(db, test_run_id)
+    return True
+
+
+def regenerate_run_summary(db: Session, test_run_id: int) -> Dict[str, Any]:
+    """不锁定运行行重新生成已完成运行的摘要，不修正计数也不发布进度
+
+    只有生成期间没有新结果(total_cases未变)时才保存并缓存，
+    否则新结果的写入方已经或即将清除摘要，返回的摘要只用于本次读取。
+
+    Raises:
+        NotFoundError: 测试运行不存在
+    """
+    test_run = db.execute(
+        select(TestRun).where(TestRun.id == test_run_id).execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+    if test_run is None:
+        raise NotFoundError(f"Test run {test_run_id} not found")
+    total_cases = test_run.total_cases
+    summary = build_run_summary(db, test_run)
+    stored = db.execute(
+        update(TestRun)
+        .where(TestRun.id == test_run_id, TestRun.total_cases == total_cases)
+        .values(summary=summary)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if stored:
+        # 提交前缓存，之后提交的结果写入会在提交后清除缓存
+        redis_set_json(summary_cache_key(test_run_id), summary, ex=test_settings.TEST_RUN_SUMMARY_CACHE_EXPIRE)
+    db.commit()
+    return summary
+
+
+def get_run_summary(db: Session, test_run_id: int) -> Optional[Dict[str, Any]]:
+    """获取已完成运行的摘要，未完成的运行返回None
+
+    Raises:
+        NotFoundError: 测试运行不存在
+    """
+    key = summary_cache_key(test_run_id)
+    summary = redis_get_json(key)
+    if summary and summary.get("version") == SUMMARY_VERSION:
+        return summary
+
+    row = db.execute(select(TestRun.completed_at, TestRun.summary).where(TestRun.id == test_run_id)).first()
+    if row is None:
+        raise NotFoundError(f"Test run {test_run_id} not found")
+    completed_at, summary = row
+    if completed_at is None:
+        return None
+    if not summary or summary.get("version") != SUMMARY_VERSION:
+        return regenerate_run_summary(db, test_run_id)
+    redis_set_json(key, summary, ex=test_settings.TEST_RUN_SUMMARY_CACHE_EXPIRE)
+    return summary
+
+
+class RunSummaryService:
+    """测试运行摘要服务类"""
+
+    @staticmethod
+    async def complete_test_run(db: Session, test_run_id: int) -> TestRun:
+        """完成测试运行并生成摘要，用于通过接口上报结果的运行
+
+        Args:
+            db: 数据库会话
+            test_run_id: 测试运行ID
+
+        Returns:
+            TestRun: 完成后的测试运行
+
+        Raises:
+            NotFoundError: 测试运行不存在
+        """
+        complete_test_run(db, test_run_id)
+        return db.get(TestRun, test_run_id)
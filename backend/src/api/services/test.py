@@ -3,20 +3,157 @@
 
 处理测试用例和测试运行相关的业务逻辑
 """
+import logging
+from collections import Counter
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Mapping, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import Select, select, insert, update, func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 
+from core.cache.count_cache import cached_count, invalidate_counts
+from core.database.fulltext import fulltext_match, paginate_ranked, split_terms
+from core.database.query_plan import register_hot_query
+from core.utils.pagination import apply_keyset, encode_cursor, paginate_keyset
+
+from ..models.project import Project
 from ..models.test_case import TestCase
 from ..models.report import TestRun, TestResult
-from ..core.exceptions import NotFoundError, PermissionError
+from ..core.exceptions import BusinessError, NotFoundError, PermissionError, ValidationError
 from ..config.constants import TestStatus, TestPriority, TestType
+from .case_version import VERSIONED_FIELDS, case_document, record_versions
+from .failure_signature import assign_signatures, record_signatures
+from .flakiness import record_outcomes
+from .result_blob import offload_payloads
+from .run_progress import discard_run_progress, publish_run_progress
+from .run_summary import invalidate_completed_summary
+
+logger = logging.getLogger(__name__)
+
+# 批量写入测试结果时每条INSERT语句的行数
+RESULT_INSERT_CHUNK_SIZE = 1000
+
+# 核对运行计数时每批的测试运行数
+RECONCILE_BATCH_SIZE = 500
+
+# 列表总数缓存的名称，测试用例和测试运行按项目失效，测试结果按测试运行失效
+TEST_CASES_COUNT = "test_cases"
+TEST_RUNS_COUNT = "test_runs"
+TEST_RESULTS_COUNT = "test_results"
+
+# 测试状态对应的测试运行计数列
+STATUS_COUNTER_COLUMNS = {
+    TestStatus.PASSED: "passed_cases",
+    TestStatus.FAILED: "failed_cases",
+    TestStatus.ERROR: "error_cases",
+    TestStatus.SKIPPED: "skipped_cases",
+}
+
+
+def test_cases_statement(
+    dialect_name: str,
+    project_id: int,
+    search: Optional[str] = None,
+    type: Optional[TestType] = None,
+    priority: Optional[TestPriority] = None
+) -> Tuple[Select, Optional[Any]]:
+    """测试用例列表查询，不含排序和分页
+    
+    Returns:
+        Tuple[Select, Optional[Any]]: (查询语句, 搜索相关度)，未搜索时相关度为None
+    """
+    statement = select(TestCase).where(TestCase.project_id == project_id)
+    
+    # 全文检索
+    score = None
+    matched = fulltext_match(
+        dialect_name,
+        [TestCase.name, TestCase.description],
+        search,
+        boost_column=TestCase.name
+    )
+    if matched is not None:
+        condition, score = matched
+        statement = statement.where(condition)
+    
+    # 类型过滤
+    if type:
+        statement = statement.where(TestCase.type == type)
+    
+    # 优先级过滤
+    if priority:
+        statement = statement.where(TestCase.priority == priority)
+    
+    return statement, score
+
+
+def test_runs_statement(project_id: int) -> Select:
+    """测试运行列表查询，不含排序和分页"""
+    return select(TestRun).where(TestRun.project_id == project_id)
+
+
+def test_results_statement(test_run_id: int, status: Optional[TestStatus] = None) -> Select:
+    """测试结果列表查询，不含排序和分页"""
+    statement = select(TestResult).where(TestResult.test_run_id == test_run_id)
+    
+    # 状态过滤
+    if status:
+        statement = statement.where(TestResult.status == status)
+    
+    return statement
+
+
+@register_hot_query("test_cases.by_project")
+def _test_cases_page() -> Select:
+    statement, _ = test_cases_statement("mysql", 1)
+    return apply_keyset(statement, TestCase.created_at, TestCase.id, 10, encode_cursor(datetime(2024, 1, 1), 1000))
+
+
+@register_hot_query("test_cases.by_type_priority")
+def _test_cases_filtered_page() -> Select:
+    statement, _ = test_cases_statement("mysql", 1, type=TestType.UNIT, priority=TestPriority.HIGH)
+    return apply_keyset(statement, TestCase.created_at, TestCase.id, 10)
+
+
+@register_hot_query("test_runs.by_project")
+def _test_runs_page() -> Select:
+    return apply_keyset(
+        test_runs_statement(1), TestRun.started_at, TestRun.id, 10, encode_cursor(datetime(2024, 1, 1), 1000)
+    )
+
+
+@register_hot_query("test_results.by_run")
+def _test_results_page() -> Select:
+    return apply_keyset(test_results_statement(1), TestResult.started_at, TestResult.id, 10)
+
+
+@register_hot_query("test_results.by_run_status")
+def _test_results_status_page() -> Select:
+    return apply_keyset(
+        test_results_statement(1, TestStatus.FAILED), TestResult.started_at, TestResult.id, 10,
+        encode_cursor(datetime(2024, 1, 1), 1000)
+    )
 
 
 class TestService:
     """测试服务"""
 
+    @staticmethod
+    def _paginate(
+        db: Session,
+        statement: Select,
+        created_column: Any,
+        id_column: Any,
+        limit: int,
+        cursor: Optional[str]
+    ) -> Tuple[List[Any], Optional[str]]:
+        """键集分页，游标无效时抛出ValidationError"""
+        try:
+            return paginate_keyset(db, statement, created_column, id_column, limit, cursor)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
     @staticmethod
     async def create_test_case(
         db: Session,
@@ -43,8 +180,13 @@ async def create_test_case(
             created_by=created_by
         )
         db.add(test_case)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise BusinessError(f"Test case {name} already exists in project {project_id}")
         db.refresh(test_case)
+        invalidate_counts(TEST_CASES_COUNT, project_id)
         return test_case
 
     @staticmethod
@@ -59,34 +201,58 @@ async def get_test_case(db: Session, test_case_id: int) -> TestCase:
     async def get_test_cases(
         db: Session,
         project_id: int,
-        skip: int = 0,
         limit: int = 10,
+        cursor: Optional[str] = None,
         search: Optional[str] = None,
         type: Optional[TestType] = None,
         priority: Optional[TestPriority] = None
-    ) -> List[TestCase]:
-        """获取测试用例列表"""
-        query = db.query(TestCase).filter(TestCase.project_id == project_id)
-        
-        # 搜索
-        if search:
-            query = query.filter(
-                or_(
-                    TestCase.name.ilike(f"%{search}%"),
-                    TestCase.description.ilike(f"%{search}%")
-                )
-            )
-        
-        # 类型过滤
-        if type:
-            query = query.filter(TestCase.type == type)
+    ) -> Tuple[List[TestCase], Optional[str]]:
+        """获取测试用例列表
         
-        # 优先级过滤
-        if priority:
-            query = query.filter(TestCase.priority == priority)
+        未搜索时按(created_at, id)倒序键集分页；搜索时按相关度倒序，
+        名称命中的用例排在前面，最多可翻到MAX_SEARCH_WINDOW条。
         
-        # 分页
-        return query.offset(skip).limit(limit).all()
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+            limit: 每页记录数
+            cursor: 上一页返回的游标
+            search: 名称或描述的搜索关键字，多个词以空格分隔，每个词按前缀匹配
+            type: 测试类型过滤
+            priority: 优先级过滤
+            
+        Returns:
+            Tuple[List[TestCase], Optional[str]]: (测试用例列表, 下一页游标)
+            
+        Raises:
+            ValidationError: 游标格式无效
+        """
+        statement, score = test_cases_statement(
+            db.get_bind().dialect.name, project_id, search, type, priority
+        )
+        if score is None:
+            return TestService._paginate(db, statement, TestCase.created_at, TestCase.id, limit, cursor)
+        try:
+            return paginate_ranked(db, statement, score, TestCase.id, limit, cursor)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+    @staticmethod
+    async def count_test_cases(
+        db: Session,
+        project_id: int,
+        search: Optional[str] = None,
+        type: Optional[TestType] = None,
+        priority: Optional[TestPriority] = None
+    ) -> int:
+        """统计测试用例总数，按过滤条件缓存"""
+        statement, _ = test_cases_statement(
+            db.get_bind().dialect.name, project_id, search, type, priority
+        )
+        return cached_count(
+            db, statement, TEST_CASES_COUNT, project_id,
+            {"search": " ".join(split_terms(search)) or None, "type": type, "priority": priority}
+        )
 
     @staticmethod
     async def update_test_case(
@@ -103,12 +269,25 @@ async def update_test_case(
             raise PermissionError("Only test case creator can update test case")
         
         # 更新字段
+        before = case_document(test_case)
         for key, value in kwargs.items():
             if hasattr(test_case, key):
                 setattr(test_case, key, value)
         
-        db.commit()
+        # 内容有变化时记录历史版本，版本号唯一约束冲突说明被并发修改
+        versions = record_versions(
+            db, [(test_case.id, test_case.version, before, case_document(test_case))], user_id
+        )
+        if test_case.id in versions:
+            test_case.version = versions[test_case.id]
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise BusinessError("Test case was modified concurrently, please retry")
         db.refresh(test_case)
+        # 名称、类型和优先级的变化会影响带过滤条件的总数
+        invalidate_counts(TEST_CASES_COUNT, test_case.project_id)
         return test_case
 
     @staticmethod
@@ -124,8 +303,88 @@ async def delete_test_case(
         if test_case.created_by != user_id:
             raise PermissionError("Only test case creator can delete test case")
         
+        project_id = test_case.project_id
         db.delete(test_case)
         db.commit()
+        invalidate_counts(TEST_CASES_COUNT, project_id)
+
+    @staticmethod
+    def upsert_test_cases(
+        db: Session,
+        project_id: int,
+        created_by: Optional[int],
+        cases: List[Dict[str, Any]]
+    ) -> Tuple[int, int]:
+        """按(project_id, name)批量新增或更新测试用例并提交
+        
+        用一条查询找出已存在的用例，其余用例用一条多行INSERT写入，
+        已存在的用例按主键批量UPDATE，内容有变化的同时写入历史版本。
+        同一批中名称重复时以最后一条为准。先锁住项目行，同一项目的导入依次执行，
+        (project_id, name)上的唯一索引保证不会写入重名用例。
+        
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+            created_by: 新增用例的创建者
+            cases: 测试用例字段列表，字段同TestCaseBase
+            
+        Returns:
+            Tuple[int, int]: (新增数量, 更新数量)
+            
+        Raises:
+            BusinessError: 同名用例被并发创建或用例被并发修改
+        """
+        by_name = {case["name"]: case for case in cases}
+        if not by_name:
+            return 0, 0
+        
+        # 锁在提交时释放，之后的查询能读到其他导入已提交的用例
+        db.execute(select(Project.id).where(Project.id == project_id).with_for_update())
+        versioned_columns = [getattr(TestCase, field) for field in VERSIONED_FIELDS]
+        existing = {
+            row.name: row
+            for row in db.execute(
+                select(TestCase.id, TestCase.version, *versioned_columns).where(
+                    TestCase.project_id == project_id,
+                    TestCase.name.in_(by_name)
+                )
+            ).all()
+        }
+        
+        now = datetime.utcnow()
+        inserts: List[Dict[str, Any]] = []
+        updates: List[Dict[str, Any]] = []
+        changes = []
+        for name, case in by_name.items():
+            if name in existing:
+                row = existing[name]
+                updates.append({**case, "id": row.id, "version": row.version, "updated_at": now})
+                changes.append((
+                    row.id, row.version, case_document(row._mapping), case_document({**row._mapping, **case})
+                ))
+            else:
+                inserts.append({
+                    **case,
+                    "project_id": project_id,
+                    "created_by": created_by,
+                    "created_at": now,
+                    "updated_at": now
+                })
+        
+        try:
+            if inserts:
+                db.execute(insert(TestCase), inserts)
+            if updates:
+                versions = record_versions(db, changes, created_by, now)
+                for row in updates:
+                    row["version"] = versions.get(row["id"], row["version"])
+                db.execute(update(TestCase), updates)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise BusinessError("Test cases were modified concurrently, please retry")
+        invalidate_counts(TEST_CASES_COUNT, project_id)
+        return len(inserts), len(updates)
 
     @staticmethod
     async def create_test_run(
@@ -147,6 +406,7 @@ async def create_test_run(
         db.add(test_run)
         db.commit()
         db.refresh(test_run)
+        invalidate_counts(TEST_RUNS_COUNT, project_id)
         return test_run
 
     @staticmethod
@@ -161,16 +421,34 @@ async def get_test_run(db: Session, test_run_id: int) -> TestRun:
     async def get_test_runs(
         db: Session,
         project_id: int,
-        skip: int = 0,
-        limit: int = 10
-    ) -> List[TestRun]:
-        """获取测试运行列表"""
-        return (
-            db.query(TestRun)
-            .filter(TestRun.project_id == project_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[TestRun], Optional[str]]:
+        """获取测试运行列表，按(started_at, id)倒序键集分页
+        
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+            limit: 每页记录数
+            cursor: 上一页返回的游标
+            
+        Returns:
+            Tuple[List[TestRun], Optional[str]]: (测试运行列表, 下一页游标)
+            
+        Raises:
+            ValidationError: 游标格式无效
+        """
+        return TestService._paginate(
+            db, test_runs_statement(project_id),
+            TestRun.started_at, TestRun.id, limit, cursor
+        )
+
+    @staticmethod
+    async def count_test_runs(db: Session, project_id: int) -> int:
+        """统计测试运行总数，按项目缓存"""
+        return cached_count(
+            db, test_runs_statement(project_id),
+            TEST_RUNS_COUNT, project_id
         )
 
     @staticmethod
@@ -184,57 +462,371 @@ async def create_test_result(
         stack_trace: Optional[str] = None,
         test_data: Optional[Dict[str, Any]] = None
     ) -> TestResult:
-        """创建测试结果"""
-        # 获取测试运行
-        test_run = await TestService.get_test_run(db, test_run_id)
+        """创建测试结果
         
-        # 创建测试结果
-        test_result = TestResult(
-            test_run_id=test_run_id,
-            test_case_id=test_case_id,
-            status=status,
-            output=output,
-            error_message=error_message,
-            stack_trace=stack_trace,
-            test_data=test_data,
-            completed_at=datetime.utcnow()
-        )
+        运行计数用UPDATE ... SET col = col + 1原子累加，并发提交结果时不会丢失更新。
+        累加会锁住测试运行行，因此放在签名和大字段写入之后、提交之前执行，
+        同一运行的并发写入只在提交前短暂排队。
+        """
+        project_id = db.scalar(select(TestRun.project_id).where(TestRun.id == test_run_id))
+        if project_id is None:
+            raise NotFoundError(f"Test run {test_run_id} not found")
         
-        # 计算执行时长
-        test_result.duration = int(
-            (test_result.completed_at - test_result.started_at).total_seconds()
+        row = TestService._build_result_row(
+            test_run_id,
+            {
+                "test_case_id": test_case_id,
+                "status": status,
+                "output": output,
+                "error_message": error_message,
+                "stack_trace": stack_trace,
+                "test_data": test_data
+            },
+            datetime.utcnow()
         )
-        
-        # 更新测试运行统计信息
-        test_run.total_cases += 1
-        if status == TestStatus.PASSED:
-            test_run.passed_cases += 1
-        elif status == TestStatus.FAILED:
-            test_run.failed_cases += 1
-        elif status == TestStatus.ERROR:
-            test_run.error_cases += 1
-        elif status == TestStatus.SKIPPED:
-            test_run.skipped_cases += 1
-        
+        assign_signatures(db, project_id, [row])
+        offload_payloads([row])
+        test_result = TestResult(**row)
         db.add(test_result)
+        record_signatures(db, [row], test_run_id)
+        record_outcomes(db, [(test_case_id, status)])
+        # 受影响行数为0说明测试运行在读取之后被删除
+        if not TestService._increment_run_counters(db, test_run_id, {status: 1}):
+            db.rollback()
+            raise NotFoundError(f"Test run {test_run_id} not found")
         db.commit()
         db.refresh(test_result)
+        invalidate_counts(TEST_RESULTS_COUNT, test_run_id)
+        # 运行已完成时清除摘要，下次读取时重新生成
+        invalidate_completed_summary(db, test_run_id)
+        publish_run_progress(db, test_run_id, {status: 1})
         return test_result
 
+    @staticmethod
+    async def create_test_results_batch(
+        db: Session,
+        test_run_id: int,
+        results: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """批量创建测试结果
+        
+        用一条查询校验测试用例，按块执行多行INSERT，最后用一条UPDATE累加运行计数，
+        整批只提交一次。单行失败只记录错误，不影响同批的其他结果。
+        写入(含签名、压缩和大字段文件)在线程池中执行，不阻塞事件循环。
+        
+        Args:
+            db: 数据库会话
+            test_run_id: 测试运行ID
+            results: 测试结果列表，字段同TestResultBatchItem
+            
+        Returns:
+            Dict[str, Any]: 写入成功和失败的数量，以及每个失败行的序号和原因
+        """
+        test_run = await TestService.get_test_run(db, test_run_id)
+        inserted, errors = await run_in_threadpool(
+            TestService._write_results, db, test_run, list(enumerate(results))
+        )
+        return {
+            "test_run_id": test_run_id,
+            "accepted": sum(inserted.values()),
+            "rejected": len(errors),
+            "errors": errors
+        }
+
+    @staticmethod
+    def _write_results(
+        db: Session,
+        test_run: TestRun,
+        items: List[Tuple[int, Dict[str, Any]]]
+    ) -> Tuple[Counter, List[Dict[str, Any]]]:
+        """校验并写入一批测试结果，记录失败签名和用例不稳定度、累加运行计数后提交
+        
+        Args:
+            db: 数据库会话
+            test_run: 测试运行
+            items: (原始序号, 测试结果)列表
+            
+        Returns:
+            Tuple[Counter, List[Dict[str, Any]]]: (各状态写入成功的数量, 按序号排序的失败行)
+        """
+        # 一次查出本项目中存在的测试用例
+        case_ids = {item["test_case_id"] for _, item in items}
+        known_case_ids = set(db.execute(
+            select(TestCase.id).where(
+                TestCase.id.in_(case_ids),
+                TestCase.project_id == test_run.project_id
+            )
+        ).scalars()) if case_ids else set()
+        
+        errors: List[Dict[str, Any]] = []
+        rows: List[Tuple[int, Dict[str, Any]]] = []
+        now = datetime.utcnow()
+        for index, item in items:
+            if item["test_case_id"] not in known_case_ids:
+                errors.append({
+                    "index": index,
+                    "test_case_id": item["test_case_id"],
+                    "error": f"Test case {item['test_case_id']} not found in project {test_run.project_id}"
+                })
+                continue
+            try:
+                row = TestService._build_result_row(test_run.id, item, now)
+            except (TypeError, ValueError) as e:
+                # 如起止时间一个带时区一个不带时区，只拒绝这一行
+                errors.append({
+                    "index": index,
+                    "test_case_id": item["test_case_id"],
+                    "error": f"Invalid result: {e}"
+                })
+                continue
+            rows.append((index, row))
+        assign_signatures(db, test_run.project_id, [row for _, row in rows])
+        offload_payloads([row for _, row in rows])
+        
+        # 分块写入，并统计各状态写入成功的数量
+        inserted: Counter = Counter()
+        outcomes: List[Tuple[int, TestStatus]] = []
+        written: List[Dict[str, Any]] = []
+        for start in range(0, len(rows), RESULT_INSERT_CHUNK_SIZE):
+            chunk = rows[start:start + RESULT_INSERT_CHUNK_SIZE]
+            for row in TestService._insert_result_chunk(db, chunk, errors):
+                inserted[row["status"]] += 1
+                outcomes.append((row["test_case_id"], row["status"]))
+                written.append(row)
+        
+        record_signatures(db, written, test_run.id)
+        record_outcomes(db, outcomes)
+        # 与create_test_result相同，最后锁住测试运行行，各写入路径按相同顺序加锁
+        TestService._increment_run_counters(db, test_run.id, inserted)
+        db.commit()
+        if inserted:
+            invalidate_counts(TEST_RESULTS_COUNT, test_run.id)
+            # 提交后重新读取完成时间，写入期间完成的运行也会清除摘要
+            invalidate_completed_summary(db, test_run.id)
+            publish_run_progress(db, test_run.id, inserted)
+        
+        errors.sort(key=lambda error: error["index"])
+        return inserted, errors
+
+    @staticmethod
+    def _build_result_row(
+        test_run_id: int,
+        item: Dict[str, Any],
+        now: datetime
+    ) -> Dict[str, Any]:
+        """构造test_results表的一行数据"""
+        started_at = item.get("started_at") or now
+        completed_at = item.get("completed_at") or now
+        duration = item.get("duration")
+        if duration is None:
+            duration = max(0, int((completed_at - started_at).total_seconds()))
+        return {
+            "test_run_id": test_run_id,
+            "test_case_id": item["test_case_id"],
+            "status": TestStatus(item["status"]),
+            "started_at": started_at,
+            "completed_at": completed_at,
+            "duration": duration,
+            "output": item.get("output"),
+            "error_message": item.get("error_message"),
+            "stack_trace": item.get("stack_trace"),
+            "test_data": item.get("test_data"),
+            "signature_id": None,
+            "payload_refs": None,
+        }
+
+    @staticmethod
+    def _insert_result_chunk(
+        db: Session,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        errors: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """在保存点中写入一块测试结果
+        
+        整块写入失败时回滚到保存点，再逐行写入以定位失败的行。
+        
+        Args:
+            db: 数据库会话
+            chunk: (原始序号, 行数据)列表
+            errors: 失败行的错误信息，原地追加
+            
+        Returns:
+            List[Dict[str, Any]]: 写入成功的行
+        """
+        try:
+            with db.begin_nested():
+                db.execute(insert(TestResult), [row for _, row in chunk])
+            return [row for _, row in chunk]
+        except SQLAlchemyError:
+            pass
+        
+        written = []
+        for index, row in chunk:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(TestResult), [row])
+                written.append(row)
+            except SQLAlchemyError as e:
+                errors.append({
+                    "index": index,
+                    "test_case_id": row["test_case_id"],
+                    "error": str(getattr(e, "orig", None) or e)
+                })
+        return written
+
+    @staticmethod
+    def _increment_run_counters(
+        db: Session,
+        test_run_id: int,
+        counts: Mapping[TestStatus, int]
+    ) -> int:
+        """用一条UPDATE原子地累加测试运行计数，不提交事务
+        
+        Args:
+            db: 数据库会话
+            test_run_id: 测试运行ID
+            counts: 各状态新增的结果数
+            
+        Returns:
+            int: 受影响的行数，测试运行不存在时为0
+        """
+        total = sum(counts.values())
+        if not total:
+            return 0
+        values = {"total_cases": TestRun.total_cases + total}
+        for status, column in STATUS_COUNTER_COLUMNS.items():
+            if counts.get(status):
+                values[column] = getattr(TestRun, column) + counts[status]
+        result = db.execute(
+            update(TestRun)
+            .where(TestRun.id == test_run_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    def reconcile_run_counters(
+        db: Session,
+        test_run_ids: Optional[List[int]] = None,
+        batch_size: int = RECONCILE_BATCH_SIZE
+    ) -> List[Dict[str, Any]]:
+        """按test_results重新统计测试运行计数并修复偏差
+        
+        按ID分批扫描测试运行，每批用一条GROUP BY查询统计结果数，
+        只对存在偏差的运行执行修复。修复语句用关联子查询在同一条UPDATE中重新计数，
+        期间并发写入的结果也会被计入。
+        
+        Args:
+            db: 数据库会话
+            test_run_ids: 需要核对的测试运行ID，为空时核对全部
+            batch_size: 每批核对的测试运行数
+            
+        Returns:
+            List[Dict[str, Any]]: 修复前存在偏差的测试运行及其计数
+        """
+        counter_columns = ["total_cases"] + list(STATUS_COUNTER_COLUMNS.values())
+        repaired: List[Dict[str, Any]] = []
+        last_id = 0
+        while True:
+            query = (
+                select(TestRun.id, *[getattr(TestRun, column) for column in counter_columns])
+                .where(TestRun.id > last_id)
+                .order_by(TestRun.id)
+                .limit(batch_size)
+            )
+            if test_run_ids is not None:
+                query = query.where(TestRun.id.in_(test_run_ids))
+            runs = db.execute(query).all()
+            if not runs:
+                break
+            last_id = runs[-1][0]
+            
+            # 一条GROUP BY统计本批所有运行的结果数
+            actual: Dict[int, Counter] = {run[0]: Counter() for run in runs}
+            for run_id, status, count in db.execute(
+                select(TestResult.test_run_id, TestResult.status, func.count())
+                .where(TestResult.test_run_id.in_(list(actual)))
+                .group_by(TestResult.test_run_id, TestResult.status)
+            ):
+                actual[run_id][TestStatus(status)] += count
+            
+            drifted = []
+            for run_id, *stored in runs:
+                counts = actual[run_id]
+                expected = [sum(counts.values())] + [
+                    counts[status] for status in STATUS_COUNTER_COLUMNS
+                ]
+                if [value or 0 for value in stored] != expected:
+                    drifted.append(run_id)
+                    repaired.append({
+                        "test_run_id": run_id,
+                        "stored": dict(zip(counter_columns, stored)),
+                        "actual": dict(zip(counter_columns, expected))
+                    })
+            
+            if drifted:
+                db.execute(
+                    update(TestRun)
+                    .where(TestRun.id.in_(drifted))
+                    .values(**TestService._recount_values())
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+                discard_run_progress(drifted)
+                logger.warning(f"已修复测试运行计数偏差: {drifted}")
+        return repaired
+
+    @staticmethod
+    def _recount_values() -> Dict[str, Any]:
+        """按test_results重新计数的关联子查询"""
+        def count_results(status: Optional[TestStatus] = None):
+            query = select(func.count()).where(TestResult.test_run_id == TestRun.id)
+            if status is not None:
+                query = query.where(TestResult.status == status)
+            return query.scalar_subquery()
+        
+        values = {"total_cases": count_results()}
+        for status, column in STATUS_COUNTER_COLUMNS.items():
+            values[column] = count_results(status)
+        return values
+
     @staticmethod
     async def get_test_results(
         db: Session,
         test_run_id: int,
-        skip: int = 0,
         limit: int = 10,
+        cursor: Optional[str] = None,
         status: Optional[TestStatus] = None
-    ) -> List[TestResult]:
-        """获取测试结果列表"""
-        query = db.query(TestResult).filter(TestResult.test_run_id == test_run_id)
-        
-        # 状态过滤
-        if status:
-            query = query.filter(TestResult.status == status)
+    ) -> Tuple[List[TestResult], Optional[str]]:
+        """获取测试结果列表，按(started_at, id)倒序键集分页
         
-        # 分页
-        return query.offset(skip).limit(limit).all() 
\ No newline at end of file
+        Args:
+            db: 数据库会话
+            test_run_id: 测试运行ID
+            limit: 每页记录数
+            cursor: 上一页返回的游标
+            status: 状态过滤
+            
+        Returns:
+            Tuple[List[TestResult], Optional[str]]: (测试结果列表, 下一页游标)
+            
+        Raises:
+            ValidationError: 游标格式无效
+        """
+        return TestService._paginate(
+            db, test_results_statement(test_run_id, status),
+            TestResult.started_at, TestResult.id, limit, cursor
+        )
+
+    @staticmethod
+    async def count_test_results(
+        db: Session,
+        test_run_id: int,
+        status: Optional[TestStatus] = None
+    ) -> int:
+        """统计测试结果总数，按状态过滤条件缓存"""
+        return cached_count(
+            db, test_results_statement(test_run_id, status),
+            TEST_RESULTS_COUNT, test_run_id, {"status": status}
+        )
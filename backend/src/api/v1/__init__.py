@@ -3,6 +3,8 @@
 """
 from fastapi import APIRouter
 from .auth import router as auth_router
+from .tests.router import router as tests_router
+from .reports.router import router as reports_router
 # from .users import router as users_router  # 用户模块待实现
 
 # 创建v1版本路由（不带前缀，前缀由api/__init__.py添加）
@@ -20,6 +22,10 @@ async def get_version():
 # 注册认证路由
 router.include_router(auth_router)
 
+# 注册测试管理和测试报告路由
+router.include_router(tests_router, prefix="/tests", tags=["测试"])
+router.include_router(reports_router, prefix="/reports", tags=["报告"])
+
 # 注册用户路由
 # router.include_router(users_router)  # 用户模块待实现
 
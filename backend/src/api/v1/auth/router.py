@@ -14,7 +14,7 @@
     Token, TokenResponse, RefreshToken, 
     LogoutRequest, UserOut, CaptchaResponse
 )
-from .schemas import UserResponse, LoginLog
+from .schemas import UserResponse
 from core.config import settings
 from core.config.jwt_config import jwt_settings
 from core.auth.dependencies import get_current_user
@@ -92,7 +92,9 @@ async def login(
             username=username,
             password=password,
             captcha_id=captcha_id,
-            captcha_text=captcha_text
+            captcha_text=captcha_text,
+            ip_address=client_host,
+            user_agent=user_agent
         )
         
         if not user:
@@ -128,24 +130,13 @@ async def login(
         user.login_attempts = 0  # 重置登录尝试次数
         user.locked_until = None  # 清除锁定时间
         
-        # 创建登录日志
-        login_log = LoginLog(
-            user_id=user.id,
-            username=user.username,
-            login_time=datetime.utcnow(),
-            login_ip=client_host,
-            user_agent=user_agent,
-            login_status=True,
-            status_message="登录成功"
-        )
-        db.add(login_log)
-        
+        # 登录日志已由认证服务异步记录
         try:
             db.commit()
             logger.info(f"登录成功 - 用户名: {user.username}, IP: {client_host}")
         except Exception as e:
             db.rollback()
-            logger.error(f"保存登录记录失败: {str(e)}")
+            logger.error(f"更新用户登录信息失败: {str(e)}")
             # 继续处理，不影响用户登录
         
         return tokens
@@ -8,7 +8,7 @@
 from sqlalchemy.orm import Session
 
 from ...core.database import get_db
-from ...core.auth.jwt import get_current_user
+from ...core.auth import get_current_user
 from ...services.project import ProjectService
 from .schemas import (
     ProjectCreate,
@@ -3,24 +3,35 @@
 
 处理测试报告相关的API路由
 """
+from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ...core.database import get_db
-from ...core.auth.jwt import get_current_user
-from ...services.report import ReportService
+from ...core.auth import get_current_user
+from ...services.failure_signature import FailureSignatureService
+from ...services.report import (
+    DETAIL_FIELDS,
+    ReportService,
+    iter_details_json,
+    iter_run_details,
+    parse_detail_fields
+)
+from ...config.constants import TestStatus
 from .schemas import (
-    TestRunSummaryResponse,
-    TestRunDetailResponse,
+    RunSummaryResponse,
     ProjectStatisticsResponse,
-    TrendAnalysisResponse
+    TrendAnalysisResponse,
+    FailureClusterResponse,
+    FailureSignatureItem
 )
 
 router = APIRouter()
 
 
-@router.get("/runs/{test_run_id}/summary", response_model=TestRunSummaryResponse)
+@router.get("/runs/{test_run_id}/summary", response_model=RunSummaryResponse)
 async def get_test_run_summary(
     test_run_id: int,
     db: Session = Depends(get_db),
@@ -30,30 +41,68 @@ async def get_test_run_summary(
     return await ReportService.get_test_run_summary(db, test_run_id)
 
 
-@router.get("/runs/{test_run_id}/detail", response_model=TestRunDetailResponse)
+@router.get("/runs/{test_run_id}/detail")
 async def get_test_run_detail(
     test_run_id: int,
+    status: Optional[TestStatus] = None,
+    fields: Optional[str] = Query(
+        None,
+        description="逗号分隔的结果字段，默认全部: " + ",".join(DETAIL_FIELDS)
+    ),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """获取测试运行详细信息，结果按开始时间倒序分批读取并以JSON流式返回"""
+    selected = parse_detail_fields(fields)
+    summary = await ReportService.get_test_run_summary(db, test_run_id)
+    return StreamingResponse(
+        iter_details_json(summary, iter_run_details(test_run_id, status, selected)),
+        media_type="application/json"
+    )
+
+
+@router.get("/runs/{test_run_id}/failures", response_model=FailureClusterResponse)
+async def get_failure_clusters(
+    test_run_id: int,
+    limit: int = Query(50, ge=1, le=500, description="最多返回的分组数"),
+    sample_cases: int = Query(10, ge=0, le=100, description="每组最多列出的用例数"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """按失败签名分组获取测试运行的失败"""
+    return await ReportService.get_failure_clusters(db, test_run_id, limit=limit, sample_cases=sample_cases)
+
+
+@router.get("/projects/{project_id}/failure-signatures", response_model=List[FailureSignatureItem])
+async def get_failure_signatures(
+    project_id: int,
+    since: Optional[datetime] = Query(None, description="只返回该时间之后出现过的签名"),
+    limit: int = Query(50, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """获取测试运行详细信息"""
-    return await ReportService.get_test_run_detail(db, test_run_id)
+    """获取项目的失败签名，按最后出现时间倒序"""
+    return await FailureSignatureService.get_signatures(db, project_id, since=since, limit=limit)
 
 
 @router.get("/projects/{project_id}/statistics", response_model=ProjectStatisticsResponse)
 async def get_project_statistics(
     project_id: int,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    interval: Optional[str] = Query(None, pattern="^(day|week)$", description="趋势的间隔，为空时按时间范围自动选择"),
+    max_points: Optional[int] = Query(None, ge=1, le=1000, description="趋势最多的点数"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """获取项目统计信息"""
+    """获取项目统计信息，合计由数据库聚合，趋势按天或按周降采样"""
     return await ReportService.get_project_statistics(
         db=db,
         project_id=project_id,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        interval=interval,
+        max_points=max_points
     )
 
 
@@ -55,15 +55,24 @@ class DailyStatistics(BaseModel):
     success_rate: float
 
 
+class ProjectStatusStatistics(BaseModel):
+    """项目各状态统计模型"""
+    passed: int
+    failed: int
+    error: int
+    skipped: int
+    success_rate: float
+
+
 class ProjectStatisticsResponse(BaseModel):
     """项目统计信息响应模型"""
     project_id: int
-    total_test_cases: int
-    total_test_runs: int
-    latest_success_rate: float
-    average_success_rate: float
-    total_execution_time: int
-    daily_statistics: List[DailyStatistics]
+    total_runs: int
+    total_cases: int
+    statistics: ProjectStatusStatistics
+    interval: str = Field(..., description="趋势的间隔，day或week")
+    bucket_days: int = Field(..., description="趋势每个点覆盖的天数")
+    trend: List[DailyStatistics] = Field(..., description="按桶合计的趋势，date为桶的起始日期")
 
     class Config:
         from_attributes = True
@@ -82,4 +91,109 @@ class TrendAnalysisResponse(BaseModel):
     test_case_count_trend: List[TrendPoint]
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+
+class FailureSignatureItem(BaseModel):
+    """失败签名模型"""
+    id: int
+    fingerprint: str
+    exception_type: Optional[str] = None
+    message: Optional[str] = Field(None, description="归一化后的错误信息")
+    frames: List[str] = Field(default_factory=list, description="归一化后参与指纹计算的帧，内层在前")
+    count: int
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    last_test_run_id: Optional[int] = None
+
+
+class FailureClusterCase(BaseModel):
+    """失败分组中的测试用例"""
+    id: int
+    name: str
+
+
+class FailureCluster(BaseModel):
+    """失败分组模型"""
+    signature: Optional[FailureSignatureItem] = Field(None, description="为空表示没有错误信息和堆栈的失败")
+    count: int = Field(..., description="本次运行中的失败次数")
+    case_count: int
+    cases: List[FailureClusterCase] = Field(..., description="涉及的部分测试用例")
+    sample_result_id: int
+    sample_error_message: Optional[str] = None
+    sample_stack_trace: Optional[str] = None
+
+
+class FailureClusterResponse(BaseModel):
+    """测试运行失败分组响应模型"""
+    test_run_id: int
+    failures: int
+    cluster_count: int
+    clusters: List[FailureCluster]
+
+
+class RunStatistics(BaseModel):
+    """测试结果统计模型"""
+    total: int
+    passed: int
+    failed: int
+    error: int
+    skipped: int
+    success_rate: float
+
+
+class RunDurationStatistics(BaseModel):
+    """测试结果耗时统计模型(秒)"""
+    count: int
+    total: int
+    mean: Optional[float] = None
+    p50: Optional[int] = None
+    p90: Optional[int] = None
+    p95: Optional[int] = None
+    p99: Optional[int] = None
+    max: Optional[int] = None
+
+
+class RunSlowCase(BaseModel):
+    """最慢用例模型"""
+    result_id: int
+    test_case_id: int
+    name: str
+    status: TestStatus
+    duration: int
+
+
+class RunFailureClusterBrief(BaseModel):
+    """摘要中的失败分组模型"""
+    signature_id: Optional[int] = None
+    exception_type: Optional[str] = None
+    message: Optional[str] = None
+    count: int
+    case_count: int
+    sample_result_id: int
+
+
+class RunFailureBrief(BaseModel):
+    """摘要中的失败统计模型"""
+    failures: int
+    cluster_count: int
+    clusters: List[RunFailureClusterBrief]
+
+
+class RunSummaryResponse(BaseModel):
+    """测试运行摘要响应模型，已完成的运行返回完成时生成的摘要"""
+    materialized: bool = Field(..., description="是否为运行完成时生成的摘要，否则只包含当前计数")
+    generated_at: Optional[datetime] = None
+    id: int
+    name: str
+    description: Optional[str] = None
+    environment: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    duration: Optional[int] = None
+    statistics: RunStatistics
+    durations: Optional[RunDurationStatistics] = None
+    slowest: List[RunSlowCase] = Field(default_factory=list)
+    failures: Optional[RunFailureBrief] = None
+    by_type: Dict[str, RunStatistics] = Field(default_factory=dict)
+    by_priority: Dict[str, RunStatistics] = Field(default_factory=dict)
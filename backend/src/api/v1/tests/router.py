@@ -3,26 +3,80 @@
 
 处理测试用例和测试运行相关的API路由
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+import uuid
+from pathlib import Path
+from typing import List, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Header, Query, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from core.config.settings import settings
 
 from ...core.database import get_db
-from ...core.auth.jwt import get_current_user
+from ...core.auth import get_current_user
 from ...services.test import TestService
+from ...services.case_version import CaseVersionService
+from ...services.execution import TestExecutionEngine, execute_test_run
+from ...services.run_queue import enqueue_test_run, queue_stats
+from ...services.impact import ImpactService, parse_diff_paths
+from ...services.flakiness import FlakinessService
+from ...services.result_stream import ResultStreamIngestor
+from ...services.result_blob import PAYLOAD_MEDIA_TYPES, ResultPayloadService, parse_byte_range
+from ...services.artifact import ArtifactService, get_artifact_store
+from ...services.run_progress import RunProgressService, encode_sse, iter_run_progress
+from ...services.run_summary import RunSummaryService
+from ...services.case_transfer import (
+    EXPORT_FORMATS,
+    CaseImportJob,
+    build_xlsx_export,
+    create_import_job,
+    detect_format,
+    get_file_manager,
+    get_import_job,
+    iter_csv_export,
+    iter_ndjson_export,
+    iter_project_cases,
+    iter_upload
+)
 from .schemas import (
     TestCaseCreate,
     TestCaseUpdate,
     TestCaseResponse,
     TestCaseList,
+    TestCaseImportRow,
+    TestCaseImportJob,
+    TestCaseVersionList,
+    TestCaseVersionDocument,
+    TestCaseVersionDiff,
     TestRunCreate,
     TestRunResponse,
     TestRunList,
+    TestRunProgress,
+    TestRunExecute,
+    TestRunExecution,
+    TestRunEnqueue,
+    TestRunQueued,
+    RunQueueStats,
+    ImpactQuery,
+    FlakyCase,
+    FlakyCaseList,
+    ImpactSelection,
     TestResultCreate,
     TestResultResponse,
-    TestResultList
+    TestResultList,
+    TestResultBatchCreate,
+    TestResultBatchItem,
+    TestResultBatchResponse,
+    TestResultStreamResponse,
+    ArtifactUploadCreate,
+    ArtifactUploadStatus,
+    ArtifactResponse,
+    ArtifactManifest
 )
 from ...config.constants import TestStatus, TestType, TestPriority
+from ...core.exceptions import NotFoundError, ValidationError
 
 router = APIRouter()
 
@@ -62,27 +116,35 @@ async def get_test_case(
 @router.get("/projects/{project_id}/cases", response_model=TestCaseList)
 async def get_test_cases(
     project_id: int,
-    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
     search: Optional[str] = None,
     type: Optional[TestType] = None,
     priority: Optional[TestPriority] = None,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """获取测试用例列表"""
-    test_cases = await TestService.get_test_cases(
+    """获取测试用例列表，按创建时间倒序分页"""
+    test_cases, next_cursor = await TestService.get_test_cases(
         db=db,
         project_id=project_id,
-        skip=skip,
         limit=limit,
+        cursor=cursor,
+        search=search,
+        type=type,
+        priority=priority
+    )
+    total = await TestService.count_test_cases(
+        db=db,
+        project_id=project_id,
         search=search,
         type=type,
         priority=priority
     )
     return {
-        "total": len(test_cases),
-        "items": test_cases
+        "total": total,
+        "items": test_cases,
+        "next_cursor": next_cursor
     }
 
 
@@ -117,6 +179,127 @@ async def delete_test_case(
     return {"message": "Test case deleted successfully"}
 
 
+@router.get("/cases/{test_case_id}/versions", response_model=TestCaseVersionList)
+async def get_test_case_versions(
+    test_case_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[int] = Query(None, ge=1, description="上一页返回的next_before"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """获取测试用例的历史版本，按版本号倒序分页"""
+    test_case = await TestService.get_test_case(db, test_case_id)
+    versions, next_before = await CaseVersionService.get_versions(
+        db, test_case, limit=limit, before=before
+    )
+    return {
+        "current_version": test_case.version,
+        "items": versions,
+        "next_before": next_before
+    }
+
+
+@router.get("/cases/{test_case_id}/versions/{version}", response_model=TestCaseVersionDocument)
+async def get_test_case_version(
+    test_case_id: int,
+    version: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """获取测试用例指定版本的内容"""
+    test_case = await TestService.get_test_case(db, test_case_id)
+    document = await CaseVersionService.get_version_document(db, test_case, version)
+    return {"test_case_id": test_case_id, "version": version, "document": document}
+
+
+@router.get("/cases/{test_case_id}/diff", response_model=TestCaseVersionDiff)
+async def diff_test_case_versions(
+    test_case_id: int,
+    from_version: int = Query(..., alias="from", ge=1),
+    to_version: Optional[int] = Query(None, alias="to", ge=1, description="默认为当前版本"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """比较测试用例的两个版本"""
+    test_case = await TestService.get_test_case(db, test_case_id)
+    to_version = test_case.version if to_version is None else to_version
+    patch = await CaseVersionService.diff_versions(db, test_case, from_version, to_version)
+    return {
+        "test_case_id": test_case_id,
+        "from_version": from_version,
+        "to_version": to_version,
+        "patch": patch
+    }
+
+
+@router.post("/projects/{project_id}/cases:import", response_model=TestCaseImportJob, status_code=202)
+async def import_test_cases(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv/xlsx/json，默认按扩展名识别"),
+    current_user = Depends(get_current_user)
+):
+    """导入测试用例，按名称新增或更新，立即返回导入任务"""
+    try:
+        format = detect_format(file.filename, format)
+        stored_name = f"imports/{uuid.uuid4().hex}{Path(file.filename or '').suffix.lower()}"
+        await get_file_manager().save_stream(
+            iter_upload(file), stored_name, max_size=settings.CASE_IMPORT_MAX_SIZE
+        )
+    except ValueError as e:
+        raise ValidationError(str(e))
+    
+    job = create_import_job(project_id, file.filename, format)
+    importer = CaseImportJob(
+        job=job,
+        stored_name=stored_name,
+        created_by=current_user.id,
+        validate=lambda row: TestCaseImportRow.model_validate(row).model_dump()
+    )
+    background_tasks.add_task(importer.run)
+    return job
+
+
+@router.get("/cases:import/{job_id}", response_model=TestCaseImportJob)
+async def get_import_job_status(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    """查询测试用例导入任务的进度"""
+    job = get_import_job(job_id)
+    if not job:
+        raise NotFoundError(f"Import job {job_id} not found")
+    return job
+
+
+@router.get("/projects/{project_id}/cases:export")
+async def export_test_cases(
+    project_id: int,
+    format: str = Query("csv", pattern="^(csv|json|xlsx)$", description="json为NDJSON，每行一个用例"),
+    current_user = Depends(get_current_user)
+):
+    """导出项目下的全部测试用例，格式与导入一致"""
+    media_type, suffix = EXPORT_FORMATS[format]
+    headers = {"Content-Disposition": f'attachment; filename="project-{project_id}-cases{suffix}"'}
+    
+    if format == "xlsx":
+        file_manager = get_file_manager()
+        try:
+            name = await build_xlsx_export(project_id, file_manager)
+        except ValueError as e:
+            raise ValidationError(str(e))
+        return StreamingResponse(
+            file_manager.iter_file(name),
+            media_type=media_type,
+            headers=headers,
+            background=BackgroundTask(file_manager.delete_file, name)
+        )
+    
+    encode = iter_csv_export if format == "csv" else iter_ndjson_export
+    return StreamingResponse(encode(iter_project_cases(project_id)), media_type=media_type, headers=headers)
+
+
 # 测试运行路由
 @router.post("/runs", response_model=TestRunResponse)
 async def create_test_run(
@@ -145,27 +328,175 @@ async def get_test_run(
     return await TestService.get_test_run(db, test_run_id)
 
 
+@router.post("/runs/{test_run_id}/complete", response_model=TestRunResponse)
+async def complete_test_run(
+    test_run_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """完成测试运行并生成报告摘要，用于通过接口上报结果的运行；已完成的运行只重新生成摘要"""
+    return await RunSummaryService.complete_test_run(db, test_run_id)
+
+
+@router.get("/runs/{test_run_id}/progress", response_model=TestRunProgress)
+async def get_test_run_progress(
+    test_run_id: int,
+    current_user = Depends(get_current_user)
+):
+    """获取测试运行的最新进度，从Redis读取"""
+    return await RunProgressService.get_progress(test_run_id)
+
+
+@router.get("/runs/{test_run_id}/progress:stream")
+async def stream_test_run_progress(
+    test_run_id: int,
+    max_rate: Optional[float] = Query(None, gt=0, description="每秒最多推送的次数，不超过服务端配置"),
+    current_user = Depends(get_current_user)
+):
+    """以SSE推送测试运行进度，先推送当前状态，运行完成后结束"""
+    snapshot, subscription = await RunProgressService.watch(test_run_id, max_rate)
+    
+    async def events():
+        async for message in iter_run_progress(snapshot, subscription):
+            yield encode_sse(message)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/runs/{test_run_id}/execute", response_model=TestRunExecution, status_code=202)
+async def execute_test_run_cases(
+    test_run_id: int,
+    background_tasks: BackgroundTasks,
+    execution: Optional[TestRunExecute] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """在后台进程池中执行测试运行，结果分批写入，可通过结果列表查看进度"""
+    test_run = await TestService.get_test_run(db, test_run_id)
+    if test_run.completed_at is not None:
+        raise ValidationError(f"Test run {test_run_id} has already been executed")
+    execution = execution or TestRunExecute()
+    case_ids = execution.case_ids
+    if case_ids:
+        cases = len(set(case_ids))
+    else:
+        cases = await TestService.count_test_cases(db, project_id=test_run.project_id)
+    engine = TestExecutionEngine()
+    background_tasks.add_task(
+        execute_test_run, test_run_id, case_ids, engine=engine, skip_quarantined=execution.skip_quarantined
+    )
+    return {
+        "test_run_id": test_run_id,
+        "cases": cases,
+        "workers": min(engine.workers, cases)
+    }
+
+
+@router.post("/runs/{test_run_id}/queue", response_model=TestRunQueued, status_code=202)
+async def enqueue_test_run_cases(
+    test_run_id: int,
+    enqueue: Optional[TestRunEnqueue] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """把测试运行加入其环境的队列，由该环境的执行机按优先级领取执行"""
+    test_run = await TestService.get_test_run(db, test_run_id)
+    if test_run.completed_at is not None:
+        raise ValidationError(f"Test run {test_run_id} has already been executed")
+    enqueue = enqueue or TestRunEnqueue()
+    return await run_in_threadpool(
+        enqueue_test_run,
+        test_run,
+        priority=enqueue.priority,
+        case_ids=enqueue.case_ids,
+        skip_quarantined=enqueue.skip_quarantined
+    )
+
+
+@router.get("/queues/{environment}", response_model=RunQueueStats)
+async def get_queue_stats(
+    environment: str,
+    current_user = Depends(get_current_user)
+):
+    """获取测试环境队列的等待数、执行中数和最早等待时间"""
+    return await run_in_threadpool(queue_stats, environment)
+
+
 @router.get("/projects/{project_id}/runs", response_model=TestRunList)
 async def get_test_runs(
     project_id: int,
-    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """获取测试运行列表"""
-    test_runs = await TestService.get_test_runs(
+    """获取测试运行列表，按开始时间倒序分页"""
+    test_runs, next_cursor = await TestService.get_test_runs(
         db=db,
         project_id=project_id,
-        skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
     return {
-        "total": len(test_runs),
-        "items": test_runs
+        "total": await TestService.count_test_runs(db, project_id),
+        "items": test_runs,
+        "next_cursor": next_cursor
     }
 
 
+@router.post("/projects/{project_id}/impact", response_model=ImpactSelection)
+async def select_impacted_cases(
+    project_id: int,
+    query: ImpactQuery,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """根据git diff选择受变更影响的测试用例，结果中的case_ids可直接用于执行测试运行"""
+    paths = [*query.paths, *parse_diff_paths(query.diff or "")]
+    if not paths:
+        raise ValidationError("Either diff or paths is required")
+    return await ImpactService.select_cases(
+        db,
+        project_id,
+        paths,
+        include_critical=query.include_critical,
+        include_flaky=query.include_flaky
+    )
+
+
+@router.get("/projects/{project_id}/flaky", response_model=FlakyCaseList)
+async def get_flaky_cases(
+    project_id: int,
+    quarantined_only: bool = Query(False, description="只返回已隔离的用例"),
+    min_score: float = Query(0.0, ge=0, le=1, description="最低翻转率"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """获取项目中结果不稳定的测试用例和隔离列表"""
+    return await FlakinessService.get_flaky_cases(
+        db,
+        project_id,
+        quarantined_only=quarantined_only,
+        min_score=min_score,
+        limit=limit
+    )
+
+
+@router.get("/cases/{test_case_id}/flakiness", response_model=FlakyCase)
+async def get_test_case_flakiness(
+    test_case_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """获取测试用例最近结果的不稳定度"""
+    return await FlakinessService.get_case_flakiness(db, test_case_id)
+
+
 # 测试结果路由
 @router.post("/results", response_model=TestResultResponse)
 async def create_test_result(
@@ -186,24 +517,210 @@ async def create_test_result(
     )
 
 
+@router.post("/runs/{test_run_id}/results:batch", response_model=TestResultBatchResponse)
+async def create_test_results_batch(
+    test_run_id: int,
+    batch: TestResultBatchCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """批量创建测试结果，单条失败不影响同批的其他结果"""
+    return await TestService.create_test_results_batch(
+        db=db,
+        test_run_id=test_run_id,
+        results=[item.model_dump() for item in batch.results]
+    )
+
+
+@router.post("/runs/{test_run_id}/results:stream", response_model=TestResultStreamResponse)
+async def stream_test_results(
+    test_run_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """以NDJSON流的形式上传测试结果，每行一个TestResultBatchItem，结束后返回写入摘要"""
+    test_run = await TestService.get_test_run(db, test_run_id)
+    ingestor = ResultStreamIngestor(
+        db=db,
+        test_run=test_run,
+        validate=lambda payload: TestResultBatchItem.model_validate(payload).model_dump()
+    )
+    return await ingestor.consume(request.stream())
+
+
+@router.get("/results/{result_id}/payload/{field}")
+async def get_test_result_payload(
+    result_id: int,
+    field: Literal["output", "stack_trace", "test_data"],
+    range: Optional[str] = Header(None, description="单段字节范围，如bytes=0-65535"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """流式读取测试结果字段的完整内容，支持Range请求，转存的内容边解压边返回"""
+    payload = await ResultPayloadService.get_payload(db, result_id, field)
+    size = payload["size"]
+    headers = {"Accept-Ranges": "bytes"}
+    try:
+        byte_range = parse_byte_range(range, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            ResultPayloadService.iter_payload(payload),
+            media_type=PAYLOAD_MEDIA_TYPES[field],
+            headers=headers
+        )
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        ResultPayloadService.iter_payload(payload, start, end),
+        status_code=206,
+        media_type=PAYLOAD_MEDIA_TYPES[field],
+        headers=headers
+    )
+
+
+# 测试产物路由
+@router.post("/runs/{test_run_id}/artifacts:upload", response_model=ArtifactUploadStatus, status_code=201)
+async def create_artifact_upload(
+    test_run_id: int,
+    upload: ArtifactUploadCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """创建测试产物上传，之后通过PUT /artifacts/uploads/{upload_id}分块写入"""
+    return await ArtifactService.create_upload(
+        db=db,
+        test_run_id=test_run_id,
+        created_by=current_user.id,
+        **upload.model_dump()
+    )
+
+
+@router.put("/artifacts/uploads/{upload_id}", response_model=ArtifactUploadStatus)
+async def upload_artifact_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="本块的起始偏移量，续传时使用上传状态中的received"),
+    current_user = Depends(get_current_user)
+):
+    """写入一块测试产物内容，请求体为原始字节"""
+    return await ArtifactService.upload_chunk(upload_id, offset, request.stream())
+
+
+@router.get("/artifacts/uploads/{upload_id}", response_model=ArtifactUploadStatus)
+async def get_artifact_upload(
+    upload_id: str,
+    current_user = Depends(get_current_user)
+):
+    """查询测试产物上传状态"""
+    return await ArtifactService.get_upload(upload_id)
+
+
+@router.post("/artifacts/uploads/{upload_id}:complete", response_model=ArtifactResponse)
+async def complete_artifact_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """完成测试产物上传，相同内容只保存一份"""
+    return await ArtifactService.complete_upload(db, upload_id)
+
+
+@router.post("/runs/{test_run_id}/artifacts", response_model=ArtifactResponse, status_code=201)
+async def upload_artifact(
+    test_run_id: int,
+    file: UploadFile = File(...),
+    name: Optional[str] = Query(None, max_length=255, description="默认使用文件名"),
+    kind: str = Query("other", pattern="^(screenshot|log|video|report|other)$"),
+    test_result_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """一次请求上传完整的测试产物，适用于截图等小文件"""
+    name = name or file.filename
+    if not name:
+        raise ValidationError("Artifact name is required")
+    return await ArtifactService.store_artifact(
+        db,
+        test_run_id,
+        name,
+        iter_upload(file),
+        kind=kind,
+        content_type=file.content_type,
+        test_result_id=test_result_id,
+        created_by=current_user.id
+    )
+
+
+@router.get("/runs/{test_run_id}/artifacts", response_model=ArtifactManifest)
+async def get_artifact_manifest(
+    test_run_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """获取测试运行的产物清单"""
+    return await ArtifactService.get_manifest(db, test_run_id)
+
+
+@router.get("/artifacts/{artifact_id}/content")
+async def get_artifact_content(
+    artifact_id: int,
+    range: Optional[str] = Header(None, description="单段字节范围，如bytes=0-65535"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """流式读取测试产物内容，支持Range请求"""
+    artifact = await ArtifactService.get_artifact(db, artifact_id)
+    size = artifact.size
+    headers = {"Accept-Ranges": "bytes", "ETag": f'"{artifact.digest}"'}
+    try:
+        byte_range = parse_byte_range(range, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    store = get_artifact_store()
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            store.iter_content(artifact.digest),
+            media_type=artifact.content_type,
+            headers=headers
+        )
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        store.iter_content(artifact.digest, start, end),
+        status_code=206,
+        media_type=artifact.content_type,
+        headers=headers
+    )
+
+
 @router.get("/runs/{test_run_id}/results", response_model=TestResultList)
 async def get_test_results(
     test_run_id: int,
-    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
     status: Optional[TestStatus] = None,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """获取测试结果列表"""
-    test_results = await TestService.get_test_results(
+    """获取测试结果列表，按开始时间倒序分页"""
+    test_results, next_cursor = await TestService.get_test_results(
         db=db,
         test_run_id=test_run_id,
-        skip=skip,
         limit=limit,
+        cursor=cursor,
         status=status
     )
     return {
-        "total": len(test_results),
-        "items": test_results
+        "total": await TestService.count_test_results(db, test_run_id, status),
+        "items": test_results,
+        "next_cursor": next_cursor
     } 
\ No newline at end of file
@@ -3,9 +3,9 @@
 
 定义测试用例、测试运行和测试结果相关的请求和响应模型
 """
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from ...config.constants import TestStatus, TestType, TestPriority
 
@@ -46,6 +46,7 @@ class TestCaseResponse(TestCaseBase):
     """测试用例响应模型"""
     id: int
     project_id: int
+    version: int = Field(1, description="当前版本号")
     created_by: int
     created_at: datetime
     updated_at: datetime
@@ -58,6 +59,71 @@ class TestCaseList(BaseModel):
     """测试用例列表响应模型"""
     total: int
     items: List[TestCaseResponse]
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多记录")
+
+
+class TestCaseImportRow(TestCaseBase):
+    """测试用例导入的单行数据，按(project_id, name)新增或更新"""
+    steps: List[Dict[str, str]] = Field(
+        default_factory=list,
+        description="测试步骤列表，CSV/XLSX中为JSON字符串"
+    )
+
+
+class TestCaseImportError(BaseModel):
+    """测试用例导入的失败行"""
+    row: int = Field(..., description="CSV/XLSX中的行号，JSON数组中的下标或NDJSON中的行号，从1开始")
+    error: str
+
+
+class TestCaseImportJob(BaseModel):
+    """测试用例导入任务"""
+    job_id: str
+    project_id: int
+    filename: str
+    format: str
+    status: str = Field(..., description="pending/running/completed/failed")
+    processed: int = Field(..., description="已处理的行数")
+    created: int
+    updated: int
+    rejected: int
+    errors: List[TestCaseImportError] = Field(..., description="仅包含前若干条错误明细")
+    message: Optional[str] = Field(None, description="任务失败的原因")
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class TestCaseVersionResponse(BaseModel):
+    """测试用例历史版本"""
+    version: int
+    is_snapshot: bool = Field(..., description="是否保存了完整内容，否则保存相对上一版本的差异")
+    created_by: Optional[int] = Field(None, description="修改人，补记的初始版本为空")
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TestCaseVersionList(BaseModel):
+    """测试用例历史版本列表"""
+    current_version: int
+    items: List[TestCaseVersionResponse]
+    next_before: Optional[int] = Field(None, description="下一页的before参数，为空表示没有更多记录")
+
+
+class TestCaseVersionDocument(BaseModel):
+    """测试用例指定版本的内容"""
+    test_case_id: int
+    version: int
+    document: Dict[str, Any]
+
+
+class TestCaseVersionDiff(BaseModel):
+    """测试用例两个版本之间的差异"""
+    test_case_id: int
+    from_version: int
+    to_version: int
+    patch: List[Dict[str, Any]] = Field(..., description="RFC 6902 JSON Patch")
 
 
 # 测试运行模型
@@ -90,10 +156,124 @@ class Config:
         from_attributes = True
 
 
+class TestRunProgressState(BaseModel):
+    """测试运行进度计数"""
+    total: int
+    passed: int
+    failed: int
+    error: int
+    skipped: int
+    completed: bool
+
+
+class TestRunProgress(BaseModel):
+    """测试运行实时进度模型，与SSE推送的消息相同"""
+    key: str = Field(..., description="测试运行ID")
+    seq: int = Field(..., description="进度序号，递增")
+    state: TestRunProgressState
+    delta: Dict[str, int] = Field(default_factory=dict, description="与上次推送之间新增的各状态结果数")
+
+
+class TestRunExecute(BaseModel):
+    """测试运行执行请求"""
+    case_ids: Optional[List[int]] = Field(None, description="要执行的测试用例ID，为空时执行项目下的全部用例")
+    skip_quarantined: bool = Field(False, description="跳过因结果不稳定被隔离的用例，否则只执行一次不重试")
+
+
+class TestRunExecution(BaseModel):
+    """已提交执行的测试运行"""
+    test_run_id: int
+    cases: int = Field(..., description="待执行的测试用例数")
+    workers: int = Field(..., description="工作进程数")
+
+
+class TestRunEnqueue(TestRunExecute):
+    """测试运行入队请求"""
+    priority: TestPriority = Field(TestPriority.MEDIUM, description="优先级，决定进入的队列通道")
+
+
+class TestRunQueued(BaseModel):
+    """已入队的测试运行"""
+    job_id: str
+    test_run_id: int
+    environment: str
+    priority: str
+
+
+class RunQueueLaneStats(BaseModel):
+    """队列单个优先级通道的积压指标"""
+    waiting: int = Field(..., description="尚未被领取的运行数")
+    pending: int = Field(..., description="已被领取尚未完成的运行数")
+    oldest_wait_seconds: float = Field(..., description="最早一个等待中的运行已等待的时间")
+    consumers: int
+
+
+class RunQueueStats(BaseModel):
+    """测试环境队列的积压指标"""
+    environment: str
+    queue: str
+    lanes: Dict[str, RunQueueLaneStats]
+    waiting: int
+    pending: int
+    oldest_wait_seconds: float
+    consumers: int
+    dead: int = Field(..., description="死信队列中的运行数")
+
+
+class FlakyCase(BaseModel):
+    """测试用例的不稳定度"""
+    test_case_id: int
+    name: Optional[str] = None
+    score: float = Field(..., description="翻转率: 窗口内相邻结果通过/失败翻转的比例")
+    failure_rate: float
+    samples: int = Field(..., description="窗口内的结果数")
+    failures: int
+    transitions: int
+    history: str = Field(..., description="窗口内的结果，从旧到新，P为通过，F为失败或错误")
+    quarantined: bool
+    quarantined_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class FlakyCaseList(BaseModel):
+    """项目的不稳定用例列表"""
+    quarantined: int = Field(..., description="已隔离的用例数")
+    items: List[FlakyCase]
+
+
+class ImpactQuery(BaseModel):
+    """变更影响分析请求，diff和paths至少提供一个"""
+    diff: Optional[str] = Field(None, description="git diff或git diff --name-only的输出")
+    paths: List[str] = Field(default_factory=list, description="相对仓库根目录的变更文件路径")
+    include_critical: bool = Field(True, description="是否加入critical优先级的用例")
+    include_flaky: bool = Field(True, description="是否加入结果不稳定的用例")
+
+
+class ImpactReasons(BaseModel):
+    """各来源选中的用例数，同一用例可能属于多个来源"""
+    affected: int = Field(..., description="覆盖了变更文件的用例数")
+    unrecorded: int = Field(..., description="没有覆盖记录的用例数")
+    critical: int
+    flaky: int
+
+
+class ImpactSelection(BaseModel):
+    """变更影响分析结果"""
+    project_id: int
+    full_run: bool = Field(..., description="是否因配置文件变更选择了全部用例")
+    total_cases: int
+    selected_cases: int
+    case_ids: List[int]
+    reasons: ImpactReasons
+    changed_paths: List[str]
+    unindexed_paths: List[str] = Field(..., description="没有任何用例覆盖的变更文件")
+
+
 class TestRunList(BaseModel):
     """测试运行列表响应模型"""
     total: int
     items: List[TestRunResponse]
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多记录")
 
 
 # 测试结果模型
@@ -112,6 +292,59 @@ class TestResultCreate(TestResultBase):
     test_case_id: int
 
 
+class TestResultBatchItem(TestResultBase):
+    """批量写入的单条测试结果"""
+    test_case_id: int
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    duration: Optional[int] = Field(None, ge=0, description="执行时长（秒），为空时由起止时间计算")
+
+    @field_validator("started_at", "completed_at")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """带时区的时间转换为不带时区的UTC时间，与数据库中的时间和datetime.utcnow()一致"""
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class TestResultBatchCreate(BaseModel):
+    """测试结果批量创建模型"""
+    results: List[TestResultBatchItem] = Field(..., min_length=1, max_length=10000)
+
+
+class TestResultBatchError(BaseModel):
+    """批量写入中失败的单条结果"""
+    index: int = Field(..., description="在请求results中的序号")
+    test_case_id: int
+    error: str
+
+
+class TestResultBatchResponse(BaseModel):
+    """测试结果批量创建响应模型"""
+    test_run_id: int
+    accepted: int
+    rejected: int
+    errors: List[TestResultBatchError]
+
+
+class TestResultStreamError(BaseModel):
+    """流式写入中失败的单行"""
+    line: int = Field(..., description="NDJSON中的行号，从1开始")
+    test_case_id: Optional[int] = None
+    error: str
+
+
+class TestResultStreamResponse(BaseModel):
+    """测试结果流式写入响应模型"""
+    test_run_id: int
+    lines: int
+    accepted: int
+    rejected: int
+    batches: int
+    errors: List[TestResultStreamError] = Field(..., description="仅包含前若干条错误明细")
+
+
 class TestResultResponse(TestResultBase):
     """测试结果响应模型"""
     id: int
@@ -120,6 +353,10 @@ class TestResultResponse(TestResultBase):
     started_at: datetime
     completed_at: Optional[datetime] = None
     duration: Optional[int] = None
+    payload_refs: Optional[Dict[str, Any]] = Field(
+        None,
+        description="已转存的字段，这些字段只返回末尾预览或为空，完整内容通过/results/{id}/payload/{field}读取"
+    )
 
     class Config:
         from_attributes = True
@@ -128,4 +365,55 @@ class Config:
 class TestResultList(BaseModel):
     """测试结果列表响应模型"""
     total: int
-    items: List[TestResultResponse] 
\ No newline at end of file
+    items: List[TestResultResponse]
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多记录") 
+
+# 测试产物模型
+class ArtifactUploadCreate(BaseModel):
+    """测试产物上传创建模型"""
+    name: str = Field(..., min_length=1, max_length=255, description="运行内唯一，已有同名产物时完成上传后替换")
+    kind: str = Field("other", pattern="^(screenshot|log|video|report|other)$")
+    content_type: Optional[str] = Field(None, max_length=100)
+    size: Optional[int] = Field(None, ge=0, description="总字节数，提供时完成上传前校验")
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$", description="提供时完成上传前校验")
+    test_result_id: Optional[int] = None
+
+
+class ArtifactUploadStatus(BaseModel):
+    """测试产物上传状态模型"""
+    upload_id: str
+    test_run_id: int
+    test_result_id: Optional[int] = None
+    name: str
+    kind: str
+    content_type: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    received: int = Field(..., description="已写入的字节数，续传时从该偏移量开始")
+
+
+class ArtifactResponse(BaseModel):
+    """测试产物响应模型"""
+    id: int
+    test_run_id: int
+    test_result_id: Optional[int] = None
+    name: str
+    kind: str
+    content_type: str
+    digest: str = Field(..., description="内容的SHA-256")
+    size: int
+    created_at: datetime
+    expires_at: Optional[datetime] = None
+    deduplicated: Optional[bool] = Field(None, description="上传时内容已存在，没有占用额外空间")
+
+    class Config:
+        from_attributes = True
+
+
+class ArtifactManifest(BaseModel):
+    """测试运行产物清单模型"""
+    test_run_id: int
+    count: int
+    total_size: int
+    stored_size: int = Field(..., description="去重后实际占用的字节数")
+    artifacts: List[ArtifactResponse]
@@ -7,7 +7,7 @@
 - 用户认证
 - 会话管理
 """
-from .models import User, Role, Permission, Department, LoginLog, OperationLog
+from .models import User, Role, Permission, Department, LoginLog, LoginLogRollup, OperationLog
 from .schemas import TokenResponse, UserLogin, RefreshToken, UserOut
 
 # 避免循环导入，将这些导入移到需要的地方
@@ -16,6 +16,6 @@
 # from .service import AuthService
 
 __all__ = [
-    "User", "Role", "Permission", "Department", "LoginLog", "OperationLog",
+    "User", "Role", "Permission", "Department", "LoginLog", "LoginLogRollup", "OperationLog",
     "TokenResponse", "UserLogin", "RefreshToken", "UserOut"
 ] 
\ No newline at end of file
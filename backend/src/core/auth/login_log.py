@@ -3,12 +3,52 @@
 负责记录用户登录行为和查询登录历史
 """
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
-from sqlalchemy import select, desc
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
 
-from core.auth.models import LoginLog, User
+from core.auth.models import LoginLog
+from core.auth.login_log_rollup import query_login_counts
+from core.auth.login_log_writer import login_log_writer, LoginEvent, LOGIN_SUCCESS, LOGIN_FAILED
+from core.database.query_plan import register_hot_query
+from core.utils.pagination import apply_keyset, encode_cursor, paginate_keyset
+
+
+def user_login_logs_statement(user_id: int) -> Select:
+    """用户登录日志查询，使用索引ix_login_logs_user_created"""
+    return select(LoginLog).where(LoginLog.user_id == user_id)
+
+
+def recent_logins_statement(status_filter: Optional[bool] = None) -> Select:
+    """最近登录日志查询，按状态过滤时使用索引ix_login_logs_status_created"""
+    statement = select(LoginLog)
+    if status_filter is not None:
+        statement = statement.where(
+            LoginLog.status == (LOGIN_SUCCESS if status_filter else LOGIN_FAILED)
+        )
+    return statement
+
+
+@register_hot_query("login_logs.user_logs")
+def _user_login_logs_page() -> Select:
+    return apply_keyset(
+        user_login_logs_statement(1), LoginLog.created_at, LoginLog.id, 20,
+        encode_cursor(datetime(2024, 1, 1), 1000)
+    )
+
+
+@register_hot_query("login_logs.recent")
+def _recent_logins_page() -> Select:
+    return apply_keyset(recent_logins_statement(), LoginLog.created_at, LoginLog.id, 20)
+
+
+@register_hot_query("login_logs.recent_by_status")
+def _recent_logins_by_status_page() -> Select:
+    return apply_keyset(
+        recent_logins_statement(False), LoginLog.created_at, LoginLog.id, 20,
+        encode_cursor(datetime(2024, 1, 1), 1000)
+    )
 
 
 class LoginLogService:
@@ -24,13 +64,15 @@ async def add_login_log(
         login_status: bool = False,
         status_message: Optional[str] = None,
         captcha_verified: bool = False
-    ) -> LoginLog:
+    ) -> bool:
         """添加登录日志
         
+        日志只放入写入队列，由后台写入器批量落库，调用方不等待数据库写入。
+        
         Args:
-            db: 数据库会话
+            db: 数据库会话，保留以兼容现有调用方
             user_id: 用户ID
-            username: 用户名，如果user_id为空但提供了username，会尝试查找用户
+            username: 用户名
             ip_address: 用户IP地址
             user_agent: 用户浏览器信息
             login_status: 登录是否成功
@@ -38,82 +80,67 @@ async def add_login_log(
             captcha_verified: 是否通过验证码验证
             
         Returns:
-            LoginLog: 创建的登录日志记录
+            bool: 是否成功加入写入队列
         """
-        # 如果没有提供user_id但提供了username，尝试查找用户
-        if user_id is None and username:
-            user = db.query(User).filter(User.username == username).first()
-            if user:
-                user_id = user.id
-        
-        # 创建登录日志记录
-        login_log = LoginLog(
-            user_id=user_id if user_id else None,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            login_status=login_status,
-            status_message=status_message,
+        return login_log_writer.submit(LoginEvent(
+            user_id=user_id,
+            username=username or "",
+            ip_address=ip_address or "unknown",
+            user_agent=user_agent or "unknown",
+            status=LOGIN_SUCCESS if login_status else LOGIN_FAILED,
+            message=status_message,
             captcha_verified=captcha_verified
-        )
-        
-        # 保存到数据库
-        db.add(login_log)
-        db.commit()
-        db.refresh(login_log)
-        
-        return login_log
+        ))
     
     @staticmethod
     async def get_user_login_logs(
         db: Session,
         user_id: int,
-        skip: int = 0,
-        limit: int = 100
-    ) -> List[LoginLog]:
-        """获取用户登录日志
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[LoginLog], Optional[str]]:
+        """获取用户登录日志，按时间倒序键集分页
         
         Args:
             db: 数据库会话
             user_id: 用户ID
-            skip: 跳过记录数
             limit: 返回记录数上限
+            cursor: 上一页返回的游标
             
         Returns:
-            List[LoginLog]: 登录日志列表
+            Tuple[List[LoginLog], Optional[str]]: (登录日志列表, 下一页游标)
+            
+        Raises:
+            ValueError: 游标格式无效
         """
-        return db.query(LoginLog).filter(
-            LoginLog.user_id == user_id
-        ).order_by(
-            desc(LoginLog.login_time)
-        ).offset(skip).limit(limit).all()
+        return paginate_keyset(
+            db, user_login_logs_statement(user_id), LoginLog.created_at, LoginLog.id, limit, cursor
+        )
     
     @staticmethod
     async def get_recent_logins(
         db: Session,
-        skip: int = 0,
         limit: int = 100,
-        status_filter: Optional[bool] = None
-    ) -> List[LoginLog]:
-        """获取最近的登录日志
+        status_filter: Optional[bool] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[LoginLog], Optional[str]]:
+        """获取最近的登录日志，按时间倒序键集分页
         
         Args:
             db: 数据库会话
-            skip: 跳过记录数
             limit: 返回记录数上限
-            status_filter: 登录状态过滤
+            status_filter: 登录状态过滤，True为成功，False为失败
+            cursor: 上一页返回的游标
             
         Returns:
-            List[LoginLog]: 登录日志列表
+            Tuple[List[LoginLog], Optional[str]]: (登录日志列表, 下一页游标)
+            
+        Raises:
+            ValueError: 游标格式无效
         """
-        query = db.query(LoginLog)
-        
-        # 应用状态过滤
-        if status_filter is not None:
-            query = query.filter(LoginLog.login_status == status_filter)
-        
-        return query.order_by(
-            desc(LoginLog.login_time)
-        ).offset(skip).limit(limit).all()
+        return paginate_keyset(
+            db, recent_logins_statement(status_filter), LoginLog.created_at, LoginLog.id, limit, cursor
+        )
     
     @staticmethod
     async def get_login_statistics(
@@ -123,39 +150,25 @@ async def get_login_statistics(
     ) -> Dict[str, Any]:
         """获取登录统计信息
         
+        整小时、整天的部分读取login_log_rollups汇总表，首尾不足一小时的部分
+        对login_logs做一次条件聚合，统计开销与时间跨度基本无关。
+        
         Args:
             db: 数据库会话
-            start_time: 开始时间
-            end_time: 结束时间
+            start_time: 开始时间(包含)，为空表示不限
+            end_time: 结束时间(不包含)，为空表示当前时间
             
         Returns:
             Dict[str, Any]: 统计信息
         """
-        query = db.query(LoginLog)
-        
-        # 应用时间过滤
-        if start_time:
-            query = query.filter(LoginLog.login_time >= start_time)
-        if end_time:
-            query = query.filter(LoginLog.login_time <= end_time)
-        
-        # 总登录次数
-        total_logins = query.count()
-        
-        # 成功登录次数
-        success_logins = query.filter(LoginLog.login_status == True).count()
-        
-        # 失败登录次数
-        failed_logins = query.filter(LoginLog.login_status == False).count()
-        
-        # 验证码验证情况
-        captcha_verified = query.filter(LoginLog.captcha_verified == True).count()
+        counts = query_login_counts(db, start_time, end_time or datetime.utcnow())
+        total_logins = counts["total"]
         
         return {
             "total_logins": total_logins,
-            "success_logins": success_logins,
-            "failed_logins": failed_logins,
-            "success_rate": (success_logins / total_logins * 100) if total_logins > 0 else 0,
-            "captcha_verified": captcha_verified,
-            "captcha_rate": (captcha_verified / total_logins * 100) if total_logins > 0 else 0
-        } 
\ No newline at end of file
+            "success_logins": counts["success"],
+            "failed_logins": counts["failed"],
+            "success_rate": (counts["success"] / total_logins * 100) if total_logins > 0 else 0,
+            "captcha_verified": counts["captcha_verified"],
+            "captcha_rate": (counts["captcha_verified"] / total_logins * 100) if total_logins > 0 else 0
+        }
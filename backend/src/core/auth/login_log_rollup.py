@@ -0,0 +1,292 @@
+"""
+登录日志汇总模块
+
+login_log_rollups表按小时和天记录各(状态, 验证码验证)组合的登录次数:
+- 写入器每刷新一批日志，就在同一事务中把该批的计数累加到汇总表
+- 统计查询把时间范围拆成整天、整小时和首尾不足一小时的边角，
+  整段部分读汇总表，边角部分对login_logs做一次条件聚合
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Select, and_, case, delete, func, or_, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+from core.auth.models import LoginLog, LoginLogRollup, LOGIN_SUCCESS, LOGIN_FAILED
+from core.database.query_plan import register_hot_query
+
+# 汇总粒度
+GRANULARITY_HOUR = "hour"
+GRANULARITY_DAY = "day"
+
+# 汇总键: (粒度, 时间桶起点, 状态, 是否通过验证码验证)
+RollupKey = Tuple[str, datetime, str, bool]
+TimeRange = Tuple[Optional[datetime], datetime]
+
+
+def floor_hour(value: datetime) -> datetime:
+    """向下取整到小时"""
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value: datetime) -> datetime:
+    """向上取整到小时"""
+    floored = floor_hour(value)
+    return floored if floored == value else floored + timedelta(hours=1)
+
+
+def floor_day(value: datetime) -> datetime:
+    """向下取整到天"""
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def ceil_day(value: datetime) -> datetime:
+    """向上取整到天"""
+    floored = floor_day(value)
+    return floored if floored == value else floored + timedelta(days=1)
+
+
+def aggregate_rollups(rows: Iterable[Tuple[datetime, str, bool]]) -> Dict[RollupKey, int]:
+    """把登录记录聚合为小时和天两种粒度的计数
+
+    Args:
+        rows: (创建时间, 状态, 是否通过验证码验证)序列
+
+    Returns:
+        Dict[RollupKey, int]: 汇总键到次数的映射
+    """
+    counts: Counter = Counter()
+    for created_at, status, captcha_verified in rows:
+        captcha_verified = bool(captcha_verified)
+        counts[(GRANULARITY_HOUR, floor_hour(created_at), status, captcha_verified)] += 1
+        counts[(GRANULARITY_DAY, floor_day(created_at), status, captcha_verified)] += 1
+    return dict(counts)
+
+
+def build_upsert(counts: Dict[RollupKey, int]):
+    """构造累加汇总计数的多行INSERT ... ON DUPLICATE KEY UPDATE语句
+
+    Args:
+        counts: 汇总键到次数的映射
+
+    Returns:
+        Insert: 可直接执行的语句
+    """
+    values = [
+        {
+            "granularity": granularity,
+            "bucket_start": bucket_start,
+            "status": status,
+            "captcha_verified": captcha_verified,
+            "count": count
+        }
+        for (granularity, bucket_start, status, captcha_verified), count in counts.items()
+    ]
+    stmt = mysql_insert(LoginLogRollup).values(values)
+    return stmt.on_duplicate_key_update(count=LoginLogRollup.count + stmt.inserted["count"])
+
+
+def apply_rollups(session: Session, rows: Iterable[Tuple[datetime, str, bool]]) -> int:
+    """把一批登录记录累加到汇总表，不提交事务
+
+    Args:
+        session: 数据库会话，由调用方提交
+        rows: (创建时间, 状态, 是否通过验证码验证)序列
+
+    Returns:
+        int: 受影响的汇总键数量
+    """
+    counts = aggregate_rollups(rows)
+    if counts:
+        session.execute(build_upsert(counts))
+    return len(counts)
+
+
+def rebuild_rollups(
+    session: Session,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    chunk_size: int = 5000
+) -> int:
+    """根据login_logs重建汇总表，用于首次上线回填或修复数据
+
+    时间范围会扩展到整天，保证重建后的天、小时汇总都是完整的。
+
+    Args:
+        session: 数据库会话
+        start_time: 开始时间，为空表示从最早的日志开始
+        end_time: 结束时间，为空表示到最新的日志为止
+        chunk_size: 流式读取日志的批大小
+
+    Returns:
+        int: 写入的汇总键数量
+    """
+    start = floor_day(start_time) if start_time else None
+    end = ceil_day(end_time) if end_time else None
+
+    cleanup = delete(LoginLogRollup)
+    query = select(LoginLog.created_at, LoginLog.status, LoginLog.captcha_verified)
+    if start:
+        cleanup = cleanup.where(LoginLogRollup.bucket_start >= start)
+        query = query.where(LoginLog.created_at >= start)
+    if end:
+        cleanup = cleanup.where(LoginLogRollup.bucket_start < end)
+        query = query.where(LoginLog.created_at < end)
+
+    session.execute(cleanup)
+    result = session.execute(query.execution_options(yield_per=chunk_size))
+    counts = aggregate_rollups(result)
+    if counts:
+        session.execute(build_upsert(counts))
+    session.commit()
+    return len(counts)
+
+
+@dataclass
+class RangePlan:
+    """统计时间范围的拆分结果"""
+    # 按天汇总的范围
+    days: List[TimeRange] = field(default_factory=list)
+    # 按小时汇总的范围
+    hours: List[TimeRange] = field(default_factory=list)
+    # 不足一小时、需要扫描原始日志的范围
+    raw: List[TimeRange] = field(default_factory=list)
+
+
+def plan_range(start_time: Optional[datetime], end_time: datetime) -> RangePlan:
+    """把半开区间[start_time, end_time)拆成整天、整小时和原始日志三部分
+
+    Args:
+        start_time: 开始时间，为空表示不限
+        end_time: 结束时间
+
+    Returns:
+        RangePlan: 拆分结果，各部分互不重叠且正好覆盖整个区间
+    """
+    plan = RangePlan()
+    hour_end = floor_hour(end_time)
+    hour_start = ceil_hour(start_time) if start_time else None
+
+    if hour_start is not None and hour_start >= hour_end:
+        # 不跨越完整的小时，全部扫描原始日志
+        if start_time < end_time:
+            plan.raw.append((start_time, end_time))
+        return plan
+
+    if hour_start is not None and start_time < hour_start:
+        plan.raw.append((start_time, hour_start))
+    if hour_end < end_time:
+        plan.raw.append((hour_end, end_time))
+
+    day_end = floor_day(hour_end)
+    day_start = ceil_day(hour_start) if hour_start is not None else None
+    if day_start is not None and day_start >= day_end:
+        plan.hours.append((hour_start, hour_end))
+        return plan
+
+    plan.days.append((day_start, day_end))
+    if hour_start is not None and hour_start < day_start:
+        plan.hours.append((hour_start, day_start))
+    if day_end < hour_end:
+        plan.hours.append((day_end, hour_end))
+    return plan
+
+
+def _range_condition(column, time_range: TimeRange):
+    """构造半开区间过滤条件"""
+    start, end = time_range
+    if start is None:
+        return column < end
+    return and_(column >= start, column < end)
+
+
+def rollup_counts_statement(plan: RangePlan) -> Optional[Select]:
+    """汇总表查询，按(粒度, 时间桶)前缀使用唯一索引uk_login_log_rollup_bucket"""
+    conditions = [
+        and_(LoginLogRollup.granularity == GRANULARITY_DAY,
+             _range_condition(LoginLogRollup.bucket_start, time_range))
+        for time_range in plan.days
+    ] + [
+        and_(LoginLogRollup.granularity == GRANULARITY_HOUR,
+             _range_condition(LoginLogRollup.bucket_start, time_range))
+        for time_range in plan.hours
+    ]
+    if not conditions:
+        return None
+    return select(
+        LoginLogRollup.status,
+        LoginLogRollup.captcha_verified,
+        func.sum(LoginLogRollup.count)
+    ).where(or_(*conditions)).group_by(
+        LoginLogRollup.status,
+        LoginLogRollup.captcha_verified
+    )
+
+
+def raw_counts_statement(ranges: List[TimeRange]) -> Select:
+    """首尾边角的条件聚合查询，由索引ix_login_logs_created覆盖，不回表"""
+    return select(
+        func.count(),
+        func.sum(case((LoginLog.status == LOGIN_SUCCESS, 1), else_=0)),
+        func.sum(case((LoginLog.status == LOGIN_FAILED, 1), else_=0)),
+        func.sum(case((LoginLog.captcha_verified.is_(True), 1), else_=0))
+    ).where(or_(*[
+        _range_condition(LoginLog.created_at, time_range)
+        for time_range in ranges
+    ]))
+
+
+@register_hot_query("login_log_rollups.counts")
+def _rollup_counts_sample() -> Select:
+    return rollup_counts_statement(plan_range(datetime(2024, 1, 1, 10, 30), datetime(2024, 1, 5, 8, 15)))
+
+
+@register_hot_query("login_logs.edge_counts", covering=True)
+def _raw_counts_sample() -> Select:
+    return raw_counts_statement(plan_range(datetime(2024, 1, 1, 10, 30), datetime(2024, 1, 5, 8, 15)).raw)
+
+
+def query_login_counts(
+    db: Session,
+    start_time: Optional[datetime],
+    end_time: datetime
+) -> Dict[str, int]:
+    """统计时间范围内的登录次数
+
+    最多执行两条查询: 一条读汇总表，一条对首尾边角做条件聚合。
+
+    Args:
+        db: 数据库会话
+        start_time: 开始时间(包含)，为空表示不限
+        end_time: 结束时间(不包含)
+
+    Returns:
+        Dict[str, int]: total、success、failed、captcha_verified四项计数
+    """
+    counts = {"total": 0, "success": 0, "failed": 0, "captcha_verified": 0}
+    plan = plan_range(start_time, end_time)
+
+    statement = rollup_counts_statement(plan)
+    if statement is not None:
+        rows = db.execute(statement).all()
+        for status, captcha_verified, count in rows:
+            count = int(count or 0)
+            counts["total"] += count
+            if status == LOGIN_SUCCESS:
+                counts["success"] += count
+            elif status == LOGIN_FAILED:
+                counts["failed"] += count
+            if captcha_verified:
+                counts["captcha_verified"] += count
+
+    if plan.raw:
+        row = db.execute(raw_counts_statement(plan.raw)).one()
+        counts["total"] += int(row[0] or 0)
+        counts["success"] += int(row[1] or 0)
+        counts["failed"] += int(row[2] or 0)
+        counts["captcha_verified"] += int(row[3] or 0)
+
+    return counts
@@ -0,0 +1,233 @@
+"""
+登录日志异步批量写入模块
+
+登录路径只负责把登录事件放入有界队列，后台线程按批次写入数据库:
+- 队列达到batch_size或等待超过flush_interval时刷新
+- 每批使用一条多行INSERT语句写入，并在同一事务中累加小时/天汇总计数
+- 队列已满时丢弃事件并计数，保证内存有界
+- 写入失败的批次放回队列，间隔retry_delay后重试，超过max_retries次仍失败时以CRITICAL级别记录并放弃
+- 停止时写完队列中剩余的事件
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from core.auth.login_log_rollup import apply_rollups
+from core.auth.models import LoginLog, LOGIN_SUCCESS, LOGIN_FAILED
+from core.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoginEvent:
+    """登录事件"""
+    username: str
+    status: str
+    user_id: Optional[int] = None
+    ip_address: str = "unknown"
+    user_agent: str = "unknown"
+    message: Optional[str] = None
+    captcha_verified: bool = False
+    # 入队时记录时间，写入延迟不影响日志时间
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    # 已失败的写入次数，不写入数据库
+    attempts: int = field(default=0, compare=False)
+
+    def to_row(self) -> Dict[str, Any]:
+        """转换为login_logs表的一行数据，超长字段按列宽截断"""
+        row = asdict(self)
+        del row["attempts"]
+        row["username"] = (row["username"] or "")[:50]
+        row["ip_address"] = (row["ip_address"] or "unknown")[:50]
+        row["user_agent"] = (row["user_agent"] or "unknown")[:200]
+        if row["message"]:
+            row["message"] = row["message"][:200]
+        return row
+
+
+class LoginLogWriter:
+    """登录日志批量写入器"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_retries: int = 3,
+        retry_delay: float = 1.0
+    ):
+        """初始化写入器
+
+        Args:
+            session_factory: 数据库会话工厂
+            max_queue_size: 队列最大长度，超出后丢弃新事件
+            batch_size: 单批写入的最大行数
+            flush_interval: 最长刷新间隔(秒)
+            max_retries: 写入失败的事件最多重试的次数
+            retry_delay: 写入失败后等待多久再写下一批(秒)
+        """
+        self._session_factory = session_factory
+        self._queue: "queue.Queue[LoginEvent]" = queue.Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计信息
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.lost = 0
+
+    @property
+    def running(self) -> bool:
+        """后台线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动后台写入线程"""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="login-log-writer",
+                daemon=True
+            )
+            self._thread.start()
+            logger.info("登录日志写入线程已启动")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """停止后台写入线程，写完队列中剩余的事件
+
+        Args:
+            timeout: 等待线程退出的最长时间(秒)
+        """
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        logger.info(
+            f"登录日志写入线程已停止 - 写入: {self.written}, 丢弃: {self.dropped}, "
+            f"失败: {self.failed}, 放弃: {self.lost}"
+        )
+
+    def submit(self, event: LoginEvent) -> bool:
+        """提交登录事件，不会阻塞调用方
+
+        Args:
+            event: 登录事件
+
+        Returns:
+            bool: 是否成功入队，队列已满时返回False
+        """
+        if not self.running:
+            self.start()
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"登录日志队列已满，已丢弃 {self.dropped} 条事件")
+            return False
+
+    def pending(self) -> int:
+        """队列中等待写入的事件数"""
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        """后台线程主循环"""
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = self._collect_batch()
+            if batch and not self._flush(batch):
+                # 数据库异常时不立即重试，停止阶段不再等待
+                self._stop_event.wait(self.retry_delay)
+
+    def _collect_batch(self) -> List[LoginEvent]:
+        """收集一批事件，达到批大小或超过刷新间隔即返回"""
+        batch: List[LoginEvent] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._stop_event.is_set():
+                # 停止阶段不再等待，直接取走剩余事件
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _flush(self, batch: List[LoginEvent]) -> bool:
+        """使用一条多行INSERT写入一批事件，并更新汇总表
+
+        Returns:
+            bool: 是否写入成功，失败的事件放回队列等待重试
+        """
+        rows = [event.to_row() for event in batch]
+        session = self._session_factory()
+        try:
+            session.execute(insert(LoginLog).values(rows))
+            apply_rollups(session, (
+                (row["created_at"], row["status"], row["captcha_verified"]) for row in rows
+            ))
+            session.commit()
+            self.written += len(rows)
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.failed += len(rows)
+            logger.error(f"批量写入登录日志失败 - 条数: {len(rows)}, 错误: {str(e)}")
+            self._requeue(batch, e)
+            return False
+        finally:
+            session.close()
+
+    def _requeue(self, batch: List[LoginEvent], error: Exception) -> None:
+        """写入失败的事件放回队列，重试次数用完或队列已满的事件放弃"""
+        lost = 0
+        for event in batch:
+            event.attempts += 1
+            if event.attempts > self.max_retries:
+                lost += 1
+                continue
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                lost += 1
+        if lost:
+            self.lost += lost
+            logger.critical(
+                f"登录日志写入多次失败，已放弃 {lost} 条(累计 {self.lost} 条)，请检查数据库和login_logs表结构 - "
+                f"错误: {str(error)}"
+            )
+
+
+# 全局登录日志写入器
+login_log_writer = LoginLogWriter()
+
+# 进程退出时写完剩余的登录日志
+atexit.register(login_log_writer.stop)
@@ -8,7 +8,12 @@
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from core.models import Base, mapper_registry
 
-__all__ = ['User', 'Role', 'Permission', 'Department', 'LoginLog', 'OperationLog', 'user_roles', 'user_departments', 'role_permissions']
+__all__ = ['User', 'Role', 'Permission', 'Department', 'LoginLog', 'LoginLogRollup', 'OperationLog', 'user_roles', 'user_departments', 'role_permissions',
+           'LOGIN_SUCCESS', 'LOGIN_FAILED']
+
+# 登录状态
+LOGIN_SUCCESS = "success"
+LOGIN_FAILED = "failed"
 
 # 用户-角色关联表
 user_roles = Table(
@@ -145,48 +150,88 @@ class User(Base):
 class LoginLog(Base):
     """登录日志表"""
     __tablename__ = 'login_logs'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # 按用户查询登录历史
+        Index('ix_login_logs_user_created', 'user_id', 'created_at', 'id'),
+        # 按状态查询最近登录
+        Index('ix_login_logs_status_created', 'status', 'created_at', 'id'),
+        # 最近登录列表，并覆盖统计查询的边角条件聚合
+        Index('ix_login_logs_created', 'created_at', 'id', 'status', 'captcha_verified'),
+        {'extend_existing': True}
+    )
     
     # 主键
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     
     # 必填字段
-    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     username: Mapped[str] = mapped_column(String(50), nullable=False)
     ip_address: Mapped[str] = mapped_column(String(50), nullable=False)
     user_agent: Mapped[str] = mapped_column(String(200), nullable=False)
     status: Mapped[str] = mapped_column(String(20), nullable=False)  # success, failed
     
     # 可选字段
+    user_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)  # 用户不存在时为空
     message: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     
     # 带默认值的字段
+    captcha_verified: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=text('CURRENT_TIMESTAMP'))
 
+class LoginLogRollup(Base):
+    """登录日志汇总表
+
+    按小时和天汇总登录次数，由登录日志写入器增量维护
+    """
+    __tablename__ = 'login_log_rollups'
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket_start', 'status', 'captcha_verified', name='uk_login_log_rollup_bucket'),
+        {'extend_existing': True}
+    )
+    
+    # 主键
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    
+    # 必填字段
+    granularity: Mapped[str] = mapped_column(String(10), nullable=False)  # hour, day
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # success, failed
+    captcha_verified: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    
+    # 带默认值的字段
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
 class OperationLog(Base):
-    """操作日志表"""
+    """操作日志表
+
+    按created_at的月份做RANGE分区，分区键必须包含在主键中，
+    因此主键为(id, created_at)，分区由operation_log_partition模块维护
+    """
     __tablename__ = 'operation_logs'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_operation_logs_created_at', 'created_at'),
+        # 按用户、按模块查询操作记录
+        Index('ix_operation_logs_user_created', 'user_id', 'created_at', 'id'),
+        Index('ix_operation_logs_module_created', 'module', 'created_at', 'id'),
+        {'extend_existing': True}
+    )
     
     # 主键
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, server_default=text('CURRENT_TIMESTAMP'))
     
     # 必填字段
-    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     username: Mapped[str] = mapped_column(String(50), nullable=False)
     ip_address: Mapped[str] = mapped_column(String(50), nullable=False)
     module: Mapped[str] = mapped_column(String(50), nullable=False)
     operation: Mapped[str] = mapped_column(String(50), nullable=False)
     
     # 可选字段
+    user_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)  # 匿名请求为空
     description: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     request_method: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
     request_url: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     request_params: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     response_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     response_message: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
-    
-    # 带默认值的字段
-    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=text('CURRENT_TIMESTAMP'))
 
 # ... 其他模型 ... 
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+操作日志中间件与查询服务
+
+以纯ASGI中间件的形式包装请求，只在请求体流经时保留前N个字节、
+在响应开始时记录状态码，请求结束后把原始信息追加到写入器的环形缓冲区。
+解析、脱敏和落库全部由后台写入器完成。
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.auth.models import OperationLog
+from core.auth.operation_log_writer import OperationEvent, OperationLogWriter, operation_log_writer
+from core.database.query_plan import register_hot_query
+from core.utils.pagination import apply_keyset, encode_cursor, paginate_keyset
+
+# 默认审计的请求方法
+DEFAULT_AUDIT_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# 默认不审计的路径前缀
+DEFAULT_EXCLUDE_PATHS = ("/docs", "/redoc", "/openapi.json", "/api/v1/health")
+
+
+class OperationLogMiddleware:
+    """操作日志中间件"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        writer: Optional[OperationLogWriter] = None,
+        methods: Iterable[str] = DEFAULT_AUDIT_METHODS,
+        exclude_paths: Iterable[str] = DEFAULT_EXCLUDE_PATHS,
+        max_body_size: Optional[int] = None
+    ):
+        """
+        初始化中间件
+
+        Args:
+            app: ASGI应用实例
+            writer: 操作日志写入器，默认使用全局写入器
+            methods: 需要审计的请求方法
+            exclude_paths: 不审计的路径前缀
+            max_body_size: 保留的请求体最大字节数，默认与写入器的参数长度一致
+        """
+        self.app = app
+        self.writer = writer or operation_log_writer
+        self.methods = frozenset(method.upper() for method in methods)
+        self.exclude_paths = tuple(exclude_paths)
+        self.max_body_size = max_body_size or self.writer.max_params_length
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        处理请求并记录操作日志
+
+        Args:
+            scope: 请求作用域
+            receive: 接收消息的函数
+            send: 发送消息的函数
+        """
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in self.methods
+            or scope["path"].startswith(self.exclude_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+        status_code = 500
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < self.max_body_size:
+                body.extend(message.get("body", b"")[:self.max_body_size - len(body)])
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            # 路由匹配后endpoint会写入同一个scope
+            endpoint = scope.get("endpoint")
+            client = scope.get("client")
+            self.writer.submit(OperationEvent(
+                method=scope["method"],
+                path=scope["path"],
+                query_string=scope.get("query_string", b""),
+                body=bytes(body),
+                status_code=status_code,
+                client_ip=client[0] if client else "unknown",
+                headers=scope.get("headers", ()),
+                endpoint=getattr(endpoint, "__name__", None)
+            ))
+
+
+def operation_logs_statement(user_id: Optional[int] = None, module: Optional[str] = None) -> Select:
+    """操作日志查询，按用户或模块过滤时分别使用对应的复合索引"""
+    statement = select(OperationLog)
+    if user_id is not None:
+        statement = statement.where(OperationLog.user_id == user_id)
+    if module is not None:
+        statement = statement.where(OperationLog.module == module)
+    return statement
+
+
+@register_hot_query("operation_logs.by_user")
+def _operation_logs_by_user_page() -> Select:
+    return apply_keyset(
+        operation_logs_statement(user_id=1), OperationLog.created_at, OperationLog.id, 20,
+        encode_cursor(datetime(2024, 1, 1), 1000)
+    )
+
+
+@register_hot_query("operation_logs.by_module")
+def _operation_logs_by_module_page() -> Select:
+    return apply_keyset(
+        operation_logs_statement(module="tests"), OperationLog.created_at, OperationLog.id, 20
+    )
+
+
+class OperationLogService:
+    """操作日志服务类"""
+
+    @staticmethod
+    async def get_operation_logs(
+        db: Session,
+        user_id: Optional[int] = None,
+        module: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[OperationLog], Optional[str]]:
+        """获取操作日志，按时间倒序键集分页
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID过滤
+            module: 模块过滤
+            limit: 返回记录数上限
+            cursor: 上一页返回的游标
+
+        Returns:
+            Tuple[List[OperationLog], Optional[str]]: (操作日志列表, 下一页游标)
+
+        Raises:
+            ValueError: 游标格式无效
+        """
+        return paginate_keyset(
+            db, operation_logs_statement(user_id, module),
+            OperationLog.created_at, OperationLog.id, limit, cursor
+        )
@@ -0,0 +1,197 @@
+"""
+操作日志分区维护模块
+
+operation_logs表按月做RANGE分区:
+- 每个月一个分区，名称为pYYYYMM，上界为下个月第一天
+- 末尾保留pmax分区兜底，新月份通过拆分pmax提前创建
+- 保留期之外的分区直接DROP PARTITION，删除开销与行数无关
+- 首次分区会重建整张表，由数据库迁移(f1c6a8d3b527)完成，后台维护只拆分pmax和删除分区，
+  表未分区时跳过维护并记录警告
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "operation_logs"
+MAX_PARTITION = "pmax"
+
+_PARTITION_PATTERN = re.compile(r"^p(\d{4})(\d{2})$")
+
+
+def month_start(value: datetime) -> date:
+    """获取所在月份的第一天"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """月份加减，结果为当月第一天"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """月份对应的分区名"""
+    return f"p{month:%Y%m}"
+
+
+def parse_partition_name(name: str) -> Optional[date]:
+    """解析分区名对应的月份，非月份分区返回None"""
+    match = _PARTITION_PATTERN.match(name or "")
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_definition(month: date) -> str:
+    """生成单个月份分区的定义"""
+    upper = add_months(month, 1)
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+
+
+def plan_new_partitions(existing: List[str], now: datetime, months_ahead: int = 2) -> List[date]:
+    """计算需要新建的月份分区
+
+    Args:
+        existing: 已有的分区名
+        now: 当前时间
+        months_ahead: 提前创建的月数
+
+    Returns:
+        List[date]: 需要新建分区的月份，按时间升序
+    """
+    latest = max(filter(None, map(parse_partition_name, existing)), default=None)
+    current = month_start(now)
+    last = add_months(current, months_ahead)
+    month = add_months(latest, 1) if latest else current
+
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def plan_expired_partitions(existing: List[str], now: datetime, retention_months: int) -> List[str]:
+    """计算超出保留期的分区
+
+    保留当前月在内的retention_months个月，更早的月份分区全部过期。
+
+    Args:
+        existing: 已有的分区名
+        now: 当前时间
+        retention_months: 保留月数
+
+    Returns:
+        List[str]: 需要删除的分区名
+    """
+    cutoff = add_months(month_start(now), -(retention_months - 1))
+    return [
+        name for name in existing
+        if parse_partition_name(name) and parse_partition_name(name) < cutoff
+    ]
+
+
+class OperationLogPartitionManager:
+    """操作日志分区管理器"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        retention_months: int = 6,
+        months_ahead: int = 2
+    ):
+        """初始化分区管理器
+
+        Args:
+            session_factory: 数据库会话工厂
+            retention_months: 保留月数，包含当前月
+            months_ahead: 提前创建的月数
+        """
+        self._session_factory = session_factory
+        self.retention_months = max(1, retention_months)
+        self.months_ahead = months_ahead
+
+    def get_partitions(self, session: Session) -> List[str]:
+        """查询operation_logs表的分区名，未分区时返回空列表"""
+        rows = session.execute(text(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+            "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+        ), {"table": TABLE_NAME}).all()
+        return [row[0] for row in rows]
+
+    def ensure_partitions(self, session: Session, now: Optional[datetime] = None) -> List[str]:
+        """通过拆分pmax确保当前月及未来months_ahead个月的分区存在
+
+        未分区的表不做转换，转换会重建并锁住整张表，应通过数据库迁移完成。
+
+        Args:
+            session: 数据库会话
+            now: 当前时间，默认为UTC当前时间
+
+        Returns:
+            List[str]: 新建的分区名
+        """
+        now = now or datetime.utcnow()
+        existing = self.get_partitions(session)
+        if not existing:
+            logger.warning(f"{TABLE_NAME}表未分区，跳过分区维护，请执行数据库迁移")
+            return []
+        months = plan_new_partitions(existing, now, self.months_ahead)
+        if not months:
+            return []
+
+        definitions = ", ".join(
+            [partition_definition(month) for month in months]
+            + [f"PARTITION {MAX_PARTITION} VALUES LESS THAN MAXVALUE"]
+        )
+        session.execute(text(
+            f"ALTER TABLE {TABLE_NAME} REORGANIZE PARTITION {MAX_PARTITION} INTO ({definitions})"
+        ))
+        created = [partition_name(month) for month in months]
+        logger.info(f"已创建操作日志分区: {', '.join(created)}")
+        return created
+
+    def drop_expired_partitions(self, session: Session, now: Optional[datetime] = None) -> List[str]:
+        """删除超出保留期的分区
+
+        Args:
+            session: 数据库会话
+            now: 当前时间，默认为UTC当前时间
+
+        Returns:
+            List[str]: 删除的分区名
+        """
+        now = now or datetime.utcnow()
+        expired = plan_expired_partitions(self.get_partitions(session), now, self.retention_months)
+        if expired:
+            session.execute(text(
+                f"ALTER TABLE {TABLE_NAME} DROP PARTITION {', '.join(expired)}"
+            ))
+            logger.info(f"已删除过期的操作日志分区: {', '.join(expired)}")
+        return expired
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """执行一次分区维护: 创建未来分区并删除过期分区
+
+        Args:
+            now: 当前时间，默认为UTC当前时间
+
+        Returns:
+            Dict[str, List[str]]: 新建和删除的分区名
+        """
+        session = self._session_factory()
+        try:
+            if session.get_bind().dialect.name != "mysql":
+                return {"created": [], "dropped": []}
+            created = self.ensure_partitions(session, now)
+            dropped = self.drop_expired_partitions(session, now)
+            return {"created": created, "dropped": dropped}
+        finally:
+            session.close()
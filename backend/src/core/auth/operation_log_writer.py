@@ -0,0 +1,294 @@
+"""
+操作日志异步批量写入模块
+
+请求处理路径只把原始请求信息追加到内存环形缓冲区，其余工作全部由后台线程完成:
+- 缓冲区已满时覆盖最旧的事件并计数，保证内存有界且从不阻塞请求
+- 后台线程按批取出事件，解析用户、模块、操作，脱敏并截断请求参数
+- 每批使用一条多行INSERT语句写入按月分区的operation_logs表
+- 定期执行分区维护，提前创建新月份分区并删除过期分区
+"""
+import atexit
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from jose import jwt
+from jose.exceptions import JOSEError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from core.auth.models import OperationLog
+from core.auth.operation_log_partition import OperationLogPartitionManager
+from core.config.jwt_config import jwt_settings
+from core.config.settings import settings
+from core.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 请求参数中需要脱敏的字段
+SENSITIVE_FIELDS = ("password", "token", "secret", "captcha_text")
+_SENSITIVE_PATTERN = "|".join(SENSITIVE_FIELDS)
+_JSON_SECRET = re.compile(rf'("[^"]*(?:{_SENSITIVE_PATTERN})[^"]*"\s*:\s*)"[^"]*"?', re.IGNORECASE)
+_FORM_SECRET = re.compile(rf'((?:^|&)[^=&]*(?:{_SENSITIVE_PATTERN})[^=&]*=)[^&]*', re.IGNORECASE)
+
+MASK = "******"
+
+
+def mask_params(params: str) -> str:
+    """对JSON或表单格式的请求参数中的敏感字段脱敏
+
+    Args:
+        params: 请求参数文本，可能已被截断
+
+    Returns:
+        str: 脱敏后的文本
+    """
+    params = _JSON_SECRET.sub(rf'\1"{MASK}"', params)
+    return _FORM_SECRET.sub(rf"\1{MASK}", params)
+
+
+@dataclass
+class OperationEvent:
+    """一次请求的原始审计信息，只保存引用，不在请求路径上做解析"""
+    method: str
+    path: str
+    query_string: bytes = b""
+    body: bytes = b""
+    status_code: int = 500
+    client_ip: str = "unknown"
+    headers: Sequence[Tuple[bytes, bytes]] = ()
+    endpoint: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def _header(self, name: bytes) -> Optional[str]:
+        """查找请求头"""
+        for key, value in self.headers:
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    def _resolve_user(self) -> Tuple[Optional[int], str]:
+        """从访问令牌中读取用户信息
+
+        与AuthService.verify_token一样校验签名、过期时间、受众和发行者，
+        没有认证依赖的接口也可能收到伪造的令牌，校验失败时记录为匿名用户。
+        """
+        authorization = self._header(b"authorization") or ""
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None, "anonymous"
+        try:
+            claims = jwt.decode(
+                token,
+                jwt_settings.JWT_SECRET_KEY,
+                algorithms=[jwt_settings.JWT_ALGORITHM],
+                audience=jwt_settings.JWT_AUDIENCE,
+                issuer=jwt_settings.JWT_ISSUER
+            )
+        except JOSEError:
+            return None, "anonymous"
+        try:
+            user_id = int(claims.get("sub"))
+        except (TypeError, ValueError):
+            user_id = None
+        return user_id, str(claims.get("username") or "anonymous")
+
+    def _resolve_ip(self) -> str:
+        """获取客户端IP，优先使用代理转发的地址"""
+        forwarded = self._header(b"x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+        return self.client_ip or "unknown"
+
+    def _resolve_module(self) -> str:
+        """按API前缀之后的第一段路径确定模块"""
+        path = self.path
+        if path.startswith(settings.API_V1_STR):
+            path = path[len(settings.API_V1_STR):]
+        segments = [segment for segment in path.split("/") if segment]
+        return segments[0] if segments else "root"
+
+    def _resolve_params(self, max_length: int) -> Optional[str]:
+        """组合查询参数和请求体，脱敏后截断"""
+        parts = []
+        if self.query_string:
+            parts.append(self.query_string.decode("utf-8", errors="replace"))
+        if self.body:
+            parts.append(self.body.decode("utf-8", errors="replace"))
+        if not parts:
+            return None
+        return mask_params("\n".join(parts))[:max_length]
+
+    def to_row(self, max_params_length: int = 2000) -> Dict[str, Any]:
+        """转换为operation_logs表的一行数据，超长字段按列宽截断"""
+        user_id, username = self._resolve_user()
+        return {
+            "user_id": user_id,
+            "username": username[:50],
+            "ip_address": self._resolve_ip()[:50],
+            "module": self._resolve_module()[:50],
+            "operation": (self.endpoint or self.method)[:50],
+            "request_method": self.method[:10],
+            "request_url": self.path[:200],
+            "request_params": self._resolve_params(max_params_length),
+            "response_code": self.status_code,
+            "created_at": self.created_at
+        }
+
+
+class OperationLogWriter:
+    """操作日志批量写入器"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        capacity: int = 20000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_params_length: int = 2000,
+        partition_manager: Optional[OperationLogPartitionManager] = None,
+        maintenance_interval: float = 6 * 3600
+    ):
+        """初始化写入器
+
+        Args:
+            session_factory: 数据库会话工厂
+            capacity: 环形缓冲区容量，超出后覆盖最旧的事件
+            batch_size: 单批写入的最大行数
+            flush_interval: 最长刷新间隔(秒)
+            max_params_length: 请求参数最大长度
+            partition_manager: 分区管理器，为空时不做分区维护
+            maintenance_interval: 分区维护间隔(秒)
+        """
+        self._session_factory = session_factory
+        self._buffer: Deque[OperationEvent] = deque(maxlen=capacity)
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_params_length = max_params_length
+        self.partition_manager = partition_manager
+        self.maintenance_interval = maintenance_interval
+
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._next_maintenance = 0.0
+
+        # 统计信息
+        self.written = 0
+        self.overwritten = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        """后台线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动后台写入线程"""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="operation-log-writer",
+                daemon=True
+            )
+            self._thread.start()
+            logger.info("操作日志写入线程已启动")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """停止后台写入线程，写完缓冲区中剩余的事件
+
+        Args:
+            timeout: 等待线程退出的最长时间(秒)
+        """
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        logger.info(
+            f"操作日志写入线程已停止 - 写入: {self.written}, 覆盖: {self.overwritten}, 失败: {self.failed}"
+        )
+
+    def submit(self, event: OperationEvent) -> None:
+        """追加事件到环形缓冲区，不加锁、不阻塞
+
+        Args:
+            event: 操作事件
+        """
+        if len(self._buffer) >= self.capacity:
+            self.overwritten += 1
+        self._buffer.append(event)
+
+    def pending(self) -> int:
+        """缓冲区中等待写入的事件数"""
+        return len(self._buffer)
+
+    def _run(self) -> None:
+        """后台线程主循环"""
+        while True:
+            self._maybe_maintain()
+            stopping = self._stop_event.wait(self.flush_interval)
+            while self._buffer:
+                self._flush(self._drain())
+            if stopping:
+                return
+
+    def _drain(self) -> List[OperationEvent]:
+        """从缓冲区头部取出一批事件"""
+        batch: List[OperationEvent] = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._buffer.popleft())
+            except IndexError:
+                break
+        return batch
+
+    def _flush(self, batch: List[OperationEvent]) -> None:
+        """使用一条多行INSERT写入一批事件"""
+        if not batch:
+            return
+        rows = [event.to_row(self.max_params_length) for event in batch]
+        session = self._session_factory()
+        try:
+            session.execute(insert(OperationLog).values(rows))
+            session.commit()
+            self.written += len(rows)
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.failed += len(rows)
+            logger.error(f"批量写入操作日志失败 - 条数: {len(rows)}, 错误: {str(e)}")
+        finally:
+            session.close()
+
+    def _maybe_maintain(self) -> None:
+        """到达维护间隔时执行分区维护"""
+        if self.partition_manager is None or time.monotonic() < self._next_maintenance:
+            return
+        self._next_maintenance = time.monotonic() + self.maintenance_interval
+        try:
+            self.partition_manager.run()
+        except SQLAlchemyError as e:
+            logger.error(f"操作日志分区维护失败: {str(e)}")
+
+
+# 全局操作日志写入器
+operation_log_writer = OperationLogWriter(
+    capacity=settings.OPERATION_LOG_BUFFER_SIZE,
+    max_params_length=settings.OPERATION_LOG_MAX_PARAMS_LENGTH,
+    partition_manager=OperationLogPartitionManager(
+        SessionLocal,
+        retention_months=settings.OPERATION_LOG_RETENTION_MONTHS
+    )
+)
+
+# 进程退出时写完剩余的操作日志
+atexit.register(operation_log_writer.stop)
@@ -16,12 +16,12 @@
 from core.config.jwt_config import jwt_settings
 from core.database import get_db
 from core.security import verify_password, pwd_context, get_password_hash
-from .models import User, LoginLog
+from .models import User
+from .login_log_writer import login_log_writer, LoginEvent, LOGIN_SUCCESS, LOGIN_FAILED
 from .schemas import TokenData, TokenResponse
 from core.logging import logger
-from .captcha import CaptchaManager
+from .captcha import get_captcha_manager
 from api.services.user import UserService
-from core.cache import CacheManager
 from core.database.session import Base, metadata, SessionLocal
 from core.redis import get_redis
 from core.exceptions import InvalidCredentialsException, TokenBlacklistedException
@@ -84,7 +84,8 @@ class AuthService(metaclass=Singleton):
     
     def __init__(self):
         """初始化认证服务"""
-        self._redis = get_redis()
+        # 第一次使用时再连接Redis，导入模块时不要求Redis可用
+        self._redis: Optional[redis.Redis] = None
         self._db = next(get_db())
         self._pwd_context = pwd_context
         self._token_blacklist_key = "token_blacklist"
@@ -97,14 +98,8 @@ def __init__(self):
         # 初始化用户服务
         self.user_service = UserService(self.db)
         
-        # 初始化缓存管理器
-        self._cache_manager = CacheManager(self._redis)
-        
-        # 初始化验证码管理器
-        self.captcha_manager = CaptchaManager(
-            cache_manager=self._cache_manager,
-            logger=auth_logger
-        )
+        # 初始化验证码管理器，验证码存储使用共享Redis连接池
+        self.captcha_manager = get_captcha_manager()
         
         auth_logger.info("认证服务初始化完成")
     
@@ -115,7 +110,9 @@ def __del__(self):
     
     @property
     def redis(self) -> redis.Redis:
-        """获取Redis客户端"""
+        """获取Redis客户端，第一次访问时建立连接"""
+        if self._redis is None:
+            self._redis = get_redis()
         return self._redis
     
     def add_token_to_blacklist(self, token: str) -> None:
@@ -276,7 +273,9 @@ def authenticate_user(
         username: str,
         password: str,
         captcha_id: str,
-        captcha_text: str
+        captcha_text: str,
+        ip_address: str = "unknown",
+        user_agent: str = "unknown"
     ) -> Optional[User]:
         """验证用户
         
@@ -285,6 +284,8 @@ def authenticate_user(
             password: 密码
             captcha_id: 验证码ID
             captcha_text: 验证码文本
+            ip_address: 客户端IP地址，用于登录日志
+            user_agent: 客户端User-Agent，用于登录日志
             
         Returns:
             Optional[User]: 验证通过返回用户对象，否则返回None
@@ -299,6 +300,10 @@ def authenticate_user(
             
             if not self.captcha_manager.verify_captcha_sync(captcha_id, captcha_text):
                 auth_logger.warning(f"验证码验证失败 - 用户名: {username}")
+                self._record_login_attempt(
+                    None, False, "验证码错误", username=username,
+                    ip_address=ip_address, user_agent=user_agent, captcha_verified=False
+                )
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="验证码错误或已过期"
@@ -308,7 +313,10 @@ def authenticate_user(
             user = self.user_service.get_user_by_username(username)
             if not user:
                 auth_logger.warning(f"用户不存在 - 用户名: {username}")
-                self._record_login_attempt(None, False, "用户不存在")
+                self._record_login_attempt(
+                    None, False, "用户不存在", username=username,
+                    ip_address=ip_address, user_agent=user_agent
+                )
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="用户名或密码错误"
@@ -326,7 +334,9 @@ def authenticate_user(
             # 验证密码
             if not self.verify_password(password, user.password_hash):
                 auth_logger.warning(f"密码验证失败 - 用户名: {username}")
-                self._record_login_attempt(user, False, "密码错误")
+                self._record_login_attempt(
+                    user, False, "密码错误", ip_address=ip_address, user_agent=user_agent
+                )
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="用户名或密码错误"
@@ -334,7 +344,9 @@ def authenticate_user(
             
             # 验证成功
             auth_logger.info(f"验证成功 - 用户名: {username}")
-            self._record_login_attempt(user, True, "登录成功")
+            self._record_login_attempt(
+                user, True, "登录成功", ip_address=ip_address, user_agent=user_agent
+            )
             return user
             
         except HTTPException:
@@ -346,30 +358,40 @@ def authenticate_user(
                 detail="验证过程发生错误"
             )
 
-    def _record_login_attempt(self, user: User, success: bool, message: str):
+    def _record_login_attempt(
+        self,
+        user: Optional[User],
+        success: bool,
+        message: str,
+        username: Optional[str] = None,
+        ip_address: str = "unknown",
+        user_agent: str = "unknown",
+        captcha_verified: bool = True
+    ) -> None:
         """记录登录尝试
         
+        登录事件交给后台写入器批量落库，不在登录路径上访问数据库。
+        
         Args:
-            user: 用户对象
+            user: 用户对象，用户不存在时为None
             success: 是否成功
             message: 详细信息
+            username: 用户名，user为None时使用
+            ip_address: 客户端IP地址
+            user_agent: 客户端User-Agent
+            captcha_verified: 是否通过验证码验证
         """
-        try:
-            log = LoginLog(
-                user_id=user.id,
-                username=user.username,
-                ip_address="127.0.0.1",  # TODO: 从请求中获取
-                user_agent="Unknown",    # TODO: 从请求中获取
-                status="success" if success else "failed",
-                message=message
-            )
-            self.db.add(log)
-            self.db.commit()
-            auth_logger.info(f"登录尝试记录已保存 - 用户: {user.username}, 状态: {'成功' if success else '失败'}")
-        except Exception as e:
-            self.db.rollback()
-            auth_logger.error(f"记录登录尝试失败: {str(e)}")
-            raise
+        event = LoginEvent(
+            user_id=user.id if user else None,
+            username=user.username if user else (username or ""),
+            ip_address=ip_address,
+            user_agent=user_agent,
+            status=LOGIN_SUCCESS if success else LOGIN_FAILED,
+            message=message,
+            captcha_verified=captcha_verified
+        )
+        if not login_log_writer.submit(event):
+            auth_logger.warning(f"登录日志队列已满，丢弃登录记录 - 用户: {event.username}")
 
     def refresh_token(self, refresh_token: str) -> TokenResponse:
         """
@@ -502,14 +524,8 @@ def generate_captcha(self) -> dict:
             HTTPException: 验证码生成失败时抛出异常
         """
         try:
-            # 确保Redis连接有效
-            if not check_redis_alive(self.redis):
-                self.redis = get_redis()
-                self.cache_manager = get_cache_manager()
-                self.captcha_manager = get_captcha_manager()
-            
             # 使用验证码管理器生成验证码
-            result = self.captcha_manager.generate_captcha()
+            result = self.captcha_manager.generate_captcha_sync()
             auth_logger.info(f"验证码生成成功 - ID: {result['captcha_id']}")
             return result
         except Exception as e:
@@ -0,0 +1,101 @@
+"""
+列表总数缓存模块
+
+列表接口的总数来自COUNT(*)，按过滤条件的签名缓存在Redis中:
+- 缓存键包含作用域的版本号，写入时递增版本号即可让该作用域下所有过滤条件的缓存失效
+- 版本号设置过期时间，每次缓存总数时续期，保证版本号比基于它的总数缓存存在得更久，
+  过期后从0重新计数也不会读到旧的总数
+- 缓存未命中或Redis不可用时直接执行COUNT，不影响列表接口的可用性
+"""
+import hashlib
+import json
+from typing import Any, Mapping, Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from core.cache.redis_manager import redis_expire, redis_get, redis_incr, redis_set
+
+# 总数缓存的默认过期时间(秒)
+DEFAULT_COUNT_TTL = 60
+
+# 版本号在最后一次写入或续期后的保留时间(秒)，不小于总数缓存的过期时间
+VERSION_TTL = 24 * 3600
+
+# 缓存键前缀
+COUNT_KEY_PREFIX = "count"
+
+
+def count_signature(filters: Mapping[str, Any]) -> str:
+    """计算过滤条件的签名
+
+    值为None的条件视为未设置，与不传该条件得到相同的签名。
+
+    Args:
+        filters: 过滤条件
+
+    Returns:
+        str: 签名
+    """
+    normalized = {key: value for key, value in filters.items() if value is not None}
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _version_key(namespace: str, scope: Any) -> str:
+    return f"{COUNT_KEY_PREFIX}:{namespace}:{scope}:version"
+
+
+def _get_version(namespace: str, scope: Any) -> str:
+    return redis_get(_version_key(namespace, scope)) or "0"
+
+
+def cached_count(
+    db: Session,
+    statement: Select,
+    namespace: str,
+    scope: Any,
+    filters: Optional[Mapping[str, Any]] = None,
+    ttl: int = DEFAULT_COUNT_TTL
+) -> int:
+    """统计查询的记录总数，结果按过滤条件的签名缓存
+
+    Args:
+        db: 数据库会话
+        statement: 已应用过滤条件、未分页的Select语句
+        namespace: 列表名称，如test_cases
+        scope: 失效作用域，如项目ID
+        filters: 作用域之外的其他过滤条件
+        ttl: 缓存过期时间(秒)
+
+    Returns:
+        int: 记录总数
+    """
+    key = (
+        f"{COUNT_KEY_PREFIX}:{namespace}:{scope}:"
+        f"{_get_version(namespace, scope)}:{count_signature(filters or {})}"
+    )
+    cached = redis_get(key)
+    if cached is not None:
+        try:
+            return int(cached)
+        except ValueError:
+            pass
+
+    count_statement = select(func.count()).select_from(statement.order_by(None).subquery())
+    total = db.execute(count_statement).scalar_one()
+    if redis_set(key, str(total), ex=ttl):
+        redis_expire(_version_key(namespace, scope), max(VERSION_TTL, ttl))
+    return total
+
+
+def invalidate_counts(namespace: str, scope: Any) -> None:
+    """使作用域下所有过滤条件的总数缓存失效
+
+    Args:
+        namespace: 列表名称
+        scope: 失效作用域
+    """
+    key = _version_key(namespace, scope)
+    redis_incr(key)
+    redis_expire(key, VERSION_TTL)
@@ -0,0 +1,375 @@
+"""
+Redis发布订阅进度通道模块
+
+写入方把进度发布到Redis，同一进程内的所有观察者共用一个订阅连接:
+- 进度值是只增不减的计数，Redis中保存每个键的最新状态(哈希)，合并时逐项取最大值，
+  消息乱序或丢失时下一条消息即可恢复，新观察者先读取状态再接收后续消息
+- 每个进程只有一个后台线程持有订阅连接，按本进程观察者关心的键订阅和退订频道，
+  Redis确认订阅后才通知观察者，观察者确认后再读取状态，不会错过两者之间发布的消息
+- 每个观察者的待发送消息合并为一条，每秒最多发送max_rate次，观察者再多也不会增加数据库负载
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Dict, Mapping, Optional, Set
+
+import redis
+from redis.exceptions import RedisError
+
+from core.cache.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+# 状态在最后一次发布后的保留时间(秒)
+DEFAULT_STATE_TTL = 24 * 3600
+
+# 订阅线程等待消息的超时时间(秒)，也是新观察者订阅频道的最大延迟
+LISTEN_TIMEOUT = 0.5
+
+# 订阅连接断开后的重连间隔(秒)
+RECONNECT_DELAY = 1.0
+
+# 观察者等待Redis确认订阅的最长时间(秒)
+SUBSCRIBE_TIMEOUT = 5.0
+
+# 逐项取最大值合并状态，返回合并后的状态和序号
+_MERGE_STATE_SCRIPT = """
+local seq = redis.call('HINCRBY', KEYS[1], '_seq', 1)
+for i = 2, #ARGV, 2 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if not current or tonumber(ARGV[i + 1]) > tonumber(current) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def _decode_state(fields: Any) -> Dict[str, int]:
+    """HGETALL的结果(字典或键值交替的列表)转换为整数状态"""
+    if isinstance(fields, (list, tuple)):
+        fields = dict(zip(fields[::2], fields[1::2]))
+    return {str(name): int(value) for name, value in (fields or {}).items()}
+
+
+def merge_messages(current: Optional[Dict[str, Any]], message: Dict[str, Any]) -> Dict[str, Any]:
+    """合并两条进度消息
+
+    状态逐项取最大值，增量逐项相加，序号取较大值，其他字段以序号较大的消息为准。
+
+    Args:
+        current: 尚未发送的消息
+        message: 新消息
+
+    Returns:
+        Dict[str, Any]: 合并后的消息
+    """
+    if current is None:
+        return message
+    older, newer = (current, message) if message.get("seq", 0) >= current.get("seq", 0) else (message, current)
+    merged = {**older, **newer}
+    state = dict(older.get("state") or {})
+    for name, value in (newer.get("state") or {}).items():
+        state[name] = max(value, state.get(name, value))
+    merged["state"] = state
+    delta = dict(older.get("delta") or {})
+    for name, value in (newer.get("delta") or {}).items():
+        delta[name] = delta.get(name, 0) + value
+    merged["delta"] = delta
+    return merged
+
+
+class ProgressChannel:
+    """基于Redis哈希和发布订阅的进度通道"""
+
+    def __init__(
+        self,
+        name: str,
+        redis_client: Optional[redis.Redis] = None,
+        state_ttl: int = DEFAULT_STATE_TTL,
+        key_prefix: str = "progress"
+    ):
+        """初始化进度通道
+
+        Args:
+            name: 通道名称，如test_runs
+            redis_client: Redis客户端实例，默认使用共享连接池
+            state_ttl: 状态在最后一次发布后的保留时间(秒)
+            key_prefix: 缓存键前缀
+        """
+        self.name = name
+        self.redis = redis_client or redis_manager.get_connection()
+        self.state_ttl = state_ttl
+        self.key_prefix = key_prefix
+        self._merge_state = self.redis.register_script(_MERGE_STATE_SCRIPT)
+
+    def state_key(self, key: Any) -> str:
+        """保存状态的哈希键"""
+        return f"{self.key_prefix}:{self.name}:{key}:state"
+
+    def channel(self, key: Any) -> str:
+        """发布消息的频道"""
+        return f"{self.key_prefix}:{self.name}:{key}"
+
+    def publish(
+        self,
+        key: Any,
+        state: Mapping[str, int],
+        delta: Optional[Mapping[str, int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """合并状态并发布消息
+
+        进度只用于展示，Redis不可用时记录日志并返回None，不影响调用方。
+
+        Args:
+            key: 进度键，如测试运行ID
+            state: 最新状态，只增不减的计数
+            delta: 本次的增量，随消息发送，不保存
+
+        Returns:
+            Optional[Dict[str, Any]]: 发布的消息
+        """
+        args = [self.state_ttl]
+        for name, value in state.items():
+            args.extend([name, int(value)])
+        try:
+            merged = _decode_state(self._merge_state(keys=[self.state_key(key)], args=args))
+            message = {"key": str(key), "seq": merged.pop("_seq"), "state": merged, "delta": dict(delta or {})}
+            self.redis.publish(self.channel(key), json.dumps(message, separators=(",", ":")))
+            return message
+        except RedisError as e:
+            logger.warning(f"进度发布失败 - 键:{key}, 错误:{str(e)}")
+            return None
+
+    def snapshot(self, key: Any) -> Optional[Dict[str, Any]]:
+        """读取最新状态，不存在或Redis不可用时返回None"""
+        try:
+            fields = _decode_state(self.redis.hgetall(self.state_key(key)))
+        except RedisError as e:
+            logger.warning(f"进度状态读取失败 - 键:{key}, 错误:{str(e)}")
+            return None
+        if not fields:
+            return None
+        return {"key": str(key), "seq": fields.pop("_seq", 0), "state": fields, "delta": {}}
+
+    def discard(self, key: Any) -> None:
+        """删除状态，计数被修正为更小的值时调用，下次读取时重新初始化"""
+        try:
+            self.redis.delete(self.state_key(key))
+        except RedisError as e:
+            logger.warning(f"进度状态删除失败 - 键:{key}, 错误:{str(e)}")
+
+
+class ProgressSubscription:
+    """一个观察者的订阅，待发送的消息合并为一条并限制发送频率"""
+
+    def __init__(self, hub: "ProgressHub", key: str, max_rate: float):
+        """
+        Args:
+            hub: 所属的订阅中心
+            key: 进度键
+            max_rate: 每秒最多发送的消息数
+        """
+        self.hub = hub
+        self.key = key
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.loop = asyncio.get_running_loop()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._ready = asyncio.Event()
+        self._subscribed = asyncio.Event()
+        self._last_sent = float("-inf")
+
+    def confirm(self) -> None:
+        """标记频道已订阅，只能在事件循环线程中调用"""
+        self._subscribed.set()
+
+    async def wait_subscribed(self, timeout: Optional[float] = SUBSCRIBE_TIMEOUT) -> bool:
+        """等待Redis确认订阅频道，确认之后发布的消息都会送达
+
+        Args:
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            bool: 是否已确认，Redis不可用时超时返回False
+        """
+        if self._subscribed.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def push(self, message: Dict[str, Any]) -> None:
+        """合并新消息，只能在事件循环线程中调用"""
+        self._pending = merge_messages(self._pending, message)
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """等待下一条合并后的消息，距上次发送不足间隔时等到间隔结束
+
+        Args:
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            Optional[Dict[str, Any]]: 合并后的消息，超时返回None
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        delay = self._last_sent + self.interval - self.loop.time()
+        if delay > 0:
+            # 等待期间到达的消息一并合并
+            await asyncio.sleep(delay)
+        message, self._pending = self._pending, None
+        self._ready.clear()
+        self._last_sent = self.loop.time()
+        return message
+
+    def close(self) -> None:
+        """取消订阅"""
+        self.hub.unwatch(self)
+
+
+class ProgressHub:
+    """进程内共享的订阅中心，一个后台线程持有订阅连接并把消息分发给本进程的观察者"""
+
+    def __init__(self, channel: ProgressChannel):
+        """
+        Args:
+            channel: 进度通道
+        """
+        self.channel = channel
+        self._subscriptions: Dict[str, Set[ProgressSubscription]] = {}
+        # Redis已确认订阅、且后台线程没有准备退订的频道对应的键
+        self._confirmed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """后台线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def watcher_count(self) -> int:
+        """本进程的观察者数"""
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def watch(self, key: Any, max_rate: float) -> ProgressSubscription:
+        """订阅一个进度键，必须在事件循环中调用，首次调用时启动后台线程
+
+        频道由后台线程订阅，读取状态前应等待subscription.wait_subscribed()。
+
+        Args:
+            key: 进度键
+            max_rate: 每秒最多发送的消息数
+
+        Returns:
+            ProgressSubscription: 订阅，使用完毕后调用close
+        """
+        subscription = ProgressSubscription(self, str(key), max_rate)
+        with self._lock:
+            self._subscriptions.setdefault(subscription.key, set()).add(subscription)
+            if subscription.key in self._confirmed:
+                subscription.confirm()
+            if not self.running:
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name=f"progress-hub-{self.channel.name}", daemon=True)
+                self._thread.start()
+        self._wake_event.set()
+        return subscription
+
+    def unwatch(self, subscription: ProgressSubscription) -> None:
+        """取消订阅，键上没有观察者后由后台线程退订频道"""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.key)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.key]
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止后台线程"""
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._wake_event.set()
+        self._thread.join(timeout)
+
+    def dispatch(self, key: str, message: Dict[str, Any]) -> int:
+        """把消息交给键上的观察者，返回观察者数"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(key, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, message)
+            except RuntimeError:
+                # 事件循环已关闭
+                self.unwatch(subscription)
+        return len(subscriptions)
+
+    def _confirm(self, key: str) -> None:
+        """Redis确认订阅频道后通知键上的观察者"""
+        with self._lock:
+            self._confirmed.add(key)
+            subscriptions = list(self._subscriptions.get(key, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.confirm)
+            except RuntimeError:
+                self.unwatch(subscription)
+
+    def _run(self) -> None:
+        prefix = self.channel.channel("")
+        pubsub = None
+        subscribed: Set[str] = set()
+        while not self._stop_event.is_set():
+            with self._lock:
+                wanted = {self.channel.channel(key) for key in self._subscriptions}
+                if pubsub is None:
+                    self._confirmed.clear()
+                else:
+                    # 即将退订的频道不再视为已确认，此后的新观察者等待重新订阅
+                    self._confirmed -= {channel[len(prefix):] for channel in subscribed - wanted}
+            try:
+                if pubsub is None:
+                    pubsub = self.channel.redis.pubsub()
+                    subscribed = set()
+                if wanted - subscribed:
+                    pubsub.subscribe(*(wanted - subscribed))
+                if subscribed - wanted:
+                    pubsub.unsubscribe(*(subscribed - wanted))
+                subscribed = wanted
+                if not subscribed:
+                    self._wake_event.wait(LISTEN_TIMEOUT)
+                    self._wake_event.clear()
+                    continue
+                raw = pubsub.get_message(timeout=LISTEN_TIMEOUT)
+            except RedisError as e:
+                logger.warning(f"进度订阅连接异常，{RECONNECT_DELAY}秒后重连: {str(e)}")
+                if pubsub is not None:
+                    pubsub.close()
+                pubsub = None
+                self._stop_event.wait(RECONNECT_DELAY)
+                continue
+            if not raw:
+                continue
+            if raw.get("type") == "subscribe":
+                self._confirm(raw["channel"][len(prefix):])
+                continue
+            if raw.get("type") != "message":
+                continue
+            try:
+                message = json.loads(raw["data"])
+            except (TypeError, ValueError):
+                continue
+            self.dispatch(raw["channel"][len(prefix):], message)
+        if pubsub is not None:
+            pubsub.close()
@@ -0,0 +1,294 @@
+"""
+Redis Streams任务队列模块
+
+每个优先级通道是一个Stream，同一队列的全部通道共用一个消费者组:
+- 消费者按通道顺序先取高优先级的任务，全部为空时在所有通道上阻塞等待
+- 已取出未确认的任务留在消费者组的待确认列表(PEL)中，空闲超过可见性超时后由其他消费者
+  通过XAUTOCLAIM接管，执行时间较长的任务需要定期调用heartbeat重置空闲时间
+- 投递次数超过max_deliveries的任务移入死信Stream，不再重试
+- 任务确认后保留在Stream中，由XADD的MAXLEN近似裁剪，消费者组的lag可以准确反映积压
+需要Redis 6.2及以上版本(XAUTOCLAIM)，lag指标需要7.0及以上版本。
+"""
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import redis
+from redis.exceptions import ResponseError
+
+from core.cache.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+# 默认可见性超时(秒)
+DEFAULT_VISIBILITY_TIMEOUT = 300
+
+# 默认最大投递次数
+DEFAULT_MAX_DELIVERIES = 5
+
+# 每个Stream保留的近似最大长度
+DEFAULT_STREAM_MAXLEN = 100000
+
+
+@dataclass
+class StreamJob:
+    """从队列中取出的任务"""
+    id: str
+    lane: str
+    stream: str
+    fields: Dict[str, str]
+    deliveries: int = 1
+
+    @property
+    def enqueued_at(self) -> float:
+        """入队时间戳(秒)，取自Stream消息ID"""
+        return stream_id_time(self.id)
+
+
+def stream_id_time(stream_id: str) -> float:
+    """Stream消息ID中的毫秒时间戳转换为秒"""
+    return int(stream_id.split("-", 1)[0]) / 1000
+
+
+def default_consumer_name() -> str:
+    """消费者名称，同一台机器上的多个进程互不相同"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class StreamJobQueue:
+    """基于Redis Streams和消费者组的任务队列"""
+
+    def __init__(
+        self,
+        name: str,
+        lanes: Sequence[str],
+        group: str,
+        consumer: Optional[str] = None,
+        redis_client: Optional[redis.Redis] = None,
+        visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT,
+        max_deliveries: int = DEFAULT_MAX_DELIVERIES,
+        maxlen: int = DEFAULT_STREAM_MAXLEN,
+        key_prefix: str = "queue"
+    ):
+        """初始化队列
+
+        Args:
+            name: 队列名称
+            lanes: 优先级通道，按优先级从高到低排列
+            group: 消费者组名称
+            consumer: 消费者名称，默认为主机名和进程号
+            redis_client: Redis客户端实例，默认使用共享连接池
+            visibility_timeout: 任务取出后多久未确认即可被其他消费者接管(秒)
+            max_deliveries: 最大投递次数，超过后移入死信Stream
+            maxlen: 每个Stream保留的近似最大长度
+            key_prefix: 缓存键前缀
+        """
+        if not lanes:
+            raise ValueError("至少需要一个优先级通道")
+        self.name = name
+        self.lanes = list(lanes)
+        self.group = group
+        self.consumer = consumer or default_consumer_name()
+        self.redis = redis_client or redis_manager.get_connection()
+        self.visibility_timeout = visibility_timeout
+        self.max_deliveries = max_deliveries
+        self.maxlen = maxlen
+        self.key_prefix = key_prefix
+        self._groups_ready = False
+
+    def stream_key(self, lane: str) -> str:
+        """通道对应的Stream键"""
+        return f"{self.key_prefix}:{self.name}:{lane}"
+
+    @property
+    def dead_letter_key(self) -> str:
+        """死信Stream键"""
+        return f"{self.key_prefix}:{self.name}:dead"
+
+    def ensure_groups(self) -> None:
+        """为每个通道创建消费者组，已存在时忽略"""
+        if self._groups_ready:
+            return
+        for lane in self.lanes:
+            try:
+                self.redis.xgroup_create(self.stream_key(lane), self.group, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        self._groups_ready = True
+
+    def enqueue(self, lane: str, fields: Dict[str, Any]) -> str:
+        """向指定通道添加任务
+
+        Args:
+            lane: 优先级通道
+            fields: 任务字段，值会被转换为字符串
+
+        Returns:
+            str: 任务ID
+
+        Raises:
+            ValueError: 通道不存在
+        """
+        if lane not in self.lanes:
+            raise ValueError(f"未知的优先级通道: {lane}")
+        self.ensure_groups()
+        return self.redis.xadd(self.stream_key(lane), fields, maxlen=self.maxlen, approximate=True)
+
+    def claim(self, count: int = 1, block_ms: Optional[int] = 5000) -> List[StreamJob]:
+        """取出任务，优先接管超时未确认的任务，其次按通道优先级读取新任务
+
+        Args:
+            count: 最多取出的任务数，阻塞等待时每个通道最多取出count个
+            block_ms: 所有通道都为空时的阻塞等待时间(毫秒)，None表示不等待
+
+        Returns:
+            List[StreamJob]: 取出的任务，没有任务时为空列表
+        """
+        self.ensure_groups()
+        jobs = self._reclaim(count)
+        if jobs:
+            return jobs
+
+        for lane in self.lanes:
+            response = self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream_key(lane): ">"}, count=count
+            )
+            jobs = self._parse_read(response)
+            if jobs:
+                return jobs
+
+        if not block_ms:
+            return []
+        response = self.redis.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream_key(lane): ">" for lane in self.lanes},
+            count=count,
+            block=block_ms
+        )
+        return sorted(self._parse_read(response), key=lambda job: self.lanes.index(job.lane))
+
+    def heartbeat(self, job: StreamJob) -> None:
+        """重置任务的空闲时间，避免执行中的任务被其他消费者接管"""
+        self.redis.xclaim(
+            job.stream, self.group, self.consumer, min_idle_time=0, message_ids=[job.id], justid=True
+        )
+
+    def ack(self, job: StreamJob) -> None:
+        """确认任务已完成"""
+        self.redis.xack(job.stream, self.group, job.id)
+
+    def dead_letter(self, job: StreamJob, reason: str) -> None:
+        """把任务移入死信Stream并确认"""
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                self.dead_letter_key,
+                {**job.fields, "lane": job.lane, "job_id": job.id, "deliveries": job.deliveries, "reason": reason},
+                maxlen=self.maxlen,
+                approximate=True
+            )
+            pipe.xack(job.stream, self.group, job.id)
+            pipe.execute()
+        logger.warning(f"任务移入死信队列 - 队列:{self.name}, 任务:{job.id}, 原因:{reason}")
+
+    def stats(self) -> Dict[str, Any]:
+        """队列积压指标
+
+        Returns:
+            Dict[str, Any]: 各通道的等待数(lag)、已取出未确认数(pending)、最早等待任务的等待时间(秒)、
+                消费者数，以及合计值和死信数
+        """
+        self.ensure_groups()
+        with self.redis.pipeline(transaction=False) as pipe:
+            for lane in self.lanes:
+                pipe.xinfo_groups(self.stream_key(lane))
+                pipe.xlen(self.stream_key(lane))
+            pipe.xlen(self.dead_letter_key)
+            results = pipe.execute()
+
+        groups = {}
+        for index, lane in enumerate(self.lanes):
+            info = next((g for g in results[index * 2] if g["name"] == self.group), {})
+            groups[lane] = (info, results[index * 2 + 1])
+
+        # 每个通道中第一条未投递的任务决定等待时间
+        with self.redis.pipeline(transaction=False) as pipe:
+            for lane, (info, _) in groups.items():
+                pipe.xrange(self.stream_key(lane), min=f"({info.get('last-delivered-id', '0-0')}", count=1)
+            oldest = pipe.execute()
+
+        now = time.time()
+        lanes = {}
+        for (lane, (info, length)), first in zip(groups.items(), oldest):
+            lag = info.get("lag")
+            if lag is None:
+                # Redis 7.0以下没有lag，或有消息被删除导致无法计算时，以Stream长度作为上限
+                lag = length
+            lanes[lane] = {
+                "waiting": lag,
+                "pending": info.get("pending", 0),
+                "oldest_wait_seconds": round(now - stream_id_time(first[0][0]), 3) if first else 0.0,
+                "consumers": info.get("consumers", 0)
+            }
+        return {
+            "queue": self.name,
+            "lanes": lanes,
+            "waiting": sum(lane["waiting"] for lane in lanes.values()),
+            "pending": sum(lane["pending"] for lane in lanes.values()),
+            "oldest_wait_seconds": max((lane["oldest_wait_seconds"] for lane in lanes.values()), default=0.0),
+            "consumers": max((lane["consumers"] for lane in lanes.values()), default=0),
+            "dead": results[-1]
+        }
+
+    def _lane_of(self, stream: str) -> str:
+        return stream.rsplit(":", 1)[-1]
+
+    def _parse_read(self, response: Any) -> List[StreamJob]:
+        """解析XREADGROUP的返回值[[stream, [(id, fields), ...]], ...]"""
+        jobs = []
+        for stream, messages in response or []:
+            for message_id, fields in messages:
+                if fields is not None:
+                    jobs.append(StreamJob(message_id, self._lane_of(stream), stream, fields))
+        return jobs
+
+    def _reclaim(self, count: int) -> List[StreamJob]:
+        """接管空闲超过可见性超时的任务，投递次数超限的任务移入死信Stream
+
+        XAUTOCLAIM会立即把任务转给当前消费者，因此每个通道接管到的任务都要返回。
+        """
+        idle_ms = self.visibility_timeout * 1000
+        with self.redis.pipeline(transaction=False) as pipe:
+            for lane in self.lanes:
+                pipe.xautoclaim(self.stream_key(lane), self.group, self.consumer, idle_ms, "0-0", count=count)
+            responses = pipe.execute()
+
+        claimed = [
+            (lane, message_id, fields)
+            for lane, response in zip(self.lanes, responses)
+            for message_id, fields in response[1]
+            if fields is not None
+        ]
+        if not claimed:
+            return []
+
+        # 查询每个任务的投递次数
+        with self.redis.pipeline(transaction=False) as pipe:
+            for lane, message_id, _ in claimed:
+                pipe.xpending_range(self.stream_key(lane), self.group, min=message_id, max=message_id, count=1)
+            pending = pipe.execute()
+
+        jobs: List[StreamJob] = []
+        for (lane, message_id, fields), info in zip(claimed, pending):
+            deliveries = info[0]["times_delivered"] if info else 1
+            job = StreamJob(message_id, lane, self.stream_key(lane), fields, deliveries)
+            if job.deliveries > self.max_deliveries:
+                self.dead_letter(job, f"Exceeded {self.max_deliveries} deliveries")
+                continue
+            logger.info(f"接管超时任务 - 队列:{self.name}, 任务:{job.id}, 第{job.deliveries}次投递")
+            jobs.append(job)
+        return jobs
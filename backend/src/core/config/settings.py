@@ -36,6 +36,16 @@ class Settings(BaseAppSettings):
     CAPTCHA_EXPIRE_MINUTES: int = Field(default=5, description="验证码过期时间(分钟)")
     CAPTCHA_EXPIRE_SECONDS: int = Field(default=300, description="验证码过期时间(秒)")
     
+    # 操作日志配置
+    OPERATION_LOG_ENABLED: bool = Field(default=True, description="是否记录操作日志")
+    OPERATION_LOG_BUFFER_SIZE: int = Field(default=20000, description="操作日志环形缓冲区大小")
+    OPERATION_LOG_MAX_PARAMS_LENGTH: int = Field(default=2000, description="操作日志请求参数最大长度")
+    OPERATION_LOG_RETENTION_MONTHS: int = Field(default=6, description="操作日志保留月数")
+    
+    # 测试用例导入导出配置
+    CASE_TRANSFER_DIR: str = Field(default="uploads/case_transfer", description="导入导出文件的临时目录")
+    CASE_IMPORT_MAX_SIZE: int = Field(default=200 * 1024 * 1024, description="导入文件最大字节数")
+    
     @validator("LOG_LEVEL")
     def validate_log_level(cls, v: str) -> str:
         """验证日志级别"""
@@ -0,0 +1,172 @@
+"""
+全文检索模块
+
+MySQL上使用带ngram解析器的FULLTEXT索引(中文没有空格分词，按ngram切分)，以BOOLEAN MODE检索:
+- 关键字按空白切分，每个词都必须出现(+)，并带*做前缀匹配
+- 相关度由MATCH ... AGAINST给出，可对名称列单独加权
+- 排序后的结果按偏移量翻页，最多翻到MAX_SEARCH_WINDOW条，与常见搜索引擎的结果窗口一致
+其他数据库(如测试用的SQLite)退化为LIKE，按名称命中的词数排序
+"""
+import base64
+import json
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, and_, case, func, or_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+# 参与检索的最大词数
+MAX_SEARCH_TERMS = 8
+
+# 单个词的最大长度
+MAX_TERM_LENGTH = 64
+
+# 可翻页的最大结果数
+MAX_SEARCH_WINDOW = 1000
+
+# 名称列命中的默认权重
+DEFAULT_BOOST = 2.0
+
+# BOOLEAN MODE中有特殊含义的字符
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+
+def split_terms(search: Optional[str]) -> List[str]:
+    """把搜索关键字拆分为检索词
+
+    去掉BOOLEAN MODE的运算符，按空白切分后去重，最多保留MAX_SEARCH_TERMS个词。
+
+    Args:
+        search: 用户输入的关键字
+
+    Returns:
+        List[str]: 检索词，关键字为空或只有运算符时返回空列表
+    """
+    if not search:
+        return []
+    terms: List[str] = []
+    for term in _BOOLEAN_OPERATORS.sub(" ", search).split():
+        term = term[:MAX_TERM_LENGTH]
+        if term not in terms:
+            terms.append(term)
+        if len(terms) >= MAX_SEARCH_TERMS:
+            break
+    return terms
+
+
+def build_boolean_query(terms: Sequence[str]) -> str:
+    """构造BOOLEAN MODE检索串，每个词必须出现并按前缀匹配
+
+    ngram索引中长度超过ngram_token_size的前缀词会按短语检索，相当于子串匹配。
+
+    Args:
+        terms: 检索词
+
+    Returns:
+        str: AGAINST的检索串
+    """
+    return " ".join(f"+{term}*" for term in terms)
+
+
+def fulltext_match(
+    dialect_name: str,
+    columns: Sequence[Any],
+    search: Optional[str],
+    boost_column: Optional[Any] = None,
+    boost: float = DEFAULT_BOOST
+) -> Optional[Tuple[ColumnElement, ColumnElement]]:
+    """生成全文检索的过滤条件和相关度
+
+    MySQL上columns必须与某个FULLTEXT索引的列完全一致，boost_column需要单独的FULLTEXT索引。
+
+    Args:
+        dialect_name: 数据库方言名称
+        columns: 检索的列
+        search: 用户输入的关键字
+        boost_column: 额外加权的列，通常是名称
+        boost: 加权列的权重
+
+    Returns:
+        Optional[Tuple[ColumnElement, ColumnElement]]: (过滤条件, 相关度)，没有有效检索词时返回None
+    """
+    terms = split_terms(search)
+    if not terms:
+        return None
+
+    if dialect_name == "mysql":
+        query = build_boolean_query(terms)
+        condition = match(*columns, against=query).in_boolean_mode()
+        score = condition
+        if boost_column is not None:
+            score = score + match(boost_column, against=query).in_boolean_mode() * boost
+        return condition, score
+
+    condition = and_(*[
+        or_(*[func.lower(column).contains(term.lower(), autoescape=True) for column in columns])
+        for term in terms
+    ])
+    rank_column = boost_column if boost_column is not None else columns[0]
+    score = sum(
+        case((func.lower(rank_column).contains(term.lower(), autoescape=True), boost), else_=0)
+        for term in terms
+    )
+    return condition, score
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """将结果偏移量编码为游标"""
+    payload = json.dumps({"o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """解码结果偏移量游标
+
+    Raises:
+        ValueError: 游标格式无效或超出结果窗口
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode()))["o"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+    if not 0 <= offset < MAX_SEARCH_WINDOW:
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return offset
+
+
+def paginate_ranked(
+    db: Session,
+    statement: Select,
+    score: ColumnElement,
+    id_column: Any,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """按相关度倒序分页，相关度相同时按ID倒序保证顺序稳定
+
+    Args:
+        db: 数据库会话
+        statement: 已应用检索条件的Select语句
+        score: fulltext_match返回的相关度
+        id_column: 主键列
+        limit: 每页记录数
+        cursor: 上一页返回的游标
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: (当前页记录, 下一页游标)，超出结果窗口后游标为None
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    limit = min(limit, MAX_SEARCH_WINDOW - offset)
+    rows = db.execute(
+        statement.order_by(score.desc(), id_column.desc()).offset(offset).limit(limit + 1)
+    ).scalars().all()
+    next_offset = offset + limit
+    if len(rows) <= limit or next_offset >= MAX_SEARCH_WINDOW:
+        return list(rows[:limit]), None
+    return list(rows[:limit]), encode_offset_cursor(next_offset)
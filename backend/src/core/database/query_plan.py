@@ -0,0 +1,121 @@
+"""
+热点查询执行计划检查模块
+
+服务层把高频查询的语句注册为热点查询，测试用EXPLAIN检查它们是否走索引:
+- MySQL: 执行计划中出现type=ALL的表视为全表扫描
+- SQLite: 执行计划中出现不带索引的SCAN视为全表扫描
+- 标记为覆盖查询的语句还要求只读取索引，不回表
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import Table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.util import find_tables
+
+
+def statement_tables(statement: Select) -> List[Table]:
+    """查询涉及的表，包括连接和子查询中的表，按出现顺序去重"""
+    tables: Dict[str, Table] = {}
+    for table in find_tables(statement):
+        tables.setdefault(table.name, table)
+    return list(tables.values())
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """热点查询"""
+    name: str
+    build: Callable[[], Select]
+    covering: bool = False
+
+    @property
+    def tables(self) -> List[str]:
+        """查询涉及的表名"""
+        return [table.name for table in statement_tables(self.build())]
+
+
+# 已注册的热点查询
+HOT_QUERIES: Dict[str, HotQuery] = {}
+
+
+def register_hot_query(name: str, covering: bool = False) -> Callable[[Callable[[], Select]], Callable[[], Select]]:
+    """注册热点查询的装饰器
+
+    被装饰的函数不接收参数，返回一条使用示例参数的查询语句。
+
+    Args:
+        name: 查询名称，全局唯一
+        covering: 是否要求索引覆盖查询
+
+    Returns:
+        Callable: 装饰器
+    """
+    def decorator(build: Callable[[], Select]) -> Callable[[], Select]:
+        HOT_QUERIES[name] = HotQuery(name=name, build=build, covering=covering)
+        return build
+    return decorator
+
+
+def explain(connection: Connection, statement: Select) -> List[Dict[str, Any]]:
+    """获取查询的执行计划
+
+    Args:
+        connection: 数据库连接
+        statement: 查询语句
+
+    Returns:
+        List[Dict[str, Any]]: 执行计划的每一行
+    """
+    dialect = connection.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+    result = connection.execute(text(prefix + sql))
+    return [dict(row._mapping) for row in result]
+
+
+def find_plan_problems(dialect_name: str, plan: List[Dict[str, Any]], covering: bool = False) -> List[str]:
+    """从执行计划中找出全表扫描和回表读取
+
+    Args:
+        dialect_name: 数据库方言名称
+        plan: explain返回的执行计划
+        covering: 是否要求索引覆盖查询
+
+    Returns:
+        List[str]: 问题描述，为空表示执行计划符合要求
+    """
+    problems = []
+    if dialect_name == "sqlite":
+        for row in plan:
+            detail = row.get("detail", "")
+            if detail.startswith("SCAN ") and "INDEX" not in detail and "CONSTANT ROW" not in detail:
+                problems.append(f"全表扫描: {detail}")
+            elif covering and detail.startswith(("SEARCH ", "SCAN ")) and "COVERING INDEX" not in detail:
+                problems.append(f"未使用覆盖索引: {detail}")
+        return problems
+
+    for row in plan:
+        table = row.get("table")
+        if not table:
+            continue
+        if row.get("type") == "ALL":
+            problems.append(f"全表扫描: {table}")
+        elif covering and "Using index" not in (row.get("Extra") or "").split("; "):
+            problems.append(f"未使用覆盖索引: {table} (key={row.get('key')})")
+    return problems
+
+
+def check_hot_query(connection: Connection, query: HotQuery) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """检查热点查询的执行计划
+
+    Args:
+        connection: 数据库连接
+        query: 热点查询
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[str]]: (执行计划, 问题描述)
+    """
+    plan = explain(connection, query.build())
+    return plan, find_plan_problems(connection.dialect.name, plan, query.covering)
@@ -5,10 +5,12 @@
     - FileManager: 异步文件管理工具，支持文件的基本操作、压缩、加密等功能
     - Logger: 日志记录工具，支持文件和控制台输出，支持日志轮转和彩色输出
     - Singleton: 单例模式工具，提供类级别的单例实现
+    - paginate_keyset: 键集分页工具，使用不透明游标按(created_at, id)翻页
 """
 
 from .file_manager import FileManager
 from .logger import Logger
 from .singleton import Singleton
+from .pagination import encode_cursor, decode_cursor, apply_keyset, paginate_keyset
 
-__all__ = ['FileManager', 'Logger', 'Singleton'] 
\ No newline at end of file
+__all__ = ['FileManager', 'Logger', 'Singleton', 'encode_cursor', 'decode_cursor', 'apply_keyset', 'paginate_keyset'] 
\ No newline at end of file
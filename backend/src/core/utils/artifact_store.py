@@ -0,0 +1,136 @@
+"""
+测试产物存储模块
+
+截图、日志、录像等测试产物按内容的SHA-256去重保存，不压缩(图片和视频本身已经压缩):
+- 上传先分块写入uploads/<上传ID>.part，中断后可以从已写入的大小继续
+- 完成时计算哈希，内容已存在则直接删除上传文件，否则把上传文件移动到blobs/<前2位>/<3-4位>/<哈希>
+- 内容被多少个产物引用由调用方(数据库)记录，引用数为0时再删除内容
+"""
+import hashlib
+import os
+import time
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+from .file_manager import FileManager
+
+# 计算哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+UPLOAD_DIR = "uploads"
+BLOB_DIR = "blobs"
+
+
+class ArtifactStore:
+    """按内容去重的测试产物存储"""
+
+    def __init__(self, file_manager: FileManager):
+        """
+        Args:
+            file_manager: 保存文件的文件管理器
+        """
+        self.file_manager = file_manager
+
+    @staticmethod
+    def upload_name(upload_id: str) -> str:
+        """上传中的文件名"""
+        if not upload_id.isalnum():
+            raise ValueError(f"Invalid upload id: {upload_id}")
+        return f"{UPLOAD_DIR}/{upload_id}.part"
+
+    @staticmethod
+    def blob_name(digest: str) -> str:
+        """内容的文件名"""
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid digest: {digest}")
+        return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def received(self, upload_id: str) -> int:
+        """上传文件已写入的字节数"""
+        path = self.file_manager.resolve_path(self.upload_name(upload_id))
+        return path.stat().st_size if path.exists() else 0
+
+    async def append(
+        self,
+        upload_id: str,
+        chunks: AsyncIterable[bytes],
+        offset: int,
+        max_size: Optional[int] = None
+    ) -> int:
+        """从offset开始写入上传内容
+
+        Args:
+            upload_id: 上传ID
+            chunks: 内容块
+            offset: 起始偏移量，小于已写入大小时覆盖之后的部分
+            max_size: 最大字节数
+
+        Returns:
+            int: 已写入的字节数
+
+        Raises:
+            ValueError: 偏移量超过已写入大小，或超出max_size
+        """
+        return await self.file_manager.append_stream(chunks, self.upload_name(upload_id), offset, max_size)
+
+    def hash_upload(self, upload_id: str) -> str:
+        """计算上传内容的SHA-256"""
+        hash_obj = hashlib.sha256()
+        with open(self.file_manager.resolve_path(self.upload_name(upload_id)), "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                hash_obj.update(chunk)
+        return hash_obj.hexdigest()
+
+    def place(self, upload_id: str, digest: str) -> bool:
+        """把上传内容保存为digest对应的内容
+
+        Args:
+            upload_id: 上传ID
+            digest: 上传内容的SHA-256
+
+        Returns:
+            bool: 是否写入了新内容，内容已存在时为False，上传文件直接删除
+        """
+        upload_path = self.file_manager.resolve_path(self.upload_name(upload_id))
+        blob_path = self.file_manager.resolve_path(self.blob_name(digest))
+        if blob_path.exists():
+            upload_path.unlink(missing_ok=True)
+            return False
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(upload_path, blob_path)
+        return True
+
+    def discard_upload(self, upload_id: str) -> bool:
+        """删除上传中的文件"""
+        path = self.file_manager.resolve_path(self.upload_name(upload_id))
+        if not path.exists():
+            return False
+        path.unlink(missing_ok=True)
+        return True
+
+    def stale_uploads(self, max_age: float, now: Optional[float] = None) -> List[str]:
+        """超过max_age秒没有写入的上传ID"""
+        directory = self.file_manager.resolve_path(UPLOAD_DIR)
+        if not directory.exists():
+            return []
+        cutoff = (now or time.time()) - max_age
+        return [
+            path.name[:-len(".part")]
+            for path in directory.iterdir()
+            if path.name.endswith(".part") and path.stat().st_mtime < cutoff
+        ]
+
+    def exists(self, digest: str) -> bool:
+        """内容是否存在"""
+        return self.file_manager.resolve_path(self.blob_name(digest)).exists()
+
+    def remove(self, digest: str) -> bool:
+        """删除内容"""
+        path = self.file_manager.resolve_path(self.blob_name(digest))
+        if not path.exists():
+            return False
+        path.unlink(missing_ok=True)
+        return True
+
+    def iter_content(self, digest: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """分块读取内容的一段"""
+        return self.file_manager.iter_file(self.blob_name(digest), start=start, end=end)
@@ -0,0 +1,240 @@
+"""
+压缩位图模块
+
+按Roaring Bitmap的思路存储非负整数集合:
+- 按高16位分桶，每个桶(容器)保存低16位
+- 元素不超过4096个的桶用有序的uint16数组，超过后改用8KB的位图
+- 序列化为紧凑的二进制，适合存入数据库的BLOB列
+稀疏的ID集合每个元素约占2字节，稠密时每个元素约占1位。
+"""
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, Union
+
+# 数组容器的最大元素数，超过后改用位图容器
+ARRAY_CONTAINER_MAX = 4096
+
+# 位图容器的字节数
+BITMAP_CONTAINER_BYTES = 8192
+
+# 序列化格式版本
+FORMAT_VERSION = 1
+
+_ARRAY = 0
+_BITMAP = 1
+
+# 数组容器为有序的uint16数组，位图容器为65536位的整数
+Container = Union[array, int]
+
+
+def _to_bits(container: Container) -> int:
+    if isinstance(container, int):
+        return container
+    bits = 0
+    for low in container:
+        bits |= 1 << low
+    return bits
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    data = bits.to_bytes(BITMAP_CONTAINER_BYTES, "little")
+    for offset, byte in enumerate(data):
+        while byte:
+            lowest = byte & -byte
+            yield offset * 8 + lowest.bit_length() - 1
+            byte ^= lowest
+
+
+def _from_bits(bits: int) -> Container:
+    """位图转换为合适的容器，元素较少时使用数组"""
+    if bits.bit_count() > ARRAY_CONTAINER_MAX:
+        return bits
+    return array("H", _iter_bits(bits))
+
+
+def _cardinality(container: Container) -> int:
+    return container.bit_count() if isinstance(container, int) else len(container)
+
+
+class RoaringBitmap:
+    """非负整数集合的压缩位图"""
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._containers: Dict[int, Container] = {}
+        self.update(values)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(container) for container in self._containers.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def __contains__(self, value: int) -> bool:
+        container = self._containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            base = high << 16
+            lows = _iter_bits(container) if isinstance(container, int) else container
+            for low in lows:
+                yield base | low
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RoaringBitmap):
+            return NotImplemented
+        return self._containers.keys() == other._containers.keys() and all(
+            _to_bits(container) == _to_bits(other._containers[high])
+            for high, container in self._containers.items()
+        )
+
+    def __repr__(self) -> str:
+        return f"<RoaringBitmap {len(self)} values>"
+
+    def add(self, value: int) -> None:
+        """添加一个元素"""
+        if value < 0:
+            raise ValueError("只能保存非负整数")
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = array("H", [low])
+        elif isinstance(container, int):
+            self._containers[high] = container | 1 << low
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return
+            container.insert(index, low)
+            if len(container) > ARRAY_CONTAINER_MAX:
+                self._containers[high] = _to_bits(container)
+
+    def discard(self, value: int) -> None:
+        """删除一个元素，不存在时忽略"""
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            return
+        if isinstance(container, int):
+            container &= ~(1 << low)
+            self._set_container(high, _from_bits(container))
+            return
+        index = bisect_left(container, low)
+        if index < len(container) and container[index] == low:
+            del container[index]
+            self._set_container(high, container)
+
+    def update(self, values: Iterable[int]) -> None:
+        """批量添加元素"""
+        groups: Dict[int, int] = {}
+        for value in values:
+            if value < 0:
+                raise ValueError("只能保存非负整数")
+            groups[value >> 16] = groups.get(value >> 16, 0) | 1 << (value & 0xFFFF)
+        for high, bits in groups.items():
+            mine = self._containers.get(high)
+            self._containers[high] = _from_bits(bits if mine is None else _to_bits(mine) | bits)
+
+    def __or__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        result = self.copy()
+        result |= other
+        return result
+
+    def __ior__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        for high, container in other._containers.items():
+            mine = self._containers.get(high)
+            if mine is None:
+                self._containers[high] = container if isinstance(container, int) else array("H", container)
+            else:
+                self._containers[high] = _from_bits(_to_bits(mine) | _to_bits(container))
+        return self
+
+    def __and__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        result = RoaringBitmap()
+        for high in self._containers.keys() & other._containers.keys():
+            result._set_container(high, _from_bits(_to_bits(self._containers[high]) & _to_bits(other._containers[high])))
+        return result
+
+    def __sub__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        result = RoaringBitmap()
+        for high, container in self._containers.items():
+            if high in other._containers:
+                container = _from_bits(_to_bits(container) & ~_to_bits(other._containers[high]))
+            result._set_container(high, container if isinstance(container, int) else array("H", container))
+        return result
+
+    def copy(self) -> "RoaringBitmap":
+        """复制位图"""
+        result = RoaringBitmap()
+        result._containers = {
+            high: container if isinstance(container, int) else array("H", container)
+            for high, container in self._containers.items()
+        }
+        return result
+
+    def to_bytes(self) -> bytes:
+        """序列化: 版本号、容器数，然后按高16位升序写入每个容器的键、类型、元素数和数据"""
+        parts = [struct.pack("<BI", FORMAT_VERSION, len(self._containers))]
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            if isinstance(container, int):
+                parts.append(struct.pack("<IBI", high, _BITMAP, container.bit_count()))
+                parts.append(container.to_bytes(BITMAP_CONTAINER_BYTES, "little"))
+            else:
+                parts.append(struct.pack("<IBI", high, _ARRAY, len(container)))
+                data = array("H", container)
+                if sys.byteorder == "big":
+                    data.byteswap()
+                parts.append(data.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RoaringBitmap":
+        """从to_bytes的结果恢复位图
+
+        Raises:
+            ValueError: 数据格式不正确
+        """
+        result = cls()
+        if not data:
+            return result
+        try:
+            version, count = struct.unpack_from("<BI", data, 0)
+            if version != FORMAT_VERSION:
+                raise ValueError(f"不支持的位图格式版本: {version}")
+            offset = struct.calcsize("<BI")
+            header = struct.calcsize("<IBI")
+            for _ in range(count):
+                high, kind, cardinality = struct.unpack_from("<IBI", data, offset)
+                offset += header
+                if kind == _BITMAP:
+                    chunk = data[offset:offset + BITMAP_CONTAINER_BYTES]
+                    offset += BITMAP_CONTAINER_BYTES
+                    container: Container = int.from_bytes(chunk, "little")
+                else:
+                    container = array("H")
+                    container.frombytes(data[offset:offset + cardinality * 2])
+                    if sys.byteorder == "big":
+                        container.byteswap()
+                    offset += cardinality * 2
+                if _cardinality(container) != cardinality:
+                    raise ValueError("位图数据不完整")
+                result._containers[high] = container
+        except struct.error as e:
+            raise ValueError(f"位图数据不完整: {e}")
+        return result
+
+    def _set_container(self, high: int, container: Container) -> None:
+        if _cardinality(container) == 0:
+            self._containers.pop(high, None)
+        else:
+            self._containers[high] = container
@@ -0,0 +1,167 @@
+"""
+内容寻址的压缩存储模块
+
+内容按未压缩时的SHA-256寻址，压缩后经FileManager保存为<前2位>/<3-4位>/<哈希>.<扩展名>:
+- 相同内容只保存一份，写入前发现文件已存在即跳过
+- 安装了zstandard时用zstd压缩，否则用gzip，引用中记录压缩方式，两种文件可以共存
+- 读取时边解压边输出，可以只读取解压后内容的一段，用于HTTP Range请求
+"""
+import gzip
+import hashlib
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from .file_manager import FileManager
+
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+
+# 压缩方式对应的文件扩展名
+CODEC_SUFFIXES = {CODEC_GZIP: "gz", CODEC_ZSTD: "zst"}
+
+# 压缩级别
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# 读取时每次从文件读取的字节数
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ValueError("zstd blobs require zstandard") from e
+    return zstandard
+
+
+def default_codec() -> str:
+    """安装了zstandard时使用zstd，否则使用gzip"""
+    try:
+        _zstandard()
+    except ValueError:
+        return CODEC_GZIP
+    return CODEC_ZSTD
+
+
+def compress(content: bytes, codec: str) -> bytes:
+    """按指定方式压缩"""
+    if codec == CODEC_GZIP:
+        # mtime固定为0，相同内容压缩结果相同
+        return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+    if codec == CODEC_ZSTD:
+        return _zstandard().ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    raise ValueError(f"Unsupported codec: {codec}")
+
+
+def decompressor(codec: str):
+    """创建流式解压对象，通过decompress(chunk)逐块解压"""
+    if codec == CODEC_GZIP:
+        return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    if codec == CODEC_ZSTD:
+        return _zstandard().ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unsupported codec: {codec}")
+
+
+@dataclass(frozen=True)
+class BlobRef:
+    """存储内容的引用"""
+    digest: str  # 未压缩内容的SHA-256
+    codec: str
+    size: int  # 未压缩的字节数
+    stored_size: int  # 压缩后的字节数
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BlobRef":
+        return cls(
+            digest=data["digest"],
+            codec=data["codec"],
+            size=int(data["size"]),
+            stored_size=int(data.get("stored_size", 0))
+        )
+
+
+class BlobStore:
+    """内容寻址的压缩存储"""
+
+    def __init__(self, file_manager: FileManager, codec: Optional[str] = None):
+        """
+        Args:
+            file_manager: 保存文件的文件管理器
+            codec: 写入时的压缩方式，默认由default_codec决定
+        """
+        self.file_manager = file_manager
+        self.codec = codec or default_codec()
+        if self.codec not in CODEC_SUFFIXES:
+            raise ValueError(f"Unsupported codec: {self.codec}")
+
+    @staticmethod
+    def blob_name(digest: str, codec: str) -> str:
+        """内容在文件管理器中的文件名"""
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.{CODEC_SUFFIXES[codec]}"
+
+    def put(self, content: bytes) -> BlobRef:
+        """保存内容，相同内容已存在时不再写入
+
+        Args:
+            content: 未压缩的内容
+
+        Returns:
+            BlobRef: 内容的引用
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        name = self.blob_name(digest, self.codec)
+        path = self.file_manager.resolve_path(name)
+        if path.exists():
+            return BlobRef(digest=digest, codec=self.codec, size=len(content), stored_size=path.stat().st_size)
+        compressed = compress(content, self.codec)
+        self.file_manager.write_atomic(name, compressed, overwrite=False)
+        return BlobRef(digest=digest, codec=self.codec, size=len(content), stored_size=len(compressed))
+
+    def exists(self, ref: BlobRef) -> bool:
+        """内容是否存在"""
+        return self.file_manager.resolve_path(self.blob_name(ref.digest, ref.codec)).exists()
+
+    async def iter_content(
+        self,
+        ref: BlobRef,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = READ_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """边解压边读取内容
+
+        压缩文件不能随机定位，start之前的部分同样需要解压，但不会输出，读到end即停止。
+
+        Args:
+            ref: 内容的引用
+            start: 解压后内容的起始偏移量
+            end: 解压后内容的结束偏移量(不含)，默认读到末尾
+            chunk_size: 每次从文件读取的字节数
+
+        Yields:
+            bytes: 解压后的内容块
+        """
+        end = ref.size if end is None else min(end, ref.size)
+        if start >= end:
+            return
+        stream = decompressor(ref.codec)
+        position = 0
+        async for chunk in self.file_manager.iter_file(self.blob_name(ref.digest, ref.codec), chunk_size=chunk_size):
+            data = stream.decompress(chunk)
+            if not data:
+                continue
+            chunk_start, position = position, position + len(data)
+            if position <= start:
+                continue
+            yield data[max(start - chunk_start, 0):end - chunk_start]
+            if position >= end:
+                return
+
+    async def read(self, ref: BlobRef) -> bytes:
+        """读取全部内容"""
+        return b"".join([chunk async for chunk in self.iter_content(ref)])
@@ -0,0 +1,142 @@
+"""
+测试用例执行器模块
+
+在执行引擎的工作进程中运行单个测试用例。用例的test_data中以target指定pytest节点
+(如tests/api/test_login.py::test_ok)，在独立的pytest子进程中执行，
+其余test_data以JSON形式通过环境变量AUTOTEST_CASE_DATA传给测试代码。
+指定coverage_root时通过pytest-cov记录用例执行到的源码文件，用于变更影响分析。
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Mapping, Optional
+
+# 测试代码读取用例数据的环境变量
+CASE_DATA_ENV = "AUTOTEST_CASE_DATA"
+
+# 保存的输出最大字符数，超出时保留末尾部分
+MAX_OUTPUT_CHARS = 64 * 1024
+
+# pytest退出码: 0全部通过，1有用例失败，5没有收集到用例，其余为执行错误
+PYTEST_EXIT_PASSED = 0
+PYTEST_EXIT_FAILED = 1
+PYTEST_EXIT_NO_TESTS = 5
+
+
+def pytest_args_from_options(options: Mapping[str, str]) -> List[str]:
+    """把TestFrameworkConfig.pytest_options转换为命令行参数
+
+    取值为"true"的选项转换为开关，"false"的选项忽略，其余转换为--key=value。
+
+    Args:
+        options: pytest选项
+
+    Returns:
+        List[str]: 命令行参数
+    """
+    args = []
+    for key, value in options.items():
+        if str(value).lower() == "true":
+            args.append(f"--{key}")
+        elif str(value).lower() != "false":
+            args.append(f"--{key}={value}")
+    return args
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= MAX_OUTPUT_CHARS:
+        return text
+    return "...(truncated)\n" + text[-MAX_OUTPUT_CHARS:]
+
+
+def touched_files(report_path: str, root: str) -> List[str]:
+    """从coverage的JSON报告中读取执行到的文件
+
+    Args:
+        report_path: pytest-cov生成的JSON报告
+        root: 源码根目录，返回的路径相对于该目录并使用/分隔
+
+    Returns:
+        List[str]: 至少执行了一行的文件，按路径排序
+    """
+    try:
+        with open(report_path, encoding="utf-8") as f:
+            files = json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return []
+    root = os.path.abspath(root)
+    paths = set()
+    for path, info in files.items():
+        if not info.get("executed_lines"):
+            continue
+        relative = os.path.relpath(os.path.abspath(path), root)
+        if not relative.startswith(os.pardir):
+            paths.add(relative.replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def _status_result(returncode: int, output: str, target: str) -> Dict[str, Any]:
+    if returncode == PYTEST_EXIT_PASSED:
+        return {"status": "passed", "output": output, "error_message": None}
+    if returncode == PYTEST_EXIT_FAILED:
+        return {"status": "failed", "output": output, "error_message": "Test failed"}
+    if returncode == PYTEST_EXIT_NO_TESTS:
+        return {"status": "skipped", "output": output, "error_message": f"No tests collected for {target}"}
+    return {
+        "status": "error",
+        "output": output,
+        "error_message": f"pytest exited with code {returncode}"
+    }
+
+
+def run_pytest_case(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """执行单个测试用例
+
+    超时由执行引擎负责，这里不设置超时；引擎终止工作进程时pytest子进程属于同一进程组，会一起被终止。
+
+    Args:
+        payload: 用例数据，包含id、name、test_data、pytest_args和可选的coverage_root
+
+    Returns:
+        Dict[str, Any]: 包含status、output和error_message的执行结果，记录覆盖时还包含touched_files
+    """
+    test_data = dict(payload.get("test_data") or {})
+    target = test_data.pop("target", None)
+    if not target:
+        return {
+            "status": "skipped",
+            "output": None,
+            "error_message": "No pytest target configured in test_data.target"
+        }
+
+    env = dict(os.environ)
+    env[CASE_DATA_ENV] = json.dumps(test_data, ensure_ascii=False, default=str)
+    args = [sys.executable, "-m", "pytest", str(target), *payload.get("pytest_args", [])]
+    coverage_root: Optional[str] = payload.get("coverage_root")
+    report_path = None
+    if coverage_root:
+        fd, report_path = tempfile.mkstemp(prefix="autotest-cov-", suffix=".json")
+        os.close(fd)
+        args += [f"--cov={coverage_root}", f"--cov-report=json:{report_path}"]
+        # 数据文件也放到临时目录，并发执行的用例不会写同一个.coverage
+        env["COVERAGE_FILE"] = f"{report_path}.data"
+    try:
+        completed = subprocess.run(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=env,
+            text=True,
+            errors="replace"
+        )
+        result = _status_result(completed.returncode, _truncate(completed.stdout or ""), target)
+        if report_path:
+            result["touched_files"] = touched_files(report_path, coverage_root)
+    finally:
+        if report_path:
+            for path in (report_path, env["COVERAGE_FILE"]):
+                if os.path.exists(path):
+                    os.unlink(path)
+    return result
@@ -0,0 +1,149 @@
+"""
+失败指纹模块
+
+把错误信息和堆栈归一化后计算指纹，相同原因的失败得到相同的指纹:
+- 去掉行号、内存地址，临时目录路径替换为<tmp>，其他路径只保留最后两级
+- 堆栈只取最内层的若干帧，调用方式不同但在同一处失败的结果仍归为一类
+- 有堆栈帧时按异常类型和帧计算指纹，否则按异常类型和归一化后的错误信息计算
+支持Python traceback、pytest的失败输出，以及Java/JavaScript形式的"at ..."堆栈。
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# 参与指纹计算的最内层帧数
+MAX_FRAMES = 5
+
+# 只解析堆栈末尾的字符数，pytest输出很长时失败信息在最后
+MAX_TRACE_CHARS = 64 * 1024
+
+# 归一化后的错误信息最大长度
+MAX_MESSAGE_LENGTH = 500
+
+# Python traceback的帧，外层在前
+_PYTHON_FRAME = re.compile(r'^\s*File "(?P<path>[^"]+)", line \d+, in (?P<func>\S+)')
+# pytest失败输出中的位置行，如tests/test_a.py:12: AssertionError或tests/test_a.py:12: in helper
+_PYTEST_FRAME = re.compile(r"^(?P<path>\S+\.py):\d+:(?: in (?P<func>\S+)|\s+(?P<type>\w+))?\s*$")
+# Java/JavaScript的帧，内层在前
+_AT_FRAME = re.compile(r"^\s*at (?P<frame>.+?)\s*$")
+_FRAME_LOCATION = re.compile(r"^(?P<name>.*?)\s*\((?P<location>[^()]*)\)$")
+_LINE_NUMBER = re.compile(r"(?::\d+)+$")
+# 异常行，如ValueError: ...、E   AssertionError: ...、java.lang.IllegalStateException: ...
+_EXCEPTION_LINE = re.compile(
+    r"^(?:E\s+|Caused by:\s+)?(?P<type>(?:[A-Za-z_]\w*\.)*[A-Za-z_]\w*(?:Error|Exception|Failure|Exit|Interrupt|Timeout))"
+    r"(?::\s*(?P<message>.*))?$"
+)
+
+_TEMP_PATH = re.compile(
+    r"(?:[A-Za-z]:)?(?:/private)?(?:/tmp|/var/tmp|/var/folders|/dev/shm|/[^\s\"']*?/AppData/Local/Temp)/[^\s\"':]*"
+)
+_HEX_ADDRESS = re.compile(r"\b0x[0-9a-fA-F]+\b")
+_UUID = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class FailureFingerprint:
+    """失败指纹"""
+    digest: str  # 40位十六进制SHA-1
+    exception_type: Optional[str]
+    message: str  # 归一化后的错误信息
+    frames: Tuple[str, ...]  # 归一化后的帧，内层在前
+
+
+def normalize_path(path: str) -> str:
+    """归一化文件路径，临时目录下的文件替换为<tmp>/文件名，第三方包保留包内路径，其他只保留最后两级"""
+    path = path.replace("\\", "/")
+    name = path.rsplit("/", 1)[-1]
+    if _TEMP_PATH.fullmatch(path):
+        return f"<tmp>/{name}"
+    for marker in ("site-packages/", "dist-packages/", "node_modules/"):
+        if marker in path:
+            return path.rsplit(marker, 1)[-1]
+    return "/".join(path.split("/")[-2:])
+
+
+def normalize_message(message: str) -> str:
+    """归一化错误信息，替换其中的临时路径、内存地址、UUID和数字"""
+    message = _TEMP_PATH.sub(lambda match: f"<tmp>/{match.group(0).rsplit('/', 1)[-1]}", message.replace("\\", "/"))
+    message = _HEX_ADDRESS.sub("<addr>", message)
+    message = _UUID.sub("<uuid>", message)
+    message = _NUMBER.sub("<n>", message)
+    return _WHITESPACE.sub(" ", message).strip()[:MAX_MESSAGE_LENGTH]
+
+
+def _normalize_at_frame(frame: str) -> str:
+    frame = _HEX_ADDRESS.sub("<addr>", frame)
+    located = _FRAME_LOCATION.match(frame)
+    if located:
+        name, location = located.group("name"), _LINE_NUMBER.sub("", located.group("location"))
+        if "/" in location or "\\" in location:
+            location = normalize_path(location)
+        return f"{name}({location})" if name else location
+    location = _LINE_NUMBER.sub("", frame)
+    return normalize_path(location) if "/" in location or "\\" in location else location
+
+
+def extract_frames(trace: str) -> List[str]:
+    """从堆栈中提取归一化后的帧，内层在前"""
+    outer_first: List[str] = []
+    inner_first: List[str] = []
+    for line in trace.splitlines():
+        python_frame = _PYTHON_FRAME.match(line)
+        if python_frame:
+            outer_first.append(f"{normalize_path(python_frame.group('path'))}:{python_frame.group('func')}")
+            continue
+        pytest_frame = _PYTEST_FRAME.match(line)
+        if pytest_frame:
+            func = pytest_frame.group("func")
+            path = normalize_path(pytest_frame.group("path"))
+            outer_first.append(f"{path}:{func}" if func else path)
+            continue
+        at_frame = _AT_FRAME.match(line)
+        if at_frame:
+            inner_first.append(_normalize_at_frame(at_frame.group("frame")))
+    return outer_first[::-1] + inner_first
+
+
+def extract_exception(trace: str) -> Tuple[Optional[str], Optional[str]]:
+    """从堆栈中提取最后一个异常行的(异常类型, 错误信息)，pytest的位置行只有异常类型"""
+    for line in reversed(trace.splitlines()):
+        match = _EXCEPTION_LINE.match(line.strip())
+        if match:
+            return match.group("type").rsplit(".", 1)[-1], match.group("message")
+        pytest_frame = _PYTEST_FRAME.match(line)
+        if pytest_frame and pytest_frame.group("type"):
+            return pytest_frame.group("type"), None
+    return None, None
+
+
+def fingerprint(
+    error_message: Optional[str],
+    stack_trace: Optional[str],
+    max_frames: int = MAX_FRAMES
+) -> Optional[FailureFingerprint]:
+    """计算失败指纹
+
+    Args:
+        error_message: 错误信息
+        stack_trace: 堆栈跟踪，没有时可以传入测试输出
+        max_frames: 参与计算的最内层帧数
+
+    Returns:
+        Optional[FailureFingerprint]: 失败指纹，错误信息和堆栈都为空时返回None
+    """
+    trace = (stack_trace or "")[-MAX_TRACE_CHARS:]
+    if not trace.strip() and not (error_message or "").strip():
+        return None
+    frames = tuple(extract_frames(trace)[:max_frames])
+    exception_type, trace_message = extract_exception(trace)
+    if exception_type is None and error_message and error_message.strip():
+        exception_type, _ = extract_exception(error_message.strip().splitlines()[-1])
+    message = normalize_message(error_message or trace_message or "")
+
+    key = [exception_type or ""]
+    key.extend(frames if frames else [message])
+    digest = hashlib.sha1("\n".join(key).encode("utf-8")).hexdigest()
+    return FailureFingerprint(digest=digest, exception_type=exception_type, message=message, frames=frames)
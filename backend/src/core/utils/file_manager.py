@@ -3,11 +3,12 @@
 """
 import os
 import shutil
+import uuid
 import hashlib
 import gzip
 import base64
 from pathlib import Path
-from typing import Union, List, Optional, BinaryIO
+from typing import AsyncIterable, AsyncIterator, Union, List, Optional, BinaryIO
 from datetime import datetime
 import aiofiles
 import aiofiles.os
@@ -112,6 +113,170 @@ async def save_file(self,
             
         return str(file_path)
         
+    def resolve_path(self, filename: str) -> Path:
+        """
+        获取文件的绝对路径
+        
+        Args:
+            filename: 文件名
+            
+        Returns:
+            Path: 文件路径
+            
+        Raises:
+            ValueError: 文件名指向基础路径之外
+        """
+        base_path = self.base_path.resolve()
+        file_path = (base_path / filename).resolve()
+        if file_path != base_path and base_path not in file_path.parents:
+            raise ValueError(f"非法的文件名: {filename}")
+        return file_path
+        
+    async def save_stream(self,
+                         chunks: AsyncIterable[bytes],
+                         filename: str,
+                         max_size: Optional[int] = None,
+                         algorithm: str = 'sha256') -> dict:
+        """
+        以流的方式保存文件，边写边计算大小和哈希值
+        
+        Args:
+            chunks: 文件内容的字节块
+            filename: 文件名
+            max_size: 最大字节数，超出时删除已写入的部分
+            algorithm: 哈希算法(md5/sha1/sha256)
+            
+        Returns:
+            dict: 文件路径、大小和哈希值
+            
+        Raises:
+            ValueError: 文件超出max_size
+        """
+        file_path = self.resolve_path(filename)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        hash_obj = hashlib.new(algorithm)
+        size = 0
+        try:
+            async with aiofiles.open(file_path, 'wb') as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise ValueError(f"文件超出大小限制: {max_size} 字节")
+                    hash_obj.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            if await aiofiles.os.path.exists(file_path):
+                await aiofiles.os.remove(file_path)
+            raise
+            
+        return {
+            "path": str(file_path),
+            "size": size,
+            "hash": hash_obj.hexdigest()
+        }
+        
+    async def append_stream(self,
+                           chunks: AsyncIterable[bytes],
+                           filename: str,
+                           offset: int,
+                           max_size: Optional[int] = None) -> int:
+        """
+        从指定偏移量开始以流的方式写入文件，用于可续传的分块上传。
+        偏移量之后的已有内容会被截断，重传的块会覆盖上次写入了一半的部分
+        
+        Args:
+            chunks: 文件内容的字节块
+            filename: 文件名
+            offset: 起始偏移量，不能超过文件当前大小
+            max_size: 文件最大字节数
+            
+        Returns:
+            int: 写入后的文件大小
+            
+        Raises:
+            ValueError: 偏移量超过文件当前大小，或文件超出max_size
+        """
+        file_path = self.resolve_path(filename)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        current = file_path.stat().st_size if file_path.exists() else 0
+        if offset < 0 or offset > current:
+            raise ValueError(f"偏移量{offset}超过文件当前大小{current}")
+        
+        size = offset
+        async with aiofiles.open(file_path, 'r+b' if current else 'wb') as f:
+            await f.truncate(offset)
+            await f.seek(offset)
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise ValueError(f"文件超出大小限制: {max_size} 字节")
+                await f.write(chunk)
+        return size
+        
+    def write_atomic(self, filename: str, content: bytes, overwrite: bool = True) -> bool:
+        """
+        同步写入文件，先写入同目录的临时文件再重命名，读取方不会看到写了一半的文件。
+        供不在事件循环中运行的代码(如后台线程)使用
+        
+        Args:
+            filename: 文件名
+            content: 文件内容
+            overwrite: 文件已存在时是否覆盖
+            
+        Returns:
+            bool: 是否写入，文件已存在且不覆盖时为False
+        """
+        file_path = self.resolve_path(filename)
+        if not overwrite and file_path.exists():
+            return False
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        temp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+        return True
+        
+    async def iter_file(self,
+                       filename: str,
+                       chunk_size: int = 64 * 1024,
+                       start: int = 0,
+                       end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        分块读取文件
+        
+        Args:
+            filename: 文件名
+            chunk_size: 每块字节数
+            start: 起始偏移量
+            end: 结束偏移量(不含)，默认读到文件末尾
+            
+        Yields:
+            bytes: 文件内容块
+        """
+        file_path = self.resolve_path(filename)
+        
+        if not await aiofiles.os.path.exists(file_path):
+            raise FileNotFoundError(f"文件不存在: {filename}")
+            
+        async with aiofiles.open(file_path, 'rb') as f:
+            await f.seek(start)
+            remaining = None if end is None else max(end - start, 0)
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        
     async def read_file(self,
                        filename: str,
                        decrypt: bool = False,
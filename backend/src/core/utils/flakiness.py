@@ -0,0 +1,77 @@
+"""
+测试用例不稳定度模块
+
+每个用例保存最近window次结果组成的位串(最低位为最新，1表示失败)，以及窗口内的失败数和
+相邻两次结果不同的次数(翻转数)。加入一个结果时只需比较移出的最旧两位和最新一位，O(1)更新。
+- 翻转率 = 翻转数 / (结果数 - 1)，稳定通过和稳定失败的用例都为0，通过失败交替出现时接近1
+- 翻转率达到进入阈值且结果数足够时隔离，降到退出阈值以下才解除，避免在阈值附近反复切换
+"""
+from dataclasses import dataclass
+from typing import List
+
+# 窗口保存的结果数
+DEFAULT_WINDOW = 32
+
+# 计算隔离状态所需的最少结果数
+MIN_SAMPLES = 8
+
+# 翻转率达到该值时隔离
+QUARANTINE_SCORE = 0.3
+
+# 已隔离的用例翻转率降到该值以下时解除隔离
+RELEASE_SCORE = 0.1
+
+
+@dataclass
+class FlakinessWindow:
+    """滚动窗口内的通过/失败翻转统计"""
+    bits: int = 0
+    size: int = 0
+    failures: int = 0
+    transitions: int = 0
+    window: int = DEFAULT_WINDOW
+
+    def push(self, failed: bool) -> None:
+        """加入最新的一次结果"""
+        bit = int(bool(failed))
+        if self.size == self.window:
+            # 移出最旧的结果，它与次旧结果之间的翻转同时移出
+            oldest = self.bits >> (self.window - 1) & 1
+            self.failures -= oldest
+            if self.window > 1 and oldest != self.bits >> (self.window - 2) & 1:
+                self.transitions -= 1
+            self.size -= 1
+        if self.size and bit != self.bits & 1:
+            self.transitions += 1
+        self.bits = (self.bits << 1 | bit) & ((1 << self.window) - 1)
+        self.failures += bit
+        self.size += 1
+
+    @property
+    def flip_rate(self) -> float:
+        """翻转率"""
+        return self.transitions / (self.size - 1) if self.size > 1 else 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        """失败率"""
+        return self.failures / self.size if self.size else 0.0
+
+    def history(self) -> List[bool]:
+        """窗口内的结果，从旧到新，True表示失败"""
+        return [bool(self.bits >> shift & 1) for shift in range(self.size - 1, -1, -1)]
+
+    def quarantine(self, quarantined: bool) -> bool:
+        """根据当前翻转率计算新的隔离状态
+
+        Args:
+            quarantined: 当前是否已隔离
+
+        Returns:
+            bool: 是否应当隔离
+        """
+        if self.size < MIN_SAMPLES:
+            return quarantined
+        if quarantined:
+            return self.flip_rate >= RELEASE_SCORE
+        return self.flip_rate >= QUARANTINE_SCORE
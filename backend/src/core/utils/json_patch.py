@@ -0,0 +1,152 @@
+"""
+JSON Patch工具模块
+
+按RFC 6902生成和应用JSON文档之间的差异，只使用add、remove和replace三种操作:
+- 对象逐键比较，只记录增删和变化的键
+- 数组先去掉相同的前缀和后缀，只对中间变化的部分逐项比较，
+  在中间插入或删除元素时补丁大小与变化量成正比
+"""
+import copy
+from typing import Any, Dict, List
+
+Patch = List[Dict[str, Any]]
+
+
+def escape_pointer(token: Any) -> str:
+    """按RFC 6901转义JSON Pointer中的一段"""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def unescape_pointer(token: str) -> str:
+    """还原JSON Pointer中转义的一段"""
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _same(a: Any, b: Any) -> bool:
+    """递归比较类型和值，避免True与1、1与1.0被视为相等"""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(value, b[key]) for key, value in a.items())
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def make_patch(source: Any, target: Any) -> Patch:
+    """生成把source变为target的补丁
+
+    Args:
+        source: 原文档
+        target: 目标文档
+
+    Returns:
+        Patch: 补丁操作列表，文档相同时为空列表
+    """
+    patch: Patch = []
+    _diff(source, target, "", patch)
+    return patch
+
+
+def _diff(source: Any, target: Any, path: str, patch: Patch) -> None:
+    if _same(source, target):
+        return
+    if isinstance(source, dict) and isinstance(target, dict):
+        for key in source:
+            if key not in target:
+                patch.append({"op": "remove", "path": f"{path}/{escape_pointer(key)}"})
+        for key, value in target.items():
+            child = f"{path}/{escape_pointer(key)}"
+            if key in source:
+                _diff(source[key], value, child, patch)
+            else:
+                patch.append({"op": "add", "path": child, "value": copy.deepcopy(value)})
+        return
+    if isinstance(source, list) and isinstance(target, list):
+        _diff_list(source, target, path, patch)
+        return
+    patch.append({"op": "replace", "path": path, "value": copy.deepcopy(target)})
+
+
+def _diff_list(source: list, target: list, path: str, patch: Patch) -> None:
+    # 去掉相同的前缀和后缀
+    start = 0
+    while start < len(source) and start < len(target) and _same(source[start], target[start]):
+        start += 1
+    source_end, target_end = len(source), len(target)
+    while source_end > start and target_end > start and _same(source[source_end - 1], target[target_end - 1]):
+        source_end -= 1
+        target_end -= 1
+
+    common = min(source_end, target_end) - start
+    for offset in range(common):
+        index = start + offset
+        _diff(source[index], target[index], f"{path}/{index}", patch)
+    # 多出的旧元素从后往前删除，保证下标不受前面删除的影响
+    for index in range(source_end - 1, start + common - 1, -1):
+        patch.append({"op": "remove", "path": f"{path}/{index}"})
+    for index in range(start + common, target_end):
+        patch.append({"op": "add", "path": f"{path}/{index}", "value": copy.deepcopy(target[index])})
+
+
+def apply_patch(document: Any, patch: Patch, in_place: bool = False) -> Any:
+    """对文档应用补丁
+
+    Args:
+        document: 原文档
+        patch: make_patch生成的补丁
+        in_place: 是否直接修改原文档，连续应用多个补丁时可以避免重复复制
+
+    Returns:
+        Any: 应用补丁后的文档
+
+    Raises:
+        ValueError: 补丁路径不存在或操作不受支持
+    """
+    if not in_place:
+        document = copy.deepcopy(document)
+    for operation in patch:
+        op, path = operation["op"], operation["path"]
+        if path == "":
+            if op not in ("add", "replace"):
+                raise ValueError(f"不支持对根节点执行{op}")
+            document = copy.deepcopy(operation["value"])
+            continue
+
+        tokens = [unescape_pointer(token) for token in path.split("/")[1:]]
+        parent = document
+        try:
+            for token in tokens[:-1]:
+                parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise ValueError(f"补丁路径不存在: {path}") from e
+
+        key = tokens[-1]
+        if isinstance(parent, list):
+            index = len(parent) if key == "-" else int(key)
+            if op == "add":
+                if index > len(parent):
+                    raise ValueError(f"补丁路径不存在: {path}")
+                parent.insert(index, copy.deepcopy(operation["value"]))
+            elif index >= len(parent):
+                raise ValueError(f"补丁路径不存在: {path}")
+            elif op == "remove":
+                del parent[index]
+            elif op == "replace":
+                parent[index] = copy.deepcopy(operation["value"])
+            else:
+                raise ValueError(f"不支持的补丁操作: {op}")
+        elif isinstance(parent, dict):
+            if op == "add":
+                parent[key] = copy.deepcopy(operation["value"])
+            elif key not in parent:
+                raise ValueError(f"补丁路径不存在: {path}")
+            elif op == "remove":
+                del parent[key]
+            elif op == "replace":
+                parent[key] = copy.deepcopy(operation["value"])
+            else:
+                raise ValueError(f"不支持的补丁操作: {op}")
+        else:
+            raise ValueError(f"补丁路径不存在: {path}")
+    return document
@@ -0,0 +1,115 @@
+"""
+键集分页工具
+
+按(created_at, id)倒序分页，游标对调用方不透明:
+- 翻页只需在索引上定位到上一页最后一行，不随页码增大变慢
+- 取limit+1行判断是否还有下一页，不需要额外的COUNT查询
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """将排序键编码为游标
+
+    Args:
+        created_at: 创建时间
+        row_id: 记录ID
+
+    Returns:
+        str: URL安全的游标字符串
+    """
+    payload = json.dumps({"t": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解码游标
+
+    Args:
+        cursor: 游标字符串
+
+    Returns:
+        Tuple[datetime, int]: (创建时间, 记录ID)
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def apply_keyset(
+    statement: Any,
+    created_column: Any,
+    id_column: Any,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Any:
+    """为查询加上键集分页的过滤、排序和limit+1
+
+    Args:
+        statement: 已应用过滤条件的Select语句或Query
+        created_column: 创建时间列
+        id_column: 主键列
+        limit: 每页记录数
+        cursor: 上一页返回的游标，为空时从第一页开始
+
+    Returns:
+        Any: 与输入类型相同的分页查询
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        statement = statement.filter(or_(
+            created_column < created_at,
+            and_(created_column == created_at, id_column < row_id)
+        ))
+    return statement.order_by(created_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def paginate_keyset(
+    db: Session,
+    statement: Select,
+    created_column: Any,
+    id_column: Any,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """按(created_at, id)倒序执行键集分页
+
+    Args:
+        db: 数据库会话
+        statement: 已应用过滤条件的Select语句
+        created_column: 创建时间列
+        id_column: 主键列
+        limit: 每页记录数
+        cursor: 上一页返回的游标，为空时从第一页开始
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: (当前页记录, 下一页游标)，没有下一页时游标为None
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    rows = db.execute(apply_keyset(statement, created_column, id_column, limit, cursor)).scalars().all()
+    if len(rows) <= limit:
+        return list(rows), None
+
+    rows = list(rows[:limit])
+    last = rows[-1]
+    return rows, encode_cursor(
+        getattr(last, created_column.key),
+        getattr(last, id_column.key)
+    )
@@ -0,0 +1,334 @@
+"""
+可强制终止的进程池模块
+
+concurrent.futures.ProcessPoolExecutor无法终止单个正在执行的任务，这里为每个工作进程
+单独建立管道，主进程知道每个进程正在执行的任务及其截止时间:
+- 任务超时后立即杀死该进程(POSIX上连同其创建的子进程整组杀死)，并启动新的进程补位
+- 工作进程意外退出时，当前任务记为失败，同样补位
+- 失败的任务按指数退避重新排队，等待期间不占用工作进程
+- 每个工作进程占用一个槽位，补位进程沿用原槽位；可以传入调度器按槽位分配任务(如分片和工作窃取)
+- POSIX上默认以forkserver方式启动工作进程，服务进程预先导入任务函数所在模块后再fork，
+  补位进程启动快，且不继承主进程的数据库连接、线程和锁；其他平台使用spawn
+"""
+import heapq
+import logging
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing.connection import wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 退避等待时间上限(秒)
+MAX_RETRY_DELAY = 300.0
+
+# 关闭进程池时等待工作进程退出的时间(秒)
+SHUTDOWN_TIMEOUT = 5.0
+
+# 工作进程启动完成后发送的消息，任务结果总是二元组
+_READY = "ready"
+
+
+@dataclass
+class TaskOutcome:
+    """任务的最终执行结果"""
+    key: Any
+    payload: Any
+    attempts: int
+    started_at: datetime
+    completed_at: datetime
+    result: Any = None
+    error: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """任务是否正常返回"""
+        return self.error is None
+
+
+@dataclass
+class _Task:
+    key: Any
+    payload: Any
+    attempts: int = 0
+    started_at: Optional[datetime] = None
+    deadline: Optional[float] = None
+
+
+class TaskScheduler(Protocol):
+    """按工作进程槽位分配任务的调度器"""
+
+    def __len__(self) -> int:
+        """尚未取出的任务数"""
+
+    def take(self, slot: int) -> Optional[int]:
+        """取出槽位slot的下一个任务在任务列表中的下标，该槽位暂无任务时为None"""
+
+
+class _FifoScheduler:
+    """默认调度器，按任务顺序分配给任意槽位"""
+
+    def __init__(self, count: int):
+        self.indexes = deque(range(count))
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+    def take(self, slot: int) -> Optional[int]:
+        return self.indexes.popleft() if self.indexes else None
+
+
+def _worker_main(conn, func: Callable[[Any], Any]) -> None:
+    """工作进程主循环，逐个执行任务并通过管道返回(是否成功, 返回值或错误信息)"""
+    if hasattr(os, "setpgrp"):
+        # 成为进程组组长，超时时可以连同子进程一起杀死
+        os.setpgrp()
+    # 启动(spawn时包括导入模块)完成后才开始计算任务超时
+    conn.send(_READY)
+    while True:
+        try:
+            payload = conn.recv()
+        except (EOFError, OSError):
+            break
+        if payload is None:
+            break
+        try:
+            message = (True, func(payload))
+        except BaseException as e:
+            message = (False, "".join(traceback.format_exception(type(e), e, e.__traceback__)))
+        try:
+            conn.send(message)
+        except Exception as e:
+            # 返回值无法序列化
+            conn.send((False, f"Task result could not be sent: {e!r}"))
+
+
+class _Worker:
+    """单个工作进程及其管道"""
+
+    def __init__(self, context, func: Callable[[Any], Any], slot: int = 0):
+        self.slot = slot
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, func), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task: Optional[_Task] = None
+
+    def submit(self, task: _Task, timeout: Optional[float]) -> None:
+        task.attempts += 1
+        task.started_at = datetime.utcnow()
+        task.deadline = time.monotonic() + timeout if timeout else None
+        self.task = task
+        self.conn.send(task.payload)
+
+    def kill(self) -> None:
+        """强制终止进程，POSIX上终止整个进程组"""
+        if self.process.is_alive():
+            try:
+                if hasattr(os, "killpg"):
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                else:
+                    self.process.kill()
+            except (ProcessLookupError, PermissionError):
+                self.process.kill()
+        self.process.join(SHUTDOWN_TIMEOUT)
+        self.conn.close()
+
+    def stop(self) -> None:
+        """通知进程退出，超时未退出时强制终止"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(SHUTDOWN_TIMEOUT)
+        self.kill()
+
+
+class KillablePool:
+    """可强制终止超时任务的进程池"""
+
+    def __init__(
+        self,
+        func: Callable[[Any], Any],
+        workers: int,
+        timeout: Optional[float] = None,
+        retry_times: int = 0,
+        retry_interval: float = 0,
+        should_retry: Optional[Callable[[TaskOutcome], bool]] = None,
+        start_method: Optional[str] = None
+    ):
+        """初始化进程池
+
+        Args:
+            func: 在工作进程中执行的函数，必须可以被pickle(模块级函数)
+            workers: 工作进程数
+            timeout: 单个任务的超时时间(秒)，None表示不限制
+            retry_times: 失败后的重试次数
+            retry_interval: 第一次重试前的等待时间(秒)，之后每次翻倍
+            should_retry: 判断任务是否需要重试，默认只重试抛出异常、超时或进程退出的任务
+            start_method: 工作进程的启动方式，默认为forkserver(不支持时为spawn)
+        """
+        if workers < 1:
+            raise ValueError("workers必须大于0")
+        self.func = func
+        self.workers = workers
+        self.timeout = timeout
+        self.retry_times = retry_times
+        self.retry_interval = retry_interval
+        self.should_retry = should_retry or (lambda outcome: not outcome.ok)
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            # 服务进程按工作目录和PYTHONPATH导入，导入失败时由各工作进程自行导入；只在服务进程启动前生效
+            self.context.set_forkserver_preload(list(dict.fromkeys([__name__, func.__module__])))
+
+    def retry_delay(self, attempts: int) -> float:
+        """第attempts次执行失败后的退避时间"""
+        return min(self.retry_interval * (2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+    def imap_unordered(
+        self,
+        tasks: Iterable[Tuple[Any, Any]],
+        scheduler: Optional[TaskScheduler] = None
+    ) -> Iterator[TaskOutcome]:
+        """执行全部任务，按完成顺序返回最终结果
+
+        开始时启动min(workers, 任务数)个工作进程，槽位依次为0到workers-1，迭代结束或调用方
+        提前退出时全部关闭。重试的任务优先于调度器中的任务，由任意空闲的工作进程执行。
+
+        Args:
+            tasks: (任务标识, 传给func的参数)列表
+            scheduler: 按槽位分配任务的调度器，管理tasks中每个任务的下标，默认按顺序分配
+
+        Yields:
+            TaskOutcome: 每个任务重试结束后的结果
+        """
+        queued = [_Task(key, payload) for key, payload in tasks]
+        scheduler = scheduler if scheduler is not None else _FifoScheduler(len(queued))
+        # 等待重试的任务
+        pending: Deque[_Task] = deque()
+        delayed: List[Tuple[float, int, _Task]] = []
+        sequence = 0
+        starting: Dict[Any, _Worker] = {}
+        idle: List[_Worker] = []
+        busy: Dict[Any, _Worker] = {}
+
+        def start_worker(slot: int) -> None:
+            worker = _Worker(self.context, self.func, slot)
+            starting[worker.conn] = worker
+
+        def next_task(worker: _Worker) -> Optional[_Task]:
+            if pending:
+                return pending.popleft()
+            index = scheduler.take(worker.slot)
+            return queued[index] if index is not None else None
+
+        try:
+            for slot in range(min(self.workers, len(queued))):
+                start_worker(slot)
+
+            while pending or delayed or busy or (scheduler and (idle or starting)):
+                now = time.monotonic()
+                while delayed and delayed[0][0] <= now:
+                    pending.append(heapq.heappop(delayed)[2])
+                for worker in list(idle):
+                    if not (pending or scheduler):
+                        break
+                    task = next_task(worker)
+                    if task is None:
+                        continue
+                    idle.remove(worker)
+                    worker.submit(task, self.timeout)
+                    busy[worker.conn] = worker
+                if not (pending or delayed or busy or starting):
+                    if scheduler:
+                        raise RuntimeError(f"调度器中还有{len(scheduler)}个任务，但没有工作进程的槽位可以领取")
+                    break
+
+                wake_up = [worker.task.deadline for worker in busy.values() if worker.task.deadline]
+                if delayed:
+                    wake_up.append(delayed[0][0])
+                wait_for = max(0.0, min(wake_up) - now) if wake_up else None
+                if busy or starting:
+                    ready = wait([*busy, *starting], wait_for)
+                else:
+                    time.sleep(wait_for or 0)
+                    ready = []
+
+                finished: List[TaskOutcome] = []
+                for conn in ready:
+                    if conn in starting:
+                        worker = starting.pop(conn)
+                        try:
+                            conn.recv()
+                        except (EOFError, OSError):
+                            worker.kill()
+                            raise RuntimeError(
+                                f"工作进程启动失败(退出码{worker.process.exitcode})，请确认任务函数可以在子进程中导入"
+                            )
+                        idle.append(worker)
+                        continue
+                    worker = busy.pop(conn)
+                    try:
+                        ok, value = conn.recv()
+                    except (EOFError, OSError):
+                        worker.kill()
+                        finished.append(self._outcome(
+                            worker.task,
+                            error=f"Worker process exited unexpectedly (exit code {worker.process.exitcode})"
+                        ))
+                        start_worker(worker.slot)
+                        continue
+                    if ok:
+                        finished.append(self._outcome(worker.task, result=value))
+                    else:
+                        finished.append(self._outcome(worker.task, error=value))
+                    worker.task = None
+                    idle.append(worker)
+
+                now = time.monotonic()
+                for conn, worker in list(busy.items()):
+                    task = worker.task
+                    if task.deadline is not None and task.deadline <= now:
+                        del busy[conn]
+                        logger.warning(f"任务{task.key}超过{self.timeout}秒未完成，终止工作进程{worker.process.pid}")
+                        worker.kill()
+                        finished.append(self._outcome(
+                            task, error=f"Timed out after {self.timeout} seconds", timed_out=True
+                        ))
+                        start_worker(worker.slot)
+
+                for outcome in finished:
+                    task = _Task(outcome.key, outcome.payload, outcome.attempts)
+                    if outcome.attempts <= self.retry_times and self.should_retry(outcome):
+                        sequence += 1
+                        ready_at = time.monotonic() + self.retry_delay(outcome.attempts)
+                        heapq.heappush(delayed, (ready_at, sequence, task))
+                        continue
+                    yield outcome
+        finally:
+            for worker in idle:
+                worker.stop()
+            for worker in [*busy.values(), *starting.values()]:
+                worker.kill()
+
+    @staticmethod
+    def _outcome(task: _Task, result: Any = None, error: Optional[str] = None, timed_out: bool = False) -> TaskOutcome:
+        return TaskOutcome(
+            key=task.key,
+            payload=task.payload,
+            attempts=task.attempts,
+            started_at=task.started_at,
+            completed_at=datetime.utcnow(),
+            result=result,
+            error=error,
+            timed_out=timed_out
+        )
@@ -0,0 +1,213 @@
+"""
+基于历史耗时的测试分片调度模块
+
+- 每个用例的耗时估计为历史耗时的指数加权移动平均(EWMA)及其方差，近期的执行权重更高
+- 按估计耗时从长到短(LPT)把用例装入当前负载最小的分片，使各分片的完成时间(makespan)尽量接近
+- 执行时每个工作进程先执行自己分片中的用例，空闲后从剩余负载最大的分片末尾窃取用例，
+  抵消估计误差造成的掉队分片
+- simulate_makespan按实际耗时模拟调度过程，用于比较LPT与轮询分片的总耗时
+"""
+import heapq
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# EWMA平滑系数，越大越偏重最近的执行
+DEFAULT_EWMA_ALPHA = 0.3
+
+# 计算分片成本时标准差的权重，耗时波动大的用例按偏长的耗时安排
+DEFAULT_RISK_FACTOR = 1.0
+
+# 单个用例的最小成本(秒)，避免耗时为0的用例不占用任何负载
+MIN_CASE_COST = 0.1
+
+
+@dataclass
+class DurationEstimate:
+    """单个用例的耗时估计"""
+    mean: float
+    variance: float = 0.0
+    samples: int = 1
+
+    @property
+    def stddev(self) -> float:
+        """耗时标准差"""
+        return math.sqrt(self.variance)
+
+    def update(self, duration: float, alpha: float = DEFAULT_EWMA_ALPHA) -> None:
+        """加入一次新的执行耗时，同时更新加权均值和加权方差"""
+        diff = duration - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.samples += 1
+
+    def cost(self, risk: float = DEFAULT_RISK_FACTOR) -> float:
+        """用于分片的成本: 均值加risk倍标准差"""
+        return max(self.mean + risk * self.stddev, MIN_CASE_COST)
+
+
+def estimate_durations(
+    history: Iterable[Tuple[Hashable, float]],
+    alpha: float = DEFAULT_EWMA_ALPHA
+) -> Dict[Hashable, DurationEstimate]:
+    """根据历史耗时计算每个用例的耗时估计
+
+    Args:
+        history: 按执行时间从早到晚排列的(用例标识, 耗时)
+        alpha: EWMA平滑系数
+
+    Returns:
+        Dict[Hashable, DurationEstimate]: 用例标识到耗时估计的映射
+    """
+    estimates: Dict[Hashable, DurationEstimate] = {}
+    for key, duration in history:
+        if duration is None:
+            continue
+        estimate = estimates.get(key)
+        if estimate is None:
+            estimates[key] = DurationEstimate(float(duration))
+        else:
+            estimate.update(float(duration), alpha)
+    return estimates
+
+
+def default_estimate(estimates: Mapping[Hashable, DurationEstimate], fallback: float = 1.0) -> DurationEstimate:
+    """没有历史的用例使用已知用例均值的中位数"""
+    means = sorted(estimate.mean for estimate in estimates.values())
+    if not means:
+        return DurationEstimate(fallback, samples=0)
+    return DurationEstimate(means[len(means) // 2], samples=0)
+
+
+def lpt_partition(costs: Sequence[float], shards: int) -> List[List[int]]:
+    """最长处理时间优先(LPT)装箱
+
+    Args:
+        costs: 每个任务的成本
+        shards: 分片数
+
+    Returns:
+        List[List[int]]: 每个分片中的任务下标，分片内按成本从大到小排列
+
+    Raises:
+        ValueError: 分片数小于1
+    """
+    if shards < 1:
+        raise ValueError("分片数必须大于0")
+    partition: List[List[int]] = [[] for _ in range(shards)]
+    # (当前负载, 分片下标)，负载相同时取下标小的分片，结果可复现
+    loads = [(0.0, shard) for shard in range(shards)]
+    for index in sorted(range(len(costs)), key=lambda i: (-costs[i], i)):
+        load, shard = heapq.heappop(loads)
+        partition[shard].append(index)
+        heapq.heappush(loads, (load + costs[index], shard))
+    return partition
+
+
+def round_robin_partition(count: int, shards: int) -> List[List[int]]:
+    """按顺序轮流分配任务，作为LPT的对照"""
+    if shards < 1:
+        raise ValueError("分片数必须大于0")
+    return [list(range(shard, count, shards)) for shard in range(shards)]
+
+
+def partition_makespan(partition: Sequence[Sequence[int]], costs: Sequence[float]) -> float:
+    """不窃取时各分片总成本的最大值"""
+    return max((sum(costs[i] for i in shard) for shard in partition), default=0.0)
+
+
+class WorkStealingScheduler:
+    """按分片分配任务，分片执行完后从其他分片窃取任务
+
+    每个工作进程对应一个分片(槽位)，从分片头部取成本最大的任务；自己的分片为空时，
+    从剩余成本最大的分片尾部窃取成本最小的任务，被窃取分片的长任务仍由其自己执行。
+    """
+
+    def __init__(self, partition: Sequence[Sequence[int]], costs: Sequence[float], steal: bool = True):
+        """初始化调度器
+
+        Args:
+            partition: 每个分片中的任务下标
+            costs: 每个任务的估计成本，用于选择被窃取的分片
+            steal: 是否允许窃取，关闭时即为静态分片
+        """
+        self.shards: List[Deque[int]] = [deque(shard) for shard in partition]
+        self.costs = costs
+        self.steal = steal
+        self.remaining = [sum(costs[i] for i in shard) for shard in partition]
+        self.stolen = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def take(self, slot: int) -> Optional[int]:
+        """取出槽位slot的下一个任务下标，没有可执行的任务时为None"""
+        shard = slot % len(self.shards)
+        if self.shards[shard]:
+            return self._pop(shard, left=True)
+        if not self.steal:
+            return None
+        victim = max(range(len(self.shards)), key=lambda i: (self.remaining[i], -i))
+        if not self.shards[victim]:
+            return None
+        self.stolen += 1
+        return self._pop(victim, left=False)
+
+    def _pop(self, shard: int, left: bool) -> int:
+        index = self.shards[shard].popleft() if left else self.shards[shard].pop()
+        self.remaining[shard] -= self.costs[index]
+        return index
+
+
+def simulate_makespan(scheduler: WorkStealingScheduler, durations: Sequence[float]) -> float:
+    """按实际耗时模拟调度过程，返回全部任务完成的时间
+
+    Args:
+        scheduler: 调度器，模拟过程中会被消耗
+        durations: 每个任务的实际耗时
+
+    Returns:
+        float: 最后一个槽位空闲的时间
+    """
+    events: List[Tuple[float, int]] = [(0.0, slot) for slot in range(len(scheduler.shards))]
+    heapq.heapify(events)
+    makespan = 0.0
+    while events:
+        now, slot = heapq.heappop(events)
+        index = scheduler.take(slot)
+        if index is None:
+            makespan = max(makespan, now)
+            continue
+        heapq.heappush(events, (now + durations[index], slot))
+    return makespan
+
+
+def compare_schedules(
+    estimated: Sequence[float],
+    actual: Sequence[float],
+    shards: int
+) -> Dict[str, Any]:
+    """用实际耗时比较轮询分片、LPT分片和LPT加窃取的总耗时
+
+    Args:
+        estimated: 每个任务的估计成本，用于LPT分片
+        actual: 每个任务的实际耗时
+        shards: 分片数
+
+    Returns:
+        Dict[str, Any]: 各策略的总耗时以及LPT加窃取相对轮询分片节省的比例
+    """
+    lpt = lpt_partition(estimated, shards)
+    round_robin = round_robin_partition(len(actual), shards)
+    result = {
+        "round_robin": simulate_makespan(WorkStealingScheduler(round_robin, actual, steal=False), actual),
+        "lpt": simulate_makespan(WorkStealingScheduler(lpt, estimated, steal=False), actual),
+        "lpt_stealing": simulate_makespan(WorkStealingScheduler(lpt, estimated), actual),
+        "lower_bound": max(sum(actual) / shards, max(actual, default=0.0))
+    }
+    result["saving"] = (
+        round(1 - result["lpt_stealing"] / result["round_robin"], 4) if result["round_robin"] else 0.0
+    )
+    return result
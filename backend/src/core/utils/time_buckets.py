@@ -0,0 +1,81 @@
+"""
+按时间分桶降采样模块
+
+数据库按天分组聚合后，把每日计数合并为按天或按周的桶，控制趋势的点数:
+- 桶宽是天数，周桶从周一开始，宽度超过一周时也以周一对齐
+- 时间范围的桶数超过上限时按基本宽度的整数倍加宽，空桶不输出
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# 支持的分桶间隔及其基本宽度(天)
+INTERVAL_DAYS = {"day": 1, "week": 7}
+
+# 对齐桶起点的参考日期，1970-01-05是周一
+_EPOCH = date(1970, 1, 5)
+
+
+def bucket_start(day: date, width: int) -> date:
+    """日期所在桶的起始日期"""
+    return day - timedelta(days=(day - _EPOCH).days % width)
+
+
+def bucket_count(first: date, last: date, width: int) -> int:
+    """覆盖[first, last]所需的桶数"""
+    return (bucket_start(last, width) - bucket_start(first, width)).days // width + 1
+
+
+def choose_bucket_width(
+    first: date,
+    last: date,
+    max_points: int,
+    interval: Optional[str] = None
+) -> Tuple[str, int]:
+    """选择桶宽，使[first, last]的桶数不超过max_points
+
+    Args:
+        first: 最早的日期
+        last: 最晚的日期
+        max_points: 最多的桶数
+        interval: day或week，为空时天数不超过max_points用day，否则用week
+
+    Returns:
+        Tuple[str, int]: (间隔, 桶宽天数)，桶宽是间隔基本宽度的整数倍
+
+    Raises:
+        ValueError: 不支持的间隔或max_points小于1
+    """
+    if max_points < 1:
+        raise ValueError("max_points must be at least 1")
+    if interval is None:
+        interval = "day" if (last - first).days + 1 <= max_points else "week"
+    if interval not in INTERVAL_DAYS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    base = INTERVAL_DAYS[interval]
+    span = (last - first).days + 1
+    width = base * max(1, -(-span // (base * max_points)))
+    # 对齐后可能多出一个桶
+    while bucket_count(first, last, width) > max_points:
+        width += base
+    return interval, width
+
+
+def downsample(
+    rows: Iterable[Tuple[date, Mapping[str, int]]],
+    width: int
+) -> List[Tuple[date, Dict[str, int]]]:
+    """把按日期的计数合并到桶中，同一桶的计数逐项相加
+
+    Args:
+        rows: (日期, 计数)，不要求有序
+        width: 桶宽(天)
+
+    Returns:
+        List[Tuple[date, Dict[str, int]]]: 按桶起始日期升序的(桶起始日期, 计数)，不包含空桶
+    """
+    buckets: Dict[date, Dict[str, int]] = {}
+    for day, counts in rows:
+        bucket = buckets.setdefault(bucket_start(day, width), {})
+        for name, value in counts.items():
+            bucket[name] = bucket.get(name, 0) + (value or 0)
+    return sorted(buckets.items())
@@ -24,6 +24,9 @@
 from core.auth.service import AuthService
 from core.auth.captcha import CaptchaManager
 from core.auth.models import User
+from core.auth.login_log_writer import login_log_writer
+from core.auth.operation_log import OperationLogMiddleware
+from core.auth.operation_log_writer import operation_log_writer
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -106,8 +109,44 @@ def create_app() -> FastAPI:
     # 添加日志中间件
     app.add_middleware(LoggingMiddleware)
 
+    # 添加操作日志中间件
+    if settings.OPERATION_LOG_ENABLED:
+        app.add_middleware(OperationLogMiddleware, writer=operation_log_writer)
+
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
+    @app.on_event("startup")
+    async def start_background_writers():
+        """启动后台日志写入器和测试产物清理线程"""
+        login_log_writer.start()
+        operation_log_writer.start()
+        # 测试产物清理线程属于测试执行模块，导入或启动失败不影响应用启动
+        try:
+            from api.config.test_config import test_execution_config
+            from api.services.artifact import artifact_sweeper
+            if test_execution_config.save_artifacts:
+                artifact_sweeper.start()
+        except Exception as e:
+            logger.error(f"测试产物清理线程启动失败: {str(e)}")
+
+    @app.on_event("shutdown")
+    async def stop_background_writers():
+        """停止后台日志写入器，写完队列中剩余的日志"""
+        login_log_writer.stop()
+        operation_log_writer.stop()
+        try:
+            from api.services.artifact import artifact_sweeper
+            artifact_sweeper.stop()
+        except Exception as e:
+            logger.error(f"测试产物清理线程停止失败: {str(e)}")
+        # 只停止本进程已经创建的进度订阅中心
+        try:
+            from api.services.run_progress import get_progress_hub
+            if get_progress_hub.cache_info().currsize:
+                get_progress_hub().stop()
+        except Exception as e:
+            logger.error(f"测试运行进度订阅中心停止失败: {str(e)}")
+
     @app.middleware("http")
     async def log_requests(request: Request, call_next):
         try:
@@ -0,0 +1,111 @@
+"""login and operation log indexes
+
+Revision ID: 5d2e8c1a7f30
+Revises: 147c6d9d4933
+Create Date: 2026-10-19 10:00:00.000000
+
+为login_logs和operation_logs的访问模式创建复合索引，
+同时补齐批量写入登录日志、登录汇总表和操作日志分区所需的表结构。
+由AUTO_CREATE_TABLES创建的库中部分对象可能已存在，这里逐项检查后再创建。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8c1a7f30'
+down_revision = '147c6d9d4933'
+branch_labels = None
+depends_on = None
+
+
+LOGIN_LOG_INDEXES = [
+    ('ix_login_logs_user_created', ['user_id', 'created_at', 'id']),
+    ('ix_login_logs_status_created', ['status', 'created_at', 'id']),
+    ('ix_login_logs_created', ['created_at', 'id', 'status', 'captcha_verified']),
+]
+
+OPERATION_LOG_INDEXES = [
+    ('ix_operation_logs_created_at', ['created_at']),
+    ('ix_operation_logs_user_created', ['user_id', 'created_at', 'id']),
+    ('ix_operation_logs_module_created', ['module', 'created_at', 'id']),
+]
+
+
+def _index_names(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def _create_missing_indexes(inspector, table, indexes):
+    existing = _index_names(inspector, table)
+    for name, columns in indexes:
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # login_logs记录验证码校验结果，用户名不存在的失败登录没有user_id
+    login_log_columns = {column['name'] for column in inspector.get_columns('login_logs')}
+    if 'captcha_verified' not in login_log_columns:
+        op.add_column(
+            'login_logs',
+            sa.Column('captcha_verified', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+    op.alter_column('login_logs', 'user_id', existing_type=sa.BigInteger(), nullable=True)
+
+    # login_log_rollups table
+    if not inspector.has_table('login_log_rollups'):
+        op.create_table(
+            'login_log_rollups',
+            sa.Column('id', sa.BigInteger(), nullable=False, autoincrement=True),
+            sa.Column('granularity', sa.String(length=10), nullable=False),
+            sa.Column('bucket_start', sa.DateTime(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('captcha_verified', sa.Boolean(), nullable=False),
+            sa.Column('count', sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('granularity', 'bucket_start', 'status', 'captcha_verified',
+                                name='uk_login_log_rollup_bucket')
+        )
+
+    # operation_logs按月分区要求分区键包含在主键中
+    primary_key = inspector.get_pk_constraint('operation_logs')['constrained_columns']
+    if 'created_at' not in primary_key:
+        op.execute(
+            "ALTER TABLE operation_logs "
+            "MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            "DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)"
+        )
+    op.alter_column('operation_logs', 'user_id', existing_type=sa.BigInteger(), nullable=True)
+
+    _create_missing_indexes(inspector, 'login_logs', LOGIN_LOG_INDEXES)
+    _create_missing_indexes(inspector, 'operation_logs', OPERATION_LOG_INDEXES)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for name, _ in reversed(OPERATION_LOG_INDEXES):
+        op.drop_index(name, table_name='operation_logs')
+    for name, _ in reversed(LOGIN_LOG_INDEXES):
+        op.drop_index(name, table_name='login_logs')
+    # user_id保持可空，已写入的失败登录没有对应用户
+    op.drop_column('login_logs', 'captcha_verified')
+
+    # 单列主键不包含分区键，先取消operation_logs的按月分区
+    partitioned = bind.execute(sa.text(
+        "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'operation_logs' "
+        "AND PARTITION_NAME IS NOT NULL"
+    )).scalar()
+    if partitioned:
+        op.execute("ALTER TABLE operation_logs REMOVE PARTITIONING")
+    primary_key = inspector.get_pk_constraint('operation_logs')['constrained_columns']
+    if 'created_at' in primary_key:
+        op.execute("ALTER TABLE operation_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+
+    if inspector.has_table('login_log_rollups'):
+        op.drop_table('login_log_rollups')
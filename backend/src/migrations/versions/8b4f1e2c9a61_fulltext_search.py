@@ -0,0 +1,46 @@
+"""fulltext search indexes for test cases and projects
+
+Revision ID: 8b4f1e2c9a61
+Revises: 5d2e8c1a7f30
+Create Date: 2026-10-19 12:00:00.000000
+
+为test_cases和projects的名称、描述创建带ngram解析器的FULLTEXT索引，
+名称列单独建一个索引用于相关度加权。FULLTEXT索引只在MySQL上创建。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4f1e2c9a61'
+down_revision = '5d2e8c1a7f30'
+branch_labels = None
+depends_on = None
+
+
+FULLTEXT_INDEXES = [
+    ('test_cases', 'ft_test_cases_name_description', ['name', 'description']),
+    ('test_cases', 'ft_test_cases_name', ['name']),
+    ('projects', 'ft_projects_name_description', ['name', 'description']),
+    ('projects', 'ft_projects_name', ['name']),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'mysql':
+        return
+
+    inspector = sa.inspect(bind)
+    for table, name, columns in FULLTEXT_INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'mysql':
+        return
+
+    for table, name, _ in reversed(FULLTEXT_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,62 @@
+"""test impact index
+
+Revision ID: a1d4c7e2b953
+Revises: e5b2f8a4c716
+Create Date: 2026-10-19 18:00:00.000000
+
+创建变更影响索引: impact_paths保存每个源码文件被哪些测试用例覆盖，
+test_case_impacts保存每个测试用例最近一次覆盖的文件，两者都以压缩位图存储。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d4c7e2b953'
+down_revision = 'e5b2f8a4c716'
+branch_labels = None
+depends_on = None
+
+# 位图列的最大字节数，MySQL上对应MEDIUMBLOB
+BITMAP_COLUMN_LENGTH = 16 * 1024 * 1024 - 1
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('impact_paths'):
+        op.create_table(
+            'impact_paths',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=False),
+            sa.Column('path', sa.String(length=500), nullable=False),
+            sa.Column('cases', sa.LargeBinary(length=BITMAP_COLUMN_LENGTH), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('project_id', 'path', name='uk_impact_paths_project_path')
+        )
+        op.create_index(op.f('ix_impact_paths_id'), 'impact_paths', ['id'], unique=False)
+
+    if not inspector.has_table('test_case_impacts'):
+        op.create_table(
+            'test_case_impacts',
+            sa.Column('test_case_id', sa.Integer(), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=False),
+            sa.Column('paths', sa.LargeBinary(length=BITMAP_COLUMN_LENGTH), nullable=False),
+            sa.Column('test_run_id', sa.Integer(), nullable=True),
+            sa.Column('recorded_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['test_case_id'], ['test_cases.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['test_run_id'], ['test_runs.id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('test_case_id')
+        )
+        op.create_index(
+            op.f('ix_test_case_impacts_project_id'), 'test_case_impacts', ['project_id'], unique=False
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_test_case_impacts_project_id'), table_name='test_case_impacts')
+    op.drop_table('test_case_impacts')
+    op.drop_index(op.f('ix_impact_paths_id'), table_name='impact_paths')
+    op.drop_table('impact_paths')
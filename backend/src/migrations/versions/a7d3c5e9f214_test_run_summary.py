@@ -0,0 +1,29 @@
+"""test run summary
+
+Revision ID: a7d3c5e9f214
+Revises: c8a5e1f3d726
+Create Date: 2026-10-19 23:30:00.000000
+
+为test_runs增加summary，运行完成时生成报告摘要(计数、耗时分位数、最慢用例、失败分组、
+按类型和优先级的分布)并保存为一个JSON文档，已完成运行的报告直接读取该文档。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3c5e9f214'
+down_revision = 'c8a5e1f3d726'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('test_runs')}
+    if 'summary' not in columns:
+        op.add_column('test_runs', sa.Column('summary', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('test_runs', 'summary')
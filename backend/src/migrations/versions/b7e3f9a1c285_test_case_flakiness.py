@@ -0,0 +1,50 @@
+"""test case flakiness
+
+Revision ID: b7e3f9a1c285
+Revises: a1d4c7e2b953
+Create Date: 2026-10-19 20:00:00.000000
+
+创建test_case_flakiness表，保存每个测试用例最近结果的通过/失败翻转统计和隔离状态。
+已有的历史结果可以通过scripts/rebuild_flakiness.py回放生成。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f9a1c285'
+down_revision = 'a1d4c7e2b953'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('test_case_flakiness'):
+        op.create_table(
+            'test_case_flakiness',
+            sa.Column('test_case_id', sa.Integer(), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=False),
+            sa.Column('bits', sa.BigInteger(), nullable=False),
+            sa.Column('samples', sa.Integer(), nullable=False),
+            sa.Column('failures', sa.Integer(), nullable=False),
+            sa.Column('transitions', sa.Integer(), nullable=False),
+            sa.Column('score', sa.Float(), nullable=False),
+            sa.Column('quarantined', sa.Boolean(), nullable=False),
+            sa.Column('quarantined_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['test_case_id'], ['test_cases.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('test_case_id')
+        )
+        op.create_index(
+            'ix_test_case_flakiness_project_score',
+            'test_case_flakiness',
+            ['project_id', 'quarantined', 'score'],
+            unique=False
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_test_case_flakiness_project_score', table_name='test_case_flakiness')
+    op.drop_table('test_case_flakiness')
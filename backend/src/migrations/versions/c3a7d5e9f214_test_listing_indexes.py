@@ -0,0 +1,41 @@
+"""composite indexes for test case, run and result listings
+
+Revision ID: c3a7d5e9f214
+Revises: 8b4f1e2c9a61
+Create Date: 2026-10-19 14:00:00.000000
+
+为测试用例、测试运行和测试结果的列表与报告查询创建复合索引，
+索引以过滤列开头、以键集分页的排序列(created_at/started_at, id)结尾。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a7d5e9f214'
+down_revision = '8b4f1e2c9a61'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('test_cases', 'ix_test_cases_project_created', ['project_id', 'created_at', 'id']),
+    ('test_cases', 'ix_test_cases_project_type_priority', ['project_id', 'type', 'priority', 'created_at', 'id']),
+    ('test_runs', 'ix_test_runs_project_started', ['project_id', 'started_at', 'id']),
+    ('test_results', 'ix_test_results_run_started', ['test_run_id', 'started_at', 'id']),
+    ('test_results', 'ix_test_results_run_status', ['test_run_id', 'status', 'started_at', 'id']),
+    ('test_results', 'ix_test_results_case', ['test_case_id', 'started_at']),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, name, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for table, name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,62 @@
+"""test artifacts
+
+Revision ID: c8a5e1f3d726
+Revises: f2c9b4e7a508
+Create Date: 2026-10-19 23:00:00.000000
+
+创建artifact_blobs和test_artifacts表，测试产物按内容的SHA-256去重保存，
+artifact_blobs.ref_count记录引用数，test_artifacts按过期时间分批清理。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8a5e1f3d726'
+down_revision = 'f2c9b4e7a508'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('artifact_blobs'):
+        op.create_table(
+            'artifact_blobs',
+            sa.Column('digest', sa.String(length=64), nullable=False),
+            sa.Column('size', sa.BigInteger(), nullable=False),
+            sa.Column('ref_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('digest')
+        )
+
+    if not inspector.has_table('test_artifacts'):
+        op.create_table(
+            'test_artifacts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('test_run_id', sa.Integer(), nullable=False),
+            sa.Column('test_result_id', sa.Integer(), nullable=True),
+            sa.Column('name', sa.String(length=255), nullable=False),
+            sa.Column('kind', sa.String(length=50), nullable=False),
+            sa.Column('content_type', sa.String(length=100), nullable=False),
+            sa.Column('digest', sa.String(length=64), nullable=False),
+            sa.Column('size', sa.BigInteger(), nullable=False),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['test_run_id'], ['test_runs.id']),
+            sa.ForeignKeyConstraint(['test_result_id'], ['test_results.id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['digest'], ['artifact_blobs.digest']),
+            sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('test_run_id', 'name', name='uk_test_artifacts_run_name')
+        )
+        op.create_index(op.f('ix_test_artifacts_id'), 'test_artifacts', ['id'], unique=False)
+        op.create_index('ix_test_artifacts_expires', 'test_artifacts', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_test_artifacts_expires', table_name='test_artifacts')
+    op.drop_index(op.f('ix_test_artifacts_id'), table_name='test_artifacts')
+    op.drop_table('test_artifacts')
+    op.drop_table('artifact_blobs')
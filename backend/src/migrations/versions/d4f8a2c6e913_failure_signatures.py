@@ -0,0 +1,71 @@
+"""failure signatures
+
+Revision ID: d4f8a2c6e913
+Revises: b7e3f9a1c285
+Create Date: 2026-10-19 21:00:00.000000
+
+创建failure_signatures表，保存归一化后的失败指纹及其出现次数和首次、最后出现时间，
+并为test_results增加signature_id，报告按签名对失败分组。
+已有的失败结果可以通过scripts/backfill_failure_signatures.py补算签名。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f8a2c6e913'
+down_revision = 'b7e3f9a1c285'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('failure_signatures'):
+        op.create_table(
+            'failure_signatures',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=False),
+            sa.Column('fingerprint', sa.String(length=40), nullable=False),
+            sa.Column('exception_type', sa.String(length=200), nullable=True),
+            sa.Column('message', sa.String(length=500), nullable=True),
+            sa.Column('frames', sa.Text(), nullable=True),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('first_seen', sa.DateTime(), nullable=True),
+            sa.Column('last_seen', sa.DateTime(), nullable=True),
+            sa.Column('last_test_run_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['last_test_run_id'], ['test_runs.id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('project_id', 'fingerprint', name='uk_failure_signatures_project_fingerprint')
+        )
+        op.create_index(op.f('ix_failure_signatures_id'), 'failure_signatures', ['id'], unique=False)
+        op.create_index(
+            'ix_failure_signatures_project_last_seen',
+            'failure_signatures',
+            ['project_id', 'last_seen'],
+            unique=False
+        )
+
+    columns = {column['name'] for column in inspector.get_columns('test_results')}
+    if 'signature_id' not in columns:
+        op.add_column('test_results', sa.Column('signature_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(
+            'fk_test_results_signature_id', 'test_results', 'failure_signatures',
+            ['signature_id'], ['id'], ondelete='SET NULL'
+        )
+        op.create_index(
+            'ix_test_results_run_signature',
+            'test_results',
+            ['test_run_id', 'signature_id'],
+            unique=False
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_test_results_run_signature', table_name='test_results')
+    op.drop_constraint('fk_test_results_signature_id', 'test_results', type_='foreignkey')
+    op.drop_column('test_results', 'signature_id')
+    op.drop_index('ix_failure_signatures_project_last_seen', table_name='failure_signatures')
+    op.drop_index(op.f('ix_failure_signatures_id'), table_name='failure_signatures')
+    op.drop_table('failure_signatures')
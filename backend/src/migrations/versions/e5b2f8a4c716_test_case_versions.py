@@ -0,0 +1,51 @@
+"""test case version history
+
+Revision ID: e5b2f8a4c716
+Revises: c3a7d5e9f214
+Create Date: 2026-10-19 16:00:00.000000
+
+为测试用例增加版本号，并创建保存历史版本的test_case_versions表，
+每个版本保存相对上一版本的JSON Patch，每隔固定版本数保存一次完整快照。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b2f8a4c716'
+down_revision = 'c3a7d5e9f214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('test_cases')}
+    if 'version' not in columns:
+        op.add_column(
+            'test_cases',
+            sa.Column('version', sa.Integer(), nullable=False, server_default='1')
+        )
+
+    if not inspector.has_table('test_case_versions'):
+        op.create_table(
+            'test_case_versions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('test_case_id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('is_snapshot', sa.Boolean(), nullable=False),
+            sa.Column('data', sa.JSON(), nullable=False),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['test_case_id'], ['test_cases.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('test_case_id', 'version', name='uk_test_case_versions_case_version')
+        )
+        op.create_index(op.f('ix_test_case_versions_id'), 'test_case_versions', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_test_case_versions_id'), table_name='test_case_versions')
+    op.drop_table('test_case_versions')
+    op.drop_column('test_cases', 'version')
@@ -0,0 +1,50 @@
+"""test case unique name
+
+Revision ID: e9b4d2f7a613
+Revises: a7d3c5e9f214
+Create Date: 2026-10-20 09:00:00.000000
+
+测试用例名称在项目内唯一，导入按(project_id, name)新增或更新用例时不会并发插入同名用例。
+建立唯一索引前先处理已有的重名用例：每组保留ID最小的用例，其余用例的名称追加" #ID"，
+测试结果等引用不受影响。降级只删除唯一索引，不恢复改名前的名称。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b4d2f7a613'
+down_revision = 'a7d3c5e9f214'
+branch_labels = None
+depends_on = None
+
+# test_cases.name的列宽
+NAME_LENGTH = 200
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    constraints = {constraint['name'] for constraint in inspector.get_unique_constraints('test_cases')}
+    if 'uk_test_cases_project_name' in constraints:
+        return
+
+    # 后缀最长为" #"加上INT的10位数字
+    op.execute(sa.text(f"""
+        UPDATE test_cases t
+        JOIN (
+            SELECT project_id, name, MIN(id) AS keep_id
+            FROM test_cases
+            GROUP BY project_id, name
+            HAVING COUNT(*) > 1
+        ) duplicates
+            ON t.project_id = duplicates.project_id
+            AND t.name = duplicates.name
+            AND t.id <> duplicates.keep_id
+        SET t.name = CONCAT(LEFT(t.name, {NAME_LENGTH - 12}), ' #', t.id)
+    """))
+    op.create_unique_constraint('uk_test_cases_project_name', 'test_cases', ['project_id', 'name'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uk_test_cases_project_name', 'test_cases', type_='unique')
@@ -0,0 +1,59 @@
+"""operation log partitions
+
+Revision ID: f1c6a8d3b527
+Revises: e9b4d2f7a613
+Create Date: 2026-10-20 10:00:00.000000
+
+把operation_logs转换为按月RANGE分区: 当前月及之后两个月各一个分区，末尾是pmax。
+转换会重建并锁住整张表，应在维护窗口执行；之后的新月份由后台维护拆分pmax创建。
+分区键created_at已由5d2e8c1a7f30加入主键。
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6a8d3b527'
+down_revision = 'e9b4d2f7a613'
+branch_labels = None
+depends_on = None
+
+# 提前创建的月数，与OperationLogPartitionManager的默认值一致
+MONTHS_AHEAD = 2
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _is_partitioned(bind) -> bool:
+    return bool(bind.execute(sa.text(
+        "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'operation_logs' "
+        "AND PARTITION_NAME IS NOT NULL"
+    )).scalar())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'mysql' or _is_partitioned(bind):
+        return
+    today = datetime.utcnow().date()
+    current = date(today.year, today.month, 1)
+    definitions = [
+        f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{_add_months(month, 1):%Y-%m-%d}'))"
+        for month in (_add_months(current, offset) for offset in range(MONTHS_AHEAD + 1))
+    ]
+    definitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    op.execute(
+        f"ALTER TABLE operation_logs PARTITION BY RANGE (TO_DAYS(created_at)) ({', '.join(definitions)})"
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql' and _is_partitioned(bind):
+        op.execute("ALTER TABLE operation_logs REMOVE PARTITIONING")
@@ -0,0 +1,29 @@
+"""test result payload refs
+
+Revision ID: f2c9b4e7a508
+Revises: d4f8a2c6e913
+Create Date: 2026-10-19 22:00:00.000000
+
+为test_results增加payload_refs，记录转存到压缩存储的output、stack_trace和test_data。
+已有的行不转存，仍按原样读取。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c9b4e7a508'
+down_revision = 'd4f8a2c6e913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('test_results')}
+    if 'payload_refs' not in columns:
+        op.add_column('test_results', sa.Column('payload_refs', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('test_results', 'payload_refs')
@@ -0,0 +1,52 @@
+"""
+API服务测试的数据库工具
+
+在内存SQLite中按模型建表，服务层的查询、保存点和批量写入都在真实的数据库上执行。
+部分表结构依赖MySQL特性，建表失败时跳过，用到这些表的测试不在这里覆盖。
+"""
+from typing import List, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import core.auth.models  # noqa: F401  API模型关联的用户模型
+from api.core.database import Base
+from api.config.constants import TestPriority, TestType
+from api.models.project import Project
+from api.models.report import TestRun
+from api.models.test_case import TestCase
+
+
+def make_session_factory() -> sessionmaker:
+    """创建绑定到新内存数据库的会话工厂，参数与SessionLocal一致"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    for table in Base.metadata.sorted_tables:
+        try:
+            table.create(engine)
+        except SQLAlchemyError:
+            pass
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+def create_project_run(db: Session, case_count: int = 3) -> Tuple[Project, List[TestCase], TestRun]:
+    """创建一个项目、若干测试用例和一个测试运行"""
+    project = Project(name="project")
+    db.add(project)
+    db.flush()
+    cases = [
+        TestCase(
+            project_id=project.id,
+            name=f"case{i}",
+            type=TestType.UNIT if i % 2 else TestType.INTEGRATION,
+            priority=TestPriority.HIGH if i % 3 == 0 else TestPriority.LOW,
+            steps=[],
+            test_data={}
+        )
+        for i in range(case_count)
+    ]
+    test_run = TestRun(name="run", project_id=project.id)
+    db.add_all(cases + [test_run])
+    db.commit()
+    return project, cases, test_run
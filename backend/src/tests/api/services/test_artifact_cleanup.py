@@ -0,0 +1,110 @@
+"""
+测试产物内容清理的单元测试
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+import api.services.artifact as artifact_service
+from api.models.report import ArtifactBlob, TestArtifact
+from api.services.artifact import release_blobs, remove_released_blobs, sweep_expired_artifacts
+from tests.api.services.database import create_project_run, make_session_factory
+
+
+class FakeStore:
+    """记录删除的内容文件"""
+
+    def __init__(self):
+        self.removed = []
+
+    def remove(self, digest):
+        self.removed.append(digest)
+        return True
+
+    def stale_uploads(self, expire):
+        return []
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeStore()
+    monkeypatch.setattr(artifact_service, "get_artifact_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def db():
+    session = make_session_factory()()
+    yield session
+    session.close()
+
+
+def add_artifacts(db, test_run, artifacts):
+    """按(名称, 内容哈希, 过期时间)添加产物，内容行的引用数为引用它的产物数"""
+    digests = {}
+    for _, digest, _ in artifacts:
+        digests[digest] = digests.get(digest, 0) + 1
+    db.add_all([ArtifactBlob(digest=digest, size=10, ref_count=count) for digest, count in digests.items()])
+    db.add_all([
+        TestArtifact(test_run_id=test_run.id, name=name, digest=digest, size=10, expires_at=expires_at)
+        for name, digest, expires_at in artifacts
+    ])
+    db.commit()
+
+
+def blob_refs(db):
+    return dict(db.execute(select(ArtifactBlob.digest, ArtifactBlob.ref_count)).all())
+
+
+def test_sweep_removes_files_after_commit(db, store):
+    """测试提交后才删除引用数降为0的内容文件，仍被引用的内容保留"""
+    _, _, test_run = create_project_run(db)
+    expired = datetime(2024, 1, 1)
+    add_artifacts(db, test_run, [
+        ("a.png", "a" * 64, expired),
+        ("b.png", "b" * 64, expired),
+        ("b-copy.png", "b" * 64, None),
+    ])
+
+    stats = sweep_expired_artifacts(db, now=expired + timedelta(days=1))
+
+    assert stats["artifacts"] == 2
+    assert stats["blobs"] == 1
+    assert store.removed == ["a" * 64]
+    assert blob_refs(db) == {"b" * 64: 1}
+
+
+def test_failed_commit_keeps_files(db, store, monkeypatch):
+    """测试提交失败回滚时内容行和文件都保留"""
+    _, _, test_run = create_project_run(db)
+    add_artifacts(db, test_run, [("a.png", "a" * 64, datetime(2024, 1, 1))])
+
+    def fail_commit():
+        raise OperationalError("COMMIT", {}, Exception("lost connection"))
+
+    monkeypatch.setattr(db, "commit", fail_commit)
+    with pytest.raises(OperationalError):
+        sweep_expired_artifacts(db, now=datetime(2024, 2, 1))
+    db.rollback()
+    monkeypatch.undo()
+
+    assert store.removed == []
+    assert blob_refs(db) == {"a" * 64: 1}
+
+
+def test_reuploaded_content_is_not_removed(db, store):
+    """测试提交后同一内容被重新上传时保留文件"""
+    _, _, test_run = create_project_run(db)
+    add_artifacts(db, test_run, [("a.png", "a" * 64, None)])
+    db.query(TestArtifact).delete()
+
+    released = release_blobs(db, {"a" * 64: 1})
+    db.commit()
+    db.add(ArtifactBlob(digest="a" * 64, size=10, ref_count=1))
+    db.commit()
+
+    assert released["digests"] == ["a" * 64]
+    assert remove_released_blobs(db, released["digests"]) == 0
+    assert store.removed == []
@@ -0,0 +1,113 @@
+"""
+测试运行详情流式输出的单元测试
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.config.constants import TestStatus
+from api.core.exceptions import ValidationError
+from api.models.report import TestResult
+from api.services.report import DETAIL_FIELDS, iter_details_json, iter_run_details, parse_detail_fields
+from tests.api.services.database import create_project_run, make_session_factory
+
+
+@pytest.fixture
+def session_factory():
+    return make_session_factory()
+
+
+@pytest.fixture
+def run_results(session_factory):
+    """一个运行的11条结果，部分结果的started_at相同，另一个运行的结果不应出现在详情中"""
+    db = session_factory()
+    _, cases, test_run = create_project_run(db)
+    _, _, other_run = create_project_run(db)
+    start = datetime(2024, 1, 1)
+    results = [
+        TestResult(
+            test_run_id=test_run.id,
+            test_case_id=cases[i % 3].id,
+            status=TestStatus.FAILED if i % 4 == 0 else TestStatus.PASSED,
+            started_at=start + timedelta(seconds=i // 3),
+            duration=i,
+            output=f"output {i}"
+        )
+        for i in range(11)
+    ]
+    db.add_all(results + [TestResult(test_run_id=other_run.id, test_case_id=cases[0].id, status=TestStatus.PASSED)])
+    db.commit()
+    ids = [result.id for result in sorted(results, key=lambda result: (result.started_at, result.id), reverse=True)]
+    db.close()
+    return test_run.id, ids
+
+
+class CountingFactory:
+    """记录打开的会话数"""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self.session_factory()
+
+
+def test_parse_detail_fields():
+    """测试字段按DETAIL_FIELDS的顺序返回，为空时返回全部字段，不支持的字段抛出ValidationError"""
+    assert parse_detail_fields(None) == DETAIL_FIELDS
+    assert parse_detail_fields("") == DETAIL_FIELDS
+    assert parse_detail_fields(" duration, status ,,") == ["status", "duration"]
+    with pytest.raises(ValidationError):
+        parse_detail_fields("status,password")
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 4, 11, 20])
+def test_iter_run_details_spans_batches(session_factory, run_results, batch_size):
+    """测试跨批次按(started_at, id)倒序输出，不重复不遗漏，每批使用一个新会话，多读一行判断是否还有下一批"""
+    test_run_id, ids = run_results
+    factory = CountingFactory(session_factory)
+
+    details = list(iter_run_details(test_run_id, session_factory=factory, batch_size=batch_size))
+
+    assert [detail["id"] for detail in details] == ids
+    assert factory.opened == -(-len(ids) // batch_size)
+
+
+def test_iter_run_details_projects_fields_and_filters_status(session_factory, run_results):
+    """测试只返回所选字段，started_at未选择时也不出现在结果中"""
+    test_run_id, ids = run_results
+    fields = parse_detail_fields("test_case,duration")
+
+    details = list(iter_run_details(
+        test_run_id, TestStatus.FAILED, fields, session_factory=session_factory, batch_size=2
+    ))
+
+    assert [detail["duration"] for detail in details] == [8, 4, 0]
+    assert all(set(detail) == {"id", "test_case", "duration"} for detail in details)
+    assert set(details[0]["test_case"]) == {"id", "name", "type", "priority"}
+    assert details[0]["test_case"]["name"] == "case2"
+
+
+def test_iter_details_json_is_well_formed(session_factory, run_results):
+    """测试逐批输出的字节拼接后是合法的JSON"""
+    test_run_id, ids = run_results
+    details = iter_run_details(test_run_id, session_factory=session_factory, batch_size=4)
+
+    chunks = list(iter_details_json({"id": test_run_id, "name": "运行"}, details, batch_size=3))
+    document = json.loads(b"".join(chunks))
+
+    assert len(chunks) == 2 + 4 + 1
+    assert document["summary"] == {"id": test_run_id, "name": "运行"}
+    assert [result["id"] for result in document["results"]] == ids
+    assert document["results"][-1]["started_at"] == "2024-01-01T00:00:00"
+    assert document["results"][-1]["output"] == "output 0"
+
+
+def test_iter_details_json_without_results():
+    """测试没有结果时输出空列表"""
+    document = json.loads(b"".join(iter_details_json({"id": 1}, iter([]))))
+
+    assert document == {"summary": {"id": 1}, "results": []}
@@ -0,0 +1,187 @@
+"""
+测试结果流式写入的单元测试
+"""
+import asyncio
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+import api.services.test as test_service
+from api.config.constants import TestStatus
+from api.models.report import TestResult
+from api.services.result_stream import ResultStreamIngestor, iter_ndjson_lines
+from api.services.test import TestService
+from api.v1.tests.schemas import TestResultBatchItem
+from tests.api.services.database import create_project_run, make_session_factory
+
+
+async def as_chunks(*chunks):
+    """把字节块包装为异步迭代器"""
+    for chunk in chunks:
+        yield chunk
+
+
+def split_lines(*chunks, max_line_bytes=1024):
+    """收集iter_ndjson_lines的输出"""
+    async def collect():
+        return [line async for line in iter_ndjson_lines(as_chunks(*chunks), max_line_bytes)]
+    return asyncio.run(collect())
+
+
+def validate(payload):
+    """测试用的校验函数，要求test_case_id为整数"""
+    if not isinstance(payload.get("test_case_id"), int):
+        raise ValueError("test_case_id must be an integer")
+    return {"test_case_id": payload["test_case_id"], "status": TestStatus(payload.get("status", "passed"))}
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """替换数据库写入，记录每个微批次；test_case_id为0的行写入失败"""
+    batches = []
+
+    def write_results(db, test_run, items):
+        batches.append([index for index, _ in items])
+        inserted = Counter(item["status"] for _, item in items if item["test_case_id"])
+        errors = [
+            {"index": index, "test_case_id": 0, "error": "Test case 0 not found"}
+            for index, item in items if not item["test_case_id"]
+        ]
+        return inserted, errors
+
+    monkeypatch.setattr(TestService, "_write_results", staticmethod(write_results))
+    return batches
+
+
+def ingest(body_chunks, **kwargs):
+    ingestor = ResultStreamIngestor(None, SimpleNamespace(id=1), validate, **kwargs)
+    return asyncio.run(ingestor.consume(as_chunks(*body_chunks)))
+
+
+class TestIterNdjsonLines:
+    """NDJSON行拆分测试类"""
+
+    def test_lines_split_across_chunks(self):
+        """测试跨块的行被拼接，空行跳过但计入行号，最后一行可以没有换行符"""
+        lines = split_lines(b'{"a":', b'1}\n\n{"b"', b':2}\r\n', b'{"c":3}')
+
+        assert lines == [(1, b'{"a":1}'), (3, b'{"b":2}\r'), (4, b'{"c":3}')]
+
+    def test_oversized_lines_are_reported_as_none(self):
+        """测试超长的行以None返回，不影响后续行"""
+        lines = split_lines(b"x" * 6, b"x" * 6 + b"\nok\n", b"y" * 20, max_line_bytes=10)
+
+        assert lines == [(1, None), (2, b"ok"), (3, None)]
+
+
+class TestResultStreamIngestor:
+    """测试结果流式写入器测试类"""
+
+    def test_micro_batches(self, written):
+        """测试按batch_size分批写入，剩余的行在流结束时写入"""
+        body = b"".join(json.dumps({"test_case_id": i + 1}).encode() + b"\n" for i in range(7))
+
+        summary = ingest([body[:50], body[50:]], batch_size=3)
+
+        assert written == [[1, 2, 3], [4, 5, 6], [7]]
+        assert summary["lines"] == 7
+        assert summary["accepted"] == 7
+        assert summary["batches"] == 3
+        assert summary["rejected"] == 0
+
+    def test_malformed_lines_are_rejected_with_line_numbers(self, written):
+        """测试无效JSON、非对象、校验失败和写入失败的行按行号报告"""
+        body = b'{"test_case_id": 1}\nnot json\n[1, 2]\n{"test_case_id": "x"}\n{"test_case_id": 0}\n'
+
+        summary = ingest([body])
+
+        assert written == [[1, 5]]
+        assert summary["accepted"] == 1
+        assert summary["rejected"] == 4
+        assert [error["line"] for error in summary["errors"]] == [2, 3, 4, 5]
+        assert summary["errors"][0]["error"].startswith("Invalid JSON")
+        assert summary["errors"][3]["test_case_id"] == 0
+
+    def test_error_details_are_capped(self, written):
+        """测试错误明细只保留前max_errors条，其余只计数"""
+        body = b"bad\n" * 250
+
+        summary = ingest([body], max_errors=100)
+
+        assert summary["rejected"] == 250
+        assert len(summary["errors"]) == 100
+        assert summary["errors"][-1]["line"] == 100
+        assert written == []
+
+    def test_failed_batch_is_reported_per_line(self, monkeypatch):
+        """测试整批写入失败时本批每行都记为失败，前后批次照常写入并返回摘要"""
+        batches = []
+
+        def write_results(db, test_run, items):
+            batches.append([index for index, _ in items])
+            if len(batches) == 2:
+                raise OperationalError("INSERT", {}, Exception("lost connection"))
+            return Counter({TestStatus.PASSED: len(items)}), []
+
+        monkeypatch.setattr(TestService, "_write_results", staticmethod(write_results))
+        body = b"".join(json.dumps({"test_case_id": i + 1}).encode() + b"\n" for i in range(5))
+        ingestor = ResultStreamIngestor(SimpleNamespace(rollback=lambda: None), SimpleNamespace(id=1), validate, batch_size=2)
+
+        summary = asyncio.run(ingestor.consume(as_chunks(body)))
+
+        assert batches == [[1, 2], [3, 4], [5]]
+        assert summary["accepted"] == 3
+        assert summary["batches"] == 2
+        assert [(error["line"], error["test_case_id"]) for error in summary["errors"]] == [(3, 3), (4, 4)]
+        assert summary["errors"][0]["error"].startswith("Batch write failed")
+
+
+class TestStreamTimestamps:
+    """流式写入的时间字段测试类，使用真实的校验模型和数据库"""
+
+    @pytest.fixture
+    def db(self, monkeypatch):
+        monkeypatch.setattr(test_service, "publish_run_progress", lambda *args, **kwargs: None)
+        monkeypatch.setattr(test_service, "invalidate_counts", lambda *args, **kwargs: None)
+        session = make_session_factory()()
+        yield session
+        session.close()
+
+    def test_zoned_timestamps_are_written_or_rejected_per_line(self, db):
+        """测试带时区的时间转换为UTC写入，无法解析或无法计算耗时的行按行号拒绝"""
+        _, cases, test_run = create_project_run(db)
+        lines = [
+            {"test_case_id": cases[0].id, "status": "passed", "started_at": "2024-01-01T00:00:00Z"},
+            {"test_case_id": cases[1].id, "status": "failed", "started_at": "yesterday"},
+            {
+                "test_case_id": cases[2].id, "status": "passed",
+                "started_at": "2024-01-01T08:00:00+08:00", "completed_at": "2024-01-01T08:00:05+08:00"
+            },
+            {"test_case_id": cases[0].id, "status": "passed", "raw": True},
+        ]
+        body = b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+
+        def validate_unnormalized(payload):
+            """带raw标记的行在校验后换成带时区的开始时间，模拟未规范化时间的调用方"""
+            item = TestResultBatchItem.model_validate(payload).model_dump()
+            if payload.get("raw"):
+                item["started_at"] = datetime(2024, 1, 1, tzinfo=timezone.utc)
+            return item
+
+        ingestor = ResultStreamIngestor(db, test_run, validate_unnormalized, batch_size=2)
+
+        summary = asyncio.run(ingestor.consume(as_chunks(body)))
+
+        assert summary["accepted"] == 2
+        assert [error["line"] for error in summary["errors"]] == [2, 4]
+        assert summary["errors"][1]["error"].startswith("Invalid result")
+        stored = db.execute(
+            select(TestResult.started_at, TestResult.duration).order_by(TestResult.id)
+        ).all()
+        assert stored[0].started_at == datetime(2024, 1, 1)
+        assert tuple(stored[1]) == (datetime(2024, 1, 1), 5)
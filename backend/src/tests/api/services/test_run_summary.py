@@ -0,0 +1,217 @@
+"""
+测试运行摘要的单元测试
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, select, update
+
+import api.services.run_summary as run_summary
+from api.config.constants import TestStatus
+from api.core.exceptions import NotFoundError
+from api.models.report import TestRun, TestResult
+from api.services.run_summary import (
+    SUMMARY_VERSION, complete_test_run, get_run_summary, invalidate_completed_summary, invalidate_run_summary,
+    percentile_rank, summary_cache_key
+)
+from tests.api.services.database import create_project_run, make_session_factory
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """用字典代替Redis缓存，不发布进度"""
+    store = {}
+    monkeypatch.setattr(run_summary, "redis_get_json", store.get)
+    monkeypatch.setattr(run_summary, "redis_set_json", lambda key, value, ex=None: store.__setitem__(key, value))
+    monkeypatch.setattr(run_summary, "redis_delete", lambda key: store.pop(key, None))
+    monkeypatch.setattr(run_summary, "publish_run_progress", lambda *args, **kwargs: None)
+    monkeypatch.setattr(run_summary, "discard_run_progress", lambda *args, **kwargs: None)
+    return store
+
+
+@pytest.fixture
+def db(cache):
+    session = make_session_factory()()
+    yield session
+    session.close()
+
+
+def add_results(db, test_run, cases, outcomes):
+    """按(用例序号, 状态, 耗时)写入结果，不累加运行计数"""
+    db.add_all([
+        TestResult(test_run_id=test_run.id, test_case_id=cases[index].id, status=status, duration=duration)
+        for index, status, duration in outcomes
+    ])
+    db.commit()
+
+
+def test_percentile_rank():
+    """测试最近秩分位数的秩"""
+    assert percentile_rank(1, 99) == 1
+    assert percentile_rank(10, 50) == 5
+    assert percentile_rank(10, 90) == 9
+    assert percentile_rank(10, 95) == 10
+    assert percentile_rank(200, 99) == 198
+
+
+def test_complete_run_builds_summary_in_sql(db, cache):
+    """测试耗时分位数和分布由聚合查询计算，不读取全部耗时"""
+    _, cases, test_run = create_project_run(db)
+    add_results(db, test_run, cases, [
+        (i % 3, TestStatus.FAILED if i == 4 else TestStatus.PASSED, None if i == 0 else i * 10)
+        for i in range(11)
+    ])
+    duration_reads = []
+
+    def record_duration_reads(conn, cursor, sql, *args):
+        if sql.startswith("SELECT test_results.duration \nFROM"):
+            duration_reads.append(sql)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record_duration_reads)
+
+    summary = complete_test_run(db, test_run.id, completed_at=datetime(2024, 1, 1))
+
+    assert summary["version"] == SUMMARY_VERSION
+    assert summary["completed_at"] == "2024-01-01T00:00:00"
+    assert summary["statistics"] == {
+        "total": 11, "passed": 10, "failed": 1, "error": 0, "skipped": 0, "success_rate": 90.91
+    }
+    assert summary["durations"] == {
+        "count": 10, "total": 550, "mean": 55.0, "p50": 50, "p90": 90, "p95": 100, "p99": 100, "max": 100
+    }
+    assert len(duration_reads) == 4
+    assert all("LIMIT" in sql for sql in duration_reads)
+    assert [case["duration"] for case in summary["slowest"][:3]] == [100, 90, 80]
+    assert summary["by_type"]["integration"]["total"] == 7
+    assert summary["by_type"]["unit"]["failed"] == 1
+    assert summary["by_priority"]["high"]["total"] == 4
+    assert cache[summary_cache_key(test_run.id)] == summary
+
+
+def test_complete_run_without_durations(db):
+    """测试没有耗时的运行分位数为None"""
+    _, cases, test_run = create_project_run(db)
+    add_results(db, test_run, cases, [(0, TestStatus.SKIPPED, None)])
+
+    durations = complete_test_run(db, test_run.id)["durations"]
+
+    assert durations == {
+        "count": 0, "total": 0, "mean": None, "p50": None, "p90": None, "p95": None, "p99": None, "max": None
+    }
+
+
+def test_complete_run_repairs_drifted_counters(db, monkeypatch):
+    """测试完成时按实际结果数修正计数并丢弃进度状态"""
+    discarded = []
+    monkeypatch.setattr(run_summary, "discard_run_progress", discarded.extend)
+    _, cases, test_run = create_project_run(db)
+    add_results(db, test_run, cases, [(0, TestStatus.PASSED, 1), (1, TestStatus.ERROR, 2)])
+    db.execute(update(TestRun).where(TestRun.id == test_run.id).values(total_cases=5, passed_cases=5))
+    db.commit()
+
+    complete_test_run(db, test_run.id)
+
+    stored = db.execute(
+        select(TestRun.total_cases, TestRun.passed_cases, TestRun.error_cases).where(TestRun.id == test_run.id)
+    ).one()
+    assert tuple(stored) == (2, 1, 1)
+    assert discarded == [test_run.id]
+    with pytest.raises(NotFoundError):
+        complete_test_run(db, 404)
+
+
+def test_get_run_summary_reads_cache_then_column(db, cache):
+    """测试先读缓存，未命中时读取summary列并重新缓存，都没有时重新生成"""
+    _, cases, test_run = create_project_run(db)
+    add_results(db, test_run, cases, [(0, TestStatus.PASSED, 3)])
+    key = summary_cache_key(test_run.id)
+
+    assert get_run_summary(db, test_run.id) is None
+    summary = complete_test_run(db, test_run.id)
+
+    cache[key] = {"version": SUMMARY_VERSION, "cached": True}
+    assert get_run_summary(db, test_run.id) == {"version": SUMMARY_VERSION, "cached": True}
+
+    cache.clear()
+    assert get_run_summary(db, test_run.id) == summary
+    assert cache[key] == summary
+
+    invalidate_run_summary(db, test_run.id)
+    assert key not in cache
+    assert db.scalar(select(TestRun.summary).where(TestRun.id == test_run.id)) is None
+
+    add_results(db, test_run, cases, [(1, TestStatus.FAILED, 4)])
+    regenerated = get_run_summary(db, test_run.id)
+    assert regenerated["statistics"]["total"] == 2
+    assert regenerated["generated_at"] != summary["generated_at"]
+    assert cache[key] == regenerated
+
+    with pytest.raises(NotFoundError):
+        get_run_summary(db, 404)
+
+
+def test_get_run_summary_regenerates_without_completing(db, cache, monkeypatch):
+    """测试读取时重新生成摘要不修正计数、不丢弃也不发布进度"""
+    published = []
+    monkeypatch.setattr(run_summary, "publish_run_progress", lambda *args, **kwargs: published.append(args))
+    monkeypatch.setattr(run_summary, "discard_run_progress", lambda *args, **kwargs: published.append(args))
+    _, cases, test_run = create_project_run(db)
+    add_results(db, test_run, cases, [(0, TestStatus.PASSED, 1)])
+    complete_test_run(db, test_run.id)
+    published.clear()
+    invalidate_run_summary(db, test_run.id)
+    db.execute(update(TestRun).where(TestRun.id == test_run.id).values(total_cases=5, passed_cases=5))
+    db.commit()
+
+    summary = get_run_summary(db, test_run.id)
+
+    assert summary["statistics"]["total"] == 1
+    stored = db.execute(
+        select(TestRun.total_cases, TestRun.passed_cases, TestRun.summary).where(TestRun.id == test_run.id)
+    ).one()
+    assert tuple(stored) == (5, 5, summary)
+    assert published == []
+
+
+def test_regeneration_skips_store_when_results_arrive(db, cache, monkeypatch):
+    """测试生成期间有新结果写入计数时不保存也不缓存摘要"""
+    _, cases, test_run = create_project_run(db)
+    add_results(db, test_run, cases, [(0, TestStatus.PASSED, 1)])
+    complete_test_run(db, test_run.id)
+    invalidate_run_summary(db, test_run.id)
+    build = run_summary.build_run_summary
+
+    def build_then_write(db, test_run):
+        summary = build(db, test_run)
+        db.execute(
+            update(TestRun)
+            .where(TestRun.id == test_run.id)
+            .values(total_cases=TestRun.total_cases + 1)
+            .execution_options(synchronize_session=False)
+        )
+        return summary
+
+    monkeypatch.setattr(run_summary, "build_run_summary", build_then_write)
+
+    summary = get_run_summary(db, test_run.id)
+
+    assert summary["statistics"]["total"] == 1
+    assert db.scalar(select(TestRun.summary).where(TestRun.id == test_run.id)) is None
+    assert summary_cache_key(test_run.id) not in cache
+
+
+def test_invalidate_completed_summary_rereads_completion(db, cache):
+    """测试结果提交后按最新的完成时间清除摘要，写入方先前读取的运行对象未完成也会清除"""
+    _, cases, test_run = create_project_run(db)
+    key = summary_cache_key(test_run.id)
+    assert invalidate_completed_summary(db, test_run.id) is False
+
+    stale = db.get(TestRun, test_run.id)
+    assert stale.completed_at is None
+    add_results(db, test_run, cases, [(0, TestStatus.PASSED, 1)])
+    complete_test_run(db, test_run.id)
+    assert key in cache
+
+    assert invalidate_completed_summary(db, test_run.id) is True
+    assert key not in cache
+    assert db.scalar(select(TestRun.summary).where(TestRun.id == test_run.id)) is None
@@ -0,0 +1,78 @@
+"""
+测试用例导入写入的单元测试
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+import api.services.test as test_service
+from api.config.constants import TestPriority, TestType
+from api.core.exceptions import BusinessError
+from api.models.project import Project
+from api.models.test_case import TestCase
+from api.services.test import TestService
+from tests.api.services.database import make_session_factory
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """创建内存数据库会话，不访问缓存"""
+    monkeypatch.setattr(test_service, "invalidate_counts", lambda *args, **kwargs: None)
+    session = make_session_factory()()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def project(db):
+    project = Project(name="project")
+    db.add(project)
+    db.commit()
+    return project
+
+
+def case(name, **fields):
+    return {"name": name, "type": TestType.UNIT, "priority": TestPriority.LOW, "steps": [], "test_data": {}, **fields}
+
+
+def project_cases(db, project_id):
+    return db.execute(
+        select(TestCase.name, TestCase.priority).where(TestCase.project_id == project_id).order_by(TestCase.name)
+    ).all()
+
+
+def test_upsert_locks_project_and_updates_by_name(db, project):
+    """测试先锁住项目行，已存在的用例按名称更新，其余新增"""
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+
+    assert TestService.upsert_test_cases(db, project.id, None, [case("a"), case("b")]) == (2, 0)
+    assert TestService.upsert_test_cases(
+        db, project.id, None, [case("b", priority=TestPriority.HIGH), case("c")]
+    ) == (1, 1)
+
+    assert statements[0].startswith("SELECT projects.id")
+    assert [tuple(row) for row in project_cases(db, project.id)] == [
+        ("a", TestPriority.LOW), ("b", TestPriority.HIGH), ("c", TestPriority.LOW)
+    ]
+
+
+def test_case_names_are_unique_per_project(db, project):
+    """测试项目内的用例名称唯一，不同项目可以同名"""
+    other = Project(name="other")
+    db.add(other)
+    db.commit()
+    TestService.upsert_test_cases(db, project.id, None, [case("a")])
+    TestService.upsert_test_cases(db, other.id, None, [case("a")])
+
+    with pytest.raises(IntegrityError):
+        db.execute(insert(TestCase), [{**case("a"), "project_id": project.id}])
+    db.rollback()
+    with pytest.raises(BusinessError):
+        asyncio.run(TestService.create_test_case(
+            db, project.id, "a", None, TestType.UNIT, TestPriority.LOW, [], {}, None, None
+        ))
+
+    assert db.scalar(select(func.count()).select_from(TestCase)) == 2
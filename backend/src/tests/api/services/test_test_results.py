@@ -0,0 +1,237 @@
+"""
+测试结果批量写入的单元测试
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import sessionmaker
+
+import api.services.test as test_service
+from api.config.constants import TestStatus
+from api.core.exceptions import NotFoundError
+from api.models.report import TestRun, TestResult
+from api.services.test import TestService
+from api.v1.tests.schemas import TestResultBatchCreate
+from tests.api.services.database import create_project_run, make_session_factory
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """创建内存数据库会话，不发布进度、不访问缓存"""
+    monkeypatch.setattr(test_service, "publish_run_progress", lambda *args, **kwargs: None)
+    monkeypatch.setattr(test_service, "invalidate_counts", lambda *args, **kwargs: None)
+    session = make_session_factory()()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(db):
+    """记录执行的SQL语句"""
+    executed = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, sql, *args: executed.append(sql))
+    return executed
+
+
+def run_counters(db, test_run_id):
+    """读取测试运行的计数"""
+    return db.execute(
+        select(TestRun.total_cases, TestRun.passed_cases, TestRun.failed_cases, TestRun.error_cases, TestRun.skipped_cases)
+        .where(TestRun.id == test_run_id)
+    ).one()
+
+
+def write_batch(db, test_run_id, results):
+    return asyncio.run(TestService.create_test_results_batch(db, test_run_id, results))
+
+
+def test_batch_writes_valid_rows_and_reports_unknown_cases(db):
+    """测试不属于项目的用例按序号报告，其余结果写入并一次累加计数"""
+    _, cases, test_run = create_project_run(db)
+    results = [
+        {"test_case_id": cases[0].id, "status": "passed"},
+        {"test_case_id": 9999, "status": "passed"},
+        {"test_case_id": cases[1].id, "status": "failed", "error_message": "boom"},
+        {"test_case_id": cases[2].id, "status": "skipped"},
+    ]
+
+    outcome = write_batch(db, test_run.id, results)
+
+    assert outcome["accepted"] == 3
+    assert outcome["rejected"] == 1
+    assert outcome["errors"][0]["index"] == 1
+    assert outcome["errors"][0]["test_case_id"] == 9999
+    assert db.scalar(select(func.count()).select_from(TestResult)) == 3
+    assert tuple(run_counters(db, test_run.id)) == (3, 1, 1, 0, 1)
+
+
+def test_batch_inserts_in_chunks_with_one_counter_update(db, statements, monkeypatch):
+    """测试按块执行多行INSERT，整批只累加一次计数"""
+    monkeypatch.setattr(test_service, "RESULT_INSERT_CHUNK_SIZE", 4)
+    _, cases, test_run = create_project_run(db)
+    results = [{"test_case_id": cases[i % 3].id, "status": "passed"} for i in range(10)]
+    statements.clear()
+
+    outcome = write_batch(db, test_run.id, results)
+
+    inserts = [sql for sql in statements if sql.startswith("INSERT INTO test_results")]
+    counter_updates = [sql for sql in statements if sql.startswith("UPDATE test_runs")]
+    writes = [sql for sql in statements if sql.startswith(("INSERT", "UPDATE"))]
+    assert outcome["accepted"] == 10
+    assert len(inserts) == 3
+    assert len(counter_updates) == 1
+    # 与单条写入相同，签名和不稳定度之后才锁住测试运行行
+    assert writes[-1].startswith("UPDATE test_runs")
+    assert tuple(run_counters(db, test_run.id)) == (10, 10, 0, 0, 0)
+
+
+def test_failed_chunk_falls_back_to_single_rows(db, monkeypatch):
+    """测试整块写入失败时回滚到保存点逐行写入，只有出错的行被拒绝"""
+    offload_payloads = test_service.offload_payloads
+
+    def corrupt_rows(rows):
+        offload_payloads(rows)
+        for row in rows:
+            if row["output"] == "invalid":
+                row["status"] = None  # 违反NOT NULL约束
+
+    monkeypatch.setattr(test_service, "offload_payloads", corrupt_rows)
+    _, cases, test_run = create_project_run(db)
+    results = [{"test_case_id": cases[0].id, "status": "passed"} for _ in range(5)]
+    results[3]["output"] = "invalid"
+
+    outcome = write_batch(db, test_run.id, results)
+
+    assert outcome["accepted"] == 4
+    assert [error["index"] for error in outcome["errors"]] == [3]
+    assert db.scalar(select(func.count()).select_from(TestResult)) == 4
+    assert tuple(run_counters(db, test_run.id)) == (4, 4, 0, 0, 0)
+
+
+def test_batch_converts_zoned_timestamps_to_utc(db):
+    """测试RFC 3339带时区的时间转换为UTC，只有一个时间时与当前时间相减也不出错"""
+    _, cases, test_run = create_project_run(db)
+    batch = TestResultBatchCreate.model_validate({"results": [
+        {"test_case_id": cases[0].id, "status": "passed", "started_at": "2024-01-01T00:00:00Z"},
+        {
+            "test_case_id": cases[1].id, "status": "passed",
+            "started_at": "2024-01-01T08:00:00+08:00", "completed_at": "2024-01-01T08:00:30+08:00"
+        },
+    ]})
+
+    outcome = write_batch(db, test_run.id, [item.model_dump() for item in batch.results])
+
+    assert outcome["accepted"] == 2
+    stored = db.execute(
+        select(TestResult.started_at, TestResult.completed_at, TestResult.duration).order_by(TestResult.id)
+    ).all()
+    assert stored[0].started_at == datetime(2024, 1, 1)
+    assert stored[0].completed_at > datetime(2024, 1, 1)
+    assert tuple(stored[1]) == (datetime(2024, 1, 1), datetime(2024, 1, 1, 0, 0, 30), 30)
+
+
+def test_unbuildable_rows_are_rejected_individually(db):
+    """测试未经校验的带时区时间无法与当前时间相减时只拒绝这一行"""
+    _, cases, test_run = create_project_run(db)
+    results = [
+        {"test_case_id": cases[0].id, "status": "passed", "started_at": datetime(2024, 1, 1, tzinfo=timezone.utc)},
+        {"test_case_id": cases[1].id, "status": "passed"},
+    ]
+
+    outcome = write_batch(db, test_run.id, results)
+
+    assert outcome["accepted"] == 1
+    assert outcome["errors"][0]["index"] == 0
+    assert outcome["errors"][0]["error"].startswith("Invalid result")
+    assert tuple(run_counters(db, test_run.id)) == (1, 1, 0, 0, 0)
+
+
+def test_batch_for_missing_run(db):
+    """测试测试运行不存在时抛出NotFoundError"""
+    with pytest.raises(NotFoundError):
+        write_batch(db, 404, [{"test_case_id": 1, "status": TestStatus.PASSED}])
+
+
+def test_create_result_updates_counters_last(db, statements):
+    """测试单条写入先读取运行，计数累加是提交前的最后一条语句"""
+    _, cases, test_run = create_project_run(db)
+    statements.clear()
+
+    result = asyncio.run(TestService.create_test_result(db, test_run.id, cases[0].id, TestStatus.FAILED))
+
+    writes = [sql for sql in statements if sql.startswith(("INSERT", "UPDATE"))]
+    assert statements[0].startswith("SELECT")
+    assert writes[-1].startswith("UPDATE test_runs")
+    assert result.status == TestStatus.FAILED
+    assert tuple(run_counters(db, test_run.id)) == (1, 0, 1, 0, 0)
+    with pytest.raises(NotFoundError):
+        asyncio.run(TestService.create_test_result(db, 404, cases[0].id, TestStatus.PASSED))
+
+
+def test_increment_run_counters_is_atomic(db):
+    """测试计数用col = col + n累加，两个会话基于过期数据累加时不会丢失更新"""
+    _, _, test_run = create_project_run(db)
+    other = sessionmaker(bind=db.get_bind())()
+    other.get(TestRun, test_run.id)  # 第二个会话先读取累加前的计数
+
+    assert TestService._increment_run_counters(db, test_run.id, {TestStatus.PASSED: 2}) == 1
+    db.commit()
+    assert TestService._increment_run_counters(other, test_run.id, {TestStatus.FAILED: 1, TestStatus.PASSED: 1}) == 1
+    other.commit()
+    other.close()
+
+    assert tuple(run_counters(db, test_run.id)) == (4, 3, 1, 0, 0)
+    assert TestService._increment_run_counters(db, 404, {TestStatus.PASSED: 1}) == 0
+
+
+def test_reconcile_repairs_drifted_counters(db, monkeypatch):
+    """测试按GROUP BY重新统计后只修复存在偏差的运行"""
+    discarded = []
+    monkeypatch.setattr(test_service, "discard_run_progress", discarded.extend)
+    project, cases, test_run = create_project_run(db)
+    healthy = TestRun(name="healthy", project_id=project.id)
+    db.add(healthy)
+    db.commit()
+    write_batch(db, test_run.id, [
+        {"test_case_id": cases[0].id, "status": "passed"},
+        {"test_case_id": cases[1].id, "status": "failed"},
+        {"test_case_id": cases[2].id, "status": "error"},
+    ])
+    write_batch(db, healthy.id, [{"test_case_id": cases[0].id, "status": "skipped"}])
+    db.execute(
+        update(TestRun).where(TestRun.id == test_run.id).values(total_cases=10, passed_cases=7, error_cases=0)
+    )
+    db.commit()
+
+    repaired = TestService.reconcile_run_counters(db, batch_size=1)
+
+    assert [run["test_run_id"] for run in repaired] == [test_run.id]
+    assert repaired[0]["stored"]["total_cases"] == 10
+    assert repaired[0]["actual"] == {
+        "total_cases": 3, "passed_cases": 1, "failed_cases": 1, "error_cases": 1, "skipped_cases": 0
+    }
+    assert tuple(run_counters(db, test_run.id)) == (3, 1, 1, 1, 0)
+    assert tuple(run_counters(db, healthy.id)) == (1, 0, 0, 0, 1)
+    assert discarded == [test_run.id]
+    assert TestService.reconcile_run_counters(db) == []
+
+
+def test_batch_writes_outside_event_loop_thread(db, monkeypatch):
+    """测试批量写入在线程池中执行，不阻塞事件循环"""
+    write_results = TestService._write_results
+    threads = []
+
+    def record_thread(*args):
+        threads.append(threading.get_ident())
+        return write_results(*args)
+
+    monkeypatch.setattr(TestService, "_write_results", staticmethod(record_thread))
+    _, cases, test_run = create_project_run(db)
+
+    outcome = write_batch(db, test_run.id, [{"test_case_id": cases[0].id, "status": "passed"}])
+
+    assert outcome["accepted"] == 1
+    assert threads and threads[0] != threading.get_ident()
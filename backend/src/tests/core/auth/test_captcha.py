@@ -2,164 +2,168 @@
 验证码功能的单元测试
 """
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock
 import base64
 import io
 from PIL import Image
-import re
 
-from core.auth.captcha import CaptchaManager
+from core.auth.captcha import (
+    CaptchaManager,
+    CaptchaStore,
+    DistortedCaptchaRenderer,
+    SimpleCaptchaRenderer,
+)
 
 pytestmark = pytest.mark.asyncio
 
 
 @pytest.fixture
-def mock_cache_manager():
-    """创建模拟的缓存管理器"""
-    mock = AsyncMock()
-    mock.set.return_value = True
-    mock.get.return_value = "1234"
-    mock.exists.return_value = True
-    mock.delete.return_value = 1
-    mock.keys.return_value = ["captcha:1", "captcha:2"]
+def mock_store():
+    """创建模拟的验证码存储"""
+    mock = MagicMock(spec=CaptchaStore)
+    mock.save.return_value = True
+    mock.pop.return_value = "1234"
+    mock.clear_expired.return_value = 3
     return mock
 
 
+def decode_image(image_data: str) -> Image.Image:
+    """解码base64图片数据"""
+    assert image_data.startswith("data:image/png;base64,")
+    image_bytes = base64.b64decode(image_data.split(",")[1])
+    return Image.open(io.BytesIO(image_bytes))
+
+
+class TestCaptchaRenderer:
+    """验证码渲染器测试类"""
+
+    @pytest.mark.parametrize("renderer_cls", [DistortedCaptchaRenderer, SimpleCaptchaRenderer])
+    async def test_render_png(self, renderer_cls):
+        """测试渲染器输出指定尺寸的PNG图片"""
+        renderer = renderer_cls(width=120, height=50)
+
+        image = Image.open(io.BytesIO(renderer.render("AB34")))
+
+        assert image.format == "PNG"
+        assert image.size == (120, 50)
+
+
 class TestCaptchaManager:
     """验证码管理器测试类"""
-    
-    async def test_generate_captcha(self, mock_cache_manager):
+
+    async def test_generate_captcha(self, mock_store):
         """测试生成验证码"""
-        # 创建验证码管理器
-        captcha_manager = CaptchaManager(mock_cache_manager)
-        
-        # 生成验证码
-        captcha_result = await captcha_manager.generate_captcha(captcha_id="test_id")
-        
+        captcha_manager = CaptchaManager(mock_store)
+
+        captcha_result = await captcha_manager.generate_captcha()
+
         # 验证结果
         assert "captcha_id" in captcha_result
         assert "captcha_image" in captcha_result
-        assert "expire_in" in captcha_result
-        assert captcha_result["captcha_id"] == "test_id"
         assert captcha_result["expire_in"] == 300  # 默认过期时间
-        
-        # 验证缓存操作
-        mock_cache_manager.set.assert_called_once()
-        
-        # 验证图像格式
-        image_data = captcha_result["captcha_image"]
-        assert image_data.startswith("data:image/png;base64,")
-        
-        # 验证Base64解码
-        try:
-            image_base64 = image_data.split(",")[1]
-            image_bytes = base64.b64decode(image_base64)
-            image = Image.open(io.BytesIO(image_bytes))
-            assert image.format == "PNG"
-        except Exception as e:
-            pytest.fail(f"无法解码图像: {str(e)}")
-    
-    async def test_verify_captcha_success(self, mock_cache_manager):
+        assert decode_image(captcha_result["captcha_image"]).format == "PNG"
+
+        # 验证存储操作
+        mock_store.save.assert_called_once()
+        captcha_id, text, expire = mock_store.save.call_args[0]
+        assert captcha_id == captcha_result["captcha_id"]
+        assert len(text) == 4 and text == text.upper()
+        assert expire == 300
+
+    async def test_generate_captcha_sync_uses_renderer(self, mock_store):
+        """测试同步生成验证码使用指定的渲染器"""
+        renderer = MagicMock()
+        renderer.render.return_value = b"png-bytes"
+        captcha_manager = CaptchaManager(mock_store, renderer=renderer, text_length=6)
+
+        captcha_result = captcha_manager.generate_captcha_sync()
+
+        renderer.render.assert_called_once()
+        assert len(renderer.render.call_args[0][0]) == 6
+        assert captcha_result["captcha_image"] == (
+            "data:image/png;base64," + base64.b64encode(b"png-bytes").decode()
+        )
+
+    async def test_generate_captcha_store_failure(self, mock_store):
+        """测试存储失败时生成验证码抛出异常"""
+        mock_store.save.return_value = False
+        captcha_manager = CaptchaManager(mock_store)
+
+        with pytest.raises(ValueError):
+            captcha_manager.generate_captcha_sync()
+
+    async def test_verify_captcha_success(self, mock_store):
         """测试验证码验证成功的情况"""
-        # 设置模拟响应
-        mock_cache_manager.get.return_value = "1234"
-        
-        # 创建验证码管理器
-        captcha_manager = CaptchaManager(mock_cache_manager)
-        
-        # 验证验证码
+        mock_store.pop.return_value = "1234"
+        captcha_manager = CaptchaManager(mock_store)
+
         result = await captcha_manager.verify_captcha("test_id", "1234")
-        
-        # 验证结果
+
         assert result is True
-        
-        # 验证缓存操作
-        mock_cache_manager.get.assert_called_once_with("captcha:test_id")
-        mock_cache_manager.delete.assert_called_once_with("captcha:test_id")
-    
-    async def test_verify_captcha_case_insensitive(self, mock_cache_manager):
+        mock_store.pop.assert_called_once_with("test_id")
+
+    async def test_verify_captcha_case_insensitive(self, mock_store):
         """测试验证码验证不区分大小写"""
-        # 设置模拟响应
-        mock_cache_manager.get.return_value = "abcd"
-        
-        # 创建验证码管理器
-        captcha_manager = CaptchaManager(mock_cache_manager)
-        
-        # 验证验证码 (使用大写)
-        result = await captcha_manager.verify_captcha("test_id", "ABCD")
-        
-        # 验证结果
-        assert result is True
-        
-        # 验证缓存操作
-        mock_cache_manager.get.assert_called_once_with("captcha:test_id")
-        mock_cache_manager.delete.assert_called_once_with("captcha:test_id")
-    
-    async def test_verify_captcha_failure_wrong_code(self, mock_cache_manager):
-        """测试验证码验证失败 - 错误的验证码"""
-        # 设置模拟响应
-        mock_cache_manager.get.return_value = "1234"
-        
-        # 创建验证码管理器
-        captcha_manager = CaptchaManager(mock_cache_manager)
-        
-        # 验证验证码
+        mock_store.pop.return_value = "ABCD"
+        captcha_manager = CaptchaManager(mock_store)
+
+        assert captcha_manager.verify_captcha_sync("test_id", " abcd ") is True
+
+    async def test_verify_captcha_failure_wrong_code(self, mock_store):
+        """测试验证码验证失败 - 错误的验证码，验证码同样被消费"""
+        mock_store.pop.return_value = "1234"
+        captcha_manager = CaptchaManager(mock_store)
+
         result = await captcha_manager.verify_captcha("test_id", "5678")
-        
-        # 验证结果
+
         assert result is False
-        
-        # 验证缓存操作
-        mock_cache_manager.get.assert_called_once_with("captcha:test_id")
-        mock_cache_manager.delete.assert_called_once_with("captcha:test_id")
-    
-    async def test_verify_captcha_failure_expired(self, mock_cache_manager):
+        mock_store.pop.assert_called_once_with("test_id")
+
+    async def test_verify_captcha_failure_expired(self, mock_store):
         """测试验证码验证失败 - 验证码已过期"""
-        # 设置模拟响应
-        mock_cache_manager.get.return_value = None  # 模拟已过期或不存在
-        
-        # 创建验证码管理器
-        captcha_manager = CaptchaManager(mock_cache_manager)
-        
-        # 验证验证码
+        mock_store.pop.return_value = None  # 模拟已过期或不存在
+        captcha_manager = CaptchaManager(mock_store)
+
         result = await captcha_manager.verify_captcha("test_id", "1234")
-        
-        # 验证结果
+
         assert result is False
-        
-        # 验证缓存操作
-        mock_cache_manager.get.assert_called_once_with("captcha:test_id")
-        # 不会调用删除方法，因为验证码已经不存在
-        mock_cache_manager.delete.assert_not_called()
-    
-    async def test_verify_captcha_empty_input(self, mock_cache_manager):
+
+    async def test_verify_captcha_empty_input(self, mock_store):
         """测试验证码验证失败 - 输入为空"""
-        # 创建验证码管理器
-        captcha_manager = CaptchaManager(mock_cache_manager)
-        
-        # 验证验证码
+        captcha_manager = CaptchaManager(mock_store)
+
         result = await captcha_manager.verify_captcha("", "")
-        
-        # 验证结果
+
         assert result is False
-        
-        # 验证缓存操作
-        mock_cache_manager.get.assert_not_called()
-        mock_cache_manager.delete.assert_not_called()
-    
-    async def test_clear_expired_captchas(self, mock_cache_manager):
+        mock_store.pop.assert_not_called()
+
+    async def test_clear_expired_captchas(self, mock_store):
         """测试清理过期验证码"""
-        # 设置模拟响应
-        mock_cache_manager.keys.return_value = ["captcha:1", "captcha:2", "captcha:3"]
-        
-        # 创建验证码管理器
-        captcha_manager = CaptchaManager(mock_cache_manager)
-        
-        # 清理过期验证码
-        result = await captcha_manager.clear_expired_captchas()
-        
-        # 验证结果
-        assert result == 3  # 应该返回键的数量
-        
-        # 验证缓存操作
-        mock_cache_manager.keys.assert_called_once_with("captcha:*") 
\ No newline at end of file
+        captcha_manager = CaptchaManager(mock_store)
+
+        result = captcha_manager.clear_expired_captchas()
+
+        assert result == 3
+        mock_store.clear_expired.assert_called_once()
+
+
+class TestCaptchaStore:
+    """验证码存储测试类"""
+
+    async def test_key_prefix(self):
+        """测试缓存键前缀"""
+        store = CaptchaStore(redis_client=MagicMock(), key_prefix="auth:captcha")
+
+        assert store._build_key("abc") == "auth:captcha:abc"
+
+    async def test_pop_uses_single_transaction(self):
+        """测试取出验证码时GET和DEL在同一事务中执行"""
+        redis_client = MagicMock()
+        pipe = redis_client.pipeline.return_value.__enter__.return_value
+        pipe.execute.return_value = ["1234", 1]
+        store = CaptchaStore(redis_client=redis_client)
+
+        assert store.pop("abc") == "1234"
+        redis_client.pipeline.assert_called_once_with(transaction=True)
+        pipe.get.assert_called_once_with("auth:captcha:abc")
+        pipe.delete.assert_called_once_with("auth:captcha:abc")
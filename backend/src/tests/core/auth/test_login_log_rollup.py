@@ -0,0 +1,154 @@
+"""
+登录日志汇总与统计的单元测试
+"""
+from datetime import datetime
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy.dialects import mysql
+
+from core.auth.login_log_rollup import (
+    GRANULARITY_DAY,
+    GRANULARITY_HOUR,
+    aggregate_rollups,
+    build_upsert,
+    plan_range,
+    query_login_counts,
+)
+from core.auth.models import LOGIN_SUCCESS, LOGIN_FAILED
+from core.utils.pagination import encode_cursor, decode_cursor
+
+
+def covered_hours(plan) -> float:
+    """计算拆分结果覆盖的总小时数"""
+    total = 0.0
+    for start, end in plan.days + plan.hours + plan.raw:
+        total += (end - start).total_seconds() / 3600
+    return total
+
+
+class TestPlanRange:
+    """统计时间范围拆分测试类"""
+
+    def test_within_one_hour_uses_raw_only(self):
+        """测试不跨整点的范围只扫描原始日志"""
+        start = datetime(2024, 1, 1, 10, 5)
+        end = datetime(2024, 1, 1, 10, 50)
+
+        plan = plan_range(start, end)
+
+        assert plan.days == [] and plan.hours == []
+        assert plan.raw == [(start, end)]
+
+    def test_same_day_uses_hours_and_edges(self):
+        """测试同一天内的范围拆成整小时和首尾边角"""
+        start = datetime(2024, 1, 1, 10, 30)
+        end = datetime(2024, 1, 1, 14, 15)
+
+        plan = plan_range(start, end)
+
+        assert plan.days == []
+        assert plan.hours == [(datetime(2024, 1, 1, 11), datetime(2024, 1, 1, 14))]
+        assert plan.raw == [
+            (start, datetime(2024, 1, 1, 11)),
+            (datetime(2024, 1, 1, 14), end)
+        ]
+
+    def test_multi_day_range(self):
+        """测试跨天范围拆成整天、整小时和边角，且正好覆盖整个区间"""
+        start = datetime(2024, 1, 1, 22, 30)
+        end = datetime(2024, 1, 4, 3, 45)
+
+        plan = plan_range(start, end)
+
+        assert plan.days == [(datetime(2024, 1, 2), datetime(2024, 1, 4))]
+        assert plan.hours == [
+            (datetime(2024, 1, 1, 23), datetime(2024, 1, 2)),
+            (datetime(2024, 1, 4), datetime(2024, 1, 4, 3))
+        ]
+        assert covered_hours(plan) == pytest.approx((end - start).total_seconds() / 3600)
+
+    def test_unbounded_start(self):
+        """测试不限开始时间时从最早的天汇总开始"""
+        end = datetime(2024, 1, 4, 3, 45)
+
+        plan = plan_range(None, end)
+
+        assert plan.days == [(None, datetime(2024, 1, 4))]
+        assert plan.hours == [(datetime(2024, 1, 4), datetime(2024, 1, 4, 3))]
+        assert plan.raw == [(datetime(2024, 1, 4, 3), end)]
+
+
+class TestRollupAggregation:
+    """汇总计数测试类"""
+
+    def test_aggregate_hour_and_day_buckets(self):
+        """测试一批记录同时计入小时和天两种粒度"""
+        counts = aggregate_rollups([
+            (datetime(2024, 1, 1, 10, 5), LOGIN_SUCCESS, True),
+            (datetime(2024, 1, 1, 10, 40), LOGIN_SUCCESS, True),
+            (datetime(2024, 1, 1, 11, 0), LOGIN_FAILED, False),
+        ])
+
+        assert counts[(GRANULARITY_HOUR, datetime(2024, 1, 1, 10), LOGIN_SUCCESS, True)] == 2
+        assert counts[(GRANULARITY_HOUR, datetime(2024, 1, 1, 11), LOGIN_FAILED, False)] == 1
+        assert counts[(GRANULARITY_DAY, datetime(2024, 1, 1), LOGIN_SUCCESS, True)] == 2
+        assert counts[(GRANULARITY_DAY, datetime(2024, 1, 1), LOGIN_FAILED, False)] == 1
+        assert len(counts) == 4
+
+    def test_upsert_accumulates_count(self):
+        """测试汇总语句在键冲突时累加计数"""
+        counts = aggregate_rollups([(datetime(2024, 1, 1, 10, 5), LOGIN_SUCCESS, True)])
+
+        sql = str(build_upsert(counts).compile(dialect=mysql.dialect()))
+
+        assert "ON DUPLICATE KEY UPDATE" in sql
+        assert "count = (login_log_rollups.count + VALUES(count))" in sql
+
+
+class TestQueryLoginCounts:
+    """登录次数统计测试类"""
+
+    def test_combines_rollups_and_raw_edges(self):
+        """测试汇总表和边角条件聚合的结果相加"""
+        db = MagicMock()
+        rollup_result = MagicMock()
+        rollup_result.all.return_value = [
+            (LOGIN_SUCCESS, True, 10),
+            (LOGIN_FAILED, False, 4),
+        ]
+        raw_result = MagicMock()
+        raw_result.one.return_value = (3, 2, 1, 2)
+        db.execute.side_effect = [rollup_result, raw_result]
+
+        counts = query_login_counts(db, datetime(2024, 1, 1, 10, 30), datetime(2024, 1, 3, 8, 15))
+
+        assert db.execute.call_count == 2
+        assert counts == {"total": 17, "success": 12, "failed": 5, "captcha_verified": 12}
+
+    def test_aligned_range_skips_raw_query(self):
+        """测试整点对齐的范围只查询汇总表"""
+        db = MagicMock()
+        db.execute.return_value.all.return_value = [(LOGIN_SUCCESS, False, 7)]
+
+        counts = query_login_counts(db, datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+        assert db.execute.call_count == 1
+        assert counts["total"] == 7
+        assert counts["captcha_verified"] == 0
+
+
+class TestKeysetCursor:
+    """键集分页游标测试类"""
+
+    def test_round_trip(self):
+        """测试游标编码后可以还原排序键"""
+        created_at = datetime(2024, 1, 1, 10, 5, 30, 123456)
+
+        cursor = encode_cursor(created_at, 42)
+
+        assert decode_cursor(cursor) == (created_at, 42)
+
+    def test_invalid_cursor(self):
+        """测试无效游标抛出ValueError"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
@@ -0,0 +1,160 @@
+"""
+登录日志批量写入器的单元测试
+"""
+import time
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.auth.login_log_writer import LoginLogWriter, LoginEvent, LOGIN_SUCCESS, LOGIN_FAILED
+
+
+@pytest.fixture
+def mock_session():
+    """创建模拟的数据库会话"""
+    return MagicMock()
+
+
+def make_writer(session, **kwargs) -> LoginLogWriter:
+    """创建使用模拟会话的写入器"""
+    return LoginLogWriter(session_factory=lambda: session, **kwargs)
+
+
+def make_event(index: int = 0, status: str = LOGIN_SUCCESS) -> LoginEvent:
+    """创建登录事件"""
+    return LoginEvent(username=f"user{index}", status=status, user_id=index)
+
+
+class TestLoginEvent:
+    """登录事件测试类"""
+
+    def test_to_row_truncates_long_fields(self):
+        """测试超长字段按列宽截断"""
+        event = LoginEvent(
+            username="u" * 80,
+            status=LOGIN_FAILED,
+            user_agent="a" * 500,
+            message="m" * 500
+        )
+
+        row = event.to_row()
+
+        assert len(row["username"]) == 50
+        assert len(row["user_agent"]) == 200
+        assert len(row["message"]) == 200
+        assert row["user_id"] is None
+        assert row["created_at"] == event.created_at
+
+
+class TestLoginLogWriter:
+    """登录日志批量写入器测试类"""
+
+    def test_submit_does_not_touch_database(self, mock_session):
+        """测试提交事件时不访问数据库"""
+        writer = make_writer(mock_session, flush_interval=60)
+        try:
+            assert writer.submit(make_event()) is True
+            mock_session.execute.assert_not_called()
+            mock_session.commit.assert_not_called()
+        finally:
+            writer.stop()
+
+    def test_flush_on_batch_size(self, mock_session):
+        """测试达到批大小时用一条INSERT写入整批，并在同一事务中更新汇总表"""
+        writer = make_writer(mock_session, batch_size=10, flush_interval=60)
+        try:
+            for i in range(10):
+                writer.submit(make_event(i))
+
+            deadline = time.monotonic() + 5
+            while writer.written < 10 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert writer.written == 10
+            # 一条日志INSERT加一条汇总表UPSERT
+            assert mock_session.execute.call_count == 2
+            mock_session.commit.assert_called_once()
+        finally:
+            writer.stop()
+
+    def test_flush_on_interval(self, mock_session):
+        """测试未达到批大小时按时间间隔刷新"""
+        writer = make_writer(mock_session, batch_size=100, flush_interval=0.05)
+        try:
+            writer.submit(make_event())
+
+            deadline = time.monotonic() + 5
+            while writer.written < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert writer.written == 1
+        finally:
+            writer.stop()
+
+    def test_stop_drains_queue(self, mock_session):
+        """测试停止时写完队列中剩余的事件"""
+        writer = make_writer(mock_session, batch_size=1000, flush_interval=60)
+        for i in range(25):
+            writer.submit(make_event(i))
+
+        writer.stop()
+
+        assert writer.written == 25
+        assert writer.pending() == 0
+        assert not writer.running
+
+    def test_queue_is_bounded(self, mock_session):
+        """测试队列已满时丢弃事件"""
+        writer = make_writer(mock_session, max_queue_size=5)
+        # 不启动后台线程，直接填满队列
+        writer.start = MagicMock()
+        writer._thread = MagicMock()
+        writer._thread.is_alive.return_value = True
+
+        results = [writer.submit(make_event(i)) for i in range(8)]
+
+        assert results.count(True) == 5
+        assert writer.dropped == 3
+
+    def test_flush_failure_rolls_back(self, mock_session):
+        """测试写入失败时回滚并计数，不影响后续批次"""
+        mock_session.execute.side_effect = [SQLAlchemyError("db down"), None, None]
+        writer = make_writer(mock_session)
+
+        writer._flush([make_event(1)])
+        writer._flush([make_event(2)])
+
+        mock_session.rollback.assert_called_once()
+        assert writer.failed == 1
+        assert writer.written == 1
+        assert mock_session.close.call_count == 2
+
+    def test_failed_batch_is_requeued(self, mock_session):
+        """测试写入失败的批次放回队列，下一次写入成功"""
+        mock_session.execute.side_effect = [SQLAlchemyError("db down"), None, None]
+        writer = make_writer(mock_session, batch_size=10, flush_interval=60, retry_delay=0.01)
+        try:
+            for i in range(3):
+                writer.submit(make_event(i))
+            writer.stop()
+
+            assert writer.failed == 3
+            assert writer.written == 3
+            assert writer.lost == 0
+            assert writer.pending() == 0
+        finally:
+            writer.stop()
+
+    def test_gives_up_after_max_retries(self, mock_session):
+        """测试超过重试次数后放弃事件并计数"""
+        mock_session.execute.side_effect = SQLAlchemyError("no such column")
+        writer = make_writer(mock_session, max_retries=2, flush_interval=0.01)
+        batch = [make_event()]
+
+        for _ in range(3):
+            assert writer._flush(batch) is False
+            batch = writer._collect_batch()
+
+        assert batch == []
+        assert writer.failed == 3
+        assert writer.lost == 1
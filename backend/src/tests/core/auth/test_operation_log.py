@@ -0,0 +1,234 @@
+"""
+操作日志流水线的单元测试
+"""
+from datetime import date, datetime
+import pytest
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+import httpx
+from jose import jwt
+
+from core.auth.operation_log import OperationLogMiddleware
+from core.auth.operation_log_partition import (
+    OperationLogPartitionManager,
+    plan_expired_partitions,
+    plan_new_partitions,
+)
+from core.auth.operation_log_writer import OperationEvent, OperationLogWriter, mask_params
+from core.config.jwt_config import jwt_settings
+
+
+@pytest.fixture
+def mock_session():
+    """创建模拟的数据库会话"""
+    return MagicMock()
+
+
+async def send_request(app: FastAPI, method: str, url: str, **kwargs) -> httpx.Response:
+    """通过ASGI传输直接调用应用"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, url, **kwargs)
+
+
+def make_token(secret: str = None, **claims) -> str:
+    """签发与登录接口格式相同的访问令牌"""
+    claims = {
+        "sub": "7",
+        "username": "alice",
+        "iss": jwt_settings.JWT_ISSUER,
+        "aud": jwt_settings.JWT_AUDIENCE,
+        "type": "access",
+        **claims
+    }
+    return jwt.encode(claims, secret or jwt_settings.JWT_SECRET_KEY, algorithm=jwt_settings.JWT_ALGORITHM)
+
+
+def make_writer(session, **kwargs) -> OperationLogWriter:
+    """创建使用模拟会话的写入器"""
+    return OperationLogWriter(session_factory=lambda: session, **kwargs)
+
+
+class TestOperationEvent:
+    """操作事件测试类"""
+
+    def test_mask_params(self):
+        """测试JSON和表单参数中的敏感字段被脱敏"""
+        assert mask_params('{"username": "admin", "password": "secret123"}') == \
+            '{"username": "admin", "password": "******"}'
+        assert mask_params("username=admin&password=secret123&x=1") == \
+            "username=admin&password=******&x=1"
+
+    def test_to_row(self):
+        """测试在写入线程中解析用户、模块和操作"""
+        token = make_token()
+        event = OperationEvent(
+            method="POST",
+            path="/api/v1/tests/cases",
+            query_string=b"project_id=1",
+            body=b'{"name": "case", "token": "abc"}',
+            status_code=201,
+            client_ip="10.0.0.1",
+            headers=[(b"authorization", f"Bearer {token}".encode())],
+            endpoint="create_test_case"
+        )
+
+        row = event.to_row(max_params_length=30)
+
+        assert row["user_id"] == 7
+        assert row["username"] == "alice"
+        assert row["module"] == "tests"
+        assert row["operation"] == "create_test_case"
+        assert row["response_code"] == 201
+        assert row["ip_address"] == "10.0.0.1"
+        assert len(row["request_params"]) == 30
+        assert "abc" not in row["request_params"]
+
+    @pytest.mark.parametrize("token", [
+        make_token(secret="forged-secret-forged-secret-forged"),
+        make_token(aud="other-service"),
+        make_token(exp=datetime(2020, 1, 1)),
+        "not-a-token",
+    ])
+    def test_unverified_token_is_anonymous(self, token):
+        """测试伪造、受众不符或过期的令牌不能冒充用户"""
+        event = OperationEvent(
+            method="POST",
+            path="/api/v1/tests/cases",
+            headers=[(b"authorization", f"Bearer {token}".encode())]
+        )
+
+        row = event.to_row()
+
+        assert row["user_id"] is None
+        assert row["username"] == "anonymous"
+
+    def test_anonymous_request(self):
+        """测试没有令牌时记录为匿名用户"""
+        event = OperationEvent(method="DELETE", path="/api/v1/projects/1")
+
+        row = event.to_row()
+
+        assert row["user_id"] is None
+        assert row["username"] == "anonymous"
+        assert row["operation"] == "DELETE"
+
+
+class TestOperationLogWriter:
+    """操作日志写入器测试类"""
+
+    def test_ring_buffer_overwrites_oldest(self, mock_session):
+        """测试缓冲区已满时覆盖最旧的事件"""
+        writer = make_writer(mock_session, capacity=3)
+
+        for i in range(5):
+            writer.submit(OperationEvent(method="POST", path=f"/api/v1/tests/{i}"))
+
+        assert writer.pending() == 3
+        assert writer.overwritten == 2
+        assert [event.path for event in writer._drain()] == [
+            "/api/v1/tests/2", "/api/v1/tests/3", "/api/v1/tests/4"
+        ]
+        mock_session.execute.assert_not_called()
+
+    def test_stop_drains_buffer_in_batches(self, mock_session):
+        """测试停止时按批写完缓冲区"""
+        writer = make_writer(mock_session, batch_size=10, flush_interval=60)
+        for i in range(25):
+            writer.submit(OperationEvent(method="POST", path="/api/v1/tests"))
+
+        writer.start()
+        writer.stop()
+
+        assert writer.written == 25
+        assert mock_session.execute.call_count == 3
+        assert writer.pending() == 0
+
+
+class TestOperationLogMiddleware:
+    """操作日志中间件测试类"""
+
+    @pytest.fixture
+    def app_and_writer(self, mock_session):
+        writer = make_writer(mock_session, max_params_length=8)
+        app = FastAPI()
+        app.add_middleware(OperationLogMiddleware, writer=writer)
+
+        @app.post("/api/v1/projects")
+        async def create_project(payload: dict):
+            return payload
+
+        @app.get("/api/v1/projects")
+        async def list_projects():
+            return []
+
+        return app, writer
+
+    @pytest.mark.asyncio
+    async def test_captures_write_requests(self, app_and_writer):
+        """测试写操作请求被放入缓冲区且请求体被截断"""
+        app, writer = app_and_writer
+
+        response = await send_request(app, "POST", "/api/v1/projects?x=1", json={"name": "demo project"})
+
+        assert response.status_code == 200
+        assert writer.pending() == 1
+        event = writer._drain()[0]
+        assert event.endpoint == "create_project"
+        assert event.status_code == 200
+        assert event.query_string == b"x=1"
+        assert len(event.body) == 8
+
+    @pytest.mark.asyncio
+    async def test_skips_read_requests(self, app_and_writer):
+        """测试默认不审计读请求"""
+        app, writer = app_and_writer
+
+        await send_request(app, "GET", "/api/v1/projects")
+
+        assert writer.pending() == 0
+
+
+class TestOperationLogPartition:
+    """操作日志分区维护测试类"""
+
+    def test_plan_initial_partitions(self):
+        """测试未分区的表从当前月开始创建分区"""
+        months = plan_new_partitions([], datetime(2024, 11, 15), months_ahead=2)
+
+        assert months == [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)]
+
+    def test_plan_missing_future_partitions(self):
+        """测试只补充缺少的未来月份"""
+        months = plan_new_partitions(["p202410", "p202411", "pmax"], datetime(2024, 11, 15), months_ahead=2)
+
+        assert months == [date(2024, 12, 1), date(2025, 1, 1)]
+
+    def test_plan_expired_partitions(self):
+        """测试保留期之外的分区被删除，pmax不受影响"""
+        existing = ["p202405", "p202406", "p202407", "p202411", "pmax"]
+
+        assert plan_expired_partitions(existing, datetime(2024, 11, 15), retention_months=5) == [
+            "p202405", "p202406"
+        ]
+
+    def test_reorganize_max_partition(self, mock_session):
+        """测试已分区的表通过拆分pmax创建新分区"""
+        manager = OperationLogPartitionManager(lambda: mock_session, months_ahead=1)
+        manager.get_partitions = MagicMock(return_value=["p202411", "pmax"])
+
+        created = manager.ensure_partitions(mock_session, datetime(2024, 11, 15))
+
+        assert created == ["p202412"]
+        sql = str(mock_session.execute.call_args[0][0])
+        assert "REORGANIZE PARTITION pmax INTO" in sql
+        assert "TO_DAYS('2025-01-01')" in sql
+
+    def test_unpartitioned_table_is_not_converted(self, mock_session):
+        """测试未分区的表不在后台转换，只由迁移完成首次分区"""
+        manager = OperationLogPartitionManager(lambda: mock_session)
+        manager.get_partitions = MagicMock(return_value=[])
+
+        assert manager.ensure_partitions(mock_session, datetime(2024, 11, 15)) == []
+        assert manager.drop_expired_partitions(mock_session, datetime(2024, 11, 15)) == []
+        mock_session.execute.assert_not_called()
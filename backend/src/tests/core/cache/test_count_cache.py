@@ -0,0 +1,93 @@
+"""
+列表总数缓存的单元测试
+"""
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+import core.cache.count_cache as count_cache
+from core.cache.count_cache import cached_count, count_signature, invalidate_counts
+
+metadata = MetaData()
+items = Table(
+    "items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("group_id", Integer),
+    Column("kind", Integer),
+)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """用字典替代Redis读写函数，过期时间记录在store["ttl"]中"""
+    store = {"ttl": {}}
+
+    def incr(key, amount=1):
+        store[key] = str(int(store.get(key, 0)) + amount)
+        return int(store[key])
+
+    monkeypatch.setattr(count_cache, "redis_get", store.get)
+    monkeypatch.setattr(count_cache, "redis_set", lambda key, value, ex=None: store.__setitem__(key, value) or True)
+    monkeypatch.setattr(count_cache, "redis_incr", incr)
+    monkeypatch.setattr(count_cache, "redis_expire", lambda key, seconds: store["ttl"].__setitem__(key, seconds) or True)
+    return store
+
+
+@pytest.fixture
+def db():
+    """创建带测试数据的内存数据库会话"""
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(insert(items), [{"group_id": 1, "kind": i % 3} for i in range(10)])
+        session.commit()
+        yield session
+
+
+def test_signature_ignores_none_and_order():
+    """测试签名与条件顺序无关，值为None的条件视为未设置"""
+    assert count_signature({"a": 1, "b": None}) == count_signature({"a": 1})
+    assert count_signature({"a": 1, "b": 2}) == count_signature({"b": 2, "a": 1})
+    assert count_signature({"a": 1}) != count_signature({"a": 2})
+
+
+def test_cached_count_hits_cache(db, fake_redis):
+    """测试相同过滤条件第二次读取缓存"""
+    statement = select(items).where(items.c.group_id == 1, items.c.kind == 0)
+
+    assert cached_count(db, statement, "items", 1, {"kind": 0}) == 4
+    db.execute(insert(items), [{"group_id": 1, "kind": 0}])
+
+    assert cached_count(db, statement, "items", 1, {"kind": 0}) == 4
+    assert cached_count(db, select(items).where(items.c.group_id == 1), "items", 1) == 11
+
+
+def test_invalidate_counts(db, fake_redis):
+    """测试递增版本号后所有过滤条件重新统计"""
+    statement = select(items).where(items.c.group_id == 1)
+    assert cached_count(db, statement, "items", 1) == 10
+
+    db.execute(insert(items), [{"group_id": 1, "kind": 1}])
+    invalidate_counts("items", 1)
+
+    assert cached_count(db, statement, "items", 1) == 11
+
+
+def test_redis_unavailable_falls_back_to_count(db, monkeypatch):
+    """测试Redis不可用时直接执行COUNT"""
+    monkeypatch.setattr(count_cache, "redis_get", lambda key: None)
+    monkeypatch.setattr(count_cache, "redis_set", lambda key, value, ex=None: False)
+
+    assert cached_count(db, select(items).order_by(items.c.id), "items", 1) == 10
+
+
+def test_version_key_expires(db, fake_redis):
+    """测试版本号设置过期时间，缓存总数时续期，且不短于总数缓存的过期时间"""
+    version_key = "count:items:1:version"
+    invalidate_counts("items", 1)
+    assert fake_redis["ttl"][version_key] == count_cache.VERSION_TTL
+
+    fake_redis["ttl"].clear()
+    cached_count(db, select(items), "items", 1, ttl=count_cache.VERSION_TTL * 2)
+
+    assert fake_redis["ttl"][version_key] == count_cache.VERSION_TTL * 2
@@ -0,0 +1,187 @@
+"""
+Redis发布订阅进度通道的单元测试
+"""
+import asyncio
+import json
+import queue
+from unittest.mock import MagicMock
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from core.cache.progress_channel import ProgressChannel, ProgressHub, merge_messages
+
+
+@pytest.fixture
+def mock_redis():
+    """创建模拟的Redis客户端，合并脚本返回HGETALL形式的键值列表"""
+    client = MagicMock()
+    client.register_script.return_value.return_value = ["_seq", "3", "total", "10", "passed", "7"]
+    return client
+
+
+@pytest.fixture
+def channel(mock_redis):
+    """创建测试通道"""
+    return ProgressChannel("test_runs", redis_client=mock_redis, state_ttl=60)
+
+
+def test_merge_messages_takes_max_state_and_sums_delta():
+    """测试合并时状态取最大值、增量相加，乱序到达的旧消息不会覆盖新状态"""
+    newer = {"seq": 5, "state": {"total": 10, "passed": 8}, "delta": {"passed": 2}}
+    older = {"seq": 4, "state": {"total": 9, "passed": 8, "failed": 1}, "delta": {"failed": 1}}
+
+    merged = merge_messages(newer, older)
+
+    assert merged["seq"] == 5
+    assert merged["state"] == {"total": 10, "passed": 8, "failed": 1}
+    assert merged["delta"] == {"passed": 2, "failed": 1}
+    assert merge_messages(None, older) is older
+
+
+def test_publish_merges_state_and_publishes(channel, mock_redis):
+    """测试发布时通过脚本合并状态，并把合并后的完整状态发布到频道"""
+    message = channel.publish(42, {"total": 10, "passed": 7}, {"passed": 1})
+
+    script = mock_redis.register_script.return_value
+    script.assert_called_once_with(
+        keys=["progress:test_runs:42:state"],
+        args=[60, "total", 10, "passed", 7]
+    )
+    assert message == {"key": "42", "seq": 3, "state": {"total": 10, "passed": 7}, "delta": {"passed": 1}}
+    channel_name, payload = mock_redis.publish.call_args[0]
+    assert channel_name == "progress:test_runs:42"
+    assert json.loads(payload) == message
+
+
+def test_publish_ignores_redis_errors(channel, mock_redis):
+    """测试Redis不可用时发布失败不抛出异常"""
+    mock_redis.register_script.return_value.side_effect = ConnectionError("down")
+
+    assert channel.publish(1, {"total": 1}) is None
+    mock_redis.publish.assert_not_called()
+
+
+def test_snapshot(channel, mock_redis):
+    """测试读取状态，不存在时返回None"""
+    mock_redis.hgetall.return_value = {"_seq": "2", "total": "4"}
+    assert channel.snapshot(7) == {"key": "7", "seq": 2, "state": {"total": 4}, "delta": {}}
+
+    mock_redis.hgetall.return_value = {}
+    assert channel.snapshot(7) is None
+
+
+def test_subscription_coalesces_and_limits_rate(channel):
+    """测试发送间隔内到达的多条消息合并为一条"""
+    hub = ProgressHub(channel)
+    hub._thread = MagicMock()  # 不启动订阅线程
+
+    async def scenario():
+        subscription = hub.watch(1, max_rate=20)
+        assert hub.watcher_count == 1
+        assert await subscription.next(timeout=0.01) is None
+
+        hub.dispatch("1", {"seq": 1, "state": {"total": 1}, "delta": {"total": 1}})
+        first = await subscription.next(timeout=1)
+        for seq in (2, 3, 4):
+            hub.dispatch("1", {"seq": seq, "state": {"total": seq}, "delta": {"total": 1}})
+        second = await subscription.next(timeout=1)
+
+        subscription.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first["seq"] == 1
+    assert second == {"seq": 4, "state": {"total": 4}, "delta": {"total": 3}}
+    assert hub.watcher_count == 0
+
+
+def test_dispatch_only_reaches_watchers_of_key(channel):
+    """测试消息只分发给订阅了该键的观察者"""
+    hub = ProgressHub(channel)
+    hub._thread = MagicMock()
+
+    async def scenario():
+        watched = hub.watch(1, max_rate=0)
+        other = hub.watch(2, max_rate=0)
+        assert hub.dispatch("1", {"seq": 1, "state": {}, "delta": {}}) == 1
+        received = await watched.next(timeout=1)
+        missed = await other.next(timeout=0.01)
+        watched.close()
+        other.close()
+        return received, missed
+
+    received, missed = asyncio.run(scenario())
+
+    assert received["seq"] == 1
+    assert missed is None
+
+
+def test_watch_waits_for_subscribe_confirmation(channel):
+    """测试Redis确认订阅后才通知观察者，已确认频道上的新观察者立即确认"""
+    hub = ProgressHub(channel)
+    hub._thread = MagicMock()
+
+    async def scenario():
+        first = hub.watch(1, max_rate=0)
+        unconfirmed = await first.wait_subscribed(timeout=0.01)
+        hub._confirm("1")
+        confirmed = await first.wait_subscribed(timeout=1)
+        second = hub.watch(1, max_rate=0)
+        immediate = await second.wait_subscribed(timeout=0)
+        first.close()
+        second.close()
+        return unconfirmed, confirmed, immediate
+
+    assert asyncio.run(scenario()) == (False, True, True)
+
+
+class FakePubSub:
+    """按命令顺序返回订阅确认和消息的模拟订阅连接"""
+
+    def __init__(self):
+        self.messages = queue.Queue()
+
+    def subscribe(self, *channels):
+        for channel in channels:
+            self.messages.put({"type": "subscribe", "channel": channel, "data": 1})
+
+    def unsubscribe(self, *channels):
+        for channel in channels:
+            self.messages.put({"type": "unsubscribe", "channel": channel, "data": 0})
+
+    def publish(self, channel, message):
+        self.messages.put({"type": "message", "channel": channel, "data": json.dumps(message)})
+
+    def get_message(self, timeout):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        pass
+
+
+def test_hub_thread_confirms_before_messages(channel, mock_redis):
+    """测试后台线程收到订阅确认后通知观察者，确认之后发布的消息都会送达"""
+    pubsub = FakePubSub()
+    mock_redis.pubsub.return_value = pubsub
+    hub = ProgressHub(channel)
+
+    async def scenario():
+        subscription = hub.watch(5, max_rate=0)
+        confirmed = await subscription.wait_subscribed(timeout=2)
+        pubsub.publish(channel.channel(5), {"seq": 9, "state": {"total": 3}, "delta": {}})
+        received = await subscription.next(timeout=2)
+        subscription.close()
+        return confirmed, received
+
+    try:
+        confirmed, received = asyncio.run(scenario())
+    finally:
+        hub.stop()
+
+    assert confirmed is True
+    assert received["seq"] == 9
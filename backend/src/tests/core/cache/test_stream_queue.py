@@ -0,0 +1,142 @@
+"""
+Redis Streams任务队列的单元测试
+"""
+from unittest.mock import MagicMock
+
+import pytest
+from redis.exceptions import ResponseError
+
+from core.cache.stream_queue import StreamJob, StreamJobQueue, stream_id_time
+
+LANES = ["critical", "high", "low"]
+
+
+@pytest.fixture
+def mock_redis():
+    """创建模拟的Redis客户端，pipeline的返回值通过pipe.execute设置"""
+    client = MagicMock()
+    pipe = client.pipeline.return_value.__enter__.return_value
+    pipe.execute.return_value = [[0, []]] * len(LANES)
+    client.xreadgroup.return_value = []
+    return client
+
+
+@pytest.fixture
+def queue(mock_redis):
+    """创建测试队列"""
+    return StreamJobQueue("runs", LANES, "executors", consumer="c1", redis_client=mock_redis, max_deliveries=2)
+
+
+def pipeline_of(client):
+    return client.pipeline.return_value.__enter__.return_value
+
+
+def test_ensure_groups_ignores_busygroup(queue, mock_redis):
+    """测试消费者组已存在时忽略错误，且只创建一次"""
+    mock_redis.xgroup_create.side_effect = ResponseError("BUSYGROUP Consumer Group name already exists")
+
+    queue.ensure_groups()
+    queue.ensure_groups()
+
+    assert mock_redis.xgroup_create.call_count == len(LANES)
+    mock_redis.xgroup_create.assert_any_call("queue:runs:critical", "executors", id="0", mkstream=True)
+
+
+def test_enqueue_unknown_lane(queue):
+    """测试向不存在的通道添加任务"""
+    with pytest.raises(ValueError):
+        queue.enqueue("urgent", {"test_run_id": 1})
+
+
+def test_claim_reads_lanes_in_priority_order(queue, mock_redis):
+    """测试按通道优先级读取，取到任务后不再读取低优先级通道"""
+    mock_redis.xreadgroup.side_effect = [
+        [],
+        [["queue:runs:high", [("1700000000000-0", {"test_run_id": "7"})]]],
+    ]
+
+    jobs = queue.claim(count=1, block_ms=None)
+
+    assert [(job.lane, job.fields["test_run_id"], job.deliveries) for job in jobs] == [("high", "7", 1)]
+    assert mock_redis.xreadgroup.call_count == 2
+    assert jobs[0].enqueued_at == 1700000000.0
+
+
+def test_claim_blocks_on_all_lanes_when_empty(queue, mock_redis):
+    """测试所有通道为空时在全部通道上阻塞等待，结果按优先级排序"""
+    mock_redis.xreadgroup.side_effect = [[], [], [], [
+        ["queue:runs:low", [("2-0", {"test_run_id": "2"})]],
+        ["queue:runs:critical", [("3-0", {"test_run_id": "3"})]],
+    ]]
+
+    jobs = queue.claim(count=1, block_ms=100)
+
+    assert [job.lane for job in jobs] == ["critical", "low"]
+    streams = mock_redis.xreadgroup.call_args.args[2]
+    assert streams == {f"queue:runs:{lane}": ">" for lane in LANES}
+    assert mock_redis.xreadgroup.call_args.kwargs["block"] == 100
+
+
+def test_claim_reclaims_idle_jobs_and_dead_letters_exceeded(queue, mock_redis):
+    """测试优先接管超时任务，投递次数超限的任务移入死信Stream"""
+    pipe = pipeline_of(mock_redis)
+    pipe.execute.side_effect = [
+        [
+            ["0-0", [("1-0", {"test_run_id": "1"})]],
+            ["0-0", []],
+            ["0-0", [("2-0", {"test_run_id": "2"}), ("3-0", None)]],
+        ],
+        [[{"times_delivered": 2}], [{"times_delivered": 3}]],
+        [],
+    ]
+
+    jobs = queue.claim(count=1, block_ms=None)
+
+    assert [(job.id, job.lane, job.deliveries) for job in jobs] == [("1-0", "critical", 2)]
+    mock_redis.xreadgroup.assert_not_called()
+    dead_fields = pipe.xadd.call_args.args[1]
+    assert pipe.xadd.call_args.args[0] == "queue:runs:dead"
+    assert dead_fields["job_id"] == "2-0" and dead_fields["deliveries"] == 3
+    pipe.xack.assert_called_once_with("queue:runs:low", "executors", "2-0")
+
+
+def test_heartbeat_and_ack(queue, mock_redis):
+    """测试心跳重置空闲时间，确认后从待确认列表移除"""
+    job = StreamJob("5-0", "high", "queue:runs:high", {"test_run_id": "5"})
+
+    queue.heartbeat(job)
+    queue.ack(job)
+
+    mock_redis.xclaim.assert_called_once_with(
+        "queue:runs:high", "executors", "c1", min_idle_time=0, message_ids=["5-0"], justid=True
+    )
+    mock_redis.xack.assert_called_once_with("queue:runs:high", "executors", "5-0")
+
+
+def test_stats(queue, mock_redis, monkeypatch):
+    """测试积压指标，没有lag时以Stream长度代替"""
+    monkeypatch.setattr("core.cache.stream_queue.time.time", lambda: 1010.0)
+    group = {"name": "executors", "consumers": 2, "pending": 1, "last-delivered-id": "1000000-0"}
+    pipeline_of(mock_redis).execute.side_effect = [
+        [
+            [dict(group, lag=3)], 5,
+            [{"name": "other"}], 0,
+            [dict(group, lag=None)], 4,
+            2,
+        ],
+        [[("1002000-0", {})], [], [("1005000-0", {})]],
+    ]
+
+    stats = queue.stats()
+
+    assert stats["lanes"]["critical"] == {
+        "waiting": 3, "pending": 1, "oldest_wait_seconds": 8.0, "consumers": 2
+    }
+    assert stats["lanes"]["high"] == {"waiting": 0, "pending": 0, "oldest_wait_seconds": 0.0, "consumers": 0}
+    assert stats["lanes"]["low"]["waiting"] == 4
+    assert (stats["waiting"], stats["pending"], stats["oldest_wait_seconds"], stats["dead"]) == (7, 2, 8.0, 2)
+
+
+def test_stream_id_time():
+    """测试Stream消息ID转换为秒级时间戳"""
+    assert stream_id_time("1700000000123-4") == 1700000000.123
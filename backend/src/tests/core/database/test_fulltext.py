@@ -0,0 +1,126 @@
+"""
+全文检索的单元测试
+"""
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, create_engine, insert, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+from core.database.fulltext import (
+    MAX_SEARCH_TERMS,
+    MAX_SEARCH_WINDOW,
+    build_boolean_query,
+    decode_offset_cursor,
+    encode_offset_cursor,
+    fulltext_match,
+    paginate_ranked,
+    split_terms,
+)
+
+metadata = MetaData()
+cases = Table(
+    "cases", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(200)),
+    Column("description", Text),
+)
+
+
+@pytest.fixture
+def db():
+    """创建带测试数据的内存数据库会话"""
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(insert(cases), [
+            {"name": "用户登录-正常流程", "description": "验证返回码"},
+            {"name": "订单支付-超时重试", "description": "覆盖用户登录后的支付"},
+            {"name": "Login timeout", "description": "check audit log"},
+            {"name": "购物车-边界值", "description": "50%折扣"},
+        ])
+        session.commit()
+        yield session
+
+
+class TestQueryBuilding:
+    """检索串构造测试类"""
+
+    def test_split_terms_strips_operators(self):
+        """测试去掉BOOLEAN MODE运算符并去重"""
+        assert split_terms('+登录 -"超时"* 登录 (a)') == ["登录", "超时", "a"]
+        assert split_terms("+-*") == []
+        assert split_terms(None) == []
+
+    def test_split_terms_limit(self):
+        """测试检索词数量上限"""
+        assert len(split_terms(" ".join(f"t{i}" for i in range(20)))) == MAX_SEARCH_TERMS
+
+    def test_boolean_query_requires_prefix(self):
+        """测试每个词必须出现并按前缀匹配"""
+        assert build_boolean_query(["登录", "time"]) == "+登录* +time*"
+
+    def test_mysql_match_against(self):
+        """测试MySQL上生成MATCH ... AGAINST并对名称加权"""
+        condition, score = fulltext_match("mysql", [cases.c.name, cases.c.description], "登录", cases.c.name)
+
+        sql = str(select(cases.c.id).where(condition).order_by(score.desc()).compile(dialect=mysql.dialect()))
+
+        assert "MATCH (cases.name, cases.description) AGAINST (%s IN BOOLEAN MODE)" in sql
+        assert "MATCH (cases.name) AGAINST (%s IN BOOLEAN MODE)" in sql
+
+    def test_empty_search(self):
+        """测试没有有效检索词时不过滤"""
+        assert fulltext_match("mysql", [cases.c.name], "  ") is None
+
+
+class TestFallback:
+    """非MySQL数据库的LIKE检索测试类"""
+
+    def search(self, db, search):
+        """执行检索，返回按相关度排序的ID"""
+        condition, score = fulltext_match(
+            "sqlite", [cases.c.name, cases.c.description], search, boost_column=cases.c.name
+        )
+        ids, _ = paginate_ranked(db, select(cases.c.id).where(condition), score, cases.c.id, 10)
+        return ids
+
+    def test_name_match_ranks_first(self, db):
+        """测试名称命中的记录排在描述命中之前"""
+        ids = self.search(db, "登录")
+
+        assert ids == [1, 2]
+
+    def test_all_terms_required_case_insensitive(self, db):
+        """测试多个词都必须命中且不区分大小写"""
+        ids = self.search(db, "login AUDIT")
+
+        assert ids == [3]
+
+    def test_like_wildcards_escaped(self, db):
+        """测试关键字中的%按字面匹配"""
+        ids = self.search(db, "50%")
+
+        assert ids == [4]
+
+
+class TestPaginateRanked:
+    """相关度分页测试类"""
+
+    def test_pages_until_exhausted(self, db):
+        """测试按偏移量游标翻页直到没有更多结果"""
+        condition, score = fulltext_match("sqlite", [cases.c.name, cases.c.description], "登录")
+        statement = select(cases.c.id).where(condition)
+
+        first, cursor = paginate_ranked(db, statement, score, cases.c.id, 1)
+        assert first == [1] and cursor is not None
+
+        second, cursor = paginate_ranked(db, statement, score, cases.c.id, 1, cursor)
+        assert second == [2] and cursor is None
+
+    def test_cursor_window(self):
+        """测试游标不能超出结果窗口"""
+        assert decode_offset_cursor(encode_offset_cursor(20)) == 20
+        with pytest.raises(ValueError):
+            decode_offset_cursor(encode_offset_cursor(MAX_SEARCH_WINDOW))
+        with pytest.raises(ValueError):
+            decode_offset_cursor("garbage")
@@ -0,0 +1,71 @@
+"""
+测试产物存储的单元测试
+"""
+import hashlib
+import os
+
+import pytest
+
+from core.utils.artifact_store import ArtifactStore
+from core.utils.file_manager import FileManager
+
+
+@pytest.fixture
+def store(tmp_path):
+    """以临时目录为基础路径的产物存储"""
+    return ArtifactStore(FileManager(str(tmp_path)))
+
+
+async def chunks(*parts: bytes):
+    """把字节块包装为异步迭代器"""
+    for part in parts:
+        yield part
+
+
+async def collect(iterator) -> bytes:
+    """读取异步迭代器的全部内容"""
+    return b"".join([chunk async for chunk in iterator])
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_and_dedup(store, tmp_path):
+    """测试中断后续传，相同内容的第二次上传不占用额外空间"""
+    content = os.urandom(3000)
+    digest = hashlib.sha256(content).hexdigest()
+
+    await store.append("a1", chunks(content[:1000], content[1000:1500]), 0)
+    assert store.received("a1") == 1500
+    # 客户端只确认了前1200字节，从1200继续
+    assert await store.append("a1", chunks(content[1200:]), 1200) == 3000
+    assert store.hash_upload("a1") == digest
+    assert store.place("a1", digest) is True
+
+    await store.append("b2", chunks(content), 0)
+    assert store.place("b2", store.hash_upload("b2")) is False
+    assert store.received("b2") == 0
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 1
+    assert await collect(store.iter_content(digest, 100, 200)) == content[100:200]
+
+    assert store.remove(digest) is True
+    assert not store.exists(digest)
+
+
+def test_names_reject_traversal(store):
+    """测试上传ID和哈希不能构造任意路径"""
+    with pytest.raises(ValueError):
+        store.upload_name("../x")
+    with pytest.raises(ValueError):
+        store.blob_name("../../etc/passwd")
+
+
+@pytest.mark.asyncio
+async def test_stale_uploads(store):
+    """测试按最后写入时间找出过期的上传"""
+    await store.append("old", chunks(b"x"), 0)
+    await store.append("new", chunks(b"y"), 0)
+    path = store.file_manager.resolve_path(store.upload_name("old"))
+    os.utime(path, (path.stat().st_atime - 7200, path.stat().st_mtime - 7200))
+
+    assert store.stale_uploads(3600) == ["old"]
+    assert store.discard_upload("old") is True
+    assert store.discard_upload("old") is False
@@ -0,0 +1,72 @@
+"""
+压缩位图的单元测试
+"""
+import random
+
+import pytest
+
+from core.utils.bitmap import ARRAY_CONTAINER_MAX, RoaringBitmap
+
+
+def test_add_discard_contains():
+    """测试添加、删除和查询元素"""
+    bitmap = RoaringBitmap([5, 1, 70000, 5])
+
+    assert list(bitmap) == [1, 5, 70000]
+    assert len(bitmap) == 3
+    assert 70000 in bitmap and 2 not in bitmap
+
+    bitmap.discard(70000)
+    bitmap.discard(123)
+
+    assert list(bitmap) == [1, 5]
+    with pytest.raises(ValueError):
+        bitmap.add(-1)
+
+
+def test_dense_container_converts_both_ways():
+    """测试元素超过阈值时转换为位图容器，删除后转换回数组"""
+    bitmap = RoaringBitmap(range(ARRAY_CONTAINER_MAX))
+    bitmap.add(ARRAY_CONTAINER_MAX)
+
+    assert isinstance(bitmap._containers[0], int)
+    assert len(bitmap) == ARRAY_CONTAINER_MAX + 1
+
+    bitmap.discard(0)
+
+    assert not isinstance(bitmap._containers[0], int)
+    assert list(bitmap) == list(range(1, ARRAY_CONTAINER_MAX + 1))
+
+
+def test_set_operations():
+    """测试并集、交集和差集"""
+    a = RoaringBitmap([1, 2, 3, 100000])
+    b = RoaringBitmap([3, 4, 200000])
+
+    assert list(a | b) == [1, 2, 3, 4, 100000, 200000]
+    assert list(a & b) == [3]
+    assert list(a - b) == [1, 2, 100000]
+    assert list(a) == [1, 2, 3, 100000]
+
+
+def test_serialization_roundtrip_and_size():
+    """测试序列化后恢复相同的集合，稀疏集合每个元素约2字节"""
+    rng = random.Random(3)
+    values = set(rng.sample(range(300000), 20000)) | set(range(10000))
+    bitmap = RoaringBitmap(values)
+
+    data = bitmap.to_bytes()
+    restored = RoaringBitmap.from_bytes(data)
+
+    assert restored == bitmap
+    assert sorted(values) == list(restored)
+    assert len(RoaringBitmap(range(0, 2000, 2)).to_bytes()) < 2100
+    assert not RoaringBitmap.from_bytes(b"")
+
+
+def test_from_bytes_rejects_truncated_data():
+    """测试数据不完整时抛出ValueError"""
+    data = RoaringBitmap([1, 2, 3]).to_bytes()
+
+    with pytest.raises(ValueError):
+        RoaringBitmap.from_bytes(data[:-2])
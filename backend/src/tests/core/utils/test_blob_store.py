@@ -0,0 +1,58 @@
+"""
+内容寻址压缩存储的单元测试
+"""
+import os
+
+import pytest
+
+from core.utils.blob_store import CODEC_GZIP, CODEC_ZSTD, BlobRef, BlobStore
+from core.utils.file_manager import FileManager
+
+
+@pytest.fixture
+def store(tmp_path):
+    """以临时目录为基础路径、gzip压缩的存储"""
+    return BlobStore(FileManager(str(tmp_path)), codec=CODEC_GZIP)
+
+
+async def collect(iterator) -> bytes:
+    """读取异步迭代器的全部内容"""
+    return b"".join([chunk async for chunk in iterator])
+
+
+@pytest.mark.asyncio
+async def test_put_deduplicates_and_reads_back(store, tmp_path):
+    """测试相同内容只保存一份，读取结果与原内容一致"""
+    content = b"line of pytest output\n" * 5000
+    first = store.put(content)
+    second = store.put(content)
+
+    assert first == second
+    assert first.size == len(content) and first.stored_size < len(content) // 10
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 1
+    assert await store.read(BlobRef.from_dict(first.to_dict())) == content
+
+
+@pytest.mark.asyncio
+async def test_iter_content_range(store):
+    """测试按解压后的偏移量读取一段内容"""
+    content = os.urandom(1000) + bytes(range(256)) * 400
+    ref = store.put(content)
+
+    assert await collect(store.iter_content(ref, start=10, end=20)) == content[10:20]
+    assert await collect(store.iter_content(ref, start=5000, end=90000, chunk_size=512)) == content[5000:90000]
+    assert await collect(store.iter_content(ref, start=len(content) - 3)) == content[-3:]
+    assert await collect(store.iter_content(ref, start=len(content))) == b""
+
+
+@pytest.mark.asyncio
+async def test_zstd_codec(tmp_path):
+    """测试zstd压缩的内容可以与gzip内容共存"""
+    pytest.importorskip("zstandard")
+    file_manager = FileManager(str(tmp_path))
+    content = b"x" * 10000
+    zstd_ref = BlobStore(file_manager, codec=CODEC_ZSTD).put(content)
+    gzip_ref = BlobStore(file_manager, codec=CODEC_GZIP).put(content)
+
+    assert zstd_ref.digest == gzip_ref.digest
+    assert await BlobStore(file_manager, codec=CODEC_GZIP).read(zstd_ref) == content
@@ -0,0 +1,75 @@
+"""
+失败指纹的单元测试
+"""
+from core.utils.failure_fingerprint import fingerprint, normalize_message, normalize_path
+
+PYTHON_TRACE = '''Traceback (most recent call last):
+  File "{root}/tests/test_orders.py", line {line}, in test_create
+    create_order(data)
+  File "{root}/src/orders.py", line 88, in create_order
+    raise ValueError(f"bad order <Order at {address}>")
+ValueError: bad order <Order at {address}> in {tmp}/payload.json
+'''
+
+
+def test_python_trace_ignores_line_numbers_addresses_and_paths():
+    """测试行号、内存地址、检出目录和临时目录不同的堆栈指纹相同"""
+    first = fingerprint("bad order", PYTHON_TRACE.format(
+        root="/home/ci/work/repo", line=12, address="0x7f00ab12", tmp="/tmp/tmpa1b2c3"
+    ))
+    second = fingerprint("bad order", PYTHON_TRACE.format(
+        root="/builds/group/repo", line=19, address="0xdeadbeef", tmp="/tmp/pytest-of-ci/pytest-7"
+    ))
+
+    assert first.digest == second.digest
+    assert first.exception_type == "ValueError"
+    assert first.frames == ("src/orders.py:create_order", "tests/test_orders.py:test_create")
+
+
+def test_different_frames_or_exception_change_digest():
+    """测试失败位置或异常类型不同时指纹不同"""
+    trace = PYTHON_TRACE.format(root="/repo", line=1, address="0x1", tmp="/tmp/x")
+    base = fingerprint(None, trace)
+
+    assert fingerprint(None, trace.replace("create_order", "update_order")).digest != base.digest
+    assert fingerprint(None, trace.replace("ValueError", "KeyError")).digest != base.digest
+
+
+def test_at_frames_and_pytest_output():
+    """测试Java堆栈内层在前，pytest输出从位置行提取异常类型"""
+    java = fingerprint(None, (
+        "java.lang.IllegalStateException: boom\n"
+        "\tat com.example.Orders.create(Orders.java:123)\n"
+        "\tat com.example.Main.main(Main.java:7)"
+    ))
+    assert java.exception_type == "IllegalStateException"
+    assert java.frames == ("com.example.Orders.create(Orders.java)", "com.example.Main.main(Main.java)")
+
+    pytest_output = fingerprint("Test failed", (
+        "    def test_total():\n"
+        ">       assert total() == 2\n"
+        "E       assert 1 == 2\n"
+        "\n"
+        "tests/test_cart.py:5: AssertionError"
+    ))
+    assert pytest_output.exception_type == "AssertionError"
+    assert pytest_output.frames == ("tests/test_cart.py",)
+
+
+def test_message_only_fingerprint():
+    """测试没有堆栈时按归一化后的错误信息计算指纹"""
+    first = fingerprint("Timeout after 30.5s for 123e4567-e89b-12d3-a456-426614174000", None)
+    second = fingerprint("Timeout after 12s for 00000000-0000-0000-0000-000000000000", None)
+
+    assert first.digest == second.digest
+    assert first.message == "Timeout after <n>s for <uuid>"
+    assert fingerprint(None, None) is None
+    assert fingerprint("  ", "") is None
+
+
+def test_normalize_helpers():
+    """测试路径和错误信息的归一化"""
+    assert normalize_path("C:\\Users\\ci\\AppData\\Local\\Temp\\tmp1\\case.py") == "<tmp>/case.py"
+    assert normalize_path("/usr/lib/python3/site-packages/requests/api.py") == "requests/api.py"
+    assert normalize_path("/srv/app/src/orders.py") == "src/orders.py"
+    assert normalize_message("retry 3 of test_2 at 0xABC") == "retry <n> of test_2 at <addr>"
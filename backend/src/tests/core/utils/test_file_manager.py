@@ -0,0 +1,72 @@
+"""
+文件管理器流式读写的单元测试
+"""
+import pytest
+
+from core.utils.file_manager import FileManager
+
+
+async def chunks(*parts: bytes):
+    """把字节块包装为异步迭代器"""
+    for part in parts:
+        yield part
+
+
+async def collect(iterator) -> bytes:
+    """读取异步迭代器的全部内容"""
+    return b"".join([chunk async for chunk in iterator])
+
+
+@pytest.fixture
+def file_manager(tmp_path):
+    """以临时目录为基础路径的文件管理器"""
+    return FileManager(str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_save_stream_and_iter_file(file_manager):
+    """测试流式保存后按范围分块读取"""
+    info = await file_manager.save_stream(chunks(b"01234", b"56789"), "a/b.bin")
+
+    assert info["size"] == 10
+    assert info["hash"] == await file_manager.calculate_hash("a/b.bin")
+    assert await collect(file_manager.iter_file("a/b.bin", chunk_size=3)) == b"0123456789"
+    assert await collect(file_manager.iter_file("a/b.bin", chunk_size=3, start=2, end=9)) == b"2345678"
+
+
+@pytest.mark.asyncio
+async def test_save_stream_max_size(file_manager):
+    """测试超出大小限制时删除已写入的部分"""
+    with pytest.raises(ValueError):
+        await file_manager.save_stream(chunks(b"x" * 8, b"x" * 8), "big.bin", max_size=10)
+
+    assert not file_manager.resolve_path("big.bin").exists()
+
+
+def test_resolve_path_rejects_traversal(file_manager):
+    """测试文件名不能指向基础路径之外"""
+    with pytest.raises(ValueError):
+        file_manager.resolve_path("../outside.txt")
+
+
+def test_write_atomic(file_manager):
+    """测试同步原子写入，不覆盖时保留已有文件"""
+    assert file_manager.write_atomic("a/c.bin", b"first") is True
+    assert file_manager.write_atomic("a/c.bin", b"second", overwrite=False) is False
+    assert file_manager.resolve_path("a/c.bin").read_bytes() == b"first"
+    assert file_manager.write_atomic("a/c.bin", b"second") is True
+    assert file_manager.resolve_path("a/c.bin").read_bytes() == b"second"
+    assert [path.name for path in file_manager.resolve_path("a").iterdir()] == ["c.bin"]
+
+
+@pytest.mark.asyncio
+async def test_append_stream_resumes(file_manager):
+    """测试从指定偏移量续写，偏移量之后的内容被截断"""
+    assert await file_manager.append_stream(chunks(b"01234", b"567"), "up.part", 0) == 8
+    assert await file_manager.append_stream(chunks(b"x89"), "up.part", 7) == 10
+    assert file_manager.resolve_path("up.part").read_bytes() == b"0123456x89"
+
+    with pytest.raises(ValueError):
+        await file_manager.append_stream(chunks(b"z"), "up.part", 11)
+    with pytest.raises(ValueError):
+        await file_manager.append_stream(chunks(b"z" * 10), "up.part", 10, max_size=12)
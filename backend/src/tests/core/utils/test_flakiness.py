@@ -0,0 +1,57 @@
+"""
+测试用例不稳定度的单元测试
+"""
+import random
+
+from core.utils.flakiness import MIN_SAMPLES, FlakinessWindow
+
+
+def recount(history):
+    """按完整历史重新计算失败数和翻转数"""
+    return sum(history), sum(1 for a, b in zip(history, history[1:]) if a != b)
+
+
+def test_incremental_update_matches_recount():
+    """测试增量更新与按窗口重新计算的结果一致"""
+    rng = random.Random(11)
+    window = FlakinessWindow(window=16)
+    history = []
+    for _ in range(500):
+        failed = rng.random() < 0.3
+        window.push(failed)
+        history = (history + [failed])[-16:]
+
+        assert window.history() == history
+        assert (window.failures, window.transitions) == recount(history)
+
+
+def test_flip_rate_distinguishes_flaky_from_broken():
+    """测试稳定失败的翻转率为0，交替失败的翻转率为1"""
+    broken, flaky = FlakinessWindow(), FlakinessWindow()
+    for i in range(10):
+        broken.push(True)
+        flaky.push(i % 2 == 0)
+
+    assert broken.flip_rate == 0 and broken.failure_rate == 1
+    assert flaky.flip_rate == 1 and flaky.failure_rate == 0.5
+
+
+def test_quarantine_hysteresis():
+    """测试达到阈值后隔离，翻转率降到退出阈值以下才解除"""
+    window = FlakinessWindow(window=20)
+    for i in range(MIN_SAMPLES - 1):
+        window.push(i % 2 == 0)
+    assert window.quarantine(False) is False
+
+    window.push(True)
+    assert window.quarantine(False) is True
+
+    while window.flip_rate >= 0.3:
+        window.push(False)
+    assert window.flip_rate >= 0.1
+    assert window.quarantine(True) is True
+    assert window.quarantine(False) is False
+
+    for _ in range(window.window):
+        window.push(False)
+    assert window.quarantine(True) is False
@@ -0,0 +1,72 @@
+"""
+JSON Patch工具的单元测试
+"""
+import random
+
+import pytest
+
+from core.utils.json_patch import apply_patch, make_patch
+
+
+def random_document(rng: random.Random, depth: int = 0):
+    """生成随机的JSON文档"""
+    kind = rng.choice(["dict", "list", "scalar"] if depth < 3 else ["scalar"])
+    if kind == "dict":
+        return {rng.choice("ab/~c"): random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    if kind == "list":
+        return [random_document(rng, depth + 1) for _ in range(rng.randint(0, 5))]
+    return rng.choice([None, True, False, 0, 1, 1.0, "x", "步骤", ""])
+
+
+def test_identical_documents():
+    """测试相同文档的补丁为空"""
+    assert make_patch({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]}) == []
+
+
+def test_insert_step_in_middle():
+    """测试在步骤中间插入一项只生成一个add操作"""
+    steps = [{"step": f"s{i}", "expected": f"e{i}"} for i in range(20)]
+    changed = steps[:10] + [{"step": "new", "expected": "ok"}] + steps[10:]
+
+    patch = make_patch({"steps": steps}, {"steps": changed})
+
+    assert patch == [{"op": "add", "path": "/steps/10", "value": {"step": "new", "expected": "ok"}}]
+
+
+def test_type_change_is_replace():
+    """测试True与1视为不同的值"""
+    assert make_patch({"a": 1}, {"a": True}) == [{"op": "replace", "path": "/a", "value": True}]
+
+
+def test_pointer_escaping():
+    """测试键中的/和~被转义"""
+    patch = make_patch({}, {"a/b": 1, "c~d": 2})
+
+    assert [operation["path"] for operation in patch] == ["/a~1b", "/c~0d"]
+    assert apply_patch({}, patch) == {"a/b": 1, "c~d": 2}
+
+
+def test_apply_does_not_modify_source():
+    """测试默认不修改原文档"""
+    source = {"steps": [1, 2, 3]}
+    apply_patch(source, make_patch(source, {"steps": [1, 3]}))
+
+    assert source == {"steps": [1, 2, 3]}
+
+
+def test_invalid_path():
+    """测试补丁路径不存在时报错"""
+    with pytest.raises(ValueError):
+        apply_patch({"a": []}, [{"op": "remove", "path": "/a/0"}])
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_round_trip(seed):
+    """测试随机文档的补丁应用后与目标一致"""
+    rng = random.Random(seed)
+    source, target = random_document(rng), random_document(rng)
+
+    result = apply_patch(source, make_patch(source, target))
+
+    assert result == target
+    assert make_patch(result, target) == []
@@ -0,0 +1,157 @@
+"""
+可强制终止的进程池和测试用例执行器的单元测试
+"""
+import os
+import time
+
+import pytest
+
+from core.utils.case_runner import pytest_args_from_options, run_pytest_case
+from core.utils.process_pool import KillablePool
+from core.utils.shard_scheduler import WorkStealingScheduler
+
+
+def square(value):
+    """正常返回的任务"""
+    return value * value
+
+
+def fail_until_marker(path):
+    """第一次执行时创建标记文件并失败，之后成功"""
+    if not os.path.exists(path):
+        open(path, "w").close()
+        raise RuntimeError("first attempt fails")
+    return "ok"
+
+
+def sleep_or_return(seconds):
+    """按参数睡眠，用于触发超时"""
+    time.sleep(seconds)
+    return seconds
+
+
+def worker_pid(_):
+    """返回执行任务的工作进程号"""
+    return os.getpid()
+
+
+def crash(code):
+    """直接退出工作进程"""
+    os._exit(code)
+
+
+def make_pool(func, **kwargs):
+    """测试函数定义在测试模块中，使用fork启动工作进程"""
+    return KillablePool(func, start_method="fork", **kwargs)
+
+
+def test_imap_unordered_returns_all_results():
+    """测试全部任务的结果都被返回"""
+    outcomes = list(make_pool(square, workers=3).imap_unordered((i, i) for i in range(20)))
+
+    assert sorted((o.key, o.result) for o in outcomes) == [(i, i * i) for i in range(20)]
+    assert all(o.ok and o.attempts == 1 for o in outcomes)
+
+
+def test_exception_is_reported_with_traceback():
+    """测试任务抛出异常时返回错误信息，不影响其他任务"""
+    outcomes = {o.key: o for o in make_pool(int, workers=2).imap_unordered([("a", "x"), ("b", "7")])}
+
+    assert not outcomes["a"].ok
+    assert "ValueError" in outcomes["a"].error
+    assert outcomes["b"].result == 7
+
+
+def test_retry_with_backoff(tmp_path):
+    """测试失败的任务在退避后重试"""
+    pool = make_pool(fail_until_marker, workers=1, retry_times=2, retry_interval=0.2)
+    started = time.monotonic()
+    [outcome] = list(pool.imap_unordered([("t", str(tmp_path / "marker"))]))
+
+    assert outcome.ok and outcome.result == "ok"
+    assert outcome.attempts == 2
+    assert time.monotonic() - started >= 0.2
+    assert pool.retry_delay(1) == 0.2
+    assert pool.retry_delay(3) == 0.8
+
+
+def test_timeout_kills_worker_and_pool_continues():
+    """测试超时任务的工作进程被终止，其余任务由补位进程继续执行"""
+    pool = make_pool(sleep_or_return, workers=1, timeout=0.5)
+    started = time.monotonic()
+    outcomes = {o.key: o for o in pool.imap_unordered([("slow", 30), ("fast", 0)])}
+
+    assert time.monotonic() - started < 10
+    assert outcomes["slow"].timed_out
+    assert "Timed out" in outcomes["slow"].error
+    assert outcomes["fast"].ok and outcomes["fast"].result == 0
+
+
+def test_worker_crash_is_reported_and_replaced():
+    """测试工作进程意外退出时记为失败并补位"""
+    outcomes = [o for o in make_pool(crash, workers=1, retry_times=1).imap_unordered([("c", 3)])]
+
+    assert len(outcomes) == 1
+    assert outcomes[0].attempts == 2
+    assert "exit code 3" in outcomes[0].error
+
+
+def test_scheduler_assigns_tasks_by_slot():
+    """测试调度器按工作进程槽位分配任务"""
+    scheduler = WorkStealingScheduler([[0, 2, 4], [1, 3, 5]], [1] * 6, steal=False)
+    outcomes = make_pool(worker_pid, workers=2).imap_unordered([(i, i) for i in range(6)], scheduler)
+    pids = {o.key: o.result for o in outcomes}
+
+    assert pids[0] == pids[2] == pids[4]
+    assert pids[1] == pids[3] == pids[5]
+    assert pids[0] != pids[1]
+
+
+def test_invalid_workers():
+    """测试工作进程数必须大于0"""
+    with pytest.raises(ValueError):
+        KillablePool(square, workers=0)
+
+
+def test_pytest_args_from_options():
+    """测试pytest选项转换为命令行参数"""
+    assert pytest_args_from_options({"verbose": "true", "capture": "no", "strict": "false"}) == [
+        "--verbose", "--capture=no"
+    ]
+
+
+def test_run_pytest_case(tmp_path):
+    """测试按test_data.target执行pytest并映射状态"""
+    test_file = tmp_path / "test_sample.py"
+    test_file.write_text(
+        "import json, os\n"
+        "def test_ok():\n"
+        "    assert json.loads(os.environ['AUTOTEST_CASE_DATA']) == {'user': 'a'}\n"
+        "def test_bad():\n"
+        "    assert False\n"
+    )
+    args = ["-p", "no:cacheprovider", "-q"]
+
+    passed = run_pytest_case({"test_data": {"target": f"{test_file}::test_ok", "user": "a"}, "pytest_args": args})
+    failed = run_pytest_case({"test_data": {"target": f"{test_file}::test_bad"}, "pytest_args": args})
+    missing = run_pytest_case({"test_data": {}})
+
+    assert passed["status"] == "passed"
+    assert failed["status"] == "failed" and "assert False" in failed["output"]
+    assert missing["status"] == "skipped"
+
+
+def test_run_pytest_case_records_touched_files(tmp_path):
+    """测试指定coverage_root时返回用例执行到的源码文件"""
+    (tmp_path / "used.py").write_text("def value():\n    return 1\n")
+    (tmp_path / "unused.py").write_text("def value():\n    return 2\n")
+    (tmp_path / "test_cov.py").write_text("from used import value\ndef test_value():\n    assert value() == 1\n")
+
+    result = run_pytest_case({
+        "test_data": {"target": str(tmp_path / "test_cov.py")},
+        "pytest_args": ["-p", "no:cacheprovider", "-q"],
+        "coverage_root": str(tmp_path)
+    })
+
+    assert result["status"] == "passed"
+    assert result["touched_files"] == ["test_cov.py", "used.py"]
@@ -0,0 +1,103 @@
+"""
+基于历史耗时的分片调度的单元测试
+"""
+import random
+
+import pytest
+
+from core.utils.shard_scheduler import (
+    DurationEstimate,
+    WorkStealingScheduler,
+    compare_schedules,
+    default_estimate,
+    estimate_durations,
+    lpt_partition,
+    partition_makespan,
+    round_robin_partition,
+    simulate_makespan,
+)
+
+
+def test_ewma_mean_and_variance():
+    """测试EWMA均值偏向最近的耗时，方差反映波动"""
+    steady = estimate_durations([("a", 10)] * 5)["a"]
+    estimates = estimate_durations([("b", 10), ("b", 10), ("b", 20), ("c", None)], alpha=0.5)
+
+    assert steady.mean == 10 and steady.variance == 0 and steady.samples == 5
+    assert estimates["b"].mean == 15
+    assert estimates["b"].variance == pytest.approx(25)
+    assert estimates["b"].cost(risk=1) == pytest.approx(20)
+    assert "c" not in estimates
+
+
+def test_cost_has_floor():
+    """测试耗时为0的用例仍有最小成本"""
+    assert DurationEstimate(0).cost() > 0
+
+
+def test_default_estimate_is_median():
+    """测试没有历史的用例使用已知均值的中位数"""
+    estimates = {i: DurationEstimate(mean) for i, mean in enumerate([1, 100, 3])}
+
+    assert default_estimate(estimates).mean == 3
+    assert default_estimate({}, fallback=2).mean == 2
+
+
+def test_lpt_partition_balances_load():
+    """测试LPT装箱的总耗时优于轮询分片"""
+    costs = [10, 1, 10, 1, 1, 1, 1, 1]
+
+    lpt = lpt_partition(costs, 2)
+
+    assert sorted(i for shard in lpt for i in shard) == list(range(len(costs)))
+    assert partition_makespan(lpt, costs) == 13
+    assert partition_makespan(round_robin_partition(len(costs), 2), costs) == 22
+    assert lpt[0][0] == 0 and lpt[1][0] == 2
+
+
+def test_invalid_shards():
+    """测试分片数必须大于0"""
+    with pytest.raises(ValueError):
+        lpt_partition([1], 0)
+
+
+def test_work_stealing_takes_from_most_loaded_tail():
+    """测试自己的分片为空时从剩余负载最大的分片尾部窃取"""
+    costs = [5, 1, 2, 8, 3]
+    scheduler = WorkStealingScheduler([[0], [3, 4, 2, 1]], costs)
+
+    assert scheduler.take(0) == 0
+    assert scheduler.take(0) == 1
+    assert scheduler.take(1) == 3
+    assert scheduler.stolen == 1
+    assert len(scheduler) == 2
+
+    static = WorkStealingScheduler([[0], [1]], costs, steal=False)
+    static.take(0)
+    assert static.take(0) is None
+
+
+def test_stealing_recovers_from_bad_estimates():
+    """测试估计严重偏差时，工作窃取使总耗时接近下界"""
+    estimated = [1.0] * 40
+    actual = [30.0] + [1.0] * 39
+    partition = lpt_partition(estimated, 4)
+
+    static = simulate_makespan(WorkStealingScheduler(partition, estimated, steal=False), actual)
+    stealing = simulate_makespan(WorkStealingScheduler(partition, estimated), actual)
+
+    assert static == 39
+    assert stealing == 30
+
+
+def test_compare_schedules_saving():
+    """测试在长尾耗时分布下LPT加窃取比轮询分片节省时间"""
+    rng = random.Random(7)
+    actual = [rng.lognormvariate(0, 1.2) for _ in range(500)]
+    estimated = [duration * rng.uniform(0.8, 1.25) for duration in actual]
+
+    result = compare_schedules(estimated, actual, 8)
+
+    assert result["lpt_stealing"] <= result["lpt"] <= result["round_robin"]
+    assert result["lpt_stealing"] <= result["lower_bound"] * 1.05
+    assert result["saving"] > 0
@@ -0,0 +1,51 @@
+"""
+按时间分桶降采样的单元测试
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from core.utils.time_buckets import bucket_count, bucket_start, choose_bucket_width, downsample
+
+
+def test_week_buckets_start_on_monday():
+    """测试周桶从周一开始"""
+    assert bucket_start(date(2024, 1, 3), 7) == date(2024, 1, 1)
+    assert bucket_start(date(2024, 1, 1), 7) == date(2024, 1, 1)
+    assert bucket_start(date(2024, 1, 7), 7) == date(2024, 1, 1)
+    assert bucket_start(date(2024, 1, 3), 1) == date(2024, 1, 3)
+
+
+def test_choose_bucket_width():
+    """测试自动选择间隔，桶数超过上限时加宽"""
+    first = date(2024, 1, 1)
+
+    assert choose_bucket_width(first, first + timedelta(days=29), 30) == ("day", 1)
+    assert choose_bucket_width(first, first + timedelta(days=30), 30) == ("week", 7)
+    assert choose_bucket_width(first, first + timedelta(days=29), 10, "day") == ("day", 3)
+
+    for days in (1, 50, 364, 1000):
+        for max_points in (1, 7, 30, 90):
+            last = first + timedelta(days=days)
+            interval, width = choose_bucket_width(first + timedelta(days=3), last, max_points)
+            assert width % (1 if interval == "day" else 7) == 0
+            assert bucket_count(first + timedelta(days=3), last, width) <= max_points
+
+    with pytest.raises(ValueError):
+        choose_bucket_width(first, first, 10, "month")
+
+
+def test_downsample_sums_counts_per_bucket():
+    """测试同一桶的计数相加，空桶不输出"""
+    rows = [
+        (date(2024, 1, 9), {"runs": 1, "passed": 3}),
+        (date(2024, 1, 1), {"runs": 2, "passed": 5}),
+        (date(2024, 1, 3), {"runs": 1, "passed": None}),
+        (date(2024, 1, 29), {"runs": 4, "passed": 1}),
+    ]
+
+    assert downsample(rows, 7) == [
+        (date(2024, 1, 1), {"runs": 3, "passed": 5}),
+        (date(2024, 1, 8), {"runs": 1, "passed": 3}),
+        (date(2024, 1, 29), {"runs": 4, "passed": 1}),
+    ]